@@ -0,0 +1,62 @@
+"""AST memory size and evaluation speed of the typed __slots__ nodes.
+
+Memory is compared against the equivalent dict AST (Node.to_dict()), which is
+the representation the parser produced before the typed nodes.
+
+Usage: python benchmarks/bench_ast.py [--lines N] [--iterations N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from lexer.regex_tokenizer import RegexTokenizer
+from parser.syntax_analyzer import SyntaxAnalyzer
+from runtime.evaluator import Evaluator
+from runtime.memory_manager import MemoryManager
+
+
+def retained_size(build):
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def parse(source):
+    return SyntaxAnalyzer().parse(RegexTokenizer(source).tokenize())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AST representation benchmark")
+    parser.add_argument('--lines', type=int, default=5000, help='Statements in the memory test script')
+    parser.add_argument('--iterations', type=int, default=50000, help='Loop iterations in the evaluation test')
+    args = parser.parse_args()
+
+    source = ''.join(f'v{i} = v{i} + {i} * 3 - w; if (v{i} > 10) {{ print("x", v{i}); }}\n' for i in range(args.lines))
+    tokens = RegexTokenizer(source).tokenize()
+    nodes, node_size = retained_size(lambda: SyntaxAnalyzer().parse(tokens))
+    _, dict_size = retained_size(nodes.to_dict)
+    print(f"AST for {args.lines} lines: nodes {node_size / 1e6:.2f} MB, dicts {dict_size / 1e6:.2f} MB "
+          f"({dict_size / node_size:.1f}x)")
+
+    program = parse(f'i = 0; total = 0;\n'
+                    f'while (i < {args.iterations}) {{ total = total + i * 2; '
+                    f'if (total > 1000) {{ total = total - 1000; }} i = i + 1; }}\n')
+    for label, ast in (('typed nodes', program), ('dict AST (converted on run)', program.to_dict())):
+        evaluator = Evaluator(MemoryManager())
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            evaluator.run(ast)
+            elapsed = time.perf_counter() - start
+        print(f"Evaluate {args.iterations} loop iterations from {label}: {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
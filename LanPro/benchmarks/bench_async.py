@@ -0,0 +1,64 @@
+"""Run many waiting parallel statements on threads and on the asyncio evaluator.
+
+Each of --activities parallel statements sleeps for 1/--rate seconds. The
+thread-based Evaluator runs them on its pool of 10 threads, so they take
+turns; runtime.async_evaluator.AsyncEvaluator runs them all at once as
+coroutines on one thread. The benchmark prints the wall time and the threads
+each evaluator started.
+
+Usage: python benchmarks/bench_async.py [--activities N] [--rate N] [--skip-threads]
+"""
+import argparse
+import io
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from rich.console import Console
+
+from lexer.regex_tokenizer import RegexTokenizer
+from parser.syntax_analyzer import SyntaxAnalyzer
+from runtime.async_evaluator import AsyncEvaluator
+from runtime.evaluator import Evaluator
+from runtime.memory_manager import MemoryManager
+from semantic.scope_resolver import ScopeResolver
+
+
+def run(evaluator_class, activities, rate):
+    memory_manager = MemoryManager()
+    evaluator = evaluator_class(memory_manager)
+    evaluator.console = Console(file=io.StringIO())
+    source = (f'function wait(n) {{ sleep(1 / {rate}); return n; }}'
+              f' for (i in range({activities})) {{ parallel {{ x = wait(i); }} }}')
+    program = SyntaxAnalyzer().parse(RegexTokenizer(source).tokenize())
+    ScopeResolver(console=evaluator.console).analyze(program)
+    threads = threading.active_count()
+    start = time.perf_counter()
+    evaluator.run(program)
+    started = threading.active_count() - threads
+    evaluator.thread_pool.shutdown(wait=True)  # run() only waits for top-level parallel statements
+    return time.perf_counter() - start, started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Asyncio evaluator benchmark")
+    parser.add_argument('--activities', type=int, default=1000, help='Parallel statements started')
+    parser.add_argument('--rate', type=int, default=20, help='Each statement sleeps 1/rate seconds')
+    parser.add_argument('--skip-threads', action='store_true', help='Only run the asyncio evaluator')
+    args = parser.parse_args()
+
+    print(f"{args.activities} parallel statements sleeping {1000 / args.rate:.0f}ms each")
+    print(f"{'evaluator':<10} {'time':>8} {'threads':>8}")
+    evaluators = [('asyncio', AsyncEvaluator)]
+    if not args.skip_threads:
+        evaluators.insert(0, ('threads', Evaluator))
+    for name, evaluator_class in evaluators:
+        elapsed, threads = run(evaluator_class, args.activities, args.rate)
+        print(f"{name:<10} {elapsed:>7.2f}s {threads:>8}")
+
+
+if __name__ == "__main__":
+    main()
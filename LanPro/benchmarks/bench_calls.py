@@ -0,0 +1,85 @@
+"""Function call overhead: recursive fib and calls made inside a loop.
+
+Each workload runs with few and with many unrelated globals, once through the
+MemoryManager call-frame stack (SemanticAnalyzer) and once through resolved
+slot frames (ScopeResolver). Call cost should not grow with the global count.
+
+Usage: python benchmarks/bench_calls.py [--fib N] [--calls N] [--globals N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from rich.console import Console
+
+from lexer.regex_tokenizer import RegexTokenizer
+from parser.syntax_analyzer import SyntaxAnalyzer
+from runtime.evaluator import Evaluator
+from runtime.memory_manager import MemoryManager
+from semantic.scope_resolver import ScopeResolver
+from semantic.semantic_analyzer import SemanticAnalyzer
+
+FIB = '''
+function fib(n) {{
+    if (n < 2) {{
+        return n;
+    }}
+    return fib(n - 1) + fib(n - 2);
+}}
+result = fib({n});
+'''
+
+LOOP = '''
+function add(a, b) {{
+    return a + b;
+}}
+i = 0;
+result = 0;
+while (i < {n}) {{
+    result = add(result, i);
+    i = i + 1;
+}}
+'''
+
+
+def run(setup, source, analyzer_class):
+    """Run setup untimed, then time source in the same interpreter."""
+    evaluator = Evaluator(MemoryManager())
+    evaluator.console = Console(file=io.StringIO())
+    analyzer = analyzer_class()
+    programs = []
+    for code in (setup, source):
+        program = SyntaxAnalyzer().parse(RegexTokenizer(code).tokenize())
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyzer.analyze(program)
+        programs.append(program)
+    evaluator.run(programs[0])
+    start = time.perf_counter()
+    evaluator.run(programs[1])
+    return time.perf_counter() - start, evaluator.memory_manager.get('result')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Function call benchmark")
+    parser.add_argument('--fib', type=int, default=18, help='Argument of the recursive fib call')
+    parser.add_argument('--calls', type=int, default=20000, help='Calls made inside the loop')
+    parser.add_argument('--globals', type=int, default=2000, help='Unrelated globals for the "many globals" runs')
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+    for title, template, n in (('fib', FIB, args.fib), ('calls in a loop', LOOP, args.calls)):
+        print(f"{title} ({n}):")
+        for global_count in (0, args.globals):
+            setup = ''.join(f'g{i} = {i};\n' for i in range(global_count))
+            for label, analyzer_class in (('frame stack', SemanticAnalyzer), ('slot frames', ScopeResolver)):
+                elapsed, result = run(setup, template.format(n=n), analyzer_class)
+                print(f"  {global_count:>5} globals, {label}: {elapsed:.3f}s (result {result})")
+
+
+if __name__ == "__main__":
+    main()
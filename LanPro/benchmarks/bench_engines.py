@@ -0,0 +1,128 @@
+"""Run loop-heavy scripts on every execution engine and compare their times.
+
+Usage: python benchmarks/bench_engines.py [--scale N] [--engines tree,vm] [--typed]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from rich.console import Console
+
+from lexer.regex_tokenizer import RegexTokenizer
+from parser.syntax_analyzer import SyntaxAnalyzer
+from runtime.engines import ENGINES, create_engine
+from runtime.memory_manager import MemoryManager
+from semantic.scope_resolver import ScopeResolver
+from semantic.type_inference import TypeInference
+
+WORKLOADS = {
+    'global while loop': '''
+i = 0;
+total = 0;
+while (i < {n}) {{
+    total = total + i;
+    i = i + 1;
+}}
+print(total);
+''',
+    'loop in a function': '''
+function sum_to(n) {{
+    i = 0;
+    total = 0;
+    while (i < n) {{
+        total = total + i;
+        i = i + 1;
+    }}
+    return total;
+}}
+print(sum_to({n}));
+''',
+    'recursive fib': '''
+function fib(n) {{
+    if (n < 2) {{
+        return n;
+    }}
+    return fib(n - 1) + fib(n - 2);
+}}
+print(fib({fib}));
+''',
+    'nested loops with calls': '''
+function cell(r, c) {{
+    return r * c;
+}}
+rows = 0;
+acc = 0;
+while (rows < {side}) {{
+    column = 0;
+    while (column < {side}) {{
+        acc = acc + cell(rows, column);
+        column = column + 1;
+    }}
+    rows = rows + 1;
+}}
+print(acc);
+''',
+    'method calls and fields': '''
+class Accumulator {{
+    reset() {{
+        self.total = 0;
+    }}
+    add(x) {{
+        self.total = self.total + x;
+    }}
+}}
+acc = new Accumulator();
+acc.reset();
+i = 0;
+while (i < {n}) {{
+    acc.add(i);
+    i = i + 1;
+}}
+print(acc.total);
+''',
+}
+
+
+def run(source, engine, typed=False):
+    printed = []
+    memory_manager = MemoryManager()
+    memory_manager.allocate('print', lambda *args: printed.append(args))
+    evaluator = create_engine(engine, memory_manager)
+    evaluator.console = Console(file=io.StringIO())
+    program = SyntaxAnalyzer().parse(RegexTokenizer(source).tokenize())
+    ScopeResolver(console=evaluator.console).analyze(program)
+    if typed:
+        TypeInference().check(program)
+    start = time.perf_counter()
+    evaluator.run(program)
+    return time.perf_counter() - start, printed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Execution engine benchmark")
+    parser.add_argument('--scale', type=int, default=50000, help='Iterations of the loop workloads')
+    parser.add_argument('--engines', default=','.join(ENGINES), help='Comma-separated engines to compare')
+    parser.add_argument('--typed', action='store_true', help='Also time each engine on the type-annotated program')
+    args = parser.parse_args()
+    engines = args.engines.split(',')
+    sizes = {'n': args.scale, 'fib': 18, 'side': int(args.scale ** 0.5)}
+
+    for title, template in WORKLOADS.items():
+        source = template.format(**sizes)
+        baseline = None
+        print(f"{title}:")
+        for engine in engines:
+            elapsed, printed = run(source, engine)
+            baseline = baseline or elapsed
+            print(f"  {engine:<9} {elapsed:.3f}s ({baseline / elapsed:.2f}x) -> {printed[-1][0]}")
+            if args.typed:
+                elapsed, printed = run(source, engine, typed=True)
+                print(f"  {engine + '+T':<9} {elapsed:.3f}s ({baseline / elapsed:.2f}x) -> {printed[-1][0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Compare for loops over range() with loops over a list literal of the same values.
+
+Each program is timed, then run again under tracemalloc for its peak memory.
+
+Usage: python benchmarks/bench_iteration.py [--count N] [--engines tree,vm]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from rich.console import Console
+
+from lexer.regex_tokenizer import RegexTokenizer
+from parser.syntax_analyzer import SyntaxAnalyzer
+from runtime.engines import ENGINES, create_engine
+from runtime.memory_manager import MemoryManager
+from semantic.scope_resolver import ScopeResolver
+
+WORKLOADS = {
+    'list literal': '''
+total = 0;
+for (x in [{values}]) {{
+    total = total + x;
+}}
+print(total);
+''',
+    'range()': '''
+total = 0;
+for (x in range({count})) {{
+    total = total + x;
+}}
+print(total);
+''',
+}
+
+
+def run(source, engine, traced=False):
+    printed = []
+    memory_manager = MemoryManager()
+    memory_manager.allocate('print', lambda *args: printed.append(args))
+    evaluator = create_engine(engine, memory_manager)
+    evaluator.console = Console(file=io.StringIO())
+    program = SyntaxAnalyzer().parse(RegexTokenizer(source).tokenize())
+    ScopeResolver(console=evaluator.console).analyze(program)
+    if not traced:
+        start = time.perf_counter()
+        evaluator.run(program)
+        return time.perf_counter() - start, printed[-1][0]
+    tracemalloc.start()
+    try:
+        evaluator.run(program)
+        return tracemalloc.get_traced_memory()[1], printed[-1][0]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Iteration benchmark")
+    parser.add_argument('--count', type=int, default=100000, help='Values each loop walks through')
+    parser.add_argument('--engines', default=','.join(ENGINES), help='Comma-separated engines to compare')
+    args = parser.parse_args()
+
+    values = ', '.join(map(str, range(args.count)))
+
+    for title, template in WORKLOADS.items():
+        print(f"{title} ({args.count} values):")
+        for engine in args.engines.split(','):
+            source = template.format(count=args.count, values=values)
+            elapsed, result = run(source, engine)
+            peak, _ = run(source, engine, traced=True)
+            print(f"  {engine:<8} {elapsed:.3f}s, peak {peak / 1024:.0f} KB -> {result}")
+
+
+if __name__ == "__main__":
+    main()
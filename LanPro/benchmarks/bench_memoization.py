@@ -0,0 +1,77 @@
+"""Time recursive functions with and without `memoized` on every execution engine.
+
+Usage: python benchmarks/bench_memoization.py [--fib N] [--engines tree,vm]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from rich.console import Console
+
+from lexer.regex_tokenizer import RegexTokenizer
+from parser.syntax_analyzer import SyntaxAnalyzer
+from runtime.engines import ENGINES, create_engine
+from runtime.memoization import memo_report
+from runtime.memory_manager import MemoryManager
+from semantic.scope_resolver import ScopeResolver
+
+WORKLOADS = {
+    'recursive fib': '''
+{memoized} function fib(n) {{
+    if (n < 2) {{
+        return n;
+    }}
+    return fib(n - 1) + fib(n - 2);
+}}
+print(fib({fib}));
+''',
+    'grid paths': '''
+{memoized} function paths(rows, columns) {{
+    if (rows == 0) {{
+        return 1;
+    }}
+    if (columns == 0) {{
+        return 1;
+    }}
+    return paths(rows - 1, columns) + paths(rows, columns - 1);
+}}
+print(paths({side}, {side}));
+''',
+}
+
+
+def run(source, engine):
+    printed = []
+    memory_manager = MemoryManager()
+    memory_manager.allocate('print', lambda *args: printed.append(args))
+    evaluator = create_engine(engine, memory_manager)
+    evaluator.console = Console(file=io.StringIO())
+    program = SyntaxAnalyzer().parse(RegexTokenizer(source).tokenize())
+    ScopeResolver(console=evaluator.console).analyze(program)
+    start = time.perf_counter()
+    evaluator.run(program)
+    return time.perf_counter() - start, printed, evaluator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoization benchmark")
+    parser.add_argument('--fib', type=int, default=20, help='Argument of the fib workload')
+    parser.add_argument('--engines', default=','.join(ENGINES), help='Comma-separated engines to compare')
+    args = parser.parse_args()
+    sizes = {'fib': args.fib, 'side': args.fib // 3}
+
+    for title, template in WORKLOADS.items():
+        print(f"{title}:")
+        for engine in args.engines.split(','):
+            plain, printed, _ = run(template.format(memoized='', **sizes), engine)
+            memoized, _, evaluator = run(template.format(memoized='memoized', **sizes), engine)
+            print(f"  {engine:<8} {plain:.3f}s plain, {memoized:.4f}s memoized ({plain / memoized:.0f}x) -> {printed[-1][0]}")
+        print(memo_report(evaluator.memoized.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Measure MemoryManager throughput as the number of task threads grows.
+
+Every thread runs one task that reads and assigns a global of its own and a
+global shared by all of them, committing every --batch assignments. The main
+thread keeps assigning the shared global meanwhile, so the stripe locks are
+contended. Threads share one interpreter lock, so on CPython the total should
+stay roughly flat as threads are added rather than collapse; it is checked
+that no reference count is lost.
+
+Usage: python benchmarks/bench_memory_threads.py [--ops N] [--threads 1,2,4,8] [--batch N]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from runtime.memory_manager import MemoryManager
+
+
+def task_body(memory_manager, index, ops, batch):
+    own = f'v{index}'
+    task = memory_manager.enter_task()
+    try:
+        for n in range(ops):
+            memory_manager.allocate(own, memory_manager.get('shared') + n)
+            memory_manager.allocate('shared', n)
+            if n % batch == 0:
+                task.commit()
+        task.commit()
+    finally:
+        memory_manager.leave_task()
+
+
+def run(threads, ops, batch):
+    """Returns the seconds taken and whether every reference count added up."""
+    memory_manager = MemoryManager()
+    memory_manager.allocate('shared', 0)
+    workers = [threading.Thread(target=task_body, args=(memory_manager, index, ops, batch)) for index in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        memory_manager.start_task()
+        worker.start()
+    main_writes = 0
+    while memory_manager.active_tasks:
+        memory_manager.allocate('shared', main_writes)
+        main_writes += 1
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    counts_ok = (memory_manager.variables['shared']['ref_count'] == 1 + threads * ops + main_writes
+                 and all(memory_manager.variables[f'v{index}']['ref_count'] == ops for index in range(threads)))
+    return elapsed, threads * ops * 3, counts_ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MemoryManager thread throughput benchmark")
+    parser.add_argument('--ops', type=int, default=50000, help='Loop iterations per thread')
+    parser.add_argument('--threads', default='1,2,4,8', help='Comma-separated thread counts')
+    parser.add_argument('--batch', type=int, default=100, help='Assignments between commits')
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores; {args.ops} iterations (3 operations each) per thread,"
+          f" commit every {args.batch}")
+    for threads in map(int, args.threads.split(',')):
+        elapsed, operations, counts_ok = run(threads, args.ops, args.batch)
+        print(f"  {threads:>3} threads: {operations / elapsed / 1e6:6.2f}M ops/s"
+              f" ({elapsed:.3f}s){'' if counts_ok else '  REFERENCE COUNTS LOST'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Time a CPU-bound parallel block on the thread and process backends against the same statements run one after another.
+
+The block runs one call of a summing loop per worker. Threads share one
+interpreter lock, so they are not expected to beat the serial run; worker
+processes are.
+
+Usage: python benchmarks/bench_parallel.py [--workers N] [--work N] [--engines tree,vm]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from rich.console import Console
+
+from lexer.regex_tokenizer import RegexTokenizer
+from parser.syntax_analyzer import SyntaxAnalyzer
+from runtime.engines import ENGINES, create_engine
+from runtime.memory_manager import MemoryManager
+from runtime.parallel import ProcessBackend
+from semantic.scope_resolver import ScopeResolver
+
+TEMPLATE = '''
+function work(n) {{
+    t = 0;
+    i = 0;
+    while (i < n) {{
+        t = t + i;
+        i = i + 1;
+    }}
+    return t;
+}}
+{block}
+'''
+
+
+def run(source, engine, process_backend):
+    memory_manager = MemoryManager()
+    evaluator = create_engine(engine, memory_manager)
+    evaluator.console = Console(file=io.StringIO())
+    evaluator.process_backend = process_backend
+    program = SyntaxAnalyzer().parse(RegexTokenizer(source).tokenize())
+    ScopeResolver(console=evaluator.console).analyze(program)
+    start = time.perf_counter()
+    evaluator.run(program)
+    return time.perf_counter() - start, memory_manager.get('r0')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel block backend benchmark")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Statements in the block, and worker processes')
+    parser.add_argument('--work', type=int, default=200000, help='Loop iterations per statement')
+    parser.add_argument('--engines', default=','.join(ENGINES), help='Comma-separated engines to compare')
+    args = parser.parse_args()
+    statements = '\n'.join(f'    r{index} = work({args.work});' for index in range(args.workers))
+    serial = TEMPLATE.format(block=statements)
+    parallel = TEMPLATE.format(block=f'parallel {{\n{statements}\n}}')
+
+    backend = ProcessBackend(args.workers)
+    run('parallel { r0 = 1; }', 'tree', backend)  # Wait for the workers to start
+    print(f"{args.workers} statements of {args.work} iterations each:")
+    for engine in args.engines.split(','):
+        one_by_one, result = run(serial, engine, None)
+        threads, _ = run(parallel, engine, None)
+        processes, _ = run(parallel, engine, backend)
+        print(f"  {engine:<8} serial {one_by_one:.3f}s, threads {threads:.3f}s ({one_by_one / threads:.1f}x),"
+              f" processes {processes:.3f}s ({one_by_one / processes:.1f}x) -> {result}")
+    backend.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Front-end time (tokenize, parse, analyze) versus loading the analyzed program from the .lanc cache.
+
+Usage: python benchmarks/bench_program_cache.py [--lines N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from lexer.regex_tokenizer import RegexTokenizer
+from parser.syntax_analyzer import SyntaxAnalyzer
+from semantic.semantic_analyzer import SemanticAnalyzer
+from utils.program_cache import ProgramCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Program cache benchmark")
+    parser.add_argument('--lines', type=int, default=5000, help='Statements in the generated script')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        script = os.path.join(directory, 'generated.lan')
+        with open(script, 'w') as handle:
+            for i in range(args.lines):
+                handle.write(f'v{i % 50} = {i} * 3 - w; if (v{i % 50} > 10) {{ print("x", v{i % 50}); }}\n')
+
+        cache = ProgramCache()
+        start = time.perf_counter()
+        with open(script) as handle:
+            program = SyntaxAnalyzer().parse(RegexTokenizer(handle).iter_tokens())
+        with contextlib.redirect_stdout(io.StringIO()):
+            SemanticAnalyzer().analyze(program)
+        front_end = time.perf_counter() - start
+
+        with open(script, 'rb') as handle:
+            key = cache.source_key(handle)
+        cache.store(script, key, program)
+        size = os.path.getsize(cache.path_for(script, key))
+
+        start = time.perf_counter()
+        with open(script, 'rb') as handle:
+            loaded = cache.load(script, cache.source_key(handle))
+        hit = time.perf_counter() - start
+
+    print(f"{args.lines} lines, cache entry {size / 1e3:.0f} KB (programs equal: {loaded == program})")
+    print(f"Tokenize + parse + analyze: {front_end:.3f}s")
+    print(f"Hash + cache load:          {hit:.3f}s ({front_end / hit:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
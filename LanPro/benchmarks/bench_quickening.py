@@ -0,0 +1,53 @@
+"""Time the tree-walker with and without quickening on the engine workloads.
+
+Usage: python benchmarks/bench_quickening.py [--scale N] [--repeat N]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from rich.console import Console
+
+from bench_engines import WORKLOADS
+from lexer.regex_tokenizer import RegexTokenizer
+from parser.syntax_analyzer import SyntaxAnalyzer
+from runtime.evaluator import Evaluator
+from runtime.memory_manager import MemoryManager
+from semantic.scope_resolver import ScopeResolver
+
+
+def run(source, quicken, count_runs=False):
+    memory_manager = MemoryManager()
+    memory_manager.allocate('print', lambda *args: None)
+    evaluator = Evaluator(memory_manager)
+    evaluator.console = Console(file=io.StringIO())
+    evaluator.set_quickening(quicken, count_runs)
+    program = SyntaxAnalyzer().parse(RegexTokenizer(source).tokenize())
+    ScopeResolver(console=evaluator.console).analyze(program)
+    start = time.perf_counter()
+    evaluator.run(program)
+    return time.perf_counter() - start, evaluator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quickening benchmark")
+    parser.add_argument('--scale', type=int, default=50000, help='Iterations of the loop workloads')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per configuration; the fastest is reported')
+    args = parser.parse_args()
+    sizes = {'n': args.scale, 'fib': 18, 'side': int(args.scale ** 0.5)}
+
+    for title, template in WORKLOADS.items():
+        source = template.format(**sizes)
+        plain = min(run(source, False)[0] for _ in range(args.repeat))
+        quickened = min(run(source, True)[0] for _ in range(args.repeat))
+        print(f"{title}: {plain:.3f}s plain, {quickened:.3f}s quickened ({plain / quickened:.2f}x)")
+        # A separate run counts hits, since counting slows the specialized nodes down
+        print(run(source, True, count_runs=True)[1].quickening)
+
+
+if __name__ == "__main__":
+    main()
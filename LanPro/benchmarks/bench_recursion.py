@@ -0,0 +1,92 @@
+"""Time deep recursion on every execution engine.
+
+Tail calls that may recurse run in constant stack on every engine; non-tail
+recursion deeper than Python's own limit only works on the VM, which keeps
+its calls on an explicit stack.
+
+Usage: python benchmarks/bench_recursion.py [--depth N] [--engines tree,vm]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from rich.console import Console
+
+from lexer.regex_tokenizer import RegexTokenizer
+from parser.syntax_analyzer import SyntaxAnalyzer
+from runtime.engines import ENGINES, create_engine
+from runtime.memory_manager import MemoryManager
+from semantic.scope_resolver import ScopeResolver
+
+WORKLOADS = {
+    'tail recursion': '''
+function count(n, total) {{
+    if (n == 0) {{
+        return total;
+    }}
+    return count(n - 1, total + n);
+}}
+print(count({depth}, 0));
+''',
+    'mutual recursion': '''
+function even(n) {{
+    if (n == 0) {{
+        return 1 == 1;
+    }}
+    return odd(n - 1);
+}}
+function odd(n) {{
+    if (n == 0) {{
+        return 1 == 2;
+    }}
+    return even(n - 1);
+}}
+print(even({depth}));
+''',
+    'non-tail recursion': '''
+function sum(n) {{
+    if (n == 0) {{
+        return 0;
+    }}
+    return n + sum(n - 1);
+}}
+print(sum({depth}));
+''',
+}
+
+
+def run(source, engine):
+    printed = []
+    memory_manager = MemoryManager()
+    memory_manager.allocate('print', lambda *args: printed.append(args))
+    evaluator = create_engine(engine, memory_manager)
+    evaluator.console = Console(file=io.StringIO())
+    program = SyntaxAnalyzer().parse(RegexTokenizer(source).tokenize())
+    ScopeResolver(console=evaluator.console).analyze(program)
+    start = time.perf_counter()
+    try:
+        evaluator.run(program)
+    except RecursionError:
+        return time.perf_counter() - start, 'RecursionError'
+    return time.perf_counter() - start, printed[-1][0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recursion depth benchmark")
+    parser.add_argument('--depth', type=int, default=50000, help='Depth each workload recurses to')
+    parser.add_argument('--engines', default=','.join(ENGINES), help='Comma-separated engines to compare')
+    args = parser.parse_args()
+
+    for title, template in WORKLOADS.items():
+        print(f"{title} (depth {args.depth}):")
+        for engine in args.engines.split(','):
+            elapsed, result = run(template.format(depth=args.depth), engine)
+            print(f"  {engine:<8} {elapsed:.3f}s -> {result}")
+
+
+if __name__ == "__main__":
+    main()
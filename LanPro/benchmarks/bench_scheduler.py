@@ -0,0 +1,93 @@
+"""Schedule many tasks at once and measure how the scheduler keeps up.
+
+The first part gives the runtime.scheduler.Scheduler --tasks one-shot
+tasks due over one second and reports the threads used and how late the
+tasks ran. The second times a recurring task whose body takes a while, to
+show that runs stay on a fixed rate instead of drifting. The third schedules
+--statements tasks from a LanPro loop.
+
+Usage: python benchmarks/bench_scheduler.py [--tasks N] [--statements N]
+"""
+import argparse
+import io
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from rich.console import Console
+
+from lexer.regex_tokenizer import RegexTokenizer
+from parser.syntax_analyzer import SyntaxAnalyzer
+from runtime.evaluator import Evaluator
+from runtime.memory_manager import MemoryManager
+from runtime.scheduler import Scheduler
+from semantic.scope_resolver import ScopeResolver
+
+
+def many_tasks(count):
+    scheduler = Scheduler()
+    lateness = []
+    threads = threading.active_count()
+    start = time.perf_counter()
+    for index in range(count):
+        due = time.monotonic() + 1 + index / count
+        scheduler.schedule(lambda due=due: lateness.append(time.monotonic() - due), 1 + index / count)
+    scheduled = time.perf_counter() - start
+    while len(lateness) < count:
+        time.sleep(0.01)
+    lateness.sort()
+    print(f"{count} one-shot tasks due over 1s: scheduled in {scheduled:.2f}s,"
+          f" {threading.active_count() - threads} threads")
+    print(f"  lateness: median {lateness[count // 2] * 1000:.1f}ms,"
+          f" 99th percentile {lateness[count * 99 // 100] * 1000:.1f}ms, max {lateness[-1] * 1000:.1f}ms")
+
+
+def fixed_rate(runs, interval, work):
+    scheduler = Scheduler()
+    starts = []
+
+    def body():
+        starts.append(time.monotonic())
+        time.sleep(work)
+
+    task = scheduler.schedule(body, interval, recurring=True)
+    while len(starts) < runs:
+        time.sleep(interval)
+    task.cancel()
+    drift = starts[runs - 1] - starts[0] - (runs - 1) * interval
+    print(f"Recurring task every {interval * 1000:.0f}ms with a {work * 1000:.0f}ms body: drift after {runs} runs"
+          f" {drift * 1000:.1f}ms (sleeping between runs would drift {(runs - 1) * work * 1000:.0f}ms)")
+
+
+def lanpro_tasks(count):
+    memory_manager = MemoryManager()
+    evaluator = Evaluator(memory_manager)
+    evaluator.console = Console(file=io.StringIO())
+    source = f'fired = 0; for (i in range({count})) {{ schedule {{ fired = fired + 1; }} after 1; }}'
+    program = SyntaxAnalyzer().parse(RegexTokenizer(source).tokenize())
+    ScopeResolver(console=evaluator.console).analyze(program)
+    start = time.perf_counter()
+    evaluator.run(program)
+    scheduled = time.perf_counter() - start
+    while evaluator.scheduler.pending() or evaluator.scheduler.ready or memory_manager.active_tasks:
+        time.sleep(0.01)
+    print(f"{count} schedule statements: scheduled in {scheduled:.2f}s, all run {time.perf_counter() - start:.2f}s"
+          f" after the loop started, {len(evaluator.scheduler.threads)} scheduler threads")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scheduler benchmark")
+    parser.add_argument('--tasks', type=int, default=100000, help='One-shot tasks given to the scheduler')
+    parser.add_argument('--statements', type=int, default=10000, help='Tasks scheduled by a LanPro loop')
+    args = parser.parse_args()
+
+    many_tasks(args.tasks)
+    fixed_rate(50, 0.02, 0.005)
+    lanpro_tasks(args.statements)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Variable access through name lookup versus resolved (depth, slot) frames.
+
+Runs a loop over locals inside a function, once analyzed by SemanticAnalyzer
+(every access goes through the MemoryManager by name) and once by ScopeResolver
+(locals live in array-indexed call frames).
+
+Usage: python benchmarks/bench_scopes.py [--iterations N] [--globals N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from rich.console import Console
+
+from lexer.regex_tokenizer import RegexTokenizer
+from parser.syntax_analyzer import SyntaxAnalyzer
+from runtime.evaluator import Evaluator
+from runtime.memory_manager import MemoryManager
+from semantic.scope_resolver import ScopeResolver
+from semantic.semantic_analyzer import SemanticAnalyzer
+
+
+def run(source, analyzer_class):
+    program = SyntaxAnalyzer().parse(RegexTokenizer(source).tokenize())
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer_class().analyze(program)
+    memory_manager = MemoryManager()
+    evaluator = Evaluator(memory_manager)
+    evaluator.console = Console(file=io.StringIO())
+    start = time.perf_counter()
+    evaluator.run(program)
+    elapsed = time.perf_counter() - start
+    return elapsed, memory_manager.get('result')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scope resolution benchmark")
+    parser.add_argument('--iterations', type=int, default=50000, help='Loop iterations inside the function')
+    parser.add_argument('--globals', type=int, default=100, help='Unrelated globals defined before the call')
+    args = parser.parse_args()
+
+    source = ''.join(f'g{i} = {i};\n' for i in range(args.globals))
+    source += f'''
+function work(n) {{
+    i = 0;
+    total = 0;
+    while (i < n) {{
+        total = total + i;
+        i = i + 1;
+    }}
+    total;
+}}
+result = work({args.iterations});
+'''
+    by_name, expected = run(source, SemanticAnalyzer)
+    resolved, result = run(source, ScopeResolver)
+    print(f"{args.iterations} iterations, {args.globals} globals (results equal: {result == expected})")
+    print(f"Name lookup:    {by_name:.3f}s")
+    print(f"Resolved slots: {resolved:.3f}s ({by_name / resolved:.2f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
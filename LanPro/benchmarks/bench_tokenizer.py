@@ -0,0 +1,60 @@
+"""Compare the legacy character-walking Tokenizer with the RegexTokenizer engine.
+
+Usage: python benchmarks/bench_tokenizer.py [--lines N] [--literal-size N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from lexer.tokenizer import Tokenizer
+from lexer.regex_tokenizer import RegexTokenizer
+
+
+def generate_source(lines, literal_size):
+    """Build a synthetic script that resembles our generated workloads."""
+    long_literal = '"' + 'x' * literal_size + '"'
+    chunks = []
+    for i in range(lines):
+        chunks.append(f'value_{i} = {i} + counter * 42;  # running total\n')
+        if i % 10 == 0:
+            chunks.append(f'if (value_{i} >= 100) {{ print("big", value_{i}); }} else {{ label = {long_literal}; }}\n')
+    return ''.join(chunks)
+
+
+def time_engine(engine, source, repeat):
+    best = None
+    tokens = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = engine(source).tokenize()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tokenizer engine benchmark")
+    parser.add_argument('--lines', type=int, default=20000, help='Number of generated source lines')
+    parser.add_argument('--literal-size', type=int, default=2000, help='Length of the long string literals')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per engine (best time is reported)')
+    args = parser.parse_args()
+
+    source = generate_source(args.lines, args.literal_size)
+    print(f"Source: {len(source) / 1e6:.2f} MB, {args.lines} lines")
+
+    legacy_time, legacy_tokens = time_engine(Tokenizer, source, args.repeat)
+    regex_time, regex_tokens = time_engine(RegexTokenizer, source, args.repeat)
+
+    same = [(t.type, t.value, t.position, t.line) for t in legacy_tokens] == \
+        [(t.type, t.value, t.position, t.line) for t in regex_tokens]
+    print(f"Tokens: {len(regex_tokens)} (streams identical: {same})")
+    print(f"Tokenizer:      {legacy_time:.3f}s ({len(legacy_tokens) / legacy_time:,.0f} tokens/s)")
+    print(f"RegexTokenizer: {regex_time:.3f}s ({len(regex_tokens) / regex_time:,.0f} tokens/s)")
+    print(f"Speedup: {legacy_time / regex_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
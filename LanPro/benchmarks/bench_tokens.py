@@ -0,0 +1,76 @@
+"""Memory and speed of the token representations: a Token list versus a TokenBuffer.
+
+Usage: python benchmarks/bench_tokens.py [--lines N]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from lexer.regex_tokenizer import RegexTokenizer
+from lexer.token_buffer import TokenBuffer
+from parser.syntax_analyzer import SyntaxAnalyzer
+
+
+class DictToken:
+    """The pre-__slots__ Token layout, kept here as the baseline."""
+
+    def __init__(self, type, value, position=None, line=None):
+        self.type = type
+        self.value = value
+        self.position = position
+        self.line = line
+
+
+def generate_source(lines):
+    return ''.join(f'total_{i % 100} = total_{i % 100} + {i} * rate; print("row", total_{i % 100});\n' for i in range(lines))
+
+
+def measure(build):
+    """Return (result, seconds, bytes retained) for build()."""
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+    # Memory is measured on a separate run because tracing slows allocation down
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, size
+
+
+def time_parse(tokens):
+    start = time.perf_counter()
+    SyntaxAnalyzer().parse(tokens)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token storage benchmark")
+    parser.add_argument('--lines', type=int, default=20000, help='Number of generated source lines')
+    args = parser.parse_args()
+    source = generate_source(args.lines)
+
+    dict_tokens, dict_time, dict_size = measure(
+        lambda: [DictToken(t.type, t.value, t.position, t.line) for t in RegexTokenizer(source).iter_tokens()])
+    slot_tokens, slot_time, slot_size = measure(lambda: RegexTokenizer(source).tokenize())
+    buffer, buffer_time, buffer_size = measure(lambda: TokenBuffer.from_tokens(RegexTokenizer(source).iter_tokens()))
+    count = len(slot_tokens)
+
+    print(f"{count} tokens from {len(source) / 1e6:.2f} MB of source")
+    print(f"{'form':<22}{'build (s)':>10}{'memory (MB)':>14}{'bytes/token':>13}")
+    for name, elapsed, size in (('Token with __dict__', dict_time, dict_size),
+                                ('Token with __slots__', slot_time, slot_size),
+                                ('TokenBuffer', buffer_time, buffer_size)):
+        print(f"{name:<22}{elapsed:>10.3f}{size / 1e6:>14.2f}{size / count:>13.1f}")
+
+    del dict_tokens
+    print(f"Parse from Token list:  {time_parse(slot_tokens):.3f}s")
+    print(f"Parse from TokenBuffer: {time_parse(buffer):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
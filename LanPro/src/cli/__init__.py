@@ -0,0 +1 @@
+# This file initializes the cli module.
\ No newline at end of file
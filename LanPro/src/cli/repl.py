@@ -0,0 +1,78 @@
+from rich.console import Console
+
+from lexer.regex_tokenizer import RegexTokenizer
+from parser.syntax_analyzer import SyntaxAnalyzer
+from semantic.scope_resolver import ScopeResolver
+from runtime.evaluator import Evaluator
+from runtime.memory_manager import MemoryManager
+from utils.trace import NULL_TRACE
+
+OPENING_BRACKETS = '({['
+CLOSING_BRACKETS = ')}]'
+
+
+class LanProREPL:
+    """A persistent interactive session.
+
+    One parser, semantic analyzer, evaluator and console live for the whole
+    session, so declared variables and functions (and the function objects the
+    evaluator built for them) survive between entries. Input is fed one line
+    at a time; lines are buffered until brackets and strings are balanced, and
+    only that new fragment is parsed, analyzed and run.
+    """
+
+    def __init__(self, evaluator=None, console=None, trace=NULL_TRACE):
+        self.console = console or Console()
+        self.evaluator = evaluator or Evaluator(MemoryManager())
+        self.trace = trace
+        self.parser = SyntaxAnalyzer(trace=trace)
+        self.semantic_analyzer = ScopeResolver(console=self.console)
+        self.pending = []  # Lines of an incomplete entry
+        self.depth = 0
+        self.in_string = False
+
+    def scan_line(self, line):
+        """Update the bracket depth and string state with one more line of input."""
+        for char in line:
+            if self.in_string:
+                if char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == '#':
+                break
+            elif char in OPENING_BRACKETS:
+                self.depth += 1
+            elif char in CLOSING_BRACKETS:
+                self.depth -= 1
+
+    def is_complete(self):
+        return self.depth <= 0 and not self.in_string
+
+    def feed(self, line):
+        """Add a line of input; run the buffered entry once it is complete.
+
+        Returns True if an entry was executed and False if more input is needed.
+        """
+        self.pending.append(line)
+        self.scan_line(line)
+        if not self.is_complete():
+            return False
+        code = '\n'.join(self.pending)
+        self.reset()
+        self.evaluate(code)
+        return True
+
+    def reset(self):
+        """Discard any partially entered input."""
+        self.pending = []
+        self.depth = 0
+        self.in_string = False
+
+    def evaluate(self, code):
+        """Parse, analyze and run one complete fragment; returns the value of its last statement."""
+        tokens = RegexTokenizer(code, trace=self.trace).tokenize()
+        program = self.parser.parse(tokens)
+        # Only the new fragment is analyzed; earlier declarations are already in the analyzer's state
+        self.semantic_analyzer.visit(program)
+        return self.evaluator.run(program)
@@ -0,0 +1,168 @@
+import codecs
+import re
+import sys
+
+from lexer.tokenizer import KEYWORDS, Token
+from utils.trace import NULL_TRACE
+
+# One master pattern for the whole language. The alternatives are tried in the
+# same order as the branches of Tokenizer.tokenize(), so both engines agree on
+# every ambiguous prefix ("null" before identifiers, "=>" before "==", ...).
+def build_pattern(numeric='', digits=''):
+    """Compile the master pattern; the extra classes only matter for non-ASCII sources."""
+    token_spec = [
+        ('WHITESPACE', r'\s+'),
+        ('COMMENT', r'#[^\n]*'),
+        ('NULL', r'null'),
+        ('NAME', rf'[^\W\d_{numeric}]\w*'),
+        ('NUMBER', rf'[\d{digits}]+'),
+        ('STRING', r'"[^"]*"'),
+        ('UNTERMINATED', r'"'),
+        ('OPERATOR', r'=>|[<>=!]=|[=+\-*/(){};<>!\[\],.]'),
+        ('MISMATCH', r'.'),
+    ]
+    return re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in token_spec))
+
+
+MASTER_PATTERN = build_pattern()
+DEFAULT_CHUNK_SIZE = 1 << 16
+_unicode_pattern = None
+
+
+def pattern_for(source):
+    """Return the master pattern that matches str.isalpha()/isdigit() semantics for source."""
+    global _unicode_pattern
+    if source.isascii():
+        return MASTER_PATTERN
+    if _unicode_pattern is None:
+        # \w accepts numeric characters that are not letters (e.g. '²', '½') and \d
+        # rejects digits that are not decimal, unlike the legacy engine's checks
+        characters = [chr(code) for code in range(128, sys.maxunicode + 1)]
+        numeric = ''.join(c for c in characters if c.isnumeric() and not c.isdecimal())
+        digits = ''.join(c for c in characters if c.isdigit() and not c.isdecimal())
+        _unicode_pattern = build_pattern(re.escape(numeric), re.escape(digits))
+    return _unicode_pattern
+
+
+class RegexTokenizer:
+    """Single-pass tokenizer driven by one compiled master pattern.
+
+    Produces the same Token stream as Tokenizer, including position and line
+    data, without walking the source one character at a time. The source may be
+    a string, or a text/binary file object or mmap that is read lazily in
+    chunks by iter_tokens().
+    """
+
+    def __init__(self, source_code, chunk_size=DEFAULT_CHUNK_SIZE, trace=NULL_TRACE):
+        self.source_code = source_code
+        self.chunk_size = chunk_size
+        self.trace = trace
+        self.tokens = []
+        self.position = 0
+        self.line = 1
+
+    def error(self, message):
+        raise Exception(f'Error: {message} at position {self.position}, line {self.line}')
+
+    def tokenize(self):
+        self.tokens.extend(self.iter_tokens())
+        return self.tokens
+
+    def read_chunks(self):
+        """Yield the source as text chunks, decoding bytes from binary files and mmaps."""
+        source = self.source_code
+        if isinstance(source, str):
+            yield source
+            return
+        decoder = None
+        while True:
+            data = source.read(self.chunk_size)
+            if isinstance(data, (bytes, bytearray)):
+                if decoder is None:
+                    decoder = codecs.getincrementaldecoder('utf-8')()
+                text = decoder.decode(data, final=not data)
+            else:
+                text = data
+            if text:
+                yield text
+            if not data:
+                return
+
+    def iter_tokens(self):
+        """Yield tokens on demand; only the unconsumed tail of the source is kept in memory."""
+        tokens = self.scan()
+        if self.trace.enabled:
+            return self.traced(tokens)
+        return tokens
+
+    def traced(self, tokens):
+        for token in tokens:
+            self.trace.emit('lexer', 'token', type=token.type, value=token.value, position=token.position, line=token.line)
+            yield token
+
+    def scan(self):
+        chunks = self.read_chunks()
+        buffer = next(chunks, '')
+        pattern = pattern_for(buffer)
+        eof = isinstance(self.source_code, str)
+        offset = 0  # Absolute position of buffer[0]
+        pos = 0
+        line = 1
+        keywords = KEYWORDS
+        while True:
+            refill = False
+            for match in pattern.finditer(buffer, pos):
+                kind = match.lastgroup
+                start = match.start()
+                if not eof and (match.end() == len(buffer) or kind == 'UNTERMINATED'):
+                    # The token may continue in the next chunk
+                    pos = start
+                    refill = True
+                    break
+                if kind == 'WHITESPACE':
+                    line += match.group().count('\n')
+                elif kind == 'NAME':
+                    value = match.group()
+                    yield Token(keywords.get(value, 'IDENTIFIER'), value, offset + start, line)
+                elif kind == 'OPERATOR':
+                    yield Token('OPERATOR', match.group(), offset + start, line)
+                elif kind == 'NUMBER':
+                    yield Token('NUMBER', int(match.group()), offset + start, line)
+                elif kind == 'STRING':
+                    value = match.group()
+                    yield Token('STRING', value, offset + start, line)
+                    line += value.count('\n')
+                elif kind == 'NULL':
+                    yield Token('NULL', 'null', offset + start, line)
+                elif kind == 'COMMENT':
+                    continue
+                elif kind == 'UNTERMINATED':
+                    # The legacy engine consumes the rest of the source before failing
+                    self.position = offset + len(buffer)
+                    self.line = line + buffer.count('\n', start)
+                    self.error("Unterminated string literal")
+                else:
+                    self.position = offset + start
+                    self.line = line
+                    self.error(f'Invalid character: {match.group()}')
+            if not refill:
+                break
+            # Read at least as much as is pending so long tokens are copied a
+            # logarithmic number of times rather than once per chunk
+            pending = len(buffer) - pos
+            pieces = [buffer[pos:]]
+            size = 0
+            for chunk in chunks:
+                if pattern is MASTER_PATTERN and not chunk.isascii():
+                    pattern = pattern_for(chunk)
+                pieces.append(chunk)
+                size += len(chunk)
+                if size >= pending:
+                    break
+            else:
+                eof = True
+            offset += pos
+            buffer = ''.join(pieces)
+            pos = 0
+        self.position = offset + len(buffer)
+        self.line = line
@@ -0,0 +1,77 @@
+from array import array
+
+from lexer.tokenizer import KEYWORDS, Token
+
+TOKEN_TYPES = ('IDENTIFIER', 'NUMBER', 'STRING', 'OPERATOR', 'NULL') + tuple(KEYWORDS.values())
+TYPE_CODES = {token_type: code for code, token_type in enumerate(TOKEN_TYPES)}
+
+
+class TokenBuffer:
+    """Struct-of-arrays token storage.
+
+    Type code, position and line live in parallel array('i') columns and token
+    values are interned in a shared table, so a token costs a few machine words
+    instead of a Python object. Iterating the buffer yields Token objects on
+    demand, which lets SyntaxAnalyzer.parse() consume it directly.
+    """
+
+    def __init__(self):
+        self.types = array('i')
+        self.values = array('i')  # Index into value_table
+        self.positions = array('i')
+        self.lines = array('i')
+        self.value_table = []
+        self.value_codes = {}
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        buffer = cls()
+        buffer.extend(tokens)
+        return buffer
+
+    def append(self, token):
+        self.add(token.type, token.value, token.position, token.line)
+
+    def extend(self, tokens):
+        for token in tokens:
+            self.add(token.type, token.value, token.position, token.line)
+
+    def add(self, token_type, value, position, line):
+        # Key on the value's type too so that e.g. 1 and "1" never share an entry
+        key = (type(value), value)
+        code = self.value_codes.get(key)
+        if code is None:
+            code = len(self.value_table)
+            self.value_codes[key] = code
+            self.value_table.append(value)
+        self.types.append(TYPE_CODES[token_type])
+        self.values.append(code)
+        self.positions.append(-1 if position is None else position)
+        self.lines.append(-1 if line is None else line)
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        position = self.positions[index]
+        line = self.lines[index]
+        return Token(
+            TOKEN_TYPES[self.types[index]],
+            self.value_table[self.values[index]],
+            None if position < 0 else position,
+            None if line < 0 else line
+        )
+
+    def __iter__(self):
+        value_table = self.value_table
+        for type_code, value_code, position, line in zip(self.types, self.values, self.positions, self.lines):
+            yield Token(
+                TOKEN_TYPES[type_code],
+                value_table[value_code],
+                None if position < 0 else position,
+                None if line < 0 else line
+            )
+
+    def nbytes(self):
+        """Approximate memory held by the columns (excluding the interned values)."""
+        return sum(column.itemsize * len(column) for column in (self.types, self.values, self.positions, self.lines))
@@ -1,7 +1,25 @@
 from tabnanny import verbose
 from rich.console import Console
+from utils.trace import NULL_TRACE
+
+KEYWORDS = {
+    'if': 'IF',
+    'else': 'ELSE',
+    'while': 'WHILE',
+    'for': 'FOR',
+    'class': 'CLASS',
+    'let': 'LET',
+    'new': 'NEW',
+    'in': 'IN',
+    'parallel': 'PARALLEL',
+    'schedule': 'SCHEDULE',
+    'every': 'EVERY',
+    'after': 'AFTER'
+}
 
 class Token:
+    __slots__ = ('type', 'value', 'position', 'line')
+
     def __init__(self, type, value, position=None, line=None):
         self.type = type
         self.value = value
@@ -12,8 +30,9 @@ class Token:
         return f'Token({self.type}, {self.value}, position={self.position}, line={self.line})'
 
 class Tokenizer:
-    def __init__(self, source_code):
+    def __init__(self, source_code, trace=NULL_TRACE):
         self.source_code = source_code
+        self.trace = trace
         self.position = 0
         self.current_char = self.source_code[self.position] if self.source_code else None
         self.tokens = []
@@ -89,33 +108,17 @@ class Tokenizer:
 
     def identifier_or_keyword(self):
         """Handle identifiers and keywords"""
-        keywords = {
-            'if': 'IF',
-            'else': 'ELSE',
-            'while': 'WHILE',
-            'for': 'FOR',
-            'class': 'CLASS',
-            'let': 'LET',
-            'new': 'NEW',
-            'in': 'IN',
-            'parallel': 'PARALLEL',
-            'schedule': 'SCHEDULE',
-            'every': 'EVERY',
-            'after': 'AFTER'
-        }
-        
         result = ''
+        start_position = self.position
+        start_line = self.line
         while self.current_char and (self.current_char.isalnum() or self.current_char == '_'):
             result += self.current_char
             self.advance()
-            
-        # if hasattr(self, 'verbose') and self.verbose:
-        print(f"Tokenizing identifier/keyword: '{result}'")
-        
-        if result in keywords:
-            print(f"Recognized as keyword: {keywords[result]}")  # Debug output
-            return Token(keywords[result], result, self.line)
-        return Token('IDENTIFIER', result, self.line)
+
+        token_type = KEYWORDS.get(result, 'IDENTIFIER')
+        if self.trace.enabled:
+            self.trace.emit('lexer', 'token', type=token_type, value=result, position=start_position, line=start_line)
+        return Token(token_type, result, start_position, start_line)
 
     def number(self):
         result = ''
@@ -124,9 +127,10 @@ class Tokenizer:
         while self.current_char is not None and self.current_char.isdigit():
             result += self.current_char
             self.advance()
-        # if hasattr(self, 'verbose') and self.verbose:
-        print(f"Tokenized number: {result} at position {start_position}, line {start_line}")
-        return Token('NUMBER', int(result), start_position, start_line)
+        token = Token('NUMBER', int(result), start_position, start_line)
+        if self.trace.enabled:
+            self.trace.emit('lexer', 'token', type='NUMBER', value=token.value, position=start_position, line=start_line)
+        return token
 
     def string(self):
         result = ''
@@ -139,7 +143,8 @@ class Tokenizer:
         if self.current_char != '"':
             self.error("Unterminated string literal")
         self.advance()  # Skip closing quote
-        print(f"Tokenized string: {result} at position {start_position}, line {start_line}")
+        if self.trace.enabled:
+            self.trace.emit('lexer', 'token', type='STRING', value=f'"{result}"', position=start_position, line=start_line)
         return Token('STRING', f'"{result}"', start_position, start_line)
 
     def operator(self):
@@ -151,12 +156,12 @@ class Tokenizer:
         if char in ['<', '>', '=', '!'] and self.current_char == '=':
             result = char + self.current_char
             self.advance()
-            print(f"Tokenized operator: {result} at position {start_position}, line {start_line}")
+            if self.trace.enabled:
+                self.trace.emit('lexer', 'token', type='OPERATOR', value=result, position=start_position, line=start_line)
             return Token('OPERATOR', result, start_position, start_line)
 
-        # Only print if verbose mode is enabled
-        # if hasattr(self, 'verbose') and self.verbose:
-        print(f"Tokenized operator: {char} at position {start_position}, line {start_line}")
+        if self.trace.enabled:
+            self.trace.emit('lexer', 'token', type='OPERATOR', value=char, position=start_position, line=start_line)
         return Token('OPERATOR', char, start_position, start_line)
 
     def null_literal(self):
@@ -2,11 +2,20 @@ from rich.console import Console
 from rich.prompt import Prompt
 from rich.panel import Panel
 import argparse
-from lexer.tokenizer import Tokenizer
+from lexer.regex_tokenizer import RegexTokenizer
 from parser.syntax_analyzer import SyntaxAnalyzer
-from semantic.semantic_analyzer import SemanticAnalyzer
-from runtime.evaluator import Evaluator
+from parser.ast_nodes import Identifier, Program
+from semantic.optimizer import DEFAULT_OPT_LEVEL, OPT_LEVELS, Optimizer
+from semantic.scope_resolver import ScopeResolver
+from semantic.type_inference import TypeInference
+from runtime.async_evaluator import AsyncEvaluator
+from runtime.engines import DEFAULT_ENGINE, ENGINES, create_engine
+from runtime.memoization import DEFAULT_MEMO_SIZE, memo_report
 from runtime.memory_manager import MemoryManager
+from runtime.parallel import DEFAULT_PARALLEL_BACKEND, PARALLEL_BACKENDS, ProcessBackend
+from cli.repl import LanProREPL
+from utils.program_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_CACHE_SIZE, ProgramCache
+from utils.trace import TRACE_SINKS, RingBufferTraceSink, create_trace_sink
 
 def main():
     console = Console()
@@ -17,8 +26,38 @@ def main():
     parser.add_argument('-f', '--file', type=str, help='Path to the LanPro script file to execute')
     parser.add_argument('--verbose', action='store_true', help='Enable verbose mode to show token stream, parse trace, and eval steps')
     parser.add_argument('--debug', action='store_true', help='Enable debug mode to show variable states and memory usage')
+    parser.add_argument('--stream', action='store_true', help='Execute each top-level statement of the script as soon as it is parsed')
+    parser.add_argument('--trace', choices=list(TRACE_SINKS), help='Trace sink for lexer and parser events (default: jsonl with --verbose, otherwise null)')
+    parser.add_argument('--trace-file', type=str, help='Write the jsonl trace to this file instead of stdout')
+    parser.add_argument('--engine', choices=list(ENGINES), default=DEFAULT_ENGINE, help='Execution engine: the AST tree-walker, the bytecode VM, compiled closures or transpiled Python')
+    parser.add_argument('--opt-level', type=int, choices=OPT_LEVELS, default=DEFAULT_OPT_LEVEL, help='AST optimizations: 0 none, 1 literals and constant folding, 2 also dead branches and loops')
+    parser.add_argument('--opt-report', action='store_true', help='Print how many AST nodes the optimizer eliminated')
+    parser.add_argument('--no-quickening', action='store_true', help='Do not specialize hot AST nodes while the tree-walker runs')
+    parser.add_argument('--quickening-report', action='store_true', help='Count and print how often specialized AST nodes ran and missed')
+    parser.add_argument('--memo-size', type=int, default=DEFAULT_MEMO_SIZE, help='Results each memoized function keeps before evicting the least recently used')
+    parser.add_argument('--memo-report', action='store_true', help='Print cache hits, misses and evictions of memoized functions')
+    parser.add_argument('--async', dest='use_async', action='store_true', help='Run parallel blocks and scheduled tasks as coroutines on one asyncio event loop (tree-walker only)')
+    parser.add_argument('--parallel-backend', choices=PARALLEL_BACKENDS, default=DEFAULT_PARALLEL_BACKEND, help='Run parallel blocks and parallel for loops on threads or, for CPU-bound work, in worker processes')
+    parser.add_argument('--max-call-depth', type=int, help='Calls the bytecode VM keeps on its explicit stack before reporting runaway recursion')
+    parser.add_argument('--no-type-check', action='store_true', help='Run programs even if type inference finds operations that always fail')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the compiled-program cache')
+    parser.add_argument('--cache-dir', type=str, help=f'Directory for cached programs (default: {DEFAULT_CACHE_DIR} next to the script)')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_CACHE_SIZE // (1024 * 1024), help='Maximum cache directory size in MB before old entries are evicted')
     args = parser.parse_args()
 
+    # Lexer and parser events go to a trace sink; --verbose streams them as JSON lines
+    trace_kind = args.trace or ('jsonl' if args.verbose or args.trace_file else 'null')
+    trace = create_trace_sink(trace_kind, args.trace_file)
+
+    def report_error(e):
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        if isinstance(e, RecursionError) and args.engine != 'vm':
+            console.print("[bold cyan]Hint:[/bold cyan] deep non-tail recursion needs --engine vm, which keeps calls on its own stack")
+        if isinstance(trace, RingBufferTraceSink):
+            console.print("[bold cyan]Most recent trace events:[/bold cyan]")
+            for record in trace.records(limit=20):
+                console.print(f"  {record}")
+
     # Debug: Print parsed arguments to verify
     console.print(f"[bold blue]Parsed Arguments: file={args.file}, verbose={args.verbose}, debug={args.debug}[/bold blue]")
 
@@ -32,14 +71,25 @@ def main():
     
     def lanpro_free(var):
         # Accepts variable name as string or identifier node
-        if isinstance(var, dict) and var.get('type') == 'Identifier':
-            var_name = var['name']
+        if isinstance(var, Identifier):
+            var_name = var.name
         else:
             var_name = var
         memory_manager.deallocate(var_name)
     memory_manager.allocate('free', lanpro_free)
     
-    evaluator = Evaluator(memory_manager)
+    if args.use_async:
+        if args.engine != 'tree':
+            parser.error(f"--async runs on the tree-walker and cannot be combined with --engine {args.engine}")
+        evaluator = AsyncEvaluator(memory_manager)
+    else:
+        evaluator = create_engine(args.engine, memory_manager)
+    evaluator.set_quickening(not args.no_quickening, count_runs=args.quickening_report)
+    evaluator.memo_size = args.memo_size
+    if args.max_call_depth is not None and hasattr(evaluator, 'max_call_depth'):
+        evaluator.max_call_depth = args.max_call_depth
+    if args.parallel_backend == 'process':
+        evaluator.process_backend = ProcessBackend()
     
     def lanpro_input(*args):
         return input(*args)
@@ -48,23 +98,48 @@ def main():
     if args.file:
         # Read and execute the script file
         try:
+            # Analyzed programs are cached by source hash, unless a stage has to run for its side effects
+            ast = None
+            program_cache = None
+            if not (args.no_cache or args.stream or trace.enabled):
+                program_cache = ProgramCache(args.cache_dir, args.cache_size * 1024 * 1024)
+                with open(args.file, 'rb') as file:
+                    cache_key = program_cache.source_key(file)
+                ast = program_cache.load(args.file, cache_key)
+
+            # Cached programs are stored unoptimized, so any --opt-level can use them
+            optimizer = Optimizer(args.opt_level)
             with open(args.file, 'r') as file:
-                code = file.read()
-                tokenizer = Tokenizer(code)
-                tokens = tokenizer.tokenize()
-                if args.verbose:
-                    console.print("[bold cyan]Token Stream:[/bold cyan]")
-                    for token in tokens:
-                        console.print(f"  {token}")
+                if ast is None:
+                    # Tokens are read from the file on demand instead of being materialized up front
+                    tokenizer = RegexTokenizer(file, trace=trace)
+                    tokens = tokenizer.iter_tokens()
+                    
+                    parser_instance = SyntaxAnalyzer(trace=trace)
+                    semantic_analyzer = ScopeResolver()
+                    if args.stream:
+                        # Analyze, optimize and run each top-level statement as it comes off the parser
+                        def analyzed_statements():
+                            for statement in parser_instance.iter_statements(tokens):
+                                semantic_analyzer.visit_statement(statement)
+                                statement = optimizer.optimize_statement(statement)
+                                if statement is not None:
+                                    yield statement
+                        ast = Program(body=analyzed_statements())
+                    else:
+                        ast = parser_instance.parse(tokens)
+                        semantic_analyzer.analyze(ast)
+                        if program_cache is not None:
+                            program_cache.store(args.file, cache_key, ast)
+                if not args.stream:
+                    # Needs the whole program; streamed statements keep the checked operations
+                    type_inference = TypeInference()
+                    if args.no_type_check:
+                        type_inference.infer(ast)
+                    else:
+                        type_inference.check(ast)
+                optimizer.optimize(ast)  # Streamed statements are optimized one at a time instead
                 
-                parser_instance = SyntaxAnalyzer()
-                ast = parser_instance.parse(tokens)
-                if args.verbose:
-                    console.print("[bold cyan]Parse Trace:[/bold cyan]")
-                    # Note: Parse trace is already printed in SyntaxAnalyzer with debug prints
-                
-                semantic_analyzer = SemanticAnalyzer()
-                semantic_analyzer.analyze(ast)
                 if args.verbose:
                     console.print("[bold cyan]Evaluation Steps:[/bold cyan]")
                     evaluator.set_verbose(True)
@@ -74,45 +149,43 @@ def main():
                     evaluator.set_debug(True)  # Enable debug mode in Evaluator
                 
                 evaluator.run(ast)
+                if args.opt_report:
+                    console.print(f"[cyan]{optimizer.report}[/cyan]")
+                if args.quickening_report:
+                    console.print(f"[cyan]{evaluator.quickening}[/cyan]")
+                if args.memo_report:
+                    console.print(f"[cyan]{memo_report(evaluator.memoized.values())}[/cyan]")
                 console.print("[green]Script executed successfully![/green]")
         except Exception as e:
-            console.print(f"[bold red]Error:[/bold red] {e}")
+            report_error(e)
+        finally:
+            trace.close()
     else:
-        # Interactive REPL mode
+        # Interactive REPL mode: one session keeps analysis state and definitions across entries
+        session = LanProREPL(evaluator, console=console, trace=trace)
+        if args.verbose:
+            console.print("[bold cyan]Evaluation Steps:[/bold cyan]")
+            evaluator.set_verbose(True)
+        
+        if args.debug:
+            console.print("[bold yellow]Debug Mode Enabled:[/bold yellow]")
+            evaluator.set_debug(True)  # Enable debug mode in Evaluator
+        
         while True:
-            code = Prompt.ask("\n[cyan]Enter your LanPro code (or type 'exit' to quit)[/cyan]\n")
-            if code.lower() == 'exit':
-                console.print("[bold red]Goodbye![/bold red]")
-                break
+            if session.pending:
+                code = Prompt.ask("[cyan]...[/cyan]")
+            else:
+                code = Prompt.ask("\n[cyan]Enter your LanPro code (or type 'exit' to quit)[/cyan]\n")
+                if code.lower() == 'exit':
+                    console.print("[bold red]Goodbye![/bold red]")
+                    break
 
             try:
-                tokenizer = Tokenizer(code)
-                tokens = tokenizer.tokenize()
-                if args.verbose:
-                    console.print("[bold cyan]Token Stream:[/bold cyan]")
-                    for token in tokens:
-                        console.print(f"  {token}")
-                
-                parser_instance = SyntaxAnalyzer()
-                ast = parser_instance.parse(tokens)
-                if args.verbose:
-                    console.print("[bold cyan]Parse Trace:[/bold cyan]")
-                    # Note: Parse trace is already printed in SyntaxAnalyzer with debug prints
-                
-                semantic_analyzer = SemanticAnalyzer()
-                semantic_analyzer.analyze(ast)
-                if args.verbose:
-                    console.print("[bold cyan]Evaluation Steps:[/bold cyan]")
-                    evaluator.set_verbose(True)
-                
-                if args.debug:
-                    console.print("[bold yellow]Debug Mode Enabled:[/bold yellow]")
-                    evaluator.set_debug(True)  # Enable debug mode in Evaluator
-                
-                evaluator.run(ast)
-                console.print("[green]Execution completed successfully![/green]")
+                if session.feed(code):
+                    console.print("[green]Execution completed successfully![/green]")
             except Exception as e:
-                console.print(f"[bold red]Error:[/bold red] {e}")
+                report_error(e)
+        trace.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,311 @@
+class Node:
+    """Base class for typed AST nodes.
+
+    Nodes are __slots__ objects: `key_names` lists the dict keys of the old dict
+    representation, and the matching leading entries of `__slots__` hold their
+    values. Any further slots are annotations added by later passes and are not
+    visible through the dict interface. The mapping methods below (node['type'],
+    node.get('line'), 'line' in node, to_dict()) keep existing tooling that
+    expects dict nodes working.
+    """
+    __slots__ = ()
+    type = None
+    key_names = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'generic' in cls.__dict__:
+            # A run-time specialization of a node class (see runtime.quickening):
+            # same type, fields and slots, and not a node type of its own
+            cls.type = cls.generic.type
+            return
+        if 'type' not in cls.__dict__:
+            cls.type = cls.__name__
+        cls.fields = cls.__slots__[:len(cls.key_names)]
+        cls.annotations = cls.__slots__[len(cls.key_names):]
+        cls.key_map = dict(zip(cls.key_names, cls.fields))
+        NODE_TYPES[cls.type] = cls
+
+    def __init__(self, *values, **named):
+        fields = self.fields
+        if len(values) > len(fields):
+            raise TypeError(f"{self.type} takes at most {len(fields)} fields, got {len(values)}")
+        for name, value in zip(fields, values):
+            setattr(self, name, value)
+        for name in fields[len(values):]:
+            setattr(self, name, named.pop(name, None))
+        for name in self.annotations:
+            setattr(self, name, named.pop(name, None))
+        if named:
+            raise TypeError(f"Unknown field(s) for {self.type}: {', '.join(named)}")
+
+    # Dict compatibility
+
+    def __getitem__(self, key):
+        if key == 'type':
+            return self.type
+        try:
+            return getattr(self, self.key_map[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        try:
+            setattr(self, self.key_map[key], value)
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return key == 'type' or key in self.key_map
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return ['type', *self.key_map]
+
+    def items(self):
+        yield 'type', self.type
+        for key, name in self.key_map.items():
+            yield key, getattr(self, name)
+
+    def to_dict(self):
+        """Return the equivalent nested dict AST."""
+        result = {'type': self.type}
+        for key, name in self.key_map.items():
+            result[key] = _to_plain(getattr(self, name))
+        return result
+
+    def __eq__(self, other):
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        if not isinstance(other, Node) or other.type != self.type:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.fields)
+
+    __hash__ = None
+
+    def __repr__(self):
+        values = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.fields)
+        return f'{self.__class__.__name__}({values})'
+
+
+NODE_TYPES = {}
+
+
+def _to_plain(value):
+    if isinstance(value, Node):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_to_plain(item) for item in value]
+    return value
+
+
+def from_dict(value):
+    """Convert a dict AST (or any part of one) into typed nodes."""
+    if isinstance(value, Node):
+        return value
+    if isinstance(value, dict) and 'type' in value:
+        node_class = NODE_TYPES.get(value['type'])
+        if node_class is None:
+            raise ValueError(f"Unknown node type: {value['type']} at line {value.get('line', 'unknown')}")
+        return node_class(**{node_class.key_map[key]: from_dict(item)
+                             for key, item in value.items() if key in node_class.key_map})
+    if isinstance(value, list):
+        return [from_dict(item) for item in value]
+    return value
+
+
+# Annotations filled in by semantic.scope_resolver.ScopeResolver:
+#   depth, slot  - frame address of a local variable (slot is None for globals)
+#   frame_size   - number of local slots a function or lambda call (or a parallel for chunk) needs
+#   tail         - True for a `return f(...)` that may recurse: a tail call
+#   tail_calls   - True for a function declaration whose body makes tail calls
+# and by semantic.type_inference.TypeInference:
+#   operand_type - 'int' or 'str' when both operands of a BinaryOperation always have that type
+# and, while the program runs, by the evaluator:
+#   cache        - for quickening (runtime.quickening), the warm-up counter of a generic
+#                  node or the data of a specialized one; for MethodCall, MemberAccess and
+#                  MemberAssignment, the inline cache (class, method or field index) of
+#                  the last object they ran on
+
+
+class Program(Node):
+    __slots__ = ('body', 'line')
+    key_names = ('body', 'line')
+
+
+class Block(Node):
+    __slots__ = ('body', 'line')
+    key_names = ('body', 'line')
+
+
+class Literal(Node):
+    __slots__ = ('value', 'line')
+    key_names = ('value', 'line')
+
+
+# A value known before the program runs: a literal with its string quotes already
+# stripped, or a folded constant expression (see semantic.optimizer)
+class Constant(Node):
+    __slots__ = ('value', 'line')
+    key_names = ('value', 'line')
+
+
+class NullLiteral(Node):
+    __slots__ = ('line',)
+    type = 'NULL'
+    key_names = ('line',)
+
+
+class Identifier(Node):
+    __slots__ = ('name', 'line', 'depth', 'slot', 'cache')
+    key_names = ('name', 'line')
+
+
+class BinaryOperation(Node):
+    __slots__ = ('operator', 'left', 'right', 'line', 'operand_type', 'cache')
+    key_names = ('operator', 'left', 'right', 'line')
+
+
+class AssignmentStatement(Node):
+    __slots__ = ('identifier', 'value', 'line', 'depth', 'slot', 'cache')
+    key_names = ('identifier', 'value', 'line')
+
+
+class LetStatement(Node):
+    __slots__ = ('identifier', 'value', 'line')
+    key_names = ('identifier', 'value', 'line')
+
+
+class ReturnStatement(Node):
+    __slots__ = ('value', 'line', 'tail')
+    key_names = ('value', 'line')
+
+
+class FunctionDeclaration(Node):
+    __slots__ = ('name', 'parameters', 'body', 'line', 'memoized', 'depth', 'slot', 'frame_size', 'tail_calls')
+    key_names = ('name', 'parameters', 'body', 'line', 'memoized')
+
+
+class FunctionCall(Node):
+    __slots__ = ('name', 'arguments', 'line', 'depth', 'slot', 'cache')
+    key_names = ('name', 'arguments', 'line')
+
+
+class LambdaExpression(Node):
+    __slots__ = ('parameters', 'body', 'line', 'frame_size')
+    key_names = ('parameters', 'body', 'line')
+
+
+class ClassDeclaration(Node):
+    __slots__ = ('name', 'methods', 'line')
+    key_names = ('name', 'methods', 'line')
+
+
+class NewExpression(Node):
+    __slots__ = ('class_name', 'line')
+    key_names = ('class', 'line')
+
+
+class MethodCall(Node):
+    __slots__ = ('object', 'member', 'arguments', 'line', 'cache')
+    key_names = ('object', 'member', 'arguments', 'line')
+
+
+class MemberAccess(Node):
+    __slots__ = ('object', 'member', 'line', 'cache')
+    key_names = ('object', 'member', 'line')
+
+
+class MemberAssignment(Node):
+    __slots__ = ('object', 'member', 'value', 'line', 'cache')
+    key_names = ('object', 'member', 'value', 'line')
+
+
+class ArrayAccess(Node):
+    __slots__ = ('array', 'index', 'line')
+    key_names = ('array', 'index', 'line')
+
+
+class ListLiteral(Node):
+    __slots__ = ('elements', 'line')
+    key_names = ('elements', 'line')
+
+
+class Tuple(Node):
+    __slots__ = ('elements', 'line')
+    key_names = ('elements', 'line')
+
+
+class Expression(Node):
+    __slots__ = ('elements', 'line')
+    key_names = ('elements', 'line')
+
+
+class IfStatement(Node):
+    __slots__ = ('condition', 'then_branch', 'else_branch', 'line')
+    key_names = ('condition', 'thenBranch', 'elseBranch', 'line')
+
+
+class WhileStatement(Node):
+    __slots__ = ('condition', 'body', 'line')
+    key_names = ('condition', 'body', 'line')
+
+
+class ForStatement(Node):
+    __slots__ = ('identifier', 'iterable', 'body', 'line', 'depth', 'slot')
+    key_names = ('identifier', 'iterable', 'body', 'line')
+
+
+class ParallelStatement(Node):
+    __slots__ = ('body', 'line')
+    key_names = ('body', 'line')
+
+
+# `parallel for (x in xs) reduce (sum total, max best) { ... }`: the iterations
+# are split into chunks that run at the same time. frame_size (set by
+# ScopeResolver) is the size of the frame each chunk runs the body in; the
+# loop variable takes slot 1 and the chunk's copies of the reduction variables
+# the slots after it.
+class ParallelForStatement(Node):
+    __slots__ = ('identifier', 'iterable', 'body', 'reductions', 'line', 'frame_size')
+    key_names = ('identifier', 'iterable', 'body', 'reductions', 'line')
+
+
+# One `sum total` of a ParallelForStatement's reduce clause. depth and slot
+# address the variable the chunks' results are combined into.
+class Reduction(Node):
+    __slots__ = ('operator', 'identifier', 'line', 'depth', 'slot')
+    key_names = ('operator', 'identifier', 'line')
+
+
+class ScheduleStatement(Node):
+    __slots__ = ('body', 'interval', 'schedule_type', 'line')
+    key_names = ('body', 'interval', 'schedule_type', 'line')
+
+
+# Nodes produced by semantic.optimizer.Optimizer. The parser never creates them.
+
+# `while (i < n) { ...; i = i + step; }` with the increment split off the body.
+# fixed: neither i nor n can change inside the body, so the values i takes can
+# be computed up front (see runtime.operations.counted_range).
+class CountedLoop(Node):
+    __slots__ = ('condition', 'body', 'increment', 'line', 'fixed')
+    key_names = ('condition', 'body', 'increment', 'line')
+
+
+# An expression whose inputs do not change inside a loop: evaluated the first
+# time the loop needs it, then read back from the hidden local `slot`
+class LoopInvariant(Node):
+    __slots__ = ('expression', 'line', 'slot')
+    key_names = ('expression', 'line')
+
+
+# Clears the LoopInvariant slots of a loop before it starts
+class ResetInvariants(Node):
+    __slots__ = ('slots', 'line')
+    key_names = ('slots', 'line')
@@ -1,30 +1,55 @@
+from collections import deque
+from parser.ast_nodes import (
+    ArrayAccess, AssignmentStatement, Block, BinaryOperation, ClassDeclaration, Expression, ForStatement,
+    FunctionCall, FunctionDeclaration, Identifier, IfStatement, LambdaExpression, LetStatement, ListLiteral,
+    Literal, MemberAccess, MemberAssignment, MethodCall, NewExpression, NullLiteral, ParallelForStatement,
+    ParallelStatement, Program, Reduction, ReturnStatement, ScheduleStatement, Tuple, WhileStatement
+)
+from utils.trace import NULL_TRACE
+
 class SyntaxAnalyzer:
-    def __init__(self):
+    def __init__(self, trace=NULL_TRACE):
+        self.trace = trace
         self.ast = []
         self.current_token = None
         self.position = 0
+        self.tokens = iter(())
+        self.lookahead = deque()  # Tokens pulled from the stream by peek() but not consumed yet
 
     def parse(self, tokens):
-        self.tokens = tokens
-        self.position = 0
-        self.current_token = self.tokens[self.position]  # Initialize current_token
+        self.reset(tokens)
         self.ast = self.program()
-        print("Generated AST:", self.ast)  # Debug print
+        if self.trace.enabled:
+            self.trace.emit('parser', 'ast', ast=self.ast)
         return self.ast
 
-    def program(self):
-        statements = []
-        while self.position < len(self.tokens) and self.current_token is not None:
+    def reset(self, tokens):
+        """Start pulling from tokens, which may be a list or a lazy token generator."""
+        self.tokens = iter(tokens)
+        self.lookahead.clear()
+        self.position = 0
+        self.current_token = next(self.tokens, None)  # Initialize current_token
+
+    def iter_statements(self, tokens):
+        """Yield top-level statements as soon as they are parsed."""
+        self.reset(tokens)
+        return self.statements()
+
+    def statements(self):
+        while self.current_token is not None:
             if self.current_token.type == 'OPERATOR' and self.current_token.value in ['}', ';']:
                 self.advance()
                 continue
-            statements.append(self.statement())
-        return {'type': 'Program', 'body': statements}
+            yield self.statement()
+
+    def program(self):
+        return Program(body=list(self.statements()))
 
     def statement(self):
         if self.current_token is None:
             raise SyntaxError(f"Unexpected end of input while parsing a statement at line {self.current_token.line if self.current_token else 'unknown'}")
-        print(f"Parsing statement at position {self.current_token.position}, line {self.current_token.line}, token: {self.current_token}")
+        if self.trace.enabled:
+            self.trace_enter('statement')
         if self.current_token.type == 'CLASS':
             return self.class_declaration()
         elif self.current_token.type == 'LET':
@@ -41,6 +66,10 @@ class SyntaxAnalyzer:
             return self.schedule_statement()
         elif self.current_token.type == 'IDENTIFIER' and self.current_token.value == 'function':
             return self.function_declaration()
+        elif (self.current_token.type == 'IDENTIFIER' and self.current_token.value == 'memoized'
+              and self.peek() and self.peek().type == 'IDENTIFIER' and self.peek().value == 'function'):
+            self.eat('IDENTIFIER')  # 'memoized'
+            return self.function_declaration(memoized=True)
         elif self.current_token.type == 'IDENTIFIER' and self.current_token.value == 'return':
             return self.return_statement()
         elif self.current_token.type == 'IDENTIFIER' and self.peek() and self.peek().type == 'OPERATOR' and self.peek().value == '=':
@@ -51,15 +80,15 @@ class SyntaxAnalyzer:
             return self.expression_statement()
 
     def return_statement(self):
-        print(f"Parsing return statement at position {self.current_token.position}, line {self.current_token.line}")
+        if self.trace.enabled:
+            self.trace_enter('return_statement')
         self.eat('IDENTIFIER')
         value = self.expression()
         self.eat('OPERATOR')
-        return {
-            'type': 'ReturnStatement',
-            'value': value,
-            'line': self.current_token.line if self.current_token else None
-        }
+        return ReturnStatement(
+            value=value,
+            line=self.current_token.line if self.current_token else None
+        )
         
     def class_declaration(self):
         self.eat('CLASS')
@@ -70,7 +99,7 @@ class SyntaxAnalyzer:
         while self.current_token.value != '}':
             methods.append(self.function_declaration(is_method=True))
         self.eat('OPERATOR')  # }
-        return {'type': 'ClassDeclaration', 'name': class_name, 'methods': methods}
+        return ClassDeclaration(name=class_name, methods=methods)
 
     def let_statement(self):
         self.eat('LET')
@@ -79,23 +108,26 @@ class SyntaxAnalyzer:
         self.eat('OPERATOR')  # =
         value = self.expression()
         self.eat('OPERATOR')  # ;
-        return {'type': 'LetStatement', 'identifier': var_name, 'value': value}
+        return LetStatement(identifier=var_name, value=value)
 
     def assignment_statement(self):
         identifier = self.current_token
         self.eat('IDENTIFIER')
         self.eat('OPERATOR')
-        value = self.expression()
-        self.eat('OPERATOR')
-        return {
-            'type': 'AssignmentStatement',
-            'identifier': identifier.value,
-            'value': value,
-            'line': identifier.line
-        }
+        if self.current_token.type == 'SCHEDULE':
+            value = self.schedule_statement()  # Assigns the task's handle; eats the ';' itself
+        else:
+            value = self.expression()
+            self.eat('OPERATOR')
+        return AssignmentStatement(
+            identifier=identifier.value,
+            value=value,
+            line=identifier.line
+        )
     
-    def function_declaration(self, is_method=False):
-        print(f"Parsing function declaration at position {self.current_token.position}, line {self.current_token.line}")
+    def function_declaration(self, is_method=False, memoized=None):
+        if self.trace.enabled:
+            self.trace_enter('function_declaration')
         if not is_method:
             self.eat('IDENTIFIER')  # 'function'
         function_name = self.current_token
@@ -111,45 +143,49 @@ class SyntaxAnalyzer:
                 self.eat('IDENTIFIER')
         self.eat('OPERATOR')  # )
         body = self.block()
-        return {
-            'type': 'FunctionDeclaration',
-            'name': function_name.value,
-            'parameters': parameters,
-            'body': body,
-            'line': function_name.line
-        }
+        return FunctionDeclaration(
+            name=function_name.value,
+            parameters=parameters,
+            body=body,
+            line=function_name.line,
+            memoized=memoized
+        )
 
     def function_call_statement(self):
-        print(f"Parsing function call at position {self.current_token.position}, line {self.current_token.line}, token: {self.current_token}")
+        if self.trace.enabled:
+            self.trace_enter('function_call')
         function_name = self.current_token
         self.eat('IDENTIFIER')
         self.eat('OPERATOR')
         arguments = self.argument_list()
         self.eat('OPERATOR')
         self.eat('OPERATOR')
-        print(f"Parsed function call: {function_name.value} with arguments {arguments}")
-        return {
-            'type': 'FunctionCall',
-            'name': function_name.value,
-            'arguments': arguments,
-            'line': function_name.line
-        }
+        if self.trace.enabled:
+            self.trace.emit('parser', 'exit', production='function_call', name=function_name.value, arguments=arguments)
+        return FunctionCall(
+            name=function_name.value,
+            arguments=arguments,
+            line=function_name.line
+        )
 
     def argument_list(self):
-        print(f"Parsing argument list at position {self.current_token.position}, line {self.current_token.line}, token: {self.current_token}")
+        if self.trace.enabled:
+            self.trace_enter('argument_list')
         arguments = []
         if self.current_token.type != 'OPERATOR' or self.current_token.value != ')':
             arguments.append(self.expression())
             while self.current_token.type == 'OPERATOR' and self.current_token.value == ',':
                 self.eat('OPERATOR')
                 arguments.append(self.expression())
-        print(f"Parsed arguments: {arguments}")
+        if self.trace.enabled:
+            self.trace.emit('parser', 'exit', production='argument_list', arguments=arguments)
         return arguments
 
     def block(self):
         if self.current_token is None or self.current_token.value != '{':
             raise SyntaxError(f"Expected '{{' but got '{self.current_token.value if self.current_token else 'None'}' at position {self.current_token.position}, line {self.current_token.line if self.current_token else 'unknown'}")
-        print(f"Entering block at position {self.current_token.position}, line {self.current_token.line}")
+        if self.trace.enabled:
+            self.trace_enter('block')
         self.eat('OPERATOR')
 
         statements = []
@@ -158,33 +194,36 @@ class SyntaxAnalyzer:
                 raise SyntaxError("Unexpected end of input. Missing closing '}'.")
             statements.append(self.statement())
 
-        print(f"Exiting block at position {self.current_token.position}, line {self.current_token.line if self.current_token else 'unknown'}")
+        if self.trace.enabled:
+            self.trace.emit('parser', 'exit', production='block', statements=len(statements))
         self.eat('OPERATOR')
-        return {'type': 'Block', 'body': statements, 'line': self.current_token.line if self.current_token else None}
+        return Block(body=statements, line=self.current_token.line if self.current_token else None)
     
     def if_statement(self):
-        print(f"Parsing if statement at position {self.current_token.position}, line {self.current_token.line}")
+        if self.trace.enabled:
+            self.trace_enter('if_statement')
         self.eat('IF')
         self.eat('OPERATOR')
         condition = self.expression()
         self.eat('OPERATOR')
 
-        print(f"Parsing thenBranch at position {self.current_token.position}, line {self.current_token.line}")
+        if self.trace.enabled:
+            self.trace_enter('then_branch')
         then_branch = self.block()
 
         else_branch = None
         if self.current_token is not None and self.current_token.type == 'ELSE':
-            print(f"Parsing elseBranch at position {self.current_token.position}, line {self.current_token.line}")
+            if self.trace.enabled:
+                self.trace_enter('else_branch')
             self.eat('ELSE')
             else_branch = self.block()
 
-        return {
-            'type': 'IfStatement',
-            'condition': condition,
-            'thenBranch': then_branch,
-            'elseBranch': else_branch,
-            'line': self.current_token.line if self.current_token else None
-        }
+        return IfStatement(
+            condition=condition,
+            then_branch=then_branch,
+            else_branch=else_branch,
+            line=self.current_token.line if self.current_token else None
+        )
 
     def while_statement(self):
         self.eat('WHILE')
@@ -192,12 +231,11 @@ class SyntaxAnalyzer:
         condition = self.expression()
         self.eat('OPERATOR')
         body = self.block()
-        return {
-            'type': 'WhileStatement',
-            'condition': condition,
-            'body': body,
-            'line': self.current_token.line if self.current_token else None
-        }
+        return WhileStatement(
+            condition=condition,
+            body=body,
+            line=self.current_token.line if self.current_token else None
+        )
 
     def for_statement(self):
         self.eat('FOR')
@@ -208,16 +246,21 @@ class SyntaxAnalyzer:
         iterable = self.expression()
         self.eat('OPERATOR')
         body = self.block()
-        return {
-            'type': 'ForStatement',
-            'identifier': identifier.value,
-            'iterable': iterable,
-            'body': body,
-            'line': identifier.line
-        }
+        return ForStatement(
+            identifier=identifier.value,
+            iterable=iterable,
+            body=body,
+            line=identifier.line
+        )
 
     def expression_statement(self):
         node = self.expression()
+        if (isinstance(node, MemberAccess) and self.current_token is not None
+                and self.current_token.type == 'OPERATOR' and self.current_token.value == '='):
+            # obj.field = value;
+            self.eat('OPERATOR')
+            value = self.expression()
+            node = MemberAssignment(object=node.object, member=node.member, value=value, line=node.line)
         if self.current_token is not None and self.current_token.type == 'OPERATOR' and self.current_token.value == ';':
             self.eat('OPERATOR')
         return node
@@ -227,30 +270,29 @@ class SyntaxAnalyzer:
         if self.current_token.type == 'NUMBER':
             token = self.current_token
             self.advance()
-            node = {'type': 'Literal', 'value': token.value, 'line': token.line}
+            node = Literal(value=token.value, line=token.line)
         elif self.current_token.type == 'NULL':
             token = self.current_token
             self.advance()
-            node = {'type': 'NULL', 'line': token.line}
+            node = NullLiteral(line=token.line)
         elif self.current_token.type == 'STRING':
             token = self.current_token
             self.advance()
-            node = {'type': 'Literal', 'value': token.value, 'line': token.line}
+            node = Literal(value=token.value, line=token.line)
         elif self.current_token.type == 'IDENTIFIER':
             token = self.current_token
             self.advance()
-            node = {'type': 'Identifier', 'name': token.value, 'line': token.line}
+            node = Identifier(name=token.value, line=token.line)
             # Handle function call: identifier followed by '('
             if self.current_token is not None and self.current_token.type == 'OPERATOR' and self.current_token.value == '(':
                 self.eat('OPERATOR')  # eat '('
                 arguments = self.argument_list()
                 self.eat('OPERATOR')  # eat ')'
-                node = {
-                    'type': 'FunctionCall',
-                    'name': token.value,
-                    'arguments': arguments,
-                    'line': token.line
-                }
+                node = FunctionCall(
+                    name=token.value,
+                    arguments=arguments,
+                    line=token.line
+                )
         elif self.current_token.type == 'NEW':
             token = self.current_token
             self.advance()
@@ -258,11 +300,10 @@ class SyntaxAnalyzer:
             self.eat('IDENTIFIER')
             self.eat('OPERATOR')  # (
             self.eat('OPERATOR')  # )
-            node = {
-                'type': 'NewExpression',
-                'class': class_name,
-                'line': token.line
-            }
+            node = NewExpression(
+                class_name=class_name,
+                line=token.line
+            )
         elif self.current_token.type == 'OPERATOR' and self.current_token.value == '(':
             self.eat('OPERATOR')  # eat '('
             # --- Lambda/arrow function parameter list support ---
@@ -279,19 +320,18 @@ class SyntaxAnalyzer:
             if self.current_token.type == 'OPERATOR' and self.current_token.value == '=>':
                 self.eat('OPERATOR')  # eat '=>'
                 body = self.expression()
-                node = {
-                    'type': 'LambdaExpression',
-                    'parameters': parameters,
-                    'body': body,
-                    'line': self.current_token.line
-                }
+                node = LambdaExpression(
+                    parameters=parameters,
+                    body=body,
+                    line=self.current_token.line
+                )
             else:
                 # Parenthesized expression
                 if len(parameters) == 1 and not (self.current_token.type == 'OPERATOR' and self.current_token.value == ','):
                     # Single identifier in parentheses, treat as variable reference
-                    node = {'type': 'Identifier', 'name': parameters[0], 'line': self.current_token.line}
+                    node = Identifier(name=parameters[0], line=self.current_token.line)
                 else:
-                    node = {'type': 'Tuple' if len(parameters) > 1 else 'Expression', 'elements': parameters, 'line': self.current_token.line}
+                    node = (Tuple if len(parameters) > 1 else Expression)(elements=parameters, line=self.current_token.line)
         elif self.current_token.type == 'OPERATOR' and self.current_token.value == '[':
             self.eat('OPERATOR')  # eat '['
             elements = []
@@ -301,11 +341,10 @@ class SyntaxAnalyzer:
                     self.eat('OPERATOR')
                     elements.append(self.expression())
             self.eat('OPERATOR')  # eat ']'
-            node = {
-                'type': 'ListLiteral',
-                'elements': elements,
-                'line': self.current_token.line
-            }
+            node = ListLiteral(
+                elements=elements,
+                line=self.current_token.line
+            )
         else:
             raise SyntaxError(f"Unexpected token: {self.current_token.type} with value {self.current_token.value}")
 
@@ -319,51 +358,49 @@ class SyntaxAnalyzer:
                     self.eat('OPERATOR')  # eat '('
                     arguments = self.argument_list()
                     self.eat('OPERATOR')  # eat ')'
-                    node = {
-                        'type': 'MethodCall',
-                        'object': node,
-                        'member': member_name,
-                        'arguments': arguments,
-                        'line': node.get('line')
-                    }
+                    node = MethodCall(
+                        object=node,
+                        member=member_name,
+                        arguments=arguments,
+                        line=node.line
+                    )
                 else:
-                    node = {
-                        'type': 'MemberAccess',
-                        'object': node,
-                        'member': member_name,
-                        'line': node.get('line')
-                    }
+                    node = MemberAccess(
+                        object=node,
+                        member=member_name,
+                        line=node.line
+                    )
             elif self.current_token.value == '[':
                 self.eat('OPERATOR')  # eat '['
                 index = self.expression()
                 self.eat('OPERATOR')  # eat ']'
-                node = {
-                    'type': 'ArrayAccess',
-                    'array': node,
-                    'index': index,
-                    'line': node.get('line')
-                }
+                node = ArrayAccess(
+                    array=node,
+                    index=index,
+                    line=node.line
+                )
         return node
         
         
 
     def expression(self):
-        print(f"Parsing expression at position {self.current_token.position}, line {self.current_token.line}, token: {self.current_token}")
+        if self.trace.enabled:
+            self.trace_enter('expression')
         left = self.primary()
 
         while self.current_token is not None and self.current_token.type == 'OPERATOR' and self.current_token.value in ['+', '-', '*', '/', '>', '<', '>=', '<=', '==', '!=']:
             operator = self.current_token.value
             self.advance()
             right = self.primary()
-            left = {
-                'type': 'BinaryOperation',
-                'operator': operator,
-                'left': left,
-                'right': right,
-                'line': left['line'] if 'line' in left else self.current_token.line if self.current_token else None
-            }
-
-        print(f"Parsed expression: {left}")
+            left = BinaryOperation(
+                operator=operator,
+                left=left,
+                right=right,
+                line=left.line
+            )
+
+        if self.trace.enabled:
+            self.trace.emit('parser', 'exit', production='expression', node=left)
         return left
 
     def eat(self, token_type):
@@ -377,34 +414,74 @@ class SyntaxAnalyzer:
 
     def next_token(self):
         self.position += 1
-        if self.position < len(self.tokens):
-            return self.tokens[self.position]
-        return None
+        if self.lookahead:
+            return self.lookahead.popleft()
+        return next(self.tokens, None)
 
     def advance(self):
         self.current_token = self.next_token()
-        if self.current_token is None:
-            print("Reached end of token stream.")
+        if self.current_token is None and self.trace.enabled:
+            self.trace.emit('parser', 'end_of_tokens', position=self.position)
 
     def peek(self):
-        if self.position + 1 < len(self.tokens):
-            return self.tokens[self.position + 1]
-        return None
+        if not self.lookahead:
+            self.lookahead.append(next(self.tokens, None))
+        return self.lookahead[0]
 
     def error(self, message):
         raise SyntaxError(message)
 
+    def trace_enter(self, production):
+        token = self.current_token
+        self.trace.emit('parser', 'enter', production=production, position=token.position, line=token.line,
+                        token_type=token.type, token_value=token.value)
+
     def parallel_statement(self):
         self.eat('PARALLEL')
+        if self.current_token is not None and self.current_token.type == 'FOR':
+            return self.parallel_for_statement()
+        body = self.block()
+        return ParallelStatement(
+            body=body,
+            line=self.current_token.line if self.current_token else None
+        )
+
+    def parallel_for_statement(self):
+        # parallel for (x in xs) reduce (sum total, max best) { ... }; the reduce clause is optional
+        self.eat('FOR')
+        self.eat('OPERATOR')
+        identifier = self.current_token
+        self.eat('IDENTIFIER')
+        self.eat('IN')
+        iterable = self.expression()
+        self.eat('OPERATOR')
+        reductions = []
+        if self.current_token is not None and self.current_token.type == 'IDENTIFIER' and self.current_token.value == 'reduce':
+            self.eat('IDENTIFIER')
+            self.eat('OPERATOR')  # (
+            while True:
+                operator = self.current_token
+                self.eat('IDENTIFIER')
+                variable = self.current_token
+                self.eat('IDENTIFIER')
+                reductions.append(Reduction(operator.value, variable.value, operator.line))
+                if self.current_token.type == 'OPERATOR' and self.current_token.value == ',':
+                    self.eat('OPERATOR')
+                else:
+                    break
+            self.eat('OPERATOR')  # )
         body = self.block()
-        return {
-            'type': 'ParallelStatement',
-            'body': body,
-            'line': self.current_token.line if self.current_token else None
-        }
+        return ParallelForStatement(
+            identifier=identifier.value,
+            iterable=iterable,
+            body=body,
+            reductions=reductions,
+            line=identifier.line
+        )
 
     def schedule_statement(self):
-        print(f"Parsing schedule statement at position {self.current_token.position}, line {self.current_token.line}")
+        if self.trace.enabled:
+            self.trace_enter('schedule_statement')
         self.eat('SCHEDULE')
         body = self.block()
         
@@ -424,10 +501,9 @@ class SyntaxAnalyzer:
         if self.current_token and self.current_token.type == 'OPERATOR' and self.current_token.value == ';':
             self.eat('OPERATOR')
         
-        return {
-            'type': 'ScheduleStatement',
-            'body': body,
-            'interval': interval,
-            'schedule_type': schedule_type,
-            'line': self.current_token.line if self.current_token else None
-        }
\ No newline at end of file
+        return ScheduleStatement(
+            body=body,
+            interval=interval,
+            schedule_type=schedule_type,
+            line=self.current_token.line if self.current_token else None
+        )
\ No newline at end of file
@@ -0,0 +1,361 @@
+import asyncio
+import os
+import sys
+from threading import get_ident
+from types import FunctionType
+
+from parser.ast_nodes import (
+    AssignmentStatement, BinaryOperation, Block, CountedLoop, ForStatement, FunctionCall, IfStatement,
+    ParallelForStatement, ReturnStatement, WhileStatement, from_dict
+)
+from runtime.data_parallel import loop_values, reduction_start
+from runtime.evaluator import UNBOUND, Evaluator, ReturnValue, TailCall, frame_at
+from runtime.io_builtins import ASYNC_VERSIONS, IO_BUILTINS
+from runtime.operations import TYPED_OPERATIONS, binary_operation, check_iterable, counted_range
+from runtime.quickening import SPECIALIZED_NODES
+from runtime.scheduler import AsyncScheduler
+from runtime.tail_calls import trampoline
+from semantic.suspension import SuspensionAnalysis
+
+
+def current_activity():
+    """MemoryManager.task_key in asyncio mode: the running asyncio task, or the thread outside the loop."""
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return get_ident()
+
+
+def use_pidfd_watcher(loop):
+    """Have loop wait for its subprocesses through pidfds.
+
+    Before Python 3.12, asyncio's default child watcher starts a thread per
+    subprocess; 3.12 uses pidfds by itself. The watcher serves one loop at a
+    time, so it is attached each time a loop starts running.
+    """
+    if sys.version_info >= (3, 12) or not hasattr(os, 'pidfd_open'):
+        return
+    watcher = asyncio.get_child_watcher()
+    if not isinstance(watcher, asyncio.PidfdChildWatcher):
+        try:
+            os.close(os.pidfd_open(os.getpid()))
+        except OSError:
+            return  # Kernel without pidfds: keep the threaded watcher
+        watcher = asyncio.PidfdChildWatcher()
+        asyncio.set_child_watcher(watcher)
+    watcher.attach_loop(loop)
+
+
+class AsyncEvaluator(Evaluator):
+    """Tree-walker that runs parallel blocks and scheduled tasks as coroutines on one asyncio event loop.
+
+    Each statement of a parallel block and each run of a scheduled task is an
+    activity: an asyncio task with its own evaluator copy and TaskScope, like
+    the threads of Evaluator. While an activity waits in sleep(), read_file()
+    or run_process(), the others run, so thousands of activities can be in
+    progress on a single thread. Only the nodes semantic.suspension.SuspensionAnalysis
+    marks are walked as coroutines; everything else goes through the ordinary
+    handlers. Activities are never preempted: one that computes without
+    calling those builtins keeps the thread until it ends.
+
+    Scheduled tasks fire while run() is running, that is while a program or a
+    REPL entry runs.
+    """
+
+    def __init__(self, memory_manager):
+        super().__init__(memory_manager)
+        self.loop = asyncio.new_event_loop()
+        self.scheduler = AsyncScheduler(self.loop)
+        memory_manager.task_key = current_activity  # Activities share the thread, so tasks are told apart by asyncio task
+        self.suspension = SuspensionAnalysis(IO_BUILTINS)
+        self.activities = set()  # asyncio tasks of parallel statements still running
+        self.async_handlers = self.async_dispatch_table()
+
+    def async_dispatch_table(self):
+        handlers = {
+            AssignmentStatement: self.evaluate_assignment_async,
+            BinaryOperation: self.evaluate_binary_operation_async,
+            Block: self.evaluate_block_async,
+            CountedLoop: self.evaluate_counted_loop_async,
+            ForStatement: self.evaluate_for_async,
+            FunctionCall: self.evaluate_function_call_async,
+            IfStatement: self.evaluate_if_async,
+            ParallelForStatement: self.evaluate_parallel_for_async,
+            ReturnStatement: self.evaluate_return_async,
+            WhileStatement: self.evaluate_while_async,
+        }
+        # Quickened nodes keep their generic node's fields, so the generic handler runs them
+        for node_class in SPECIALIZED_NODES:
+            if node_class.generic in handlers:
+                handlers[node_class] = handlers[node_class.generic]
+        return handlers
+
+    def task_copy(self, frame):
+        evaluator = super().task_copy(frame)
+        evaluator.async_handlers = evaluator.async_dispatch_table()
+        return evaluator
+
+    def close(self):
+        """Cancel the scheduled tasks and close the event loop."""
+        self.scheduler.cancel_all()
+        self.loop.close()
+
+    def run(self, program):
+        use_pidfd_watcher(self.loop)
+        return self.loop.run_until_complete(self.run_async(program))
+
+    async def run_async(self, program):
+        if isinstance(program, dict):
+            program = from_dict(program)
+        result = None
+        for statement in program.body:
+            if self.verbose:
+                self.console.print(f"[magenta]Running statement: {statement}[/magenta]")
+            self.suspension.add(statement)
+            try:
+                result = await self.evaluate_async(statement)
+            except ReturnValue as returned:
+                result = returned.value
+            self.finish_statement()
+
+        # Wait for the parallel statements, including the ones they started
+        while self.activities:
+            await asyncio.gather(*self.activities)
+        return result
+
+    def start_activity(self, coroutine):
+        activity = self.loop.create_task(coroutine)
+        activities = self.root.activities
+        activities.add(activity)
+        activity.add_done_callback(activities.discard)
+        return activity
+
+    async def run_activity(self, node, frame, chunk=None, bindings=None):
+        """The coroutine version of run_task: evaluate node as an activity, then commit its global writes."""
+        memory_manager = self.memory_manager
+        key = memory_manager.task_key()
+        task = memory_manager.enter_task(bindings, frame)
+        evaluator = self.task_evaluators[key] = self.task_copy(task.frame)
+        try:
+            if chunk is None:
+                result = await evaluator.evaluate_async(node)
+            else:
+                result = await evaluator.run_chunk_async(node, *chunk)
+            task.commit()
+            return result
+        finally:
+            del self.task_evaluators[key]
+            memory_manager.leave_task()
+
+    def evaluate_parallel(self, node):
+        if self.process_backend is not None:
+            return super().evaluate_parallel(node)
+        if self.verbose:
+            self.console.print("[magenta]Starting parallel block as coroutines[/magenta]")
+        activities = []
+        for statement in node.body.body:
+            bindings = self.memory_manager.start_task()
+            activities.append(self.start_activity(self.root.run_activity(statement, self.frame, None, bindings)))
+        return activities
+
+    def run_chunks(self, node, values, starts):
+        # Nothing in the body waits, so activities would only run one after another anyway
+        return [self.run_chunk(node, values, starts)]
+
+    def schedule_task(self, body, interval, schedule_type, line=None):
+        frame = self.frame
+        root = self.root
+        memory_manager = self.memory_manager
+        bindings = memory_manager.call_bindings()
+
+        async def run():
+            if not root.running:
+                return
+            memory_manager.start_task()
+            try:
+                await root.run_activity(body, frame, bindings=bindings)
+            except Exception as error:
+                root.report_task_error(line, error)
+                raise
+
+        return self.scheduler.schedule(run, interval, schedule_type == 'recurring')
+
+    def evaluate_function_declaration(self, node):
+        super().evaluate_function_declaration(node)
+        if node.name not in self.suspension.suspending_names:
+            return None
+        if node.slot is not None:
+            function = frame_at(self.frame, node.depth)[node.slot]
+        else:
+            function = self.memory_manager.get(node.name)
+        # Memoized functions are pure, so they never suspend; the others are awaited through call_declared
+        if isinstance(function, FunctionType):
+            function.coroutine = (node, self.frame)
+        return None
+
+    async def evaluate_async(self, node):
+        if id(node) not in self.suspension.nodes:
+            return self.evaluate(node)
+        if not self.running:
+            return None
+        handler = self.async_handlers.get(node.__class__)
+        if handler is None:
+            return self.evaluate(node)
+        return await handler(node)
+
+    async def evaluate_block_async(self, node):
+        for statement in node.body:
+            await self.evaluate_async(statement)
+
+    async def evaluate_if_async(self, node):
+        if await self.evaluate_async(node.condition):
+            return await self.evaluate_async(node.then_branch)
+        elif node.else_branch is not None:
+            return await self.evaluate_async(node.else_branch)
+
+    async def evaluate_while_async(self, node):
+        while await self.evaluate_async(node.condition):
+            await self.evaluate_async(node.body)
+
+    async def evaluate_for_async(self, node):
+        iterable = check_iterable(await self.evaluate_async(node.iterable), node.line)
+        if node.slot is not None:
+            frame = frame_at(self.frame, node.depth)
+            for value in iterable:
+                frame[node.slot] = value
+                await self.evaluate_async(node.body)
+        else:
+            for value in iterable:
+                self.memory_manager.allocate(node.identifier, value)
+                await self.evaluate_async(node.body)
+
+    async def evaluate_counted_loop_async(self, node):
+        condition, body, increment = node.condition, node.body, node.increment
+        if not node.fixed:
+            while await self.evaluate_async(condition):
+                await self.evaluate_async(body)
+                await self.evaluate_async(increment)
+            return None
+        variable = condition.left
+        values = counted_range(self.evaluate(variable), self.evaluate(condition.right),
+                               increment.value.right.value, condition.operator, condition.line)
+        value = UNBOUND
+        for value in values:
+            if not self.running:
+                return None
+            if variable.slot is not None:
+                frame_at(self.frame, variable.depth)[variable.slot] = value
+            else:
+                self.assign_global(variable.name, value)
+            await self.evaluate_async(body)
+        if value is not UNBOUND:
+            self.evaluate(increment)
+
+    async def evaluate_parallel_for_async(self, node):
+        """Run a parallel for loop whose body waits as one activity per iteration, so that the waits overlap."""
+        if self.process_backend is not None:
+            return self.evaluate_parallel_for(node)
+        values = loop_values(check_iterable(await self.evaluate_async(node.iterable), node.line))
+        before = self.reduction_values(node)
+        starts = [reduction_start(reduction.operator, value) for reduction, value in zip(node.reductions, before)]
+        activities = []
+        for value in values:
+            bindings = self.memory_manager.start_task()
+            activity = self.root.run_activity(node, self.frame, ([value], starts), bindings)
+            activities.append(self.start_activity(activity))
+        self.store_reductions(node, before, await asyncio.gather(*activities))
+
+    async def run_chunk_async(self, node, values, starts):
+        """The coroutine version of run_chunk."""
+        body = node.body
+        if node.frame_size is not None:
+            frame = [self.frame] + [UNBOUND] * node.frame_size
+            frame[2:len(starts) + 2] = starts
+            caller = self.frame
+            self.frame = frame
+            try:
+                for value in values:
+                    frame[1] = value
+                    await self.evaluate_async(body)
+            finally:
+                self.frame = caller
+            return frame[2:len(starts) + 2]
+        memory_manager = self.memory_manager
+        names = [reduction.identifier for reduction in node.reductions]
+        memory_manager.push_scope()
+        try:
+            for name, start in zip(names, starts):
+                memory_manager.bind(name, start)
+            for value in values:
+                memory_manager.bind(node.identifier, value)
+                await self.evaluate_async(body)
+            return [memory_manager.get(name) for name in names]
+        finally:
+            memory_manager.pop_scope()
+
+    async def evaluate_assignment_async(self, node):
+        value = await self.evaluate_async(node.value)
+        if node.slot is not None:
+            frame_at(self.frame, node.depth)[node.slot] = value
+        else:
+            self.assign_global(node.identifier, value)
+
+    async def evaluate_return_async(self, node):
+        raise ReturnValue(await self.evaluate_async(node.value))
+
+    async def evaluate_binary_operation_async(self, node):
+        left = await self.evaluate_async(node.left)
+        right = await self.evaluate_async(node.right)
+        if node.operand_type is not None:
+            return TYPED_OPERATIONS[node.operand_type][node.operator](left, right)
+        return binary_operation(node.operator, node.line)(left, right, node.line)
+
+    async def evaluate_function_call_async(self, node):
+        if node.slot is None:
+            function = self.memory_manager.get(node.name)
+        else:
+            function = frame_at(self.frame, node.depth)[node.slot]
+            if function is UNBOUND:
+                raise KeyError(f"Undefined variable: '{node.name}'")
+        if node.name == 'free' or not callable(function):
+            return self.evaluate_function_call(node)
+        arguments = [await self.evaluate_async(argument) for argument in node.arguments]
+        if function in ASYNC_VERSIONS:
+            return await ASYNC_VERSIONS[function](*arguments)
+        declared = getattr(function, 'coroutine', None)
+        if declared is not None:
+            return await self.call_declared(*declared, arguments)
+        return function(*arguments)
+
+    async def call_declared(self, declaration, parent, arguments):
+        """Await a call of a declared function whose body suspends."""
+        parameters, statements = declaration.parameters, declaration.body.body
+        result = None
+        if declaration.frame_size is None:
+            memory_manager = self.memory_manager
+            memory_manager.push_scope()
+            try:
+                for name, value in zip(parameters, arguments):
+                    memory_manager.bind(name, value)
+                for statement in statements:
+                    result = await self.evaluate_async(statement)
+            except ReturnValue as returned:
+                result = returned.value
+            finally:
+                memory_manager.pop_scope()
+        else:
+            frame = [parent] + [UNBOUND] * declaration.frame_size
+            bound = min(len(arguments), len(parameters))
+            frame[1:bound + 1] = arguments[:bound]
+            caller = self.frame
+            self.frame = frame
+            try:
+                for statement in statements:
+                    result = await self.evaluate_async(statement)
+            except ReturnValue as returned:
+                result = returned.value
+            finally:
+                self.frame = caller
+        if result.__class__ is TailCall:
+            return trampoline(result)  # A tail call that does not suspend
+        return result
@@ -0,0 +1,361 @@
+from parser.ast_nodes import (
+    ArrayAccess, AssignmentStatement, Block, BinaryOperation, Constant, CountedLoop, ForStatement, FunctionCall,
+    FunctionDeclaration, Identifier, IfStatement, LambdaExpression, ListLiteral, Literal, LoopInvariant,
+    NullLiteral, ResetInvariants, ReturnStatement, WhileStatement
+)
+from runtime.evaluator import UNBOUND
+from runtime.operations import BINARY_OPERATIONS, TYPED_OPERATIONS
+
+# Opcodes. Instructions are stored flat as [opcode, argument, opcode, argument, ...];
+# the numbering roughly follows how often the VM dispatch loop sees them.
+LOAD_LOCAL = 0        # push frame[arg]
+LOAD_CONST = 1        # push constants[arg]
+LOAD_GLOBAL = 2       # push the MemoryManager variable names[arg]
+BINARY_OP = 3         # pop right and left, push constants[arg] = (operation, line) applied to them
+STORE_LOCAL = 4       # frame[arg] = pop
+POP_JUMP_IF_FALSE = 5 # pop, jump to arg if falsy
+JUMP = 6              # jump to arg (backward jumps are loop edges)
+ASSIGN_GLOBAL = 7     # pop into names[arg] with assignment-statement semantics
+CALL = 8              # constants[arg] = (argument count, FunctionCall node); callee sits below the arguments
+RETURN_VALUE = 9      # pop and return from the current function (or code unit)
+POP = 10              # discard the top of the stack
+LOAD_DEREF = 11       # push an outer frame's slot, derefs[arg] = (depth, slot, name)
+STORE_DEREF = 12      # pop into an outer frame's slot
+STORE_NAME = 13       # pop into names[arg] with MemoryManager.allocate
+BUILD_LIST = 14       # pop arg values into a list
+INDEX = 15            # pop index and array, push the element; arg is the line constant
+GET_ITER = 16         # replace the top with an iterator over it; arg is the line constant
+FOR_ITER = 17         # push next(top), or pop the iterator and jump to arg when exhausted
+MAKE_FUNCTION = 18    # push a function built from the FunctionTemplate constants[arg]
+EVAL = 19             # push the tree-walker's value for the node constants[arg]
+# Specialized BINARY_OP forms with an inline fast path for two ints; any other
+# operands go through the shared operation, so results and errors are unchanged.
+BINARY_ADD = 20
+BINARY_SUBTRACT = 21
+COMPARE_LESS = 22
+
+# Loop optimizations (see semantic.optimizer)
+COUNTED_ITER = 23     # pop limit and start, push an iterator over runtime.operations.counted_range;
+                      # constants[arg] = (step, operator, line)
+LOAD_CACHED = 24      # constants[arg] = [slot, target]: if frame[slot] is set, push it and jump to target
+STORE_CACHED = 25     # frame[arg] = top, leaving it on the stack
+
+# Operands of known type (see semantic.type_inference)
+BINARY_TYPED = 26     # pop right and left, push constants[arg] (from TYPED_OPERATIONS) applied to them
+
+# Calls in tail position (see semantic.tail_calls.mark_tail_calls)
+TAIL_CALL = 27        # like CALL, but a VM function replaces the running call instead of nesting;
+                      # any other callee's value is pushed for the RETURN_VALUE that follows
+
+SPECIALIZED_OPERATORS = {'+': BINARY_ADD, '-': BINARY_SUBTRACT, '<': COMPARE_LESS}
+
+OPCODE_NAMES = {value: name for name, value in list(globals().items()) if name.isupper() and isinstance(value, int)}
+
+
+class FunctionTemplate:
+    """Everything needed to build a function value when its declaration runs."""
+    __slots__ = ('name', 'parameters', 'frame_size', 'code', 'declaration')
+
+    def __init__(self, name, parameters, frame_size, code, declaration=None):
+        self.name = name
+        self.parameters = parameters
+        self.frame_size = frame_size  # None: the body is unresolved and binds names in the MemoryManager
+        self.code = code
+        self.declaration = declaration  # The FunctionDeclaration node, None for lambdas
+
+
+class CodeObject:
+    """Compiled bytecode for a function body or a top-level statement."""
+    __slots__ = ('name', 'code', 'constants', 'names', 'derefs', 'slot_names')
+
+    def __init__(self, name):
+        self.name = name
+        self.code = []
+        self.constants = []
+        self.names = []
+        self.derefs = []
+        self.slot_names = {}  # slot -> variable name, for error messages
+
+    def disassemble(self):
+        """Return a readable listing, one instruction per line."""
+        lines = []
+        for offset in range(0, len(self.code), 2):
+            opcode, argument = self.code[offset], self.code[offset + 1]
+            lines.append(f'{offset:>5} {OPCODE_NAMES[opcode]:<18} {argument}')
+        return '\n'.join(lines)
+
+
+class Compiler:
+    """Compiles resolved (or unresolved) AST nodes into CodeObjects.
+
+    Locals annotated by semantic.scope_resolver.ScopeResolver become frame slot
+    accesses; every other name goes through the MemoryManager. Nodes the
+    compiler does not handle (classes, method calls, parallel and schedule
+    blocks, ...) compile to an EVAL instruction that hands them to the
+    tree-walker, so any program the Evaluator runs also compiles.
+    """
+
+    def __init__(self):
+        self.compilers = {
+            Literal: self.compile_literal,
+            Constant: self.compile_constant,
+            NullLiteral: self.compile_null,
+            Identifier: self.compile_identifier,
+            BinaryOperation: self.compile_binary_operation,
+            AssignmentStatement: self.compile_assignment,
+            FunctionCall: self.compile_function_call,
+            LambdaExpression: self.compile_lambda,
+            FunctionDeclaration: self.compile_function_declaration,
+            ReturnStatement: self.compile_return,
+            ListLiteral: self.compile_list_literal,
+            ArrayAccess: self.compile_array_access,
+            Block: self.compile_block,
+            IfStatement: self.compile_if,
+            WhileStatement: self.compile_while,
+            ForStatement: self.compile_for,
+            CountedLoop: self.compile_counted_loop,
+            LoopInvariant: self.compile_loop_invariant,
+            ResetInvariants: self.compile_reset_invariants,
+        }
+        self.unit = None
+        self.constant_map = None
+
+    def compile_statement(self, node):
+        """Compile a top-level statement into a code unit that returns its value."""
+        return self.compile_unit('<statement>', [node])
+
+    def compile_unit(self, name, statements):
+        outer = self.unit, self.constant_map
+        self.unit, self.constant_map = CodeObject(name), {}
+        try:
+            if not statements:
+                self.emit(LOAD_CONST, self.constant(None))
+            for index, statement in enumerate(statements):
+                self.compile(statement, keep=index == len(statements) - 1)
+            self.emit(RETURN_VALUE, 0)
+            return self.unit
+        finally:
+            self.unit, self.constant_map = outer
+
+    # Emission helpers
+
+    def emit(self, opcode, argument=0):
+        self.unit.code += (opcode, argument)
+        return len(self.unit.code) - 1  # Position of the argument, for patching jumps
+
+    def patch(self, position):
+        self.unit.code[position] = len(self.unit.code)
+
+    def constant(self, value):
+        # Plain values are shared within a unit; everything else gets its own entry
+        key = (value.__class__, value) if value is None or isinstance(value, (int, float, str)) else id(value)
+        index = self.constant_map.get(key)
+        if index is None:
+            constants = self.unit.constants
+            constants.append(value)
+            index = self.constant_map[key] = len(constants) - 1
+        return index
+
+    def name(self, name):
+        names = self.unit.names
+        if name not in names:
+            names.append(name)
+        return names.index(name)
+
+    def emit_load(self, name, depth, slot):
+        if slot is None:
+            self.emit(LOAD_GLOBAL, self.name(name))
+        elif depth == 0:
+            self.unit.slot_names[slot] = name
+            self.emit(LOAD_LOCAL, slot)
+        else:
+            self.unit.derefs.append((depth, slot, name))
+            self.emit(LOAD_DEREF, len(self.unit.derefs) - 1)
+
+    def emit_store(self, name, depth, slot, global_opcode):
+        if slot is None:
+            self.emit(global_opcode, self.name(name))
+        elif depth == 0:
+            self.unit.slot_names[slot] = name
+            self.emit(STORE_LOCAL, slot)
+        else:
+            self.unit.derefs.append((depth, slot, name))
+            self.emit(STORE_DEREF, len(self.unit.derefs) - 1)
+
+    # Nodes. With keep=True a node leaves exactly one value (what the
+    # tree-walker would return for it) on the stack; with keep=False, none.
+
+    def compile(self, node, keep=True):
+        compiler = self.compilers.get(node.__class__)
+        if compiler is None:
+            self.emit(EVAL, self.constant(node))
+            if not keep:
+                self.emit(POP)
+            return
+        compiler(node, keep)
+
+    def keep_none(self, keep):
+        if keep:
+            self.emit(LOAD_CONST, self.constant(None))
+
+    def discard(self, keep):
+        if not keep:
+            self.emit(POP)
+
+    def compile_literal(self, node, keep):
+        value = node.value
+        if isinstance(value, str) and value.startswith('"') and value.endswith('"'):
+            value = value[1:-1]  # Strip quotes from string literals
+        self.emit(LOAD_CONST, self.constant(value))
+        self.discard(keep)
+
+    def compile_constant(self, node, keep):
+        self.emit(LOAD_CONST, self.constant(node.value))
+        self.discard(keep)
+
+    def compile_null(self, node, keep):
+        self.keep_none(keep)
+
+    def compile_identifier(self, node, keep):
+        self.emit_load(node.name, node.depth, node.slot)
+        self.discard(keep)
+
+    def compile_binary_operation(self, node, keep):
+        operation = BINARY_OPERATIONS.get(node.operator)
+        if operation is None:
+            # Unknown operators fail at run time, after both operands, like they do in the tree-walker
+            self.emit(EVAL, self.constant(node))
+            self.discard(keep)
+            return
+        self.compile(node.left)
+        self.compile(node.right)
+        if node.operand_type is not None:
+            self.emit(BINARY_TYPED, self.constant(TYPED_OPERATIONS[node.operand_type][node.operator]))
+            self.discard(keep)
+            return
+        self.emit(SPECIALIZED_OPERATORS.get(node.operator, BINARY_OP), self.constant((operation, node.line)))
+        self.discard(keep)
+
+    def compile_assignment(self, node, keep):
+        self.compile(node.value)
+        self.emit_store(node.identifier, node.depth, node.slot, ASSIGN_GLOBAL)
+        self.keep_none(keep)
+
+    def compile_function_call(self, node, keep):
+        if node.name == 'free':
+            # free() receives the identifier node itself, not its value
+            self.emit(EVAL, self.constant(node))
+        else:
+            self.emit_load(node.name, node.depth, node.slot)
+            for argument in node.arguments:
+                self.compile(argument)
+            self.emit(CALL, self.constant((len(node.arguments), node)))
+        self.discard(keep)
+
+    def compile_lambda(self, node, keep):
+        template = FunctionTemplate('<lambda>', node.parameters, node.frame_size, self.compile_unit('<lambda>', [node.body]))
+        self.emit(MAKE_FUNCTION, self.constant(template))
+        self.discard(keep)
+
+    def compile_function_declaration(self, node, keep):
+        code = self.compile_unit(node.name, node.body.body)
+        template = FunctionTemplate(node.name, node.parameters, node.frame_size, code, declaration=node)
+        self.emit(MAKE_FUNCTION, self.constant(template))
+        self.emit_store(node.name, node.depth, node.slot, STORE_NAME)
+        self.keep_none(keep)
+
+    def compile_return(self, node, keep):
+        call = node.value
+        if node.tail and isinstance(call, FunctionCall):
+            self.emit_load(call.name, call.depth, call.slot)
+            for argument in call.arguments:
+                self.compile(argument)
+            self.emit(TAIL_CALL, self.constant((len(call.arguments), call)))
+        else:
+            self.compile(call)
+        self.emit(RETURN_VALUE)
+
+    def compile_list_literal(self, node, keep):
+        for element in node.elements:
+            self.compile(element)
+        self.emit(BUILD_LIST, len(node.elements))
+        self.discard(keep)
+
+    def compile_array_access(self, node, keep):
+        self.compile(node.array)
+        self.compile(node.index)
+        self.emit(INDEX, self.constant(node.line))
+        self.discard(keep)
+
+    def compile_block(self, node, keep):
+        for statement in node.body:
+            self.compile(statement, keep=False)
+        self.keep_none(keep)
+
+    def compile_if(self, node, keep):
+        self.compile(node.condition)
+        to_else = self.emit(POP_JUMP_IF_FALSE)
+        self.compile(node.then_branch, keep)
+        to_end = self.emit(JUMP)
+        self.patch(to_else)
+        if node.else_branch is not None:
+            self.compile(node.else_branch, keep)
+        else:
+            self.keep_none(keep)
+        self.patch(to_end)
+
+    def compile_while(self, node, keep):
+        start = len(self.unit.code)
+        self.compile(node.condition)
+        to_end = self.emit(POP_JUMP_IF_FALSE)
+        self.compile(node.body, keep=False)
+        self.emit(JUMP, start)
+        self.patch(to_end)
+        self.keep_none(keep)
+
+    def compile_for(self, node, keep):
+        self.compile(node.iterable)
+        self.emit(GET_ITER, self.constant(node.line))
+        start = len(self.unit.code)
+        to_end = self.emit(FOR_ITER)
+        self.emit_store(node.identifier, node.depth, node.slot, STORE_NAME)
+        self.compile(node.body, keep=False)
+        self.emit(JUMP, start)
+        self.patch(to_end)
+        self.keep_none(keep)
+
+    def compile_counted_loop(self, node, keep):
+        condition = node.condition
+        if node.fixed:
+            variable = condition.left
+            self.compile(variable)
+            self.compile(condition.right)
+            step = node.increment.value.right.value
+            self.emit(COUNTED_ITER, self.constant((step, condition.operator, condition.line)))
+            start = len(self.unit.code)
+            to_end = self.emit(FOR_ITER)
+            self.emit_store(variable.name, variable.depth, variable.slot, ASSIGN_GLOBAL)
+        else:
+            start = len(self.unit.code)
+            self.compile(condition)
+            to_end = self.emit(POP_JUMP_IF_FALSE)
+        self.compile(node.body, keep=False)
+        # The fixed form runs the increment too, so that i ends where the while loop would leave it
+        self.compile(node.increment, keep=False)
+        self.emit(JUMP, start)
+        self.patch(to_end)
+        self.keep_none(keep)
+
+    def compile_loop_invariant(self, node, keep):
+        cache = [node.slot, 0]
+        self.emit(LOAD_CACHED, self.constant(cache))
+        self.compile(node.expression)
+        self.emit(STORE_CACHED, node.slot)
+        cache[1] = len(self.unit.code)
+        self.discard(keep)
+
+    def compile_reset_invariants(self, node, keep):
+        for slot in node.slots:
+            self.emit(LOAD_CONST, self.constant(UNBOUND))
+            self.emit(STORE_LOCAL, slot)
+        self.keep_none(keep)
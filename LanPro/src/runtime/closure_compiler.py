@@ -0,0 +1,475 @@
+from parser.ast_nodes import (
+    ArrayAccess, AssignmentStatement, Block, BinaryOperation, ClassDeclaration, Constant, CountedLoop, ForStatement,
+    FunctionCall, FunctionDeclaration, Identifier, IfStatement, LambdaExpression, ListLiteral, Literal, LoopInvariant,
+    MemberAccess, MemberAssignment, MethodCall, NewExpression, NullLiteral, ResetInvariants, ReturnStatement,
+    WhileStatement
+)
+from runtime.evaluator import UNBOUND, Evaluator, ReturnValue, TailCall, frame_at, tail_calling
+from runtime.objects import LanProObject, find_method, get_field, get_member, set_field
+from runtime.operations import BINARY_OPERATIONS, TYPED_OPERATIONS, check_iterable, counted_range, index_array
+
+# Operators whose result for two plain ints can be computed directly,
+# skipping the type checks in runtime.operations
+INT_OPERATORS = {
+    '*': lambda x, y: x * y,
+    '>': lambda x, y: x > y,
+    '<=': lambda x, y: x <= y,
+    '>=': lambda x, y: x >= y,
+    '==': lambda x, y: x == y,
+    '!=': lambda x, y: x != y,
+}
+
+
+class ClosureCompiler:
+    """Compiles AST nodes into nested Python closures.
+
+    Each node becomes a function of the current call frame that returns what
+    the tree-walker would return for it, calling its children's closures
+    directly: dispatch on the node class and reading node fields happen once,
+    at compile time. Nodes without a compiler here are run by the evaluator's
+    tree-walker.
+    """
+
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+        self.compilers = {
+            Literal: self.compile_literal,
+            Constant: self.compile_constant,
+            NullLiteral: self.compile_null,
+            Identifier: self.compile_identifier,
+            BinaryOperation: self.compile_binary_operation,
+            AssignmentStatement: self.compile_assignment,
+            FunctionCall: self.compile_function_call,
+            LambdaExpression: self.compile_lambda,
+            FunctionDeclaration: self.compile_function_declaration,
+            ClassDeclaration: self.compile_class_declaration,
+            NewExpression: self.compile_new_expression,
+            MethodCall: self.compile_method_call,
+            MemberAccess: self.compile_member_access,
+            MemberAssignment: self.compile_member_assignment,
+            ReturnStatement: self.compile_return,
+            ListLiteral: self.compile_list_literal,
+            ArrayAccess: self.compile_array_access,
+            Block: self.compile_block,
+            IfStatement: self.compile_if,
+            WhileStatement: self.compile_while,
+            ForStatement: self.compile_for,
+            CountedLoop: self.compile_counted_loop,
+            LoopInvariant: self.compile_loop_invariant,
+            ResetInvariants: self.compile_reset_invariants,
+        }
+
+    def compile(self, node):
+        compiler = self.compilers.get(node.__class__)
+        if compiler is None:
+            return self.compile_fallback(node)
+        return compiler(node)
+
+    def compile_fallback(self, node):
+        evaluator = self.evaluator
+
+        def run(frame):
+            tree_walker = evaluator.for_thread()
+            caller, tree_walker.frame = tree_walker.frame, frame
+            try:
+                return tree_walker.evaluate(node)
+            finally:
+                tree_walker.frame = caller
+        return run
+
+    def compile_literal(self, node):
+        value = node.value
+        if isinstance(value, str) and value.startswith('"') and value.endswith('"'):
+            value = value[1:-1]  # Strip quotes from string literals
+        return lambda frame: value
+
+    def compile_constant(self, node):
+        value = node.value
+        return lambda frame: value
+
+    def compile_null(self, node):
+        return lambda frame: None
+
+    def compile_load(self, name, depth, slot):
+        if slot is None:
+            get = self.evaluator.memory_manager.get
+            return lambda frame: get(name)
+        if depth == 0:
+            def load_local(frame):
+                value = frame[slot]
+                if value is UNBOUND:
+                    raise KeyError(f"Undefined variable: '{name}'")
+                return value
+            return load_local
+
+        def load_outer(frame):
+            value = frame_at(frame, depth)[slot]
+            if value is UNBOUND:
+                raise KeyError(f"Undefined variable: '{name}'")
+            return value
+        return load_outer
+
+    def compile_store(self, name, depth, slot, store_global):
+        """Return store(frame, value) for a variable."""
+        if slot is None:
+            return lambda frame, value: store_global(name, value)
+        if depth == 0:
+            def store_local(frame, value):
+                frame[slot] = value
+            return store_local
+
+        def store_outer(frame, value):
+            frame_at(frame, depth)[slot] = value
+        return store_outer
+
+    def compile_identifier(self, node):
+        return self.compile_load(node.name, node.depth, node.slot)
+
+    def compile_binary_operation(self, node):
+        operator, line = node.operator, node.line
+        operation = BINARY_OPERATIONS.get(operator)
+        if operation is None:
+            return self.compile_fallback(node)  # Fails at run time, after both operands
+        left, right = self.compile(node.left), self.compile(node.right)
+        if node.operand_type is not None:
+            typed = TYPED_OPERATIONS[node.operand_type][operator]
+            return lambda frame: typed(left(frame), right(frame))
+        if operator == '+':
+            def add(frame):
+                a, b = left(frame), right(frame)
+                if a.__class__ is int and b.__class__ is int:
+                    return a + b
+                return operation(a, b, line)
+            return add
+        if operator == '-':
+            def subtract(frame):
+                a, b = left(frame), right(frame)
+                if a.__class__ is int and b.__class__ is int:
+                    return a - b
+                return operation(a, b, line)
+            return subtract
+        if operator == '<':
+            def less(frame):
+                a, b = left(frame), right(frame)
+                if a.__class__ is int and b.__class__ is int:
+                    return a < b
+                return operation(a, b, line)
+            return less
+        fast = INT_OPERATORS.get(operator)
+        if fast is not None:
+            def fast_operation(frame):
+                a, b = left(frame), right(frame)
+                if a.__class__ is int and b.__class__ is int:
+                    return fast(a, b)
+                return operation(a, b, line)
+            return fast_operation
+        return lambda frame: operation(left(frame), right(frame), line)
+
+    def compile_assignment(self, node):
+        value = self.compile(node.value)
+        if node.slot is not None and node.depth == 0:
+            slot = node.slot
+
+            def assign_local(frame):
+                frame[slot] = value(frame)
+            return assign_local
+        store = self.compile_store(node.identifier, node.depth, node.slot, self.evaluator.assign_global)
+
+        def assign(frame):
+            store(frame, value(frame))
+        return assign
+
+    def compile_function_call(self, node):
+        if node.name == 'free':
+            return self.compile_fallback(node)  # free() receives the identifier node itself
+        evaluator = self.evaluator
+        callee = self.compile_load(node.name, node.depth, node.slot)
+        arguments = tuple(self.compile(argument) for argument in node.arguments)
+
+        def call(frame):
+            function = callee(frame)
+            if callable(function):
+                return function(*[argument(frame) for argument in arguments])
+            return evaluator.evaluate_function(node.name, node.arguments, node.line)
+        if len(arguments) == 1:
+            argument, = arguments
+
+            def call_one(frame):
+                function = callee(frame)
+                if callable(function):
+                    return function(argument(frame))
+                return evaluator.evaluate_function(node.name, node.arguments, node.line)
+            return call_one
+        return call
+
+    def make_function(self, parameters, frame_size, body, parent, tail_calls=False):
+        """Build the Python callable for a compiled function or lambda created in frame `parent`."""
+        if frame_size is None:
+            # Unresolved body: parameters are bound in a MemoryManager scope
+            memory_manager = self.evaluator.memory_manager
+
+            def dynamic_function(*args):
+                memory_manager.push_scope()
+                try:
+                    for name, value in zip(parameters, args):
+                        memory_manager.bind(name, value)
+                    return body(None)
+                except ReturnValue as returned:
+                    return returned.value
+                finally:
+                    memory_manager.pop_scope()
+            if tail_calls:
+                return tail_calling(dynamic_function)
+            return dynamic_function
+
+        count = len(parameters)
+        template = [parent] + [UNBOUND] * frame_size
+
+        def function(*args):
+            frame = template.copy()
+            if len(args) == count:
+                frame[1:count + 1] = args
+            else:
+                bound = min(len(args), count)
+                frame[1:bound + 1] = args[:bound]
+            try:
+                return body(frame)
+            except ReturnValue as returned:
+                return returned.value
+        if tail_calls:
+            return tail_calling(function)
+        return function
+
+    def compile_body(self, statements):
+        """A function body: runs the statements and returns the last one's value."""
+        statements = tuple(self.compile(statement) for statement in statements)
+        if len(statements) == 1:
+            return statements[0]
+
+        def body(frame):
+            result = None
+            for statement in statements:
+                result = statement(frame)
+            return result
+        return body
+
+    def compile_lambda(self, node):
+        parameters, frame_size = node.parameters, node.frame_size
+        body = self.compile(node.body)
+        return lambda frame: self.make_function(parameters, frame_size, body, frame)
+
+    def compile_function_declaration(self, node):
+        evaluator = self.evaluator
+        parameters, frame_size = node.parameters, node.frame_size
+        body = self.compile_body(node.body.body)
+        store = self.compile_store(node.name, node.depth, node.slot, evaluator.memory_manager.allocate)
+
+        def declare(frame):
+            function = evaluator.memoize(node, self.make_function(parameters, frame_size, body, frame, node.tail_calls))
+            evaluator.functions[node.name] = {
+                'parameters': parameters,
+                'body': node.body,
+                'function': function,
+                'declaration': node
+            }
+            store(frame, function)
+        return declare
+
+    def compile_class_declaration(self, node):
+        evaluator = self.evaluator
+        methods = [(['self', *method.parameters], method.frame_size, self.compile_body(method.body.body))
+                   for method in node.methods]
+
+        def declare(frame):
+            evaluator.define_class(node, [self.make_function(parameters, frame_size, body, frame)
+                                          for parameters, frame_size, body in methods])
+        return declare
+
+    def compile_new_expression(self, node):
+        evaluator = self.evaluator
+        return lambda frame: evaluator.evaluate_new_expression(node)
+
+    # Inline caches: `cached` is the class of the last object seen, with the
+    # method or field index found for it, as in Evaluator.evaluate_method_call
+
+    def compile_method_call(self, node):
+        receiver = self.compile(node.object)
+        arguments = tuple(self.compile(argument) for argument in node.arguments)
+        member, line = node.member, node.line
+        cached = (None, None)
+
+        def method_call(frame):
+            nonlocal cached
+            obj = receiver(frame)
+            lanpro_class, method = cached
+            if obj.__class__ is not LanProObject or obj.lanpro_class is not lanpro_class:
+                method = find_method(obj, member, line)
+                cached = (obj.lanpro_class, method)
+            return method(obj, *[argument(frame) for argument in arguments])
+        return method_call
+
+    def compile_member_access(self, node):
+        receiver = self.compile(node.object)
+        member, line = node.member, node.line
+        cached = (None, None)
+
+        def member_access(frame):
+            nonlocal cached
+            obj = receiver(frame)
+            lanpro_class, index = cached
+            if obj.__class__ is LanProObject and obj.lanpro_class is lanpro_class:
+                return get_field(obj, index, member, line)
+            value = get_member(obj, member, line)
+            index = obj.lanpro_class.fields.get(member)
+            if index is not None:
+                cached = (obj.lanpro_class, index)
+            return value
+        return member_access
+
+    def compile_member_assignment(self, node):
+        receiver, value = self.compile(node.object), self.compile(node.value)
+        member, line = node.member, node.line
+        cached = (None, None)
+
+        def member_assignment(frame):
+            nonlocal cached
+            obj = receiver(frame)
+            result = value(frame)
+            lanpro_class, index = cached
+            if obj.__class__ is LanProObject and obj.lanpro_class is lanpro_class:
+                obj.values[index] = result
+            else:
+                index = set_field(obj, member, result, line)
+                cached = (obj.lanpro_class, index)
+        return member_assignment
+
+    def compile_return(self, node):
+        value = self.compile(node.value)
+        if node.tail and isinstance(node.value, FunctionCall):
+            call = node.value
+            callee = self.compile_load(call.name, call.depth, call.slot)
+            arguments = tuple(self.compile(argument) for argument in call.arguments)
+
+            def return_tail_call(frame):
+                function = callee(frame)
+                if callable(function):
+                    # Hand the call back to the function's wrapper instead of nesting it
+                    raise ReturnValue(TailCall(function, [argument(frame) for argument in arguments]))
+                raise ReturnValue(value(frame))
+            return return_tail_call
+
+        def return_value(frame):
+            raise ReturnValue(value(frame))
+        return return_value
+
+    def compile_list_literal(self, node):
+        elements = tuple(self.compile(element) for element in node.elements)
+        return lambda frame: [element(frame) for element in elements]
+
+    def compile_array_access(self, node):
+        array, index, line = self.compile(node.array), self.compile(node.index), node.line
+        return lambda frame: index_array(array(frame), index(frame), line)
+
+    def compile_block(self, node):
+        statements = tuple(self.compile(statement) for statement in node.body)
+
+        def block(frame):
+            for statement in statements:
+                statement(frame)
+        return block
+
+    def compile_if(self, node):
+        condition = self.compile(node.condition)
+        then_branch = self.compile(node.then_branch)
+        else_branch = self.compile(node.else_branch) if node.else_branch is not None else None
+
+        def if_statement(frame):
+            if condition(frame):
+                return then_branch(frame)
+            if else_branch is not None:
+                return else_branch(frame)
+        return if_statement
+
+    def compile_while(self, node):
+        evaluator = self.evaluator
+        condition, body = self.compile(node.condition), self.compile(node.body)
+
+        def while_statement(frame):
+            # Stopping tasks ends loops, as it does in the tree-walker
+            while evaluator.running and condition(frame):
+                body(frame)
+        return while_statement
+
+    def compile_for(self, node):
+        iterable, body, line = self.compile(node.iterable), self.compile(node.body), node.line
+        store = self.compile_store(node.identifier, node.depth, node.slot, self.evaluator.memory_manager.allocate)
+
+        def for_statement(frame):
+            for value in check_iterable(iterable(frame), line):
+                store(frame, value)
+                body(frame)
+        return for_statement
+
+
+    def compile_counted_loop(self, node):
+        evaluator = self.evaluator
+        condition, body, increment = self.compile(node.condition), self.compile(node.body), self.compile(node.increment)
+        if not node.fixed:
+            def counted_loop(frame):
+                while evaluator.running and condition(frame):
+                    body(frame)
+                    increment(frame)
+            return counted_loop
+        variable, operator, line = node.condition.left, node.condition.operator, node.condition.line
+        start, limit = self.compile(variable), self.compile(node.condition.right)
+        step = node.increment.value.right.value
+        store = self.compile_store(variable.name, variable.depth, variable.slot, evaluator.assign_global)
+
+        def fixed_loop(frame):
+            value = UNBOUND
+            for value in counted_range(start(frame), limit(frame), step, operator, line):
+                if not evaluator.running:
+                    return
+                store(frame, value)
+                body(frame)
+            if value is not UNBOUND:
+                increment(frame)  # Leaves i where the while loop would have
+        return fixed_loop
+
+    def compile_loop_invariant(self, node):
+        expression, slot = self.compile(node.expression), node.slot
+
+        def loop_invariant(frame):
+            value = frame[slot]
+            if value is UNBOUND:
+                value = frame[slot] = expression(frame)
+            return value
+        return loop_invariant
+
+    def compile_reset_invariants(self, node):
+        slots = node.slots
+
+        def reset_invariants(frame):
+            for slot in slots:
+                frame[slot] = UNBOUND
+        return reset_invariants
+
+
+class ClosureEvaluator(Evaluator):
+    """Runs programs by compiling each top-level statement into nested closures.
+
+    Same run(program) API, MemoryManager, builtins and debug output as
+    Evaluator; nodes the ClosureCompiler does not handle are tree-walked.
+    """
+
+    def __init__(self, memory_manager):
+        super().__init__(memory_manager)
+        self.compiler = ClosureCompiler(self)
+
+    def execute_statement(self, statement):
+        if not self.running:
+            return None
+        try:
+            return self.compiler.compile(statement)(self.frame)
+        except ReturnValue as returned:
+            return returned.value  # A top-level return just yields its value
@@ -0,0 +1,60 @@
+from runtime.operations import binary_operation
+
+# Operators a parallel for loop's reduce clause accepts
+REDUCTIONS = ('sum', 'min', 'max')
+
+# Fewest iterations a chunk gets (but the last), so that the cost of handing a
+# chunk to a worker stays small next to the work in it. A worker process has
+# to unpickle the loop and declare its functions again for every chunk.
+MIN_THREAD_CHUNK = 16
+MIN_PROCESS_CHUNK = 64
+
+
+def loop_values(iterable):
+    """The values of a parallel for loop as a sequence that can be sliced into chunks."""
+    if isinstance(iterable, (list, tuple, range)):
+        return iterable
+    return list(iterable)  # Iterators are read to the end first
+
+
+def guided_chunks(values, workers, minimum):
+    """Split values into chunks for `workers` workers to take one at a time.
+
+    Each chunk gets 1/(2 * workers) of the values still left (guided
+    scheduling). Chunks start large, so the per-chunk cost is paid rarely, and
+    shrink towards the end, so a worker that drew slow iterations finishes
+    about when the others run out of work instead of leaving them idle.
+    """
+    chunks = []
+    start, count = 0, len(values)
+    while start < count:
+        size = max(minimum, (count - start) // (2 * workers))
+        chunks.append(values[start:start + size])
+        start += size
+    return chunks
+
+
+def reduction_start(operator, value):
+    """What each chunk's copy of a reduction variable starts at, given the variable's value before the loop.
+
+    Sums start from the empty value of the variable's type, "" for a string
+    and 0 for a number, and are added to the variable at the end; min and
+    max start from the variable itself, which they may keep.
+    """
+    if operator != 'sum':
+        return value
+    return '' if isinstance(value, str) else 0
+
+
+def combine(operator, value, results, line):
+    """The final value of a reduction variable: its value before the loop combined with each chunk's result."""
+    if operator == 'sum':
+        add = binary_operation('+', line)
+        for result in results:
+            value = add(value, result, line)
+        return value
+    less = binary_operation('<', line)
+    for result in results:
+        if (less(result, value, line) if operator == 'min' else less(value, result, line)):
+            value = result
+    return value
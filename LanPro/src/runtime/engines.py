@@ -0,0 +1,24 @@
+from runtime.closure_compiler import ClosureEvaluator
+from runtime.evaluator import Evaluator
+from runtime.transpiler import TranspiledEvaluator
+from runtime.vm import VirtualMachine
+
+# Execution engines selectable with --engine. They share the Evaluator's
+# run(program) API, so they are interchangeable wherever an Evaluator is used.
+ENGINES = {
+    'tree': Evaluator,
+    'vm': VirtualMachine,
+    'closure': ClosureEvaluator,
+    'python': TranspiledEvaluator,
+}
+
+DEFAULT_ENGINE = 'tree'
+
+
+def create_engine(kind, memory_manager):
+    """Build an engine by name: 'tree' (the AST walker), 'vm' (bytecode) or 'closure' (compiled closures)
+    or 'python' (transpiled to Python source)."""
+    engine_class = ENGINES.get(kind)
+    if engine_class is None:
+        raise ValueError(f"Unknown engine '{kind}', expected one of: {', '.join(ENGINES)}")
+    return engine_class(memory_manager)
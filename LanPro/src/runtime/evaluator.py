@@ -1,24 +1,156 @@
 import asyncio
-import threading
-import time
+import copy
 from concurrent.futures import ThreadPoolExecutor, Future
 from threading import Timer
 from rich.console import Console
+from parser.ast_nodes import (
+    ArrayAccess, AssignmentStatement, Block, BinaryOperation, ClassDeclaration, Constant, CountedLoop, ForStatement,
+    FunctionCall, FunctionDeclaration, Identifier, IfStatement, LambdaExpression, ListLiteral, Literal,
+    LoopInvariant, MemberAccess, MemberAssignment, MethodCall, NewExpression, Node, NullLiteral, ParallelForStatement,
+    ParallelStatement, ResetInvariants, ReturnStatement, ScheduleStatement, WhileStatement, from_dict
+)
+from runtime.data_parallel import MIN_THREAD_CHUNK, combine, guided_chunks, loop_values, reduction_start
+from runtime.io_builtins import IO_BUILTINS
+from runtime.memoization import DEFAULT_MEMO_SIZE, MemoizedFunction
+from runtime.objects import (
+    LanProClass, LanProObject, field_layout, find_method, get_field, get_member, set_field
+)
+from runtime.operations import BUILTINS, TYPED_OPERATIONS, binary_operation, check_iterable, counted_range, index_array
+from runtime.quickening import (
+    INT_OPERATIONS, QUICKEN_BACKOFF, SPECIALIZED_NODES, DirectFunctionCall, IntBinaryOperation, LocalAssignment,
+    LocalIdentifier, QuickeningStats, warm_up
+)
+from runtime.scheduler import Scheduler, cancel_task
+from runtime.tail_calls import TailCall, tail_calling
+
+THREAD_WORKERS = 10  # Size of the thread pool parallel statements and parallel for loops share
+
+
+class ReturnValue(Exception):
+    """Raised by a return statement to unwind to the enclosing call."""
+
+    def __init__(self, value):
+        super().__init__()
+        self.value = value
+
+
+class Unbound:
+    """Type of UNBOUND. It unpickles to UNBOUND itself, so frames can be sent to worker processes."""
+    __slots__ = ()
+
+    def __reduce__(self):
+        return 'UNBOUND'
+
+    def __repr__(self):
+        return 'UNBOUND'
+
+
+# Marks a local slot that has not been assigned yet (or has been freed)
+UNBOUND = Unbound()
+
+
+def frame_at(frame, depth):
+    """Walk `depth` parent links up from a call frame."""
+    while depth:
+        frame = frame[0]
+        depth -= 1
+    return frame
+
 
 class Evaluator:
     def __init__(self, memory_manager):
         self.memory_manager = memory_manager
+        for name, builtin in {**BUILTINS, **IO_BUILTINS}.items():
+            memory_manager.allocate(name, builtin)
+        # commit() publishes the global writes of the task it runs in (see run_task)
+        memory_manager.allocate('commit', memory_manager.commit)
+        memory_manager.allocate('cancel', cancel_task)
+        memory_manager.allocate('stop_tasks', self.stop_tasks)
         self.functions = {}
         self.verbose = False
         self.debug = False
         self.classes = {}
-        self.thread_pool = ThreadPoolExecutor(max_workers=10)  # Limit concurrent threads
-        self.scheduled_tasks = []  # Keep track of scheduled tasks
+        self.thread_pool = ThreadPoolExecutor(max_workers=THREAD_WORKERS)  # Limit concurrent threads
+        # A runtime.parallel.ProcessBackend, when parallel blocks run in worker processes instead
+        self.process_backend = None
+        self.scheduler = Scheduler()  # Runs the bodies of schedule statements
         self.running = True  # Flag to control task execution
         self.console = Console()
+        # Call frame of the running function: [parent frame, local slots...], None at top level.
+        # Only programs resolved by semantic.scope_resolver.ScopeResolver use frames.
+        self.frame = None
+        # Hot nodes are rewritten in place into specialized ones (see runtime.quickening)
+        self.quicken = True
+        self.quickening = QuickeningStats()
+        # Functions declared `memoized`, by name, and the number of results each one keeps
+        self.memoized = {}
+        self.memo_size = DEFAULT_MEMO_SIZE
+        # Copies of this evaluator running tasks on other threads, by thread ident (see run_task)
+        self.task_evaluators = {}
+        self.root = self  # The evaluator a task's copy was made from
+        self.handlers = self.dispatch_table()
+
+    def dispatch_table(self):
+        # Dispatch on the node class instead of walking an if/elif chain of type names
+        return {
+            Literal: self.evaluate_literal,
+            Constant: self.evaluate_constant,
+            Identifier: self.evaluate_identifier,
+            NullLiteral: self.evaluate_null,
+            BinaryOperation: self.evaluate_binary_operation,
+            AssignmentStatement: self.evaluate_assignment,
+            FunctionCall: self.evaluate_function_call,
+            LambdaExpression: self.evaluate_lambda,
+            FunctionDeclaration: self.evaluate_function_declaration,
+            ClassDeclaration: self.evaluate_class_declaration,
+            NewExpression: self.evaluate_new_expression,
+            MethodCall: self.evaluate_method_call,
+            MemberAccess: self.evaluate_member_access,
+            MemberAssignment: self.evaluate_member_assignment,
+            ReturnStatement: self.evaluate_return,
+            ListLiteral: self.evaluate_list_literal,
+            ArrayAccess: self.evaluate_array_access,
+            Block: self.evaluate_block,
+            ParallelStatement: self.evaluate_parallel,
+            ParallelForStatement: self.evaluate_parallel_for,
+            ScheduleStatement: self.evaluate_schedule,
+            IfStatement: self.evaluate_if,
+            WhileStatement: self.evaluate_while,
+            ForStatement: self.evaluate_for,
+            CountedLoop: self.evaluate_counted_loop,
+            LoopInvariant: self.evaluate_loop_invariant,
+            ResetInvariants: self.evaluate_reset_invariants,
+            LocalIdentifier: self.evaluate_local_identifier,
+            LocalAssignment: self.evaluate_local_assignment,
+            IntBinaryOperation: self.evaluate_int_binary_operation,
+            DirectFunctionCall: self.evaluate_direct_call,
+        }
 
     def set_verbose(self, verbose):
         self.verbose = verbose
+        if verbose:
+            self.quicken = False  # Specialized nodes skip the step-by-step output
+
+    def set_quickening(self, enabled, count_runs=False):
+        """Turn quickening on or off; count_runs also counts the runs of specialized nodes."""
+        self.quicken = enabled
+        if count_runs and not self.quickening.counting_runs:
+            self.count_specialized_runs()
+
+    def count_specialized_runs(self):
+        for node_class in SPECIALIZED_NODES:
+            self.handlers[node_class] = self.quickening.counting(node_class.kind, self.handlers[node_class])
+
+    def specialize(self, node, specialized, cache=None):
+        node.cache = cache
+        node.__class__ = specialized
+        self.quickening.specialized[specialized.kind] += 1
+
+    def deoptimize(self, node, specialized):
+        """Turn a node whose specialization guard failed back into its generic class."""
+        node.__class__ = specialized.generic
+        node.cache = -QUICKEN_BACKOFF
+        self.quickening.misses[specialized.kind] += 1
 
     def set_debug(self, debug):
         self.debug = debug
@@ -27,35 +159,82 @@ class Evaluator:
     def stop_tasks(self):
         """Stop all scheduled tasks"""
         self.running = False
-        for task in self.scheduled_tasks:
-            if hasattr(task, 'cancel'):
-                task.cancel()
-        self.scheduled_tasks.clear()
+        for evaluator in [self.root, *self.task_evaluators.values()]:
+            evaluator.running = False
+        self.scheduler.cancel_all()
         self.console.print("[yellow]All scheduled tasks stopped[/yellow]")
 
-    def schedule_task(self, body, interval, schedule_type):
-        """Schedule a task to run either recurring or delayed"""
-        def task_wrapper():
-            if schedule_type == 'recurring':
-                while self.running:
-                    self.evaluate(body)
-                    time.sleep(interval)
-            else:  # delayed
-                time.sleep(interval)
-                if self.running:
-                    self.evaluate(body)
+    def schedule_task(self, body, interval, schedule_type, line=None):
+        """Schedule a task to run either recurring or delayed; returns its runtime.scheduler.ScheduledTask."""
+        frame = self.frame
+        root = self.root  # stop_tasks() stops it even if the task scheduling it has ended
+        memory_manager = self.memory_manager
+        bindings = memory_manager.call_bindings()
+
+        def run():
+            if not root.running:
+                return
+            memory_manager.start_task()
+            try:
+                root.run_task(body, frame, bindings=bindings)
+            except Exception as error:
+                root.report_task_error(line, error)
+                raise
 
-        task = threading.Thread(target=task_wrapper, daemon=True)
-        task.start()
-        self.scheduled_tasks.append(task)
-        return task
+        return self.scheduler.schedule(run, interval, schedule_type == 'recurring')
+
+    def report_task_error(self, line, error):
+        self.console.print(f"[bold red]Scheduled task at line {line or 'unknown'} stopped: {error}[/bold red]")
+
+    def task_copy(self, frame):
+        """A copy of this evaluator for a task on another thread, with its own current frame.
+
+        Everything else (functions, classes, the MemoryManager) is shared.
+        """
+        evaluator = copy.copy(self)
+        evaluator.frame = frame
+        evaluator.handlers = evaluator.dispatch_table()
+        if self.quickening.counting_runs:
+            evaluator.count_specialized_runs()
+        return evaluator
+
+    def for_thread(self):
+        """The evaluator running the current task, or self outside tasks."""
+        if self.task_evaluators:
+            return self.task_evaluators.get(self.memory_manager.task_key(), self)
+        return self
+
+    def run_task(self, node, frame, chunk=None, bindings=None):
+        """Evaluate node as a task on the calling thread, then commit its global writes.
+
+        The task gets its own evaluator, running on a copy of frame, and its
+        own MemoryManager scope (see runtime.memory_manager.TaskScope); the submitter has already counted
+        it with start_task(), which returned the bindings the task starts with.
+        If it fails, its uncommitted writes are dropped. For a parallel for
+        loop, chunk is the (values, starts) of the chunk to run, and the result
+        is the chunk's reduction values.
+        """
+        memory_manager = self.memory_manager
+        key = memory_manager.task_key()
+        task = memory_manager.enter_task(bindings, frame)
+        evaluator = self.task_evaluators[key] = self.task_copy(task.frame)
+        try:
+            result = evaluator.evaluate(node) if chunk is None else evaluator.run_chunk(node, *chunk)
+            task.commit()
+            return result
+        finally:
+            del self.task_evaluators[key]
+            memory_manager.leave_task()
 
     def evaluate(self, node):
         if not self.running:
             return None
-            
-        if self.verbose and isinstance(node, dict):
-            self.console.print(f"[magenta]Evaluating node: {node}[/magenta]")
+
+        handler = self.handlers.get(node.__class__)
+        if handler is not None:
+            if self.verbose:
+                self.console.print(f"[magenta]Evaluating node: {node}[/magenta]")
+            return handler(node)
 
         if isinstance(node, int):
             if self.verbose:
@@ -66,246 +245,546 @@ class Evaluator:
             if self.verbose:
                 self.console.print(f"[magenta]Evaluated identifier '{node}' to: {value}[/magenta]")
             return value
+        elif isinstance(node, Node):
+            return self.evaluate_control_structure(node)
         elif isinstance(node, dict):
-            node_type = node.get('type')
-            line = node.get('line')
-
-            if node_type == 'Literal':
-                value = node['value']
-                if isinstance(value, str) and value.startswith('"') and value.endswith('"'):
-                    result = value[1:-1]  # Strip quotes from string literals
-                else:
-                    result = value
-                if self.verbose:
-                    self.console.print(f"[magenta]Evaluated Literal to: {result}[/magenta]")
-                return result
-            elif node_type == 'Identifier':
-                result = self.memory_manager.get(node['name'])
-                if self.verbose:
-                    self.console.print(f"[magenta]Evaluated Identifier '{node['name']}' to: {result}[/magenta]")
-                return result
-            elif node_type == 'NULL':
-                if self.verbose:
-                    self.console.print("[magenta]Evaluated NULL to: None[/magenta]")
-                return None
-            elif node_type == 'BinaryOperation':
-                if self.verbose:
-                    self.console.print(f"[magenta]Evaluating BinaryOperation: {node['operator']}[/magenta]")
-                left = self.evaluate(node['left'])
-                right = self.evaluate(node['right'])
-                operator = node['operator']
-                if operator == '+':
-                    # Only allow string + string or number + number
-                    if isinstance(left, str) and isinstance(right, str):
-                        result = left + right
-                    elif isinstance(left, (int, float)) and isinstance(right, (int, float)):
-                        result = left + right
-                    else:
-                        raise ValueError(f"Type mismatch: Cannot add {type(left).__name__} and {type(right).__name__} at line {line}")
-                elif operator == '-':
-                    if isinstance(left, (int, float)) and isinstance(right, (int, float)):
-                        result = left - right
-                    else:
-                        raise ValueError(f"Type mismatch: Cannot subtract {type(right).__name__} from {type(left).__name__} at line {line}")
-                elif operator == '*':
-                    if isinstance(left, (int, float)) and isinstance(right, (int, float)):
-                        result = left * right
-                    else:
-                        raise ValueError(f"Type mismatch: Cannot multiply {type(left).__name__} and {type(right).__name__} at line {line}")
-                elif operator == '/':
-                    if isinstance(left, (int, float)) and isinstance(right, (int, float)):
-                        if right == 0:
-                            raise ValueError(f"Division by zero error for operation '{left} / {right}' at line {line}, where left = {left}")
-                        result = left / right
-                    else:
-                        raise ValueError(f"Type mismatch or division by zero: Cannot divide {type(left).__name__} by {type(right).__name__} at line {line}")
-                elif operator in ['<', '>', '<=', '>=', '==', '!=']:
-                    if isinstance(left, (int, float)) and isinstance(right, (int, float)):
-                        result = {
-                            '<': lambda x, y: x < y,
-                            '>': lambda x, y: x > y,
-                            '<=': lambda x, y: x <= y,
-                            '>=': lambda x, y: x >= y,
-                            '==': lambda x, y: x == y,
-                            '!=': lambda x, y: x != y
-                        }[operator](left, right)
-                    else:
-                        raise ValueError(f"Type mismatch: Cannot compare {type(left).__name__} and {type(right).__name__} at line {line}")
-                else:
-                    raise ValueError(f"Unknown operator: {operator} at line {line}")
-                if self.verbose:
-                    self.console.print(f"[magenta]Evaluated {left} {operator} {right} to: {result}[/magenta]")
-                return result
-            elif node_type == 'AssignmentStatement':
-                if self.verbose:
-                    self.console.print(f"[magenta]Assigning to '{node['identifier']}'[/magenta]")
-                value = self.evaluate(node['value'])
-                if value is None:
-                    if self.memory_manager.exists(node['identifier']):
-                        self.memory_manager.update(node['identifier'], None)
-                    else:
-                        self.memory_manager.allocate(node['identifier'], None)
-                else:
-                    self.memory_manager.allocate(node['identifier'], value)
-                if self.verbose:
-                    self.console.print(f"[magenta]Assigned value: {value} to '{node['identifier']}'[/magenta]")
-            elif node_type == 'FunctionCall':
-                if self.verbose:
-                    self.console.print(f"[magenta]Calling function '{node['name']}' with args: {node['arguments']}[/magenta]")
-                func = self.memory_manager.get(node['name'])
-                # Special-case for 'free': pass the identifier node itself, not its evaluated value
-                if node['name'] == 'free' and node['arguments']:
-                    return func(node['arguments'][0])
-                elif callable(func):
-                    evaluated_args = [self.evaluate(arg) for arg in node['arguments']]
-                    return func(*evaluated_args)
-                return self.evaluate_function(node['name'], node['arguments'], line)
-            elif node_type == 'LambdaExpression':
-                    # Return a callable lambda object (closure)
-                def lambda_func(*args):
-                    original_variables = self.memory_manager.variables.copy()
-                    for param, arg in zip(node['parameters'], args):
-                        self.memory_manager.allocate(param, arg)
-                    result = self.evaluate(node['body'])
-                    self.memory_manager.variables = original_variables
-                    return result                    
-                return lambda_func
-            elif node_type == 'FunctionDeclaration':
-                if self.verbose:
-                    self.console.print(f"[magenta]Declaring function '{node['name']}'[/magenta]")
-                # Define a callable function object
-                def user_function(*args):
-                    original_variables = self.memory_manager.variables.copy()
-                    for param, arg in zip(node['parameters'], args):
-                        self.memory_manager.allocate(param, arg)
-                    result = None
-                    for statement in node['body']['body']:
-                        result = self.evaluate(statement)
-                        # Handle return
-                        if isinstance(result, dict) and result.get('type') == 'Return':
-                            self.memory_manager.variables = original_variables
-                            return result['value']
-                    self.memory_manager.variables = original_variables
-                    return result
-                # Store in both self.functions and memory_manager for compatibility
-                self.functions[node['name']] = {
-                    'parameters': node['parameters'],
-                    'body': node['body']
-                }
-                self.memory_manager.allocate(node['name'], user_function)
-                return None
-            elif node_type == 'ClassDeclaration':
-                # Register the class and its methods
-                self.classes[node['name']] = {m['name']: m for m in node['methods']}
-                if self.verbose:
-                    console.print(f"[magenta]Registered class '{node['name']}' with methods: {list(self.classes[node['name']].keys())}[/magenta]")
+            # Dict ASTs from older tooling are converted once, then dispatched normally
+            return self.evaluate(from_dict(node))
+        else:
+            raise ValueError(f"Unknown node type: {type(node)}")
+
+    def evaluate_literal(self, node):
+        value = node.value
+        if isinstance(value, str) and value.startswith('"') and value.endswith('"'):
+            result = value[1:-1]  # Strip quotes from string literals
+        else:
+            result = value
+        if self.verbose:
+            self.console.print(f"[magenta]Evaluated Literal to: {result}[/magenta]")
+        return result
+
+    def evaluate_constant(self, node):
+        if self.verbose:
+            self.console.print(f"[magenta]Evaluated Constant to: {node.value}[/magenta]")
+        return node.value
+
+    def evaluate_identifier(self, node):
+        slot = node.slot
+        if slot is None:
+            result = self.memory_manager.get(node.name)
+        else:
+            if node.depth:
+                result = frame_at(self.frame, node.depth)[slot]
+            else:
+                result = self.frame[slot]
+                if self.quicken and warm_up(node):
+                    self.specialize(node, LocalIdentifier)
+            if result is UNBOUND:
+                raise KeyError(f"Undefined variable: '{node.name}'")
+        if self.verbose:
+            self.console.print(f"[magenta]Evaluated Identifier '{node.name}' to: {result}[/magenta]")
+        return result
+
+    def evaluate_local_identifier(self, node):
+        result = self.frame[node.slot]
+        if result is UNBOUND:
+            raise KeyError(f"Undefined variable: '{node.name}'")
+        return result
+
+    def evaluate_null(self, node):
+        if self.verbose:
+            self.console.print("[magenta]Evaluated NULL to: None[/magenta]")
+        return None
+
+    def evaluate_binary_operation(self, node):
+        line = node.line
+        if self.verbose:
+            self.console.print(f"[magenta]Evaluating BinaryOperation: {node.operator}[/magenta]")
+        left = self.evaluate(node.left)
+        right = self.evaluate(node.right)
+        operator = node.operator
+        if node.operand_type is not None:
+            result = TYPED_OPERATIONS[node.operand_type][operator](left, right)
+        else:
+            result = binary_operation(operator, line)(left, right, line)
+            if (self.quicken and left.__class__ is int and right.__class__ is int and operator in INT_OPERATIONS
+                    and warm_up(node)):
+                self.specialize(node, IntBinaryOperation)
+        if self.verbose:
+            self.console.print(f"[magenta]Evaluated {left} {operator} {right} to: {result}[/magenta]")
+        return result
+
+    def evaluate_int_binary_operation(self, node):
+        # Operands have run before, so they have handlers; calling them directly skips evaluate()
+        handlers = self.handlers
+        left, right = node.left, node.right
+        left = handlers[left.__class__](left)
+        right = handlers[right.__class__](right)
+        if left.__class__ is int and right.__class__ is int:
+            return INT_OPERATIONS[node.operator](left, right)
+        self.deoptimize(node, IntBinaryOperation)
+        return binary_operation(node.operator, node.line)(left, right, node.line)
+
+    def evaluate_assignment(self, node):
+        if self.verbose:
+            self.console.print(f"[magenta]Assigning to '{node.identifier}'[/magenta]")
+        value = self.evaluate(node.value)
+        if node.slot is not None:
+            frame_at(self.frame, node.depth)[node.slot] = value
+            if not node.depth and self.quicken and warm_up(node):
+                self.specialize(node, LocalAssignment)
+        else:
+            self.assign_global(node.identifier, value)
+        if self.verbose:
+            self.console.print(f"[magenta]Assigned value: {value} to '{node.identifier}'[/magenta]")
+
+    def evaluate_local_assignment(self, node):
+        value = node.value
+        self.frame[node.slot] = self.handlers[value.__class__](value)
+
+    def assign_global(self, name, value):
+        if value is None:
+            if self.memory_manager.exists(name):
+                self.memory_manager.update(name, None)
+            else:
+                self.memory_manager.allocate(name, None)
+        else:
+            self.memory_manager.allocate(name, value)
+
+    def evaluate_function_call(self, node):
+        if self.verbose:
+            self.console.print(f"[magenta]Calling function '{node.name}' with args: {node.arguments}[/magenta]")
+        if node.slot is None:
+            func = self.memory_manager.get(node.name)
+        else:
+            func = frame_at(self.frame, node.depth)[node.slot]
+            if func is UNBOUND:
+                raise KeyError(f"Undefined variable: '{node.name}'")
+        # Special-case for 'free': pass the identifier node itself, not its evaluated value
+        if node.name == 'free' and node.arguments:
+            target = node.arguments[0]
+            if isinstance(target, Identifier) and target.slot is not None:
+                frame_at(self.frame, target.depth)[target.slot] = UNBOUND
                 return None
-            elif node_type == 'NewExpression':
-                class_name = node['class']
-                if class_name not in self.classes:
-                    raise ValueError(f"Class '{class_name}' is not defined at line {node.get('line')}")
-                # Create a new object with a reference to its class methods
-                return {'__class__': class_name, '__methods__': self.classes[class_name]}
-            elif node_type == 'MethodCall':
-                obj = self.evaluate(node['object'])
-                method_name = node['member']
-                arguments = node['arguments']
-                if '__methods__' not in obj or method_name not in obj['__methods__']:
-                    raise ValueError(f"Method '{method_name}' not found on object of class '{obj.get('__class__', 'unknown')}' at line {line}")
-                method_def = obj['__methods__'][method_name]
-                original_variables = self.memory_manager.variables.copy()
-                self.memory_manager.allocate('self', obj)
-                for param, arg in zip(method_def['parameters'], arguments):
-                    self.memory_manager.allocate(param, self.evaluate(arg))
+            return func(target)
+        elif callable(func):
+            if self.quicken and warm_up(node):
+                self.specialize(node, DirectFunctionCall, func)
+            evaluated_args = [self.evaluate(arg) for arg in node.arguments]
+            return func(*evaluated_args)
+        return self.evaluate_function(node.name, node.arguments, node.line)
+
+    def evaluate_direct_call(self, node):
+        if node.slot is None:
+            func = self.memory_manager.get(node.name)
+        else:
+            func = frame_at(self.frame, node.depth)[node.slot]
+        if func is not node.cache:
+            self.deoptimize(node, DirectFunctionCall)
+            return self.evaluate_function_call(node)  # Looking the name up again has no side effects
+        handlers = self.handlers
+        return func(*[handlers[arg.__class__](arg) for arg in node.arguments])
+
+    def evaluate_lambda(self, node):
+        if node.frame_size is not None:
+            return self.make_closure(node.parameters, node.frame_size, node.body)
+        # Return a callable lambda object (closure)
+        def lambda_func(*args):
+            return self.call_in_scope(zip(node.parameters, args), node.body)
+        return lambda_func
+
+    def evaluate_function_declaration(self, node):
+        if self.verbose:
+            self.console.print(f"[magenta]Declaring function '{node.name}'[/magenta]")
+        if node.frame_size is not None:
+            user_function = self.memoize(node, self.make_closure(node.parameters, node.frame_size, node.body.body,
+                                                                 node.tail_calls))
+            self.functions[node.name] = {
+                'parameters': node.parameters,
+                'body': node.body,
+                'function': user_function,
+                'declaration': node
+            }
+            if node.slot is not None:
+                frame_at(self.frame, node.depth)[node.slot] = user_function
+            else:
+                self.memory_manager.allocate(node.name, user_function)
+            return None
+        # Define a callable function object
+        def user_function(*args):
+            return self.call_in_scope(zip(node.parameters, args), node.body.body)
+        if node.tail_calls:
+            user_function = tail_calling(user_function)
+        # Store in both self.functions and memory_manager for compatibility
+        self.functions[node.name] = {
+            'parameters': node.parameters,
+            'body': node.body,
+            'declaration': node
+        }
+        self.memory_manager.allocate(node.name, self.memoize(node, user_function))
+        return None
+
+    def memoize(self, node, function):
+        """Wrap the function built for a FunctionDeclaration in a result cache if it is declared `memoized`."""
+        if not node.memoized:
+            return function
+        memoized = MemoizedFunction(node.name, function, self.memo_size)
+        self.memoized[node.name] = memoized
+        return memoized
+
+    def make_closure(self, parameters, frame_size, body, tail_calls=False):
+        """Build a callable for a resolved function or lambda.
+
+        Each call gets a fresh frame: slot 0 links to the frame the function was
+        created in, parameters fill the next slots and the remaining locals start
+        out UNBOUND. `body` is either a list of statements or a single expression.
+        A function body that makes tail calls gets a tail_calling() wrapper.
+        """
+        parent = self.frame
+        count = len(parameters)
+        template = [parent] + [UNBOUND] * frame_size
+        statements = body if isinstance(body, list) else None
+        task_evaluators = self.task_evaluators
+        task_key = self.memory_manager.task_key
+
+        def closure(*args):
+            frame = template.copy()
+            bound = min(len(args), count)
+            frame[1:bound + 1] = args[:bound]
+            # Called from a task, the function runs on the task's evaluator
+            evaluator = task_evaluators.get(task_key(), self) if task_evaluators else self
+            caller = evaluator.frame
+            evaluator.frame = frame
+            try:
+                if statements is None:
+                    return evaluator.evaluate(body)
                 result = None
-                for stmt in method_def['body']['body']:
-                    result = self.evaluate(stmt)
-                self.memory_manager.variables = original_variables
+                for statement in statements:
+                    result = evaluator.evaluate(statement)
                 return result
-            elif node_type == 'ReturnStatement':
-                if self.verbose:
-                    self.console.print("[magenta]Evaluating return statement[/magenta]")
-                return self.evaluate(node['value'])
-            elif node_type == 'ListLiteral':
-                return [self.evaluate(element) for element in node['elements']]
-            elif node_type == 'ArrayAccess':
-                array = self.evaluate(node['array'])
-                index = self.evaluate(node['index'])
-                if not isinstance(array, (list, tuple)):
-                    raise ValueError(f"Cannot index into non-array type {type(array).__name__} at line {line}")
-                if not isinstance(index, int):
-                    raise ValueError(f"Array index must be an integer, got {type(index).__name__} at line {line}")
-                if index < 0 or index >= len(array):
-                    raise ValueError(f"Array index {index} out of bounds for array of length {len(array)} at line {line}")
-                return array[index]
-            elif node_type == 'Block':
-                if self.verbose:
-                    self.console.print("[magenta]Entering Block[/magenta]")
-                for statement in node['body']:
-                    result = self.evaluate(statement)
-                    if isinstance(result, dict) and result.get('type') == 'ReturnStatement':
-                        if self.verbose:
-                            self.console.print("[magenta]Exiting Block with return[/magenta]")
-                        return result
-                if self.verbose:
-                    self.console.print("[magenta]Exiting Block[/magenta]")
-            elif node_type == 'ParallelStatement':
-                if self.verbose:
-                    self.console.print("[magenta]Executing parallel block[/magenta]")
-                # Submit each statement in the block to run concurrently
-                futures = []
-                for statement in node['body']['body']:
-                    future = self.thread_pool.submit(self.evaluate, statement)
-                    futures.append(future)
-                return futures  # Return list of futures for result collection
-            elif node_type == 'ScheduleStatement':
-                if self.verbose:
-                    self.console.print("[magenta]Setting up scheduled task[/magenta]")
-                interval = self.evaluate(node['interval'])
-                if not isinstance(interval, (int, float)):
-                    raise ValueError(f"Schedule interval must be a number, got {type(interval).__name__} at line {line}")
-                self.schedule_task(node['body'], interval, node['schedule_type'])
-                return None
+            except ReturnValue as returned:
+                return returned.value
+            finally:
+                evaluator.frame = caller
+        if tail_calls:
+            return tail_calling(closure)
+        return closure
+
+    def call_in_scope(self, bindings, body):
+        """Run an unresolved call body in a new local scope on the MemoryManager's frame stack.
+
+        `bindings` are (parameter, value) pairs; `body` is either a list of
+        statements, whose last value is the result, or a single expression.
+        """
+        memory_manager = self.memory_manager
+        memory_manager.push_scope()
+        try:
+            for name, value in bindings:
+                memory_manager.bind(name, value)
+            if not isinstance(body, list):
+                return self.evaluate(body)
+            result = None
+            for statement in body:
+                result = self.evaluate(statement)
+            return result
+        except ReturnValue as returned:
+            return returned.value
+        finally:
+            memory_manager.pop_scope()
+
+    def evaluate_class_declaration(self, node):
+        self.define_class(node, [self.make_method(method) for method in node.methods])
+        if self.verbose:
+            self.console.print(f"[magenta]Registered class '{node.name}' with methods: {list(self.classes[node.name].methods)}[/magenta]")
+        return None
+
+    def make_method(self, method):
+        """Build the callable for a method; its first argument is the receiver."""
+        parameters = ['self', *method.parameters]
+        body = method.body.body
+        if method.frame_size is not None:
+            return self.make_closure(parameters, method.frame_size, body)
+        return lambda *args: self.call_in_scope(zip(parameters, args), body)
+
+    def define_class(self, node, methods):
+        """Register the class a ClassDeclaration declares; `methods` are its methods' callables, in order."""
+        methods = {method.name: function for method, function in zip(node.methods, methods)}
+        self.classes[node.name] = LanProClass(node.name, methods, field_layout(node))
+
+    def evaluate_new_expression(self, node):
+        lanpro_class = self.classes.get(node.class_name)
+        if lanpro_class is None:
+            raise ValueError(f"Class '{node.class_name}' is not defined at line {node.line}")
+        return LanProObject(lanpro_class)
+
+    # MethodCall, MemberAccess and MemberAssignment keep an inline cache in
+    # node.cache: the class of the last object they ran on, with the method or
+    # field index found for it. An object of the same class skips the lookup.
+
+    def evaluate_method_call(self, node):
+        obj = self.evaluate(node.object)
+        cache = node.cache
+        if cache is not None and obj.__class__ is LanProObject and obj.lanpro_class is cache[0]:
+            method = cache[1]
+        else:
+            method = find_method(obj, node.member, node.line)
+            node.cache = (obj.lanpro_class, method)
+        return method(obj, *[self.evaluate(arg) for arg in node.arguments])
+
+    def evaluate_member_access(self, node):
+        obj = self.evaluate(node.object)
+        cache = node.cache
+        if cache is not None and obj.__class__ is LanProObject and obj.lanpro_class is cache[0]:
+            return get_field(obj, cache[1], node.member, node.line)
+        value = get_member(obj, node.member, node.line)
+        index = obj.lanpro_class.fields.get(node.member)
+        if index is not None:
+            node.cache = (obj.lanpro_class, index)
+        return value
+
+    def evaluate_member_assignment(self, node):
+        obj = self.evaluate(node.object)
+        value = self.evaluate(node.value)
+        cache = node.cache
+        if cache is not None and obj.__class__ is LanProObject and obj.lanpro_class is cache[0]:
+            obj.values[cache[1]] = value
+        else:
+            index = set_field(obj, node.member, value, node.line)
+            node.cache = (obj.lanpro_class, index)
+        if self.verbose:
+            self.console.print(f"[magenta]Assigned value: {value} to field '{node.member}'[/magenta]")
+
+    def evaluate_return(self, node):
+        if self.verbose:
+            self.console.print("[magenta]Evaluating return statement[/magenta]")
+        call = node.value
+        if node.tail and isinstance(call, FunctionCall):
+            # Hand the call back to the function's wrapper instead of nesting it
+            if call.slot is None:
+                function = self.memory_manager.get(call.name)
             else:
-                return self.evaluate_control_structure(node)
+                function = frame_at(self.frame, call.depth)[call.slot]
+            if callable(function):
+                raise ReturnValue(TailCall(function, [self.evaluate(arg) for arg in call.arguments]))
+        raise ReturnValue(self.evaluate(call))
+
+    def evaluate_list_literal(self, node):
+        return [self.evaluate(element) for element in node.elements]
+
+    def evaluate_array_access(self, node):
+        array = self.evaluate(node.array)
+        index = self.evaluate(node.index)
+        return index_array(array, index, node.line)
+
+    def evaluate_block(self, node):
+        if self.verbose:
+            self.console.print("[magenta]Entering Block[/magenta]")
+        for statement in node.body:
+            result = self.evaluate(statement)
+            if isinstance(result, dict) and result.get('type') == 'ReturnStatement':
+                if self.verbose:
+                    self.console.print("[magenta]Exiting Block with return[/magenta]")
+                return result
+        if self.verbose:
+            self.console.print("[magenta]Exiting Block[/magenta]")
+
+    def evaluate_parallel(self, node):
+        if self.verbose:
+            self.console.print("[magenta]Executing parallel block[/magenta]")
+        if self.process_backend is not None:
+            return self.process_backend.run_block(self, node)
+        # Submit each statement in the block to run concurrently, each one as a task
+        futures = []
+        for statement in node.body.body:
+            bindings = self.memory_manager.start_task()
+            future = self.thread_pool.submit(self.run_task, statement, self.frame, None, bindings)
+            futures.append(future)
+        return futures  # Return list of futures for result collection
+
+    def evaluate_parallel_for(self, node):
+        """Run a parallel for loop in chunks, then fold the chunks' reduction values into the variables."""
+        if self.verbose:
+            self.console.print("[magenta]Executing parallel for loop[/magenta]")
+        values = loop_values(check_iterable(self.evaluate(node.iterable), node.line))
+        before = self.reduction_values(node)
+        starts = [reduction_start(reduction.operator, value) for reduction, value in zip(node.reductions, before)]
+        if self.process_backend is not None:
+            partials = self.process_backend.run_loop(self, node, values, starts)
         else:
-            raise ValueError(f"Unknown node type: {type(node)} at line {line}")
+            partials = self.run_chunks(node, values, starts)
+        self.store_reductions(node, before, partials)
+
+    def reduction_values(self, node):
+        """The values of a parallel for loop's reduction variables before the loop."""
+        values = []
+        for reduction in node.reductions:
+            if reduction.slot is None:
+                value = self.memory_manager.get(reduction.identifier)
+            else:
+                value = frame_at(self.frame, reduction.depth)[reduction.slot]
+                if value is UNBOUND:
+                    raise KeyError(f"Undefined variable: '{reduction.identifier}'")
+            values.append(value)
+        return values
+
+    def store_reductions(self, node, before, partials):
+        """Assign each reduction variable its value before the loop combined with the chunks' partial values."""
+        for index, reduction in enumerate(node.reductions):
+            value = combine(reduction.operator, before[index], [partial[index] for partial in partials], node.line)
+            if reduction.slot is not None:
+                frame_at(self.frame, reduction.depth)[reduction.slot] = value
+            else:
+                self.assign_global(reduction.identifier, value)
+
+    def run_chunks(self, node, values, starts):
+        """Run the chunks of a parallel for loop on the thread pool; returns each chunk's reduction values in order.
+
+        A loop inside a task runs its chunks one after another on the task's
+        thread: a task waiting for pool threads could hold the last free one.
+        """
+        chunks = guided_chunks(values, THREAD_WORKERS, MIN_THREAD_CHUNK)
+        if len(chunks) <= 1 or self.memory_manager.current_task() is not None:
+            return [self.run_chunk(node, chunk, starts) for chunk in chunks]
+        futures = []
+        for chunk in chunks:
+            bindings = self.memory_manager.start_task()
+            futures.append(self.thread_pool.submit(self.root.run_task, node, self.frame, (chunk, starts), bindings))
+        return [future.result() for future in futures]
+
+    def run_chunk(self, node, values, starts):
+        """Run the body of a parallel for loop over values, with private copies of the reduction variables.
+
+        Names the body binds stay local to the chunk; its writes to global
+        variables are committed with the task, like a parallel statement's.
+        """
+        body = node.body
+        if node.frame_size is not None:
+            # Slot 1 holds the loop variable and the next slots the reduction variables (see ScopeResolver)
+            frame = [self.frame] + [UNBOUND] * node.frame_size
+            frame[2:len(starts) + 2] = starts
+            caller = self.frame
+            self.frame = frame
+            try:
+                for value in values:
+                    if not self.running:
+                        break
+                    frame[1] = value
+                    self.evaluate(body)
+            finally:
+                self.frame = caller
+            return frame[2:len(starts) + 2]
+        memory_manager = self.memory_manager
+        names = [reduction.identifier for reduction in node.reductions]
+        memory_manager.push_scope()
+        try:
+            for name, start in zip(names, starts):
+                memory_manager.bind(name, start)
+            for value in values:
+                if not self.running:
+                    break
+                memory_manager.bind(node.identifier, value)
+                self.evaluate(body)
+            return [memory_manager.get(name) for name in names]
+        finally:
+            memory_manager.pop_scope()
+
+    def evaluate_schedule(self, node):
+        if self.verbose:
+            self.console.print("[magenta]Setting up scheduled task[/magenta]")
+        interval = self.evaluate(node.interval)
+        if not isinstance(interval, (int, float)):
+            raise ValueError(f"Schedule interval must be a number, got {type(interval).__name__} at line {node.line}")
+        if node.schedule_type == 'recurring' and interval <= 0:
+            raise ValueError(f"Schedule interval must be positive, got {interval} at line {node.line}")
+        return self.schedule_task(node.body, interval, node.schedule_type, node.line)  # The task's handle
 
     def evaluate_control_structure(self, node):
-        node_type = node.get('type')
-        line = node.get('line')
-        if node_type == 'IfStatement':
-            if self.verbose:
-                self.console.print("[magenta]Evaluating IfStatement condition[/magenta]")
-            condition = self.evaluate(node['condition'])
-            if condition:
-                if self.verbose:
-                    self.console.print("[magenta]Condition true, entering then branch[/magenta]")
-                return self.evaluate(node['thenBranch'])
-            elif node['elseBranch'] is not None:
-                if self.verbose:
-                    self.console.print("[magenta]Condition false, entering else branch[/magenta]")
-                return self.evaluate(node['elseBranch'])
-        elif node_type == 'WhileStatement':
-            if self.verbose:
-                self.console.print("[magenta]Entering WhileStatement loop[/magenta]")
-            while self.evaluate(node['condition']):
-                self.evaluate(node['body'])
+        if isinstance(node, IfStatement):
+            return self.evaluate_if(node)
+        elif isinstance(node, WhileStatement):
+            return self.evaluate_while(node)
+        elif isinstance(node, ForStatement):
+            return self.evaluate_for(node)
+        else:
+            raise ValueError(f"Unknown control structure type: {node['type']} at line {node.get('line')}")
+
+    def evaluate_if(self, node):
+        if self.verbose:
+            self.console.print("[magenta]Evaluating IfStatement condition[/magenta]")
+        condition = self.evaluate(node.condition)
+        if condition:
             if self.verbose:
-                self.console.print("[magenta]Exiting WhileStatement loop[/magenta]")
-        elif node_type == 'ForStatement':
+                self.console.print("[magenta]Condition true, entering then branch[/magenta]")
+            return self.evaluate(node.then_branch)
+        elif node.else_branch is not None:
             if self.verbose:
-                self.console.print("[magenta]Entering ForStatement loop[/magenta]")
-            iterable = self.evaluate(node['iterable'])
-            if not isinstance(iterable, (list, tuple, range)):
-                raise ValueError(f"For loop expects an iterable, got {type(iterable).__name__} at line {line}")
+                self.console.print("[magenta]Condition false, entering else branch[/magenta]")
+            return self.evaluate(node.else_branch)
+
+    def evaluate_while(self, node):
+        if self.verbose:
+            self.console.print("[magenta]Entering WhileStatement loop[/magenta]")
+        while self.evaluate(node.condition):
+            self.evaluate(node.body)
+        if self.verbose:
+            self.console.print("[magenta]Exiting WhileStatement loop[/magenta]")
+
+    def evaluate_for(self, node):
+        if self.verbose:
+            self.console.print("[magenta]Entering ForStatement loop[/magenta]")
+        iterable = check_iterable(self.evaluate(node.iterable), node.line)
+        if node.slot is not None:
+            frame = frame_at(self.frame, node.depth)
             for value in iterable:
-                self.memory_manager.allocate(node['identifier'], value)
-                self.evaluate(node['body'])
-            if self.verbose:
-                self.console.print("[magenta]Exiting ForStatement loop[/magenta]")
+                frame[node.slot] = value
+                self.evaluate(node.body)
         else:
-            raise ValueError(f"Unknown control structure type: {node_type} at line {line}")
+            for value in iterable:
+                self.memory_manager.allocate(node.identifier, value)
+                self.evaluate(node.body)
+        if self.verbose:
+            self.console.print("[magenta]Exiting ForStatement loop[/magenta]")
+
+    def evaluate_counted_loop(self, node):
+        if self.verbose:
+            self.console.print("[magenta]Entering CountedLoop[/magenta]")
+        condition, body, increment = node.condition, node.body, node.increment
+        if not node.fixed:
+            while self.evaluate(condition):
+                self.evaluate(body)
+                self.evaluate(increment)
+            return None
+        variable = condition.left
+        values = counted_range(self.evaluate(variable), self.evaluate(condition.right),
+                               increment.value.right.value, condition.operator, condition.line)
+        value = UNBOUND
+        if variable.slot is not None:
+            frame, slot = frame_at(self.frame, variable.depth), variable.slot
+            for value in values:
+                if not self.running:
+                    return None
+                frame[slot] = value
+                self.evaluate(body)
+        else:
+            for value in values:
+                if not self.running:
+                    return None
+                self.assign_global(variable.name, value)
+                self.evaluate(body)
+        if value is not UNBOUND:
+            self.evaluate(increment)  # Leaves i where the while loop would have
+        if self.verbose:
+            self.console.print("[magenta]Exiting CountedLoop[/magenta]")
+
+    def evaluate_loop_invariant(self, node):
+        value = self.frame[node.slot]
+        if value is UNBOUND:
+            value = self.frame[node.slot] = self.evaluate(node.expression)
+        return value
+
+    def evaluate_reset_invariants(self, node):
+        for slot in node.slots:
+            self.frame[slot] = UNBOUND
 
     def evaluate_function(self, function_name, arguments, line):
         if self.verbose:
@@ -318,13 +797,10 @@ class Evaluator:
         elif function_name == "input":
             prompt = self.evaluate(arguments[0]) if arguments else ""
             return input(prompt)
-        elif function_name == "stop_tasks":
-            self.stop_tasks()
-            return None
         elif function_name == "free":
-            if len(arguments) != 1 or not isinstance(arguments[0], dict) or arguments[0]['type'] != 'Identifier':
+            if len(arguments) != 1 or not isinstance(arguments[0], Identifier):
                 raise ValueError(f"free() expects a single variable name as argument at line {line}")
-            var_name = arguments[0]['name']
+            var_name = arguments[0].name
             self.memory_manager.deallocate(var_name)
         elif function_name == "help":
             help_text = """
@@ -355,48 +831,57 @@ Running scripts:
             if len(arguments) != len(parameters):
                 raise ValueError(f"Function '{function_name}' expects {len(parameters)} arguments, but got {len(arguments)} at line {line}")
 
+            if 'function' in function:
+                return function['function'](*[self.evaluate(arg) for arg in arguments])
             if self.verbose:
                 self.console.print(f"[magenta]Setting up function '{function_name}' with parameters: {parameters}[/magenta]")
-            original_variables = self.memory_manager.variables.copy()
-            for param, arg in zip(parameters, arguments):
-                self.memory_manager.allocate(param, self.evaluate(arg))
-
-            result = None
-            for statement in body['body']:
-                result = self.evaluate(statement)
-
-            self.memory_manager.variables = original_variables
+            result = self.call_in_scope(zip(parameters, [self.evaluate(arg) for arg in arguments]), body.body)
             if self.verbose:
                 self.console.print(f"[magenta]Function '{function_name}' returned: {result}[/magenta]")
             return result
         else:
             raise ValueError(f"Unknown function: {function_name} at line {line}")
 
+    def execute_statement(self, statement):
+        """Run one top-level statement and return its value."""
+        try:
+            return self.evaluate(statement)
+        except ReturnValue as returned:
+            return returned.value  # A top-level return just yields its value
+
     def run(self, program):
+        if isinstance(program, dict):
+            program = from_dict(program)
         all_futures = []  # Store all parallel execution futures
-        for statement in program['body']:
+        result = None
+        for statement in program.body:
             if self.verbose:
                 self.console.print(f"[magenta]Running statement: {statement}[/magenta]")
-            result = self.evaluate(statement)
+            result = self.execute_statement(statement)
             if isinstance(result, Future):
                 all_futures.append(result)
             elif isinstance(result, list) and all(isinstance(f, Future) for f in result):
                 all_futures.extend(result)
-            if self.debug:
-                self.console.print("[yellow]Debug: Variable States:[/yellow]")
-                for var_name, info in self.memory_manager.variables.items():
-                    if var_name not in self.memory_manager.deleted_vars:
-                        self.console.print(f"[yellow]  {var_name} = {info['value']} (ref_count: {info['ref_count']})[/yellow]")
-                self.console.print(f"[yellow]Debug: Memory Usage - Active Variables: {len([v for v in self.memory_manager.variables if v not in self.memory_manager.deleted_vars])}[/yellow]")
-                self.console.print(f"[yellow]Debug: Deleted Variables: {self.memory_manager.deleted_vars}[/yellow]")
-            else:
-                self.console.print("[yellow]Debug Mode Off: Skipping variable states and memory usage[/yellow]")
-            self.memory_manager.run_gc()
-            if self.verbose:
-                self.console.print("[magenta]Garbage collection completed[/magenta]")
+            self.finish_statement()
         
         # Wait for all parallel executions to complete
         for future in all_futures:
             future.result()  # This will raise any exceptions that occurred in the parallel blocks
+        return result  # Value of the last top-level statement
+
+    def finish_statement(self):
+        """Debug output and garbage collection after each top-level statement."""
+        if self.debug:
+            self.console.print("[yellow]Debug: Variable States:[/yellow]")
+            for var_name, info in list(self.memory_manager.variables.items()):
+                if var_name not in self.memory_manager.deleted_vars:
+                    self.console.print(f"[yellow]  {var_name} = {info['value']} (ref_count: {info['ref_count']})[/yellow]")
+            self.console.print(f"[yellow]Debug: Memory Usage - Active Variables: {len([v for v in self.memory_manager.variables if v not in self.memory_manager.deleted_vars])}[/yellow]")
+            self.console.print(f"[yellow]Debug: Deleted Variables: {self.memory_manager.deleted_vars}[/yellow]")
+        else:
+            self.console.print("[yellow]Debug Mode Off: Skipping variable states and memory usage[/yellow]")
+        self.memory_manager.run_gc()
+        if self.verbose:
+            self.console.print("[magenta]Garbage collection completed[/magenta]")
 
 from rich.panel import Panel
\ No newline at end of file
@@ -0,0 +1,84 @@
+import asyncio
+import shlex
+import subprocess
+import time
+
+# Characters read_file() reads before letting other activities run, in asyncio mode
+READ_CHUNK = 64 * 1024
+
+
+def check_seconds(seconds):
+    if isinstance(seconds, bool) or not isinstance(seconds, (int, float)):
+        raise ValueError(f"sleep() expects a number of seconds, got {type(seconds).__name__}")
+    if seconds < 0:
+        raise ValueError(f"sleep() expects a non-negative number of seconds, got {seconds}")
+
+
+def check_string(function, value):
+    if not isinstance(value, str):
+        raise ValueError(f"{function}() expects a string, got {type(value).__name__}")
+
+
+def command_output(command, returncode, output, errors):
+    if returncode != 0:
+        raise ValueError(f"Command '{command}' failed with exit code {returncode}: {errors.strip()}")
+    return output
+
+
+def lanpro_sleep(seconds):
+    """sleep(seconds): pause the running statement."""
+    check_seconds(seconds)
+    time.sleep(seconds)
+
+
+def read_file(path):
+    """read_file(path): the contents of a UTF-8 text file."""
+    check_string('read_file', path)
+    with open(path, encoding='utf-8') as file:
+        return file.read()
+
+
+def run_process(command):
+    """run_process(command): run a command (split like a shell would, but without one) and return its output."""
+    check_string('run_process', command)
+    completed = subprocess.run(shlex.split(command), capture_output=True, text=True)
+    return command_output(command, completed.returncode, completed.stdout, completed.stderr)
+
+
+async def sleep_async(seconds):
+    check_seconds(seconds)
+    await asyncio.sleep(seconds)
+
+
+async def read_file_async(path):
+    # Regular files cannot be waited on, so the file is read in chunks with other activities running in between
+    check_string('read_file', path)
+    chunks = []
+    with open(path, encoding='utf-8') as file:
+        while chunk := file.read(READ_CHUNK):
+            chunks.append(chunk)
+            await asyncio.sleep(0)
+    return ''.join(chunks)
+
+
+async def run_process_async(command):
+    check_string('run_process', command)
+    process = await asyncio.create_subprocess_exec(*shlex.split(command), stdout=asyncio.subprocess.PIPE,
+                                                   stderr=asyncio.subprocess.PIPE)
+    output, errors = await process.communicate()
+    return command_output(command, process.returncode, output.decode(), errors.decode())
+
+
+# Builtins every engine provides. They block the thread they run on.
+IO_BUILTINS = {
+    'sleep': lanpro_sleep,
+    'read_file': read_file,
+    'run_process': run_process,
+}
+
+# What runtime.async_evaluator.AsyncEvaluator awaits instead when an activity calls one of them
+ASYNC_VERSIONS = {
+    lanpro_sleep: sleep_async,
+    read_file: read_file_async,
+    run_process: run_process_async,
+}
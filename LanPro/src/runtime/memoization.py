@@ -0,0 +1,122 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+from runtime.tail_calls import TailCall
+
+# Results kept per memoized function unless --memo-size says otherwise
+DEFAULT_MEMO_SIZE = 1024
+
+# What ResultCache.cache_info() returns, with the fields of functools.lru_cache's
+CacheInfo = namedtuple('CacheInfo', ('hits', 'misses', 'maxsize', 'currsize'))
+
+MISSING = object()
+
+
+class ResultCache:
+    """A bounded LRU cache of results keyed by argument tuples, counting hits and misses like functools.lru_cache.
+
+    Unlike lru_cache it can be looked up and filled separately, which a
+    trampoline step needs (see MemoizedFunction.tail_step).
+    """
+    __slots__ = ('entries', 'maxsize', 'hits', 'misses', 'lock')
+
+    def __init__(self, maxsize):
+        self.entries = OrderedDict()
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()  # Memoized functions can be called from several tasks at once
+
+    def get(self, key):
+        with self.lock:
+            result = self.entries.get(key, MISSING)
+            if result is MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        with self.lock:
+            if self.maxsize <= 0:
+                return
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def cache_info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.entries))
+
+
+def result_key(arguments):
+    """The cache key of a call: arguments are compared by type as well as value. None if one is unhashable."""
+    key = (*arguments, *[argument.__class__ for argument in arguments])
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class MemoizedFunction:
+    """A function declared `memoized`, with its results kept in a bounded LRU cache.
+
+    The semantic analyzer has checked that the function is pure (see
+    semantic.purity), so a call with the same arguments returns the same value.
+    Arguments are compared by type as well as value, since True and 1 behave
+    differently in LanPro. Calls with an unhashable argument, such as a list,
+    are not cached.
+    """
+    __slots__ = ('name', 'function', 'step', 'cached', 'uncached')
+
+    def __init__(self, name, function, size):
+        self.name = name
+        self.function = function
+        # One run of the body, which may hand back a TailCall (see runtime.tail_calls.tail_calling)
+        self.step = getattr(function, 'tail_step', function)
+        self.cached = ResultCache(size)
+        self.uncached = 0
+
+    def __call__(self, *arguments):
+        key = result_key(arguments)
+        if key is None:
+            self.uncached += 1
+            return self.function(*arguments)
+        result = self.cached.get(key)
+        if result is MISSING:
+            result = self.function(*arguments)
+            self.cached.put(key, result)
+        return result
+
+    def tail_step(self, *arguments):
+        """A trampoline's step for a tail call of this function: the cached result, or one run of the body.
+
+        Only results the body returns directly are cached here; a call that
+        ends in a further tail call is cached by the call that started the
+        trampoline, if that was a call of this function.
+        """
+        key = result_key(arguments)
+        if key is None:
+            self.uncached += 1
+            return self.step(*arguments)
+        result = self.cached.get(key)
+        if result is MISSING:
+            result = self.step(*arguments)
+            if result.__class__ is not TailCall:
+                self.cached.put(key, result)
+        return result
+
+    def __str__(self):
+        info = self.cached.cache_info()
+        lookups = info.hits + info.misses
+        hit_rate = info.hits / lookups if lookups else 0.0
+        evicted = info.misses - info.currsize
+        return (f"{self.name}: {info.hits} hits, {info.misses} misses ({hit_rate:.1%} hit rate),"
+                f" {info.currsize}/{info.maxsize} entries, {evicted} evicted, {self.uncached} uncached")
+
+
+def memo_report(functions):
+    lines = ['Memoization:']
+    lines.extend(f'  {function}' for function in functions)
+    return '\n'.join(lines)
@@ -1,58 +1,382 @@
+import threading
+from threading import get_ident
+
+# Globals are guarded by one of this many locks, picked by the variable's name,
+# so threads writing different variables rarely wait for each other
+LOCK_STRIPES = 16
+
+
+class TaskScope:
+    """One task's view of a MemoryManager: a parallel statement or a run of a scheduled task.
+
+    The task has call frames of its own: names bound by the functions it calls
+    live in `local`, and its frame stack records what they shadowed, as in
+    MemoryManager. A global the task writes is copied into `writes` first and
+    changed there (copy-on-write), so other threads never see a half-finished
+    task's changes. commit() publishes them. Reads look at the task's own
+    bindings and copies first, then at the shared globals. A task started
+    inside a call of a resolved function runs on a copy of that call's frame
+    (see semantic.scope_resolver), and commit() writes the slots it changed
+    back to the call's frame as well.
+    """
+
+    def __init__(self, memory_manager, bindings=None, frame=None):
+        self.memory_manager = memory_manager
+        # Names bound by the task's calls -> {'value', 'ref_count'}, starting
+        # with private copies of the ones bound where the task was started
+        self.local = {name: entry.copy() for name, entry in bindings.items()} if bindings else {}
+        # The frame the task was started in, the task's copy of it, and the copy's slots when last committed
+        self.shared_frame = frame
+        self.frame = None if frame is None else frame[:]
+        self.frame_base = None if frame is None else frame[:]
+        self.frames = []
+        self.writes = {}     # Copies of the globals the task changed
+        self.bases = {}      # Reference count of each global when it was copied
+        self.freed = set()   # Globals the task deallocated
+
+    def push_scope(self):
+        self.frames.append({})
+
+    def pop_scope(self):
+        local = self.local
+        for name, entry in self.frames.pop().items():
+            if entry is None:
+                local.pop(name, None)
+            else:
+                local[name] = entry
+
+    def save(self, name):
+        frame = self.frames[-1]
+        if name not in frame:
+            frame[name] = self.local.get(name)
+
+    def bind(self, name, value):
+        if self.frames:
+            self.save(name)
+        self.local[name] = {'value': value, 'ref_count': 1}
+
+    def find(self, name):
+        """The task's own entry for name, or None if it reads the shared one."""
+        entry = self.local.get(name)
+        if entry is None:
+            entry = self.writes.get(name)
+            if entry is None and name in self.freed:
+                raise ValueError(f"Variable '{name}' has been deleted.")
+        return entry
+
+    def copy(self, name):
+        """Copy a global into `writes`; returns the copy, or None if there is no such global."""
+        shared = self.memory_manager.variables.get(name)
+        if shared is None or name in self.freed:
+            return None
+        entry = self.writes[name] = shared.copy()
+        self.bases[name] = entry['ref_count']
+        return entry
+
+    def allocate(self, name, value):
+        entry = self.local.get(name) or self.writes.get(name) or self.copy(name)
+        if entry is not None:
+            entry['value'] = value
+            entry['ref_count'] += 1
+        elif self.frames:
+            self.save(name)  # A new name is local to the running call
+            self.local[name] = {'value': value, 'ref_count': 1}
+        else:
+            self.writes[name] = {'value': value, 'ref_count': 1}
+            self.bases.setdefault(name, 0)
+
+    def deallocate(self, name):
+        entry = self.local.get(name)
+        if entry is not None:
+            entry['ref_count'] -= 1
+            if entry['ref_count'] <= 0:
+                if self.frames:
+                    self.save(name)
+                del self.local[name]
+            return
+        entry = self.writes.get(name) or self.copy(name)
+        if entry is None:
+            raise KeyError(f"Variable '{name}' is not defined and cannot be deallocated.")
+        entry['ref_count'] -= 1
+        if entry['ref_count'] <= 0:
+            del self.writes[name]
+            self.freed.add(name)
+
+    def update(self, name, value):
+        entry = self.local.get(name) or self.writes.get(name) or self.copy(name)
+        if entry is None:
+            if name in self.freed:
+                raise ValueError(f"Variable '{name}' has been deleted and cannot be updated.")
+            raise KeyError(f"Undefined variable: '{name}'")
+        entry['value'] = value
+
+    def commit(self):
+        """Publish the task's global writes, each one under its variable's lock.
+
+        Values replace the shared ones: when two tasks assign the same
+        variable, the last to commit wins. Reference counts are merged by
+        adding the task's change, so concurrent increments are never lost.
+        Changed slots of the task's frame are written back the same way.
+        """
+        frame = self.frame
+        if frame is not None:
+            shared, base = self.shared_frame, self.frame_base
+            for slot in range(1, len(frame)):  # Slot 0 is the parent frame, which is not copied
+                value = frame[slot]
+                if value is not base[slot]:
+                    shared[slot] = base[slot] = value
+        memory_manager = self.memory_manager
+        variables = memory_manager.variables
+        for name in self.freed - self.writes.keys():
+            with memory_manager.lock_for(name):
+                if variables.pop(name, None) is not None:
+                    memory_manager.deleted_vars.add(name)
+        for name, entry in self.writes.items():
+            with memory_manager.lock_for(name):
+                shared = variables.get(name)
+                if shared is None or name in self.freed:  # New, or freed and assigned again
+                    variables[name] = entry
+                    memory_manager.deleted_vars.discard(name)
+                else:
+                    shared['value'] = entry['value']
+                    shared['ref_count'] += entry['ref_count'] - self.bases[name]
+        self.writes.clear()
+        self.bases.clear()
+        self.freed.clear()
+
+
 class MemoryManager:
     def __init__(self):
         self.variables = {}  # Dictionary to store variables and their reference counts
         self.deleted_vars = set()  # Set to track deleted variables
+        # Names bound by the calls running outside tasks, kept apart from the
+        # globals in `variables`, which tasks read. `local` always holds the
+        # current bindings; each frame records what the names it touched were
+        # bound to before the call (None if they were unbound), so popping it
+        # restores the caller's view.
+        self.local = {}
+        self.frames = []
+        # Running tasks, by task_key(): the thread ident, or the asyncio task
+        # under runtime.async_evaluator (see TaskScope). While there are any,
+        # writes from outside tasks take the variable's lock.
+        self.tasks = {}
+        self.task_key = get_ident
+        self.active_tasks = 0
+        self.tasks_lock = threading.Lock()
+        self.locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def lock_for(self, name):
+        return self.locks[hash(name) % LOCK_STRIPES]
+
+    def current_task(self):
+        """The TaskScope of the running task, or None outside tasks."""
+        if self.active_tasks:
+            return self.tasks.get(self.task_key())
+        return None
+
+    def start_task(self):
+        """Count a task that is about to be handed to another thread; call before submitting it.
+
+        Returns call_bindings(), for the task to start from.
+        """
+        bindings = self.call_bindings()
+        with self.tasks_lock:
+            self.active_tasks += 1
+        return bindings
+
+    def call_bindings(self):
+        """A copy of the names bound by the calls the current thread or task is in.
+
+        A task started inside a call of an unresolved function sees that call's
+        parameters and locals, as the statements around it do.
+        """
+        task = self.current_task()
+        local = self.local if task is None else task.local
+        return {name: entry.copy() for name, entry in local.items()}
+
+    def enter_task(self, bindings=None, frame=None):
+        """Give the running task a TaskScope of its own; the task has been counted by start_task().
+
+        bindings are the call_bindings() of the code that started it, and frame
+        the call frame it was started in (None at top level); the task runs on
+        the TaskScope's copy of that frame.
+        """
+        task = self.tasks[self.task_key()] = TaskScope(self, bindings, frame)
+        return task
+
+    def leave_task(self):
+        """End the running task; writes not committed by then are dropped."""
+        del self.tasks[self.task_key()]
+        with self.tasks_lock:
+            self.active_tasks -= 1
+
+    def commit(self):
+        """Publish the running task's global writes. Does nothing on the main thread."""
+        task = self.current_task()
+        if task is not None:
+            task.commit()
+
+    def push_scope(self):
+        """Enter a function call: names bound from here on are local to it."""
+        task = self.current_task()
+        if task is not None:
+            return task.push_scope()
+        self.frames.append({})
+
+    def pop_scope(self):
+        """Leave a function call, undoing its local bindings in O(names it bound)."""
+        task = self.current_task()
+        if task is not None:
+            return task.pop_scope()
+        local = self.local
+        for name, entry in self.frames.pop().items():
+            if entry is None:
+                local.pop(name, None)
+            else:
+                local[name] = entry
+
+    def save(self, name):
+        """Remember the caller's binding of name so pop_scope can restore it."""
+        frame = self.frames[-1]
+        if name not in frame:
+            frame[name] = self.local.get(name)
+
+    def bind(self, name, value):
+        """Bind a parameter in the current call frame, shadowing any outer variable of that name."""
+        task = self.current_task()
+        if task is not None:
+            return task.bind(name, value)
+        if not self.frames:
+            self.deleted_vars.discard(name)
+            self.variables[name] = {'value': value, 'ref_count': 1}
+            return
+        self.save(name)
+        self.local[name] = {'value': value, 'ref_count': 1}
 
     def allocate(self, name, value):
         """Allocate a new variable or update an existing one with a reference count."""
-        if name in self.deleted_vars:
-            self.deleted_vars.remove(name)
-            print(f"Variable '{name}' has been reused.")
+        lock = None
+        if self.active_tasks:
+            task = self.tasks.get(self.task_key())
+            if task is not None:
+                return task.allocate(name, value)
+        if self.frames:
+            entry = self.local.get(name)
+            if entry is not None:
+                entry['value'] = value
+                entry['ref_count'] += 1
+                return
+        if self.active_tasks:
+            lock = self.lock_for(name)
+            lock.acquire()
+        try:
+            if name in self.deleted_vars:
+                self.deleted_vars.remove(name)
+                print(f"Variable '{name}' has been reused.")
 
-        if name in self.variables:
-            self.variables[name]['value'] = value
-            self.variables[name]['ref_count'] += 1
-        else:
-            self.variables[name] = {'value': value, 'ref_count': 1}
+            entry = self.variables.get(name)
+            if entry is not None:
+                entry['value'] = value
+                entry['ref_count'] += 1
+            elif self.frames:
+                self.save(name)  # A new name is local to the running call
+                self.local[name] = {'value': value, 'ref_count': 1}
+            else:
+                self.variables[name] = {'value': value, 'ref_count': 1}
+        finally:
+            if lock is not None:
+                lock.release()
 
     def deallocate(self, name):
         """Deallocate a variable and mark it as deleted."""
-        if name in self.variables:
-            self.variables[name]['ref_count'] -= 1
-            if self.variables[name]['ref_count'] <= 0:
+        lock = None
+        if self.active_tasks:
+            task = self.tasks.get(self.task_key())
+            if task is not None:
+                return task.deallocate(name)
+        if self.frames:
+            entry = self.local.get(name)
+            if entry is not None:
+                entry['ref_count'] -= 1
+                if entry['ref_count'] <= 0:
+                    self.save(name)
+                    del self.local[name]
+                return
+        if self.active_tasks:
+            lock = self.lock_for(name)
+            lock.acquire()
+        try:
+            entry = self.variables.get(name)
+            if entry is None:
+                raise KeyError(f"Variable '{name}' is not defined and cannot be deallocated.")
+            entry['ref_count'] -= 1
+            if entry['ref_count'] <= 0:
                 del self.variables[name]
                 self.deleted_vars.add(name)
-        else:
-            raise KeyError(f"Variable '{name}' is not defined and cannot be deallocated.")
+        finally:
+            if lock is not None:
+                lock.release()
 
     def get(self, name):
         """Retrieve the value of a variable."""
+        task = None
+        if self.active_tasks:
+            task = self.tasks.get(self.task_key())
+            if task is not None:
+                entry = task.find(name)
+                if entry is not None:
+                    return entry['value']
+        if task is None and self.frames:
+            entry = self.local.get(name)
+            if entry is not None:
+                return entry['value']
         if name in self.deleted_vars:
             raise ValueError(f"Variable '{name}' has been deleted.")
-        if name not in self.variables:
+        entry = self.variables.get(name)
+        if entry is None:
             raise KeyError(f"Undefined variable: '{name}'")
-        return self.variables[name]['value']
+        return entry['value']
 
     def update(self, name, value):
         """Update the value of an existing variable."""
+        task = self.current_task()
+        if task is not None:
+            return task.update(name, value)
+        entry = self.local.get(name)
+        if entry is not None:
+            entry['value'] = value
+            return
         if name in self.deleted_vars:
             raise ValueError(f"Variable '{name}' has been deleted and cannot be updated.")
-        if name not in self.variables:
+        entry = self.variables.get(name)
+        if entry is None:
             raise KeyError(f"Undefined variable: '{name}'")
-        self.variables[name]['value'] = value
+        entry['value'] = value
 
     def cleanup(self):
         """Clear all variables and reset the deleted variables tracker."""
         self.variables.clear()
         self.deleted_vars.clear()
+        self.local.clear()
+        self.frames.clear()
 
     def exists(self, name):
         """Check if a variable exists and is not deleted."""
+        task = self.current_task()
+        if task is not None:
+            try:
+                if task.find(name) is not None:
+                    return True
+            except ValueError:
+                return False
+        elif name in self.local:
+            return True
         return name in self.variables and name not in self.deleted_vars
 
     def run_gc(self):
         """Run garbage collection to remove variables with zero reference count."""
-        to_remove = [name for name, info in self.variables.items() if info['ref_count'] <= 0]
+        to_remove = [name for name, info in list(self.variables.items()) if info['ref_count'] <= 0]
         for name in to_remove:
-            del self.variables[name]
-            self.deleted_vars.add(name)
\ No newline at end of file
+            with self.lock_for(name):
+                if self.variables.pop(name, None) is not None:
+                    self.deleted_vars.add(name)
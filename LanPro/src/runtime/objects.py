@@ -0,0 +1,145 @@
+from parser.ast_nodes import Identifier, MemberAssignment, Node
+
+# Marks a field that has not been assigned yet
+UNSET = object()
+
+
+def field_layout(declaration):
+    """Map each field of a ClassDeclaration's instances to its index in LanProObject.values.
+
+    The fields are the names the methods assign through `self.name = ...`, in
+    the order they first appear. Like Python's __slots__, no others can be set.
+    """
+    fields = {}
+
+    def collect(node):
+        if isinstance(node, list):
+            for item in node:
+                collect(item)
+        elif isinstance(node, Node):
+            if (node.__class__ is MemberAssignment and node.object.__class__ is Identifier
+                    and node.object.name == 'self'):
+                fields.setdefault(node.member, len(fields))
+            for name in node.fields:
+                collect(getattr(node, name))
+    collect(declaration.methods)
+    return fields
+
+
+class LanProClass:
+    """A class: its methods and the field layout of its instances.
+
+    Methods are callables taking the receiver as their first argument. They
+    are built once, when the class declaration runs.
+    """
+    __slots__ = ('name', 'methods', 'fields')
+
+    def __init__(self, name, methods, fields):
+        self.name = name
+        self.methods = methods  # Method name -> callable(receiver, *arguments)
+        self.fields = fields    # Field name -> index in LanProObject.values
+
+    def __repr__(self):
+        return f'<class {self.name}>'
+
+
+class LanProObject:
+    """An instance: one value per field of its class, stored by index."""
+    __slots__ = ('lanpro_class', 'values')
+
+    def __init__(self, lanpro_class):
+        self.lanpro_class = lanpro_class
+        self.values = [UNSET] * len(lanpro_class.fields)
+
+    def __repr__(self):
+        return f'<{self.lanpro_class.name} object>'
+
+
+class BoundMethod:
+    """A method read through MemberAccess (`obj.method`), with its receiver bound."""
+    __slots__ = ('receiver', 'function')
+
+    def __init__(self, receiver, function):
+        self.receiver = receiver
+        self.function = function
+
+    def __call__(self, *arguments):
+        return self.function(self.receiver, *arguments)
+
+    def __repr__(self):
+        return f'<bound method of {self.receiver!r}>'
+
+
+def class_of(obj, member, line):
+    if obj.__class__ is not LanProObject:
+        raise ValueError(f"Cannot access member '{member}' of non-object type {type(obj).__name__} at line {line}")
+    return obj.lanpro_class
+
+
+def get_field(obj, index, name, line):
+    value = obj.values[index]
+    if value is UNSET:
+        raise ValueError(f"Field '{name}' of {obj.lanpro_class.name} object has not been set at line {line}")
+    return value
+
+
+def get_member(obj, name, line):
+    """Value of `obj.name`: a field, or else a bound method."""
+    lanpro_class = class_of(obj, name, line)
+    index = lanpro_class.fields.get(name)
+    if index is not None:
+        return get_field(obj, index, name, line)
+    method = lanpro_class.methods.get(name)
+    if method is None:
+        raise ValueError(f"Object of class '{lanpro_class.name}' has no member '{name}' at line {line}")
+    return BoundMethod(obj, method)
+
+
+def set_field(obj, name, value, line):
+    """Run `obj.name = value`; returns the field's index."""
+    lanpro_class = class_of(obj, name, line)
+    index = lanpro_class.fields.get(name)
+    if index is None:
+        raise ValueError(f"Class '{lanpro_class.name}' has no field '{name}' at line {line}")
+    obj.values[index] = value
+    return index
+
+
+def find_method(obj, name, line):
+    """The callable behind `obj.name(...)`; it takes obj as its first argument."""
+    if obj.__class__ is LanProObject:
+        method = obj.lanpro_class.methods.get(name)
+        if method is not None:
+            return method
+        class_name = obj.lanpro_class.name
+    else:
+        class_name = type(obj).__name__
+    raise ValueError(f"Method '{name}' not found on object of class '{class_name}' at line {line}")
+
+
+def iterate_object(obj, line):
+    """What a for loop over an object walks through.
+
+    An object is iterable when its class has an iterator() method, whose
+    result is walked instead (a list or range, say, or another object), or
+    when it is an iterator itself: has_next() says whether there is another
+    value and next() returns it. Values are asked for one at a time, as the
+    loop needs them.
+    """
+    methods = obj.lanpro_class.methods
+    iterator = methods.get('iterator')
+    if iterator is not None:
+        obj = iterator(obj)
+        if obj.__class__ is not LanProObject:
+            return obj  # Checked by the caller like any other iterable
+        methods = obj.lanpro_class.methods
+    has_next, next_value = methods.get('has_next'), methods.get('next')
+    if has_next is None or next_value is None:
+        raise ValueError(f"For loop expects an iterable, got {obj.lanpro_class.name} object without"
+                         f" iterator() or has_next() and next() methods at line {line}")
+    return _object_values(obj, has_next, next_value)
+
+
+def _object_values(obj, has_next, next_value):
+    while has_next(obj):
+        yield next_value(obj)
@@ -0,0 +1,151 @@
+# LanPro's value semantics, shared by every execution engine so that type
+# mismatches, division by zero and bad indexing fail the same way (with the same
+# messages) whether a program is tree-walked, compiled to bytecode or otherwise.
+
+import operator
+from collections.abc import Iterator
+
+from runtime.objects import LanProObject, iterate_object
+
+NUMBER_TYPES = (int, float)
+
+
+def add(left, right, line):
+    # Only allow string + string or number + number
+    if isinstance(left, str) and isinstance(right, str):
+        return left + right
+    if isinstance(left, NUMBER_TYPES) and isinstance(right, NUMBER_TYPES):
+        return left + right
+    raise ValueError(f"Type mismatch: Cannot add {type(left).__name__} and {type(right).__name__} at line {line}")
+
+
+def subtract(left, right, line):
+    if isinstance(left, NUMBER_TYPES) and isinstance(right, NUMBER_TYPES):
+        return left - right
+    raise ValueError(f"Type mismatch: Cannot subtract {type(right).__name__} from {type(left).__name__} at line {line}")
+
+
+def multiply(left, right, line):
+    if isinstance(left, NUMBER_TYPES) and isinstance(right, NUMBER_TYPES):
+        return left * right
+    raise ValueError(f"Type mismatch: Cannot multiply {type(left).__name__} and {type(right).__name__} at line {line}")
+
+
+def divide(left, right, line):
+    if isinstance(left, NUMBER_TYPES) and isinstance(right, NUMBER_TYPES):
+        if right == 0:
+            raise ValueError(f"Division by zero error for operation '{left} / {right}' at line {line}, where left = {left}")
+        return left / right
+    raise ValueError(f"Type mismatch or division by zero: Cannot divide {type(left).__name__} by {type(right).__name__} at line {line}")
+
+
+def comparison(compare):
+    def operation(left, right, line):
+        if isinstance(left, NUMBER_TYPES) and isinstance(right, NUMBER_TYPES):
+            return compare(left, right)
+        raise ValueError(f"Type mismatch: Cannot compare {type(left).__name__} and {type(right).__name__} at line {line}")
+    return operation
+
+
+BINARY_OPERATIONS = {
+    '+': add,
+    '-': subtract,
+    '*': multiply,
+    '/': divide,
+    '<': comparison(lambda x, y: x < y),
+    '>': comparison(lambda x, y: x > y),
+    '<=': comparison(lambda x, y: x <= y),
+    '>=': comparison(lambda x, y: x >= y),
+    '==': comparison(lambda x, y: x == y),
+    '!=': comparison(lambda x, y: x != y),
+}
+
+
+# Operations on operands whose types are known in advance (see
+# semantic.type_inference), so none of the checks above are needed. Division is
+# left out: it still has to check for zero.
+TYPED_OPERATIONS = {
+    'int': {
+        '+': operator.add,
+        '-': operator.sub,
+        '*': operator.mul,
+        '<': operator.lt,
+        '>': operator.gt,
+        '<=': operator.le,
+        '>=': operator.ge,
+        '==': operator.eq,
+        '!=': operator.ne,
+    },
+    'str': {
+        '+': operator.add,
+    },
+}
+
+
+def binary_operation(operator, line):
+    """Return the function implementing operator, or raise for an unknown one."""
+    operation = BINARY_OPERATIONS.get(operator)
+    if operation is None:
+        raise ValueError(f"Unknown operator: {operator} at line {line}")
+    return operation
+
+
+def index_array(array, index, line):
+    if not isinstance(array, (list, tuple)):
+        raise ValueError(f"Cannot index into non-array type {type(array).__name__} at line {line}")
+    if not isinstance(index, int):
+        raise ValueError(f"Array index must be an integer, got {type(index).__name__} at line {line}")
+    if index < 0 or index >= len(array):
+        raise ValueError(f"Array index {index} out of bounds for array of length {len(array)} at line {line}")
+    return array[index]
+
+
+def check_iterable(iterable, line):
+    """What a for loop over `iterable` walks through.
+
+    Lists, tuples and ranges are walked as they are, and so are the Python
+    iterators builtins may return. Objects follow the iterator protocol of
+    runtime.objects.iterate_object.
+    """
+    if iterable.__class__ is LanProObject:
+        iterable = iterate_object(iterable, line)
+    if not isinstance(iterable, (list, tuple, range, Iterator)):
+        raise ValueError(f"For loop expects an iterable, got {type(iterable).__name__} at line {line}")
+    return iterable
+
+
+def lanpro_range(*arguments):
+    """The range(stop), range(start, stop) and range(start, stop, step) builtin.
+
+    Returns a Python range, so a for loop over it produces each int as it
+    goes instead of building a list first.
+    """
+    if not 1 <= len(arguments) <= 3:
+        raise ValueError(f"range expects 1 to 3 arguments, got {len(arguments)}")
+    for argument in arguments:
+        if argument.__class__ is not int:
+            raise ValueError(f"range expects int arguments, got {type(argument).__name__}")
+    if len(arguments) == 3 and arguments[2] == 0:
+        raise ValueError("range step cannot be zero")
+    return range(*arguments)
+
+
+# Builtins every engine defines; the CLI adds print, input and free
+BUILTINS = {'range': lanpro_range}
+
+
+def counted_range(start, limit, step, operator, line):
+    """The values i takes in `while (i < limit) { ...; i = i + step; }` when nothing else changes i or limit.
+
+    operator is the condition's '<' or '<='. Ints get a range(); anything else
+    is compared and added step by step, so it fails like the loop would.
+    """
+    if start.__class__ is int and limit.__class__ is int:
+        return range(start, limit + 1 if operator == '<=' else limit, step)
+    return _counted_values(start, limit, step, BINARY_OPERATIONS[operator], line)
+
+
+def _counted_values(value, limit, step, compare, line):
+    while compare(value, limit, line):
+        yield value
+        value = add(value, step, line)
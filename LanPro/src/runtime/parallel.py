@@ -0,0 +1,300 @@
+import io
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+from rich.console import Console
+
+from parser.ast_nodes import (
+    AssignmentStatement, ForStatement, FunctionCall, FunctionDeclaration, Identifier, LambdaExpression, LoopInvariant,
+    Node, ParallelForStatement, Program, Reduction, ResetInvariants
+)
+from runtime.data_parallel import MIN_PROCESS_CHUNK, guided_chunks
+from runtime.evaluator import UNBOUND, frame_at
+from runtime.io_builtins import IO_BUILTINS
+from runtime.memory_manager import MemoryManager
+from runtime.operations import BUILTINS
+
+# How parallel blocks run, selected with --parallel-backend
+PARALLEL_BACKENDS = ('thread', 'process')
+DEFAULT_PARALLEL_BACKEND = 'thread'
+
+# Builtins a worker provides itself: print output is sent back, the rest are handled by the worker's engine
+WORKER_BUILTINS = ('print', 'input', 'free', 'commit', 'cancel', *BUILTINS, *IO_BUILTINS)
+
+
+def detached(node):
+    """A copy of an AST without run-time state, so it can be pickled for a worker process.
+
+    Quickened nodes become their generic class again, and the caches of
+    quickened and inline-cached nodes, which may hold functions, are dropped.
+    """
+    if isinstance(node, list):
+        return [detached(item) for item in node]
+    if not isinstance(node, Node):
+        return node
+    node_class = node.__class__
+    node_class = node_class.__dict__.get('generic', node_class)
+    copy = node_class.__new__(node_class)
+    for name in node_class.fields:
+        setattr(copy, name, detached(getattr(node, name)))
+    for name in node_class.annotations:
+        setattr(copy, name, None if name == 'cache' else getattr(node, name, None))
+    return copy
+
+
+def collect_references(node, nesting, names, slots, writes, frames=0):
+    """Collect what a statement reads and writes outside itself.
+
+    Globals (and the names of unresolved programs) go into `names`, frame slots
+    into `slots` as (depth, slot) pairs relative to the frame the statement runs
+    in; `nesting` counts the functions and lambdas entered on the way down, and
+    `frames` the resolved parallel for bodies, which have frames of their own
+    but assign globals like the statement itself. The ones assigned are also
+    added to `writes`, as names or (depth, slot) pairs.
+    """
+    if isinstance(node, list):
+        for item in node:
+            collect_references(item, nesting, names, slots, writes, frames)
+        return
+    if not isinstance(node, Node):
+        return
+    if isinstance(node, (Identifier, FunctionCall, AssignmentStatement, ForStatement, FunctionDeclaration, Reduction)):
+        name = node.identifier if isinstance(node, (AssignmentStatement, ForStatement, Reduction)) else node.name
+        written = not isinstance(node, (Identifier, FunctionCall))
+        if node.slot is None:
+            if nesting == 0 or not written:
+                names.add(name)
+                if written:
+                    writes.add(name)
+        elif node.depth >= nesting + frames:
+            slots.add((node.depth - nesting - frames, node.slot))
+            if written:
+                writes.add((node.depth - nesting - frames, node.slot))
+    elif isinstance(node, LoopInvariant) and nesting + frames == 0:
+        slots.add((0, node.slot))
+    elif isinstance(node, ResetInvariants) and nesting + frames == 0:
+        slots.update((0, slot) for slot in node.slots)
+    if isinstance(node, ParallelForStatement):
+        collect_references([node.iterable, node.reductions], nesting, names, slots, writes, frames)
+        collect_references(node.body, nesting, names, slots, writes, frames + (node.frame_size is not None))
+        return
+    if isinstance(node, (FunctionDeclaration, LambdaExpression)):
+        nesting += 1
+    for name in node.fields:
+        collect_references(getattr(node, name), nesting, names, slots, writes, frames)
+
+
+def frame_snapshot(frame, slots):
+    """Copy the frames a statement uses, keeping only the slots it refers to.
+
+    Returns a frame chain like the original, [parent, slot values...], with
+    every other slot UNBOUND and nothing above the deepest frame used.
+    """
+    if frame is None or not slots:
+        return None
+    depth = max(depth for depth, _ in slots)
+    copies = []
+    for level in range(depth + 1):
+        original = frame_at(frame, level)
+        copies.append([None] + [UNBOUND] * (len(original) - 1))
+    for level in range(depth):
+        copies[level][0] = copies[level + 1]
+    for level, slot in slots:
+        copies[level][slot] = frame_at(frame, level)[slot]
+    return copies[0]
+
+
+def worker_evaluator(engine_class, variables, printed):
+    """An evaluator for a worker process, with the variables a task was sent and print() collecting into printed."""
+    memory_manager = MemoryManager()
+    memory_manager.allocate('print', lambda *args: printed.append(args))
+    for name, value in variables.items():
+        memory_manager.allocate(name, value)
+    evaluator = engine_class(memory_manager)
+    evaluator.console = Console(file=io.StringIO())
+    return evaluator
+
+
+def sent_values(variables, frame, writes):
+    """What the globals and frame slots a task may assign held when it was sent."""
+    return {write: variables.get(write, UNBOUND) if isinstance(write, str) else frame_at(frame, write[0])[write[1]]
+            for write in writes}
+
+
+def written_values(memory_manager, frame, sent):
+    """The final values of the globals and frame slots a task assigned, as (names, slots) dicts.
+
+    Only the ones that changed are returned: a branch that did not run must
+    not undo what another task wrote.
+    """
+    written_names, written_slots = {}, {}
+    for write, before in sent.items():
+        if isinstance(write, str):
+            entry = memory_manager.variables.get(write)
+            if entry is not None and entry['value'] is not before:
+                written_names[write] = entry['value']
+        else:
+            depth, slot = write
+            value = frame_at(frame, depth)[slot]
+            if value is not before:
+                written_slots[write] = value
+    return written_names, written_slots
+
+
+def run_task(data):
+    """Run one pickled statement of a parallel block in a worker process.
+
+    Returns what it printed and the final values of the globals and frame
+    slots it assigns, for the parent to merge.
+    """
+    engine_class, declarations, variables, frame, statement, writes = pickle.loads(data)
+    printed = []
+    sent = sent_values(variables, frame, writes)
+    evaluator = worker_evaluator(engine_class, variables, printed)
+    if frame is None:
+        evaluator.run(Program(declarations + [statement]))
+    else:
+        evaluator.run(Program(declarations))
+        evaluator.frame = frame
+        evaluator.execute_statement(statement)
+    return (printed, *written_values(evaluator.memory_manager, frame, sent))
+
+
+def run_chunk(data, values, starts):
+    """Run one chunk of a pickled parallel for loop in a worker process.
+
+    Like run_task, plus the chunk's reduction values.
+    """
+    engine_class, declarations, variables, frame, loop, writes = pickle.loads(data)
+    printed = []
+    sent = sent_values(variables, frame, writes)
+    evaluator = worker_evaluator(engine_class, variables, printed)
+    evaluator.run(Program(declarations))
+    evaluator.frame = frame
+    partials = evaluator.run_chunk(loop, values, starts)
+    return (printed, *written_values(evaluator.memory_manager, frame, sent), partials)
+
+
+def warm_up():
+    return os.getpid()
+
+
+class ProcessBackend:
+    """Runs the statements of parallel blocks in a pool of worker processes.
+
+    Threads share one interpreter lock, so CPU-bound parallel blocks gain
+    nothing from the thread pool. Here each statement is sent to a worker as a
+    detached copy of its AST, with a snapshot of the variables it reads and
+    the declarations of the global functions it may call. Workers run it on
+    the same engine and send back what it printed and the variables it
+    assigned. The block waits for all of its statements; output and
+    assignments are then replayed in statement order, so when two statements
+    assign the same variable, the later one wins. A parallel for loop is sent
+    once per chunk instead, and the chunks' results are replayed in chunk order.
+
+    Values are copied, not shared: functions other than declared global ones,
+    and objects, cannot be sent to a worker.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        # Start the workers now, while the program is still being read, not at the first block
+        for _ in range(self.workers):
+            self.pool.submit(warm_up)
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+    def run_block(self, evaluator, node):
+        futures = [self.pool.submit(run_task, self.task(evaluator, statement, node.line or 'unknown'))
+                   for statement in node.body.body]
+        for future in futures:
+            self.merge(evaluator, *future.result())
+        return None
+
+    def run_loop(self, evaluator, node, values, starts):
+        """Run the chunks of a parallel for loop on the workers; returns each chunk's reduction values in order.
+
+        The loop is pickled once for all of its chunks. Output and assignments
+        are replayed in chunk order, as run_block does for statements.
+        """
+        data = self.task(evaluator, node, node.line or 'unknown', chunked=True)
+        futures = [self.pool.submit(run_chunk, data, chunk, starts)
+                   for chunk in guided_chunks(values, self.workers, MIN_PROCESS_CHUNK)]
+        partials = []
+        for future in futures:
+            printed, written_names, written_slots, partial = future.result()
+            self.merge(evaluator, printed, written_names, written_slots)
+            partials.append(partial)
+        return partials
+
+    def merge(self, evaluator, printed, written_names, written_slots):
+        """Replay what a task printed and assigned in a worker."""
+        memory_manager = evaluator.memory_manager
+        printer = memory_manager.variables.get('print')
+        printer = print if printer is None else printer['value']
+        for args in printed:
+            printer(*args)
+        for name, value in written_names.items():
+            memory_manager.allocate(name, value)
+        for (depth, slot), value in written_slots.items():
+            frame_at(evaluator.frame, depth)[slot] = value
+
+    def task(self, evaluator, statement, line, chunked=False):
+        """Pickle statement with what a worker needs to run it.
+
+        With chunked, statement is a parallel for loop whose chunks the worker
+        runs: only what its body refers to is sent, and its loop variable and
+        reduction variables, which each chunk binds itself, are not written back.
+        """
+        names, slots, writes = set(), set(), set()
+        if chunked:
+            collect_references(statement.body, 0, names, slots, writes, int(statement.frame_size is not None))
+            if statement.frame_size is None:
+                writes -= {statement.identifier, *[reduction.identifier for reduction in statement.reductions]}
+        else:
+            collect_references(statement, 0, names, slots, writes)
+        declarations, variables = [], {}
+        pending, seen = list(names), set()
+        while pending:
+            name = pending.pop()
+            if name in seen or name in WORKER_BUILTINS:
+                continue
+            seen.add(name)
+            try:
+                value = evaluator.memory_manager.get(name)
+            except (KeyError, ValueError):
+                continue  # Undefined here, so the worker fails the same way
+            entry = evaluator.functions.get(name)
+            declaration = entry and entry.get('declaration')
+            if declaration is not None and declaration.slot is None and entry.get('function', value) is value:
+                # A global function: the worker declares it again, with the globals its body reads
+                declarations.append(detached(declaration))
+                body_names = set()
+                collect_references(declaration.body, 1, body_names, set(), set())
+                pending.extend(body_names)
+            else:
+                variables[name] = value
+        frame = frame_snapshot(evaluator.frame, slots | {slot for slot in writes if not isinstance(slot, str)})
+        task = (evaluator.__class__, declarations, variables, frame, detached(statement), writes)
+        kind = "Parallel for loop" if chunked else "Parallel block"
+        try:
+            return pickle.dumps(task)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            for name, value in variables.items():
+                if not picklable(value):
+                    raise ValueError(f"{kind} at line {line} cannot run in a worker process:"
+                                     f" variable '{name}' holds a {type(value).__name__}, which cannot be copied") from None
+            raise ValueError(f"{kind} at line {line} cannot run in a worker process:"
+                             f" it uses a function or object that cannot be copied") from None
+
+
+def picklable(value):
+    try:
+        pickle.dumps(value)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return False
+    return True
@@ -0,0 +1,102 @@
+from parser.ast_nodes import AssignmentStatement, BinaryOperation, FunctionCall, Identifier
+from runtime.operations import TYPED_OPERATIONS
+
+# A generic node that has behaved the same way this many times in a row is
+# rewritten into its specialized class. A specialized node whose guard fails
+# goes back to its generic class and waits QUICKEN_BACKOFF runs before trying again.
+QUICKEN_AFTER = 8
+QUICKEN_BACKOFF = 64
+
+# Operations a binary operation on two ints can be specialized for
+INT_OPERATIONS = TYPED_OPERATIONS['int']
+
+
+# Specialized node classes. The Evaluator swaps a hot node's __class__ to one
+# of these in place: they keep the generic node's type, fields and layout, and
+# their `cache` annotation holds what the specialization needs.
+
+class LocalIdentifier(Identifier):
+    """An identifier read from the running function's own frame."""
+    __slots__ = ()
+    generic = Identifier
+    kind = 'identifier'
+
+
+class LocalAssignment(AssignmentStatement):
+    """An assignment to the running function's own frame."""
+    __slots__ = ()
+    generic = AssignmentStatement
+    kind = 'assignment'
+
+
+class IntBinaryOperation(BinaryOperation):
+    """A binary operation that has only seen int operands.
+
+    Guard: both operands are still ints (bools are not).
+    """
+    __slots__ = ()
+    generic = BinaryOperation
+    kind = 'int operation'
+
+
+class DirectFunctionCall(FunctionCall):
+    """A call that has always reached the same function, kept in `cache`.
+
+    Guard: the name still refers to that function.
+    """
+    __slots__ = ()
+    generic = FunctionCall
+    kind = 'function call'
+
+
+SPECIALIZED_NODES = (LocalIdentifier, LocalAssignment, IntBinaryOperation, DirectFunctionCall)
+
+
+def warm_up(node):
+    """Count one more uniform run of a generic node; True once it should be specialized."""
+    count = node.cache
+    if count.__class__ is not int:
+        count = 0  # Not counted yet, or another thread just specialized it
+    count += 1
+    if count < QUICKEN_AFTER:
+        node.cache = count
+        return False
+    return True
+
+
+class QuickeningStats:
+    """How often each kind of specialized node was created, ran, and failed its guard.
+
+    Runs are only counted once counting() has wrapped the specialized handlers,
+    since counting them slows every run down.
+    """
+
+    def __init__(self):
+        kinds = [node_class.kind for node_class in SPECIALIZED_NODES]
+        self.specialized = dict.fromkeys(kinds, 0)  # Nodes rewritten
+        self.runs = dict.fromkeys(kinds, 0)         # Runs of specialized nodes
+        self.misses = dict.fromkeys(kinds, 0)       # Guard failures, each turning a node back
+        self.counting_runs = False
+
+    def counting(self, kind, handler):
+        """Wrap a specialized node's handler so that its runs are counted."""
+        self.counting_runs = True
+        runs = self.runs
+
+        def counted(node):
+            runs[kind] += 1
+            return handler(node)
+        return counted
+
+    def hit_rate(self, kind):
+        runs = self.runs[kind]
+        return (runs - self.misses[kind]) / runs if runs else 0.0
+
+    def __str__(self):
+        lines = ['Quickening:']
+        for kind in self.specialized:
+            line = f"  {kind}: {self.specialized[kind]} specialized, {self.misses[kind]} guard misses"
+            if self.counting_runs and self.runs[kind]:
+                line += f", {self.runs[kind]} runs ({self.hit_rate(kind):.1%} hit rate)"
+            lines.append(line)
+        return '\n'.join(lines)
@@ -0,0 +1,259 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+# Threads that run the bodies of due tasks, however many tasks are scheduled
+DEFAULT_SCHEDULER_WORKERS = 4
+
+
+class ScheduledTask:
+    """Handle of a task given to a Scheduler.
+
+    cancel() removes it from the schedule; a run already in progress
+    finishes. `runs` counts the runs that finished, `skipped` the runs of a
+    recurring task that were dropped because the previous one was still going
+    or the task fell behind. If a run raises, the task is cancelled and the
+    exception kept in `error`.
+    """
+    __slots__ = ('scheduler', 'callback', 'interval', 'recurring', 'due', 'queued', 'running', 'cancelled',
+                 'runs', 'skipped', 'error')
+
+    def __init__(self, scheduler, callback, interval, recurring, due):
+        self.scheduler = scheduler
+        self.callback = callback
+        self.interval = interval
+        self.recurring = recurring
+        self.due = due
+        self.queued = False      # In the scheduler's heap
+        self.running = False     # Handed to a worker and not finished yet
+        self.cancelled = False
+        self.runs = 0
+        self.skipped = 0
+        self.error = None
+
+    def cancel(self):
+        self.scheduler.cancel(self)
+
+    @property
+    def done(self):
+        """True once the task will not run again."""
+        return self.cancelled or (not self.recurring and self.runs > 0)
+
+    def __str__(self):
+        timing = f"every {self.interval}s" if self.recurring else f"after {self.interval}s"
+        state = 'cancelled' if self.cancelled else 'done' if self.done else 'scheduled'
+        return f"<task {timing}, {self.runs} runs, {state}>"
+
+    __repr__ = __str__
+
+
+def advance(task, due, now):
+    """Set a recurring task's next due time, one interval after `due`, skipping the periods already past."""
+    task.due = due + task.interval
+    if task.due <= now:
+        missed = int((now - task.due) // task.interval) + 1
+        task.skipped += missed
+        task.due += missed * task.interval
+
+
+class Scheduler:
+    """Runs scheduled tasks from one timer thread and a bounded pool of workers.
+
+    Tasks wait in a min-heap ordered by due time. The timer thread sleeps
+    until the earliest one is due and hands it to a worker, so there are at
+    most `workers` + 1 threads however many tasks are scheduled. Recurring
+    tasks run at a fixed rate: each run is due one interval after the
+    previous one was due, not after it finished, so the time a body takes
+    does not add up into drift. A run that comes due while the task's
+    previous run is still going is skipped rather than run twice at once, and
+    periods that have already passed are skipped rather than run in a burst.
+
+    Threads are started with the first task. Like the threads scheduled tasks
+    used to get, they do not keep the process alive.
+    """
+
+    def __init__(self, workers=DEFAULT_SCHEDULER_WORKERS, clock=time.monotonic):
+        self.workers = workers
+        self.clock = clock
+        self.heap = []           # (due, sequence, task); the sequence keeps ties in scheduling order
+        self.sequence = itertools.count()
+        self.cancelled = 0       # Cancelled tasks still in the heap
+        self.condition = threading.Condition()
+        self.ready = deque()     # Due tasks waiting for a worker
+        self.threads = []
+        self.idle = 0            # Workers waiting for a task
+
+    def schedule(self, callback, interval, recurring=False):
+        """Run callback() once after `interval` seconds, or every `interval` seconds if recurring."""
+        if recurring and interval <= 0:
+            raise ValueError(f"A recurring task needs a positive interval, got {interval}")
+        with self.condition:
+            task = ScheduledTask(self, callback, interval, recurring, self.clock() + interval)
+            self.push(task)
+            if not self.threads:
+                self.start_thread(self.loop)
+            elif self.heap[0][2] is task:
+                self.condition.notify_all()  # Due before whatever the timer is waiting for
+        return task
+
+    def cancel(self, task):
+        with self.condition:
+            if task.cancelled:
+                return
+            task.cancelled = True
+            if task.queued:
+                self.cancelled += 1
+                if self.cancelled > len(self.heap) // 2:
+                    # Mostly cancelled entries: rebuild instead of waiting for them to come due
+                    self.heap = [entry for entry in self.heap if not entry[2].cancelled]
+                    heapq.heapify(self.heap)
+                    self.cancelled = 0
+
+    def cancel_all(self):
+        with self.condition:
+            for _, _, task in self.heap:
+                task.cancelled = True
+                task.queued = False
+            for task in self.ready:
+                task.cancelled = True
+            self.heap.clear()
+            self.ready.clear()
+            self.cancelled = 0
+
+    def pending(self):
+        """Number of tasks still scheduled."""
+        with self.condition:
+            return len(self.heap) - self.cancelled
+
+    def push(self, task):
+        task.queued = True
+        heapq.heappush(self.heap, (task.due, next(self.sequence), task))
+
+    def start_thread(self, target):
+        thread = threading.Thread(target=target, daemon=True)
+        self.threads.append(thread)
+        thread.start()
+
+    def loop(self):
+        """The timer thread: moves tasks from the heap to the workers as they come due."""
+        with self.condition:
+            while True:
+                if not self.heap:
+                    self.condition.wait()
+                    continue
+                due, _, task = self.heap[0]
+                now = self.clock()
+                if due > now:
+                    self.condition.wait(due - now)
+                    continue
+                heapq.heappop(self.heap)
+                task.queued = False
+                if task.cancelled:
+                    self.cancelled -= 1
+                    continue
+                if task.running:
+                    task.skipped += 1  # Never two runs of one task at once
+                else:
+                    task.running = True
+                    self.ready.append(task)
+                    if self.idle:
+                        self.condition.notify_all()
+                    elif len(self.threads) <= self.workers:
+                        self.start_thread(self.work)
+                if task.recurring:
+                    advance(task, due, now)
+                    self.push(task)
+
+    def work(self):
+        """A worker thread: runs due tasks one at a time."""
+        while True:
+            with self.condition:
+                while not self.ready:
+                    self.idle += 1
+                    self.condition.wait()
+                    self.idle -= 1
+                task = self.ready.popleft()
+            if task.cancelled:
+                task.running = False
+                continue
+            try:
+                task.callback()
+            except Exception as error:
+                task.error = error
+                self.cancel(task)
+            finally:
+                task.running = False
+                task.runs += 1
+
+
+class AsyncScheduler:
+    """Runs scheduled tasks as coroutines on an asyncio event loop, for runtime.async_evaluator.
+
+    Same timing rules and handles as Scheduler, but each task waits on a
+    timer of the loop instead of in a heap, and its callback returns a
+    coroutine, which runs as an asyncio task. No threads are started.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.timers = {}     # ScheduledTask -> the loop's timer for its next run
+        self.running = set()  # asyncio tasks of runs in progress; the loop only keeps weak references
+
+    def schedule(self, callback, interval, recurring=False):
+        if recurring and interval <= 0:
+            raise ValueError(f"A recurring task needs a positive interval, got {interval}")
+        task = ScheduledTask(self, callback, interval, recurring, self.loop.time() + interval)
+        self.arm(task)
+        return task
+
+    def arm(self, task):
+        task.queued = True
+        self.timers[task] = self.loop.call_at(task.due, self.fire, task)
+
+    def fire(self, task):
+        del self.timers[task]
+        task.queued = False
+        due = task.due
+        if task.running:
+            task.skipped += 1
+        else:
+            task.running = True
+            run = self.loop.create_task(self.run(task))
+            self.running.add(run)
+            run.add_done_callback(self.running.discard)
+        if task.recurring:
+            advance(task, due, self.loop.time())
+            self.arm(task)
+
+    async def run(self, task):
+        try:
+            await task.callback()
+        except Exception as error:
+            task.error = error
+            self.cancel(task)
+        finally:
+            task.running = False
+            task.runs += 1
+
+    def cancel(self, task):
+        task.cancelled = True
+        timer = self.timers.pop(task, None)
+        if timer is not None:
+            timer.cancel()
+            task.queued = False
+
+    def cancel_all(self):
+        for task in list(self.timers):
+            self.cancel(task)
+
+    def pending(self):
+        return len(self.timers)
+
+
+def cancel_task(task):
+    """The cancel() builtin: stops a task whose handle a schedule statement assigned."""
+    if not isinstance(task, ScheduledTask):
+        raise ValueError(f"cancel() expects a scheduled task, got {type(task).__name__}")
+    task.cancel()
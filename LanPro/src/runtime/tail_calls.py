@@ -0,0 +1,37 @@
+class TailCall:
+    """A call in tail position (`return f(...)`), handed back by the function making it.
+
+    The function's wrapper makes the call instead (see tail_calling), so a chain
+    of tail calls runs in a loop rather than in nested Python frames.
+    """
+    __slots__ = ('function', 'arguments')
+
+    def __init__(self, function, arguments):
+        self.function = function
+        self.arguments = arguments
+
+
+def trampoline(call):
+    """Make a TailCall, and each TailCall it returns in turn, until one returns a value."""
+    while call.__class__ is TailCall:
+        function = call.function
+        step = getattr(function, 'tail_step', None)
+        if step is None:
+            return function(*call.arguments)  # Not a LanPro function: it handles its own tail calls
+        call = step(*call.arguments)
+    return call
+
+
+def tail_calling(step):
+    """Wrap the callable of a function that makes tail calls.
+
+    `step` runs the body once and may return a TailCall; the wrapper makes it.
+    Trampolines call the step directly, so mutually recursive functions loop too.
+    """
+    def function(*args):
+        result = step(*args)
+        if result.__class__ is TailCall:
+            return trampoline(result)
+        return result
+    function.tail_step = step
+    return function
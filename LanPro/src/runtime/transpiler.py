@@ -0,0 +1,440 @@
+import functools
+import hashlib
+import re
+
+from parser.ast_nodes import (
+    ArrayAccess, AssignmentStatement, Block, BinaryOperation, ClassDeclaration, Constant, CountedLoop, ForStatement,
+    FunctionCall, FunctionDeclaration, Identifier, IfStatement, LambdaExpression, ListLiteral, Literal,
+    LoopInvariant, MemberAccess, MemberAssignment, MethodCall, NewExpression, NullLiteral, ResetInvariants,
+    ReturnStatement, WhileStatement
+)
+from runtime.evaluator import UNBOUND, Evaluator, TailCall, tail_calling
+from runtime.objects import find_method, get_member, set_field
+from runtime.operations import BINARY_OPERATIONS, check_iterable, counted_range, index_array
+
+# Operators whose int/int case is inlined into the generated code
+INLINE_INT_OPERATORS = {'+', '-', '*', '<', '>', '<=', '>=', '==', '!='}
+OPERATION_NAMES = {'+': 'add', '-': 'subtract', '*': 'multiply', '/': 'divide', '<': 'lt', '>': 'gt',
+                   '<=': 'le', '>=': 'ge', '==': 'eq', '!=': 'ne'}
+EXPRESSION_NODES = (Literal, Constant, NullLiteral, Identifier, BinaryOperation, FunctionCall, LambdaExpression,
+                    ListLiteral, ArrayAccess, NewExpression, MethodCall, MemberAccess, LoopInvariant)
+UNBOUND_NAME = re.compile(r"variable 'v_(\w+)'")
+CODE_CACHE_SIZE = 128
+
+
+class Unsupported(Exception):
+    """The program uses something the transpiler cannot translate."""
+
+
+class Function:
+    """State of the Python function being generated."""
+
+    def __init__(self):
+        self.lines = []  # (indent, text, LanPro line)
+        self.nonlocals = set()
+        self.indent = 0
+
+
+class PythonModule:
+    """Generated source for one program plus what is needed to run it."""
+
+    def __init__(self, source, line_map, constants):
+        self.source = source
+        self.line_map = line_map  # Python line number - 1 -> LanPro line
+        self.constants = constants
+        self.filename = f'<lanpro {hashlib.sha256(source.encode()).hexdigest()[:12]}>'
+
+
+class Transpiler:
+    """Translates a Program resolved by ScopeResolver into Python source.
+
+    Every top-level statement becomes a function _s<N>() returning the value
+    the tree-walker would give it. LanPro locals become Python locals (outer
+    ones are reached through nonlocal closures), globals stay in the
+    MemoryManager and are accessed through the helpers of TranspiledEvaluator.
+    Operators keep LanPro semantics: the int/int case runs inline and every
+    other case goes through runtime.operations, so type-mismatch and division
+    errors are the same. Anything else raises Unsupported.
+    """
+
+    def __init__(self):
+        self.function = None
+        self.constants = []
+        self.counter = 0
+        self.line = None
+
+    def transpile(self, program):
+        if not isinstance(program.body, list):
+            raise Unsupported("streamed program")
+        module = Function()
+        for index, statement in enumerate(program.body):
+            self.line = self.line_of(statement) or self.line
+            body = self.function_body([statement], returns=True)
+            module.lines.append((0, f'def _s{index}():', self.line))
+            module.lines.extend((indent + 1, text, line) for indent, text, line in body.lines)
+        names = ', '.join(f'_s{index}' for index in range(len(program.body)))
+        module.lines.append((0, f'_statements = ({names}{"," if len(program.body) == 1 else ""})', self.line))
+        source = '\n'.join('    ' * indent + text for indent, text, _ in module.lines) + '\n'
+        return PythonModule(source, [line for _, _, line in module.lines], self.constants)
+
+    # Helpers
+
+    def line_of(self, node):
+        if isinstance(node, (IfStatement, WhileStatement)):
+            return node.condition.line or node.line
+        return node.line
+
+    def emit(self, text, node=None):
+        if node is not None:
+            self.line = self.line_of(node) or self.line
+        self.function.lines.append((self.function.indent, text, self.line))
+
+    def temporary(self):
+        self.counter += 1
+        return f'_t{self.counter}'
+
+    def constant(self, value):
+        self.constants.append(value)
+        return f'_c[{len(self.constants) - 1}]'
+
+    def function_body(self, statements, returns, parameters=()):
+        """Generate a function body; with returns=True a final expression statement is returned."""
+        outer, self.function = self.function, Function()
+        try:
+            for name in parameters:
+                self.emit(f'if v_{name} is _UNBOUND: del v_{name}')  # Missing argument
+            for index, statement in enumerate(statements):
+                if returns and index == len(statements) - 1 and isinstance(statement, EXPRESSION_NODES):
+                    self.emit(f'return {self.expression(statement)}', statement)
+                else:
+                    self.statement(statement)
+            if not self.function.lines:
+                self.emit('pass')
+            function = self.function
+        finally:
+            self.function = outer
+        if function.nonlocals:
+            function.lines.insert(0, (0, f'nonlocal {", ".join(sorted(function.nonlocals))}', self.line))
+        return function
+
+    def define_function(self, name, parameters, frame_size, statements, tail_calls=False):
+        """Emit a nested def for a LanPro function or lambda and return its Python name."""
+        if frame_size is None:
+            raise Unsupported(f"unresolved function '{name}'")
+        python_name = f'_f{self.counter + 1}'
+        self.counter += 1
+        body = self.function_body(statements, returns=True, parameters=parameters)
+        signature = ''.join(f'v_{parameter}=_UNBOUND, ' for parameter in parameters) + '*_'
+        self.emit(f'def {python_name}({signature}):')
+        indent = self.function.indent + 1
+        self.function.lines.extend((indent + extra, text, line) for extra, text, line in body.lines)
+        if tail_calls:
+            self.emit(f'{python_name} = _tail_calling({python_name})')
+        return python_name
+
+    def block(self, node):
+        self.function.indent += 1
+        start = len(self.function.lines)
+        for statement in (node.body if isinstance(node, Block) else [node]):
+            self.statement(statement)
+        if len(self.function.lines) == start:
+            self.emit('pass')
+        self.function.indent -= 1
+
+    def store(self, name, depth, slot, value, global_helper):
+        if slot is None:
+            return f'{global_helper}({name!r}, {value})'
+        if depth:
+            self.function.nonlocals.add(f'v_{name}')
+        return f'v_{name} = {value}'
+
+    def load(self, name, depth, slot):
+        if slot is None:
+            return f'_get({name!r})'
+        return f'v_{name}'
+
+    # Statements
+
+    def statement(self, node):
+        if isinstance(node, AssignmentStatement):
+            value = self.expression(node.value)
+            self.emit(self.store(node.identifier, node.depth, node.slot, value, '_assign'), node)
+        elif isinstance(node, ReturnStatement):
+            call = node.value
+            if node.tail and isinstance(call, FunctionCall):
+                # Hand the call back to the function's wrapper instead of nesting it
+                callee = self.temporary()
+                arguments = ', '.join(self.expression(argument) for argument in call.arguments)
+                self.emit(f'return (_TailCall({callee}, [{arguments}]) if callable({callee} := '
+                          f'{self.load(call.name, call.depth, call.slot)}) else '
+                          f'_call_other({self.constant(call)}, lambda: [{arguments}]))', node)
+            else:
+                self.emit(f'return {self.expression(call)}', node)
+        elif isinstance(node, IfStatement):
+            self.emit(f'if {self.expression(node.condition)}:', node)
+            self.block(node.then_branch)
+            if node.else_branch is not None:
+                self.emit('else:')
+                self.block(node.else_branch)
+        elif isinstance(node, WhileStatement):
+            self.emit(f'while {self.expression(node.condition)}:', node)
+            self.block(node.body)
+        elif isinstance(node, CountedLoop):
+            condition = node.condition
+            if not node.fixed:
+                self.emit(f'while {self.expression(condition)}:', node)
+            else:
+                variable = condition.left
+                values = (f'_counted({self.expression(variable)}, {self.expression(condition.right)}, '
+                          f'{node.increment.value.right.value!r}, {condition.operator!r}, {condition.line!r})')
+                if variable.slot is not None and not variable.depth:
+                    self.emit(f'for v_{variable.name} in {values}:', node)
+                else:
+                    value = self.temporary()
+                    self.emit(f'for {value} in {values}:', node)
+                    self.function.indent += 1
+                    self.emit(self.store(variable.name, variable.depth, variable.slot, value, '_assign'))
+                    self.function.indent -= 1
+            # The fixed form runs the increment too, so that i ends where the while loop would leave it
+            self.block(Block([*node.body.body, node.increment], node.line))
+        elif isinstance(node, ResetInvariants):
+            self.emit(f'{" = ".join(f"_l{slot}" for slot in node.slots)} = _UNBOUND', node)
+        elif isinstance(node, ForStatement):
+            iterable = f'_iterable({self.expression(node.iterable)}, {node.line!r})'
+            if node.slot is not None and not node.depth:
+                self.emit(f'for v_{node.identifier} in {iterable}:', node)
+                self.block(node.body)
+            else:
+                value = self.temporary()
+                self.emit(f'for {value} in {iterable}:', node)
+                self.function.indent += 1
+                self.emit(self.store(node.identifier, node.depth, node.slot, value, '_allocate'))
+                self.function.indent -= 1
+                self.block(node.body)
+        elif isinstance(node, FunctionDeclaration):
+            self.line = node.line or self.line
+            function = self.define_function(node.name, node.parameters, node.frame_size, node.body.body,
+                                            node.tail_calls)
+            self.emit(f'{function} = _declare({self.constant(node)}, {function})')
+            self.emit(self.store(node.name, node.depth, node.slot, function, '_allocate'))
+        elif isinstance(node, ClassDeclaration):
+            methods = []
+            for method in node.methods:
+                self.line = method.line or self.line
+                methods.append(self.define_function(method.name, ['self', *method.parameters],
+                                                    method.frame_size, method.body.body))
+            self.emit(f'_declare_class({self.constant(node)}, ({"".join(f"{name}, " for name in methods)}))')
+        elif isinstance(node, Block):
+            for statement in node.body:
+                self.statement(statement)
+        elif (isinstance(node, FunctionCall) and node.name == 'free' and node.arguments
+              and isinstance(node.arguments[0], Identifier) and node.arguments[0].slot is not None):
+            target = node.arguments[0]
+            if target.depth:
+                self.function.nonlocals.add(f'v_{target.name}')
+            self.emit(self.load(node.name, node.depth, node.slot), node)  # free itself must exist
+            # Unbinding an unbound local is not an error, as in the tree-walker
+            self.emit('try:')
+            self.function.indent += 1
+            self.emit(f'del v_{target.name}')
+            self.function.indent -= 1
+            self.emit('except NameError:')
+            self.function.indent += 1
+            self.emit('pass')
+            self.function.indent -= 1
+        elif isinstance(node, MemberAssignment):
+            obj, value = self.expression(node.object), self.expression(node.value)
+            self.emit(f'_set_field({obj}, {node.member!r}, {value}, {node.line!r})', node)
+        elif isinstance(node, EXPRESSION_NODES):
+            self.emit(self.expression(node), node)
+        else:
+            raise Unsupported(f"{node.type} statement")
+
+    # Expressions
+
+    def expression(self, node):
+        if isinstance(node, (Literal, Constant)):
+            value = node.value
+            if node.__class__ is Literal and isinstance(value, str) and value.startswith('"') and value.endswith('"'):
+                value = value[1:-1]  # Strip quotes from string literals
+            if not isinstance(value, (int, float, str)) or isinstance(value, bool):
+                return self.constant(value)
+            return repr(value)
+        if isinstance(node, NullLiteral):
+            return 'None'
+        if isinstance(node, Identifier):
+            return self.load(node.name, node.depth, node.slot)
+        if isinstance(node, BinaryOperation):
+            return self.binary_operation(node)
+        if isinstance(node, FunctionCall):
+            if node.name == 'free' and node.arguments:
+                target = node.arguments[0]
+                if isinstance(target, Identifier) and target.slot is not None:
+                    raise Unsupported("free() of a local inside an expression")
+                # free() receives the identifier node itself, not its value
+                return f'{self.load(node.name, node.depth, node.slot)}({self.constant(target)})'
+            if node.name == 'stop_tasks':
+                raise Unsupported("stop_tasks()")  # Stopping must end every loop, as in the tree-walker
+            callee = self.temporary()
+            arguments = ', '.join(self.expression(argument) for argument in node.arguments)
+            # Non-callable callees get their arguments lazily, like evaluate_function evaluates them
+            return (f'({callee}({arguments}) if callable({callee} := {self.load(node.name, node.depth, node.slot)})'
+                    f' else _call_other({self.constant(node)}, lambda: [{arguments}]))')
+        if isinstance(node, LambdaExpression):
+            body = node.body.body if isinstance(node.body, Block) else [node.body]
+            return self.define_function('<lambda>', node.parameters, node.frame_size, body)
+        if isinstance(node, ListLiteral):
+            return f'[{", ".join(self.expression(element) for element in node.elements)}]'
+        if isinstance(node, ArrayAccess):
+            return f'_index({self.expression(node.array)}, {self.expression(node.index)}, {node.line!r})'
+        if isinstance(node, NewExpression):
+            return f'_new({self.constant(node)})'
+        if isinstance(node, LoopInvariant):
+            cache = f'_l{node.slot}'
+            return f'({cache} if {cache} is not _UNBOUND else ({cache} := {self.expression(node.expression)}))'
+        if isinstance(node, MethodCall):
+            receiver = self.temporary()
+            arguments = ''.join(f', {self.expression(argument)}' for argument in node.arguments)
+            return f'_method({receiver} := {self.expression(node.object)}, {node.member!r}, {node.line!r})({receiver}{arguments})'
+        if isinstance(node, MemberAccess):
+            return f'_member({self.expression(node.object)}, {node.member!r}, {node.line!r})'
+        raise Unsupported(f"{node.type} expression")
+
+    def binary_operation(self, node):
+        if node.operator not in BINARY_OPERATIONS:
+            raise Unsupported(f"operator {node.operator}")
+        operation = f'_{OPERATION_NAMES[node.operator]}'
+        left, right = self.expression(node.left), self.expression(node.right)
+        if node.operand_type is not None:
+            return f'({left} {node.operator} {right})'
+        if node.operator not in INLINE_INT_OPERATORS:
+            return f'{operation}({left}, {right}, {node.line!r})'
+        # Both operands are evaluated before the type checks, as in the tree-walker
+        a, b = self.temporary(), self.temporary()
+        return (f'({operation}({a}, {b}, {node.line!r}) if (({a} := {left}).__class__ is not int)'
+                f' | (({b} := {right}).__class__ is not int) else {a} {node.operator} {b})')
+
+
+@functools.lru_cache(maxsize=CODE_CACHE_SIZE)
+def compile_module(source, filename):
+    """Compile generated source; code objects are cached by source text."""
+    return compile(source, filename, 'exec')
+
+
+class TranspiledEvaluator(Evaluator):
+    """Runs programs as Python code generated by Transpiler.
+
+    Same run(program) API, MemoryManager, builtins and debug output as
+    Evaluator. Programs the transpiler cannot translate are tree-walked.
+    Errors raised by generated code carry the LanPro line they happened on
+    (as `lanpro_line` and as a note).
+    """
+
+    def __init__(self, memory_manager):
+        super().__init__(memory_manager)
+        self.statement_functions = {}  # id(top-level statement) -> generated function
+        self.module = None
+        self.fallback = None  # Why the last program was tree-walked
+
+    def helpers(self, module):
+        memory_manager = self.memory_manager
+        namespace = {
+            '_c': module.constants,
+            '_UNBOUND': UNBOUND,
+            '_get': memory_manager.get,
+            '_allocate': memory_manager.allocate,
+            '_assign': self.assign_global,
+            '_iterable': check_iterable,
+            '_index': index_array,
+            '_counted': counted_range,
+            '_declare': self.declare_function,
+            '_declare_class': self.define_class,
+            '_new': self.evaluate_new_expression,
+            '_method': find_method,
+            '_member': get_member,
+            '_set_field': set_field,
+            '_call_other': self.call_other,
+            '_TailCall': TailCall,
+            '_tail_calling': tail_calling,
+        }
+        for operator, name in OPERATION_NAMES.items():
+            namespace[f'_{name}'] = BINARY_OPERATIONS[operator]
+        return namespace
+
+    def load(self, program):
+        """Translate and compile program; returns False if it has to be tree-walked."""
+        try:
+            module = Transpiler().transpile(program)
+        except Unsupported as reason:
+            self.fallback = str(reason)
+            return False
+        self.fallback = None
+        namespace = self.helpers(module)
+        exec(compile_module(module.source, module.filename), namespace)
+        self.module = module
+        self.statement_functions = dict(zip(map(id, program.body), namespace['_statements']))
+        return True
+
+    def run(self, program):
+        # Verbose tracing is done by the tree-walker
+        if not self.verbose and not isinstance(program, dict) and self.load(program):
+            try:
+                return super().run(program)
+            finally:
+                self.statement_functions = {}
+        return super().run(program)
+
+    def execute_statement(self, statement):
+        function = self.statement_functions.get(id(statement))
+        if function is None:
+            return super().execute_statement(statement)
+        if not self.running:
+            return None
+        try:
+            return function()
+        except Exception as error:
+            raise self.map_error(error) from None
+
+    def map_error(self, error):
+        """Attach the LanPro line of the innermost generated frame to error."""
+        line = None
+        traceback = error.__traceback__
+        while traceback is not None:
+            if traceback.tb_frame.f_code.co_filename == self.module.filename:
+                line = self.module.line_map[traceback.tb_lineno - 1]
+            traceback = traceback.tb_next
+        if isinstance(error, NameError):
+            match = UNBOUND_NAME.search(str(error))
+            if match:
+                error = KeyError(f"Undefined variable: '{match.group(1)}'")
+        if line is not None and getattr(error, 'lanpro_line', None) is None:
+            error.lanpro_line = line
+            error.add_note(f"LanPro line {line}")
+        return error
+
+    def call_other(self, node, arguments):
+        """evaluate_function for generated code: `arguments()` evaluates the call's arguments."""
+        name = node.name
+        if name == 'print':
+            print(*arguments())
+        elif name == 'input':
+            values = arguments()
+            return input(values[0] if values else "")
+        elif name in self.functions and 'function' in self.functions[name]:
+            function = self.functions[name]
+            if len(node.arguments) != len(function['parameters']):
+                raise ValueError(f"Function '{name}' expects {len(function['parameters'])} arguments, but got {len(node.arguments)} at line {node.line}")
+            return function['function'](*arguments())
+        else:
+            # The remaining cases do not evaluate arguments
+            return self.evaluate_function(name, node.arguments, node.line)
+
+    def declare_function(self, node, function):
+        function = self.memoize(node, function)
+        self.functions[node.name] = {
+            'parameters': node.parameters,
+            'body': node.body,
+            'function': function,
+            'declaration': node
+        }
+        return function
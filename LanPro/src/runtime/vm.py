@@ -0,0 +1,304 @@
+from runtime.bytecode import (
+    ASSIGN_GLOBAL, BINARY_ADD, BINARY_OP, BINARY_TYPED, BINARY_SUBTRACT, BUILD_LIST, CALL, COMPARE_LESS, COUNTED_ITER, EVAL,
+    FOR_ITER, GET_ITER, INDEX, JUMP, LOAD_CACHED, LOAD_CONST, LOAD_DEREF, LOAD_GLOBAL, LOAD_LOCAL, MAKE_FUNCTION,
+    POP, POP_JUMP_IF_FALSE, RETURN_VALUE, STORE_CACHED, STORE_DEREF, STORE_LOCAL, STORE_NAME, TAIL_CALL, Compiler
+)
+from runtime.evaluator import UNBOUND, Evaluator, ReturnValue, TailCall, frame_at
+from runtime.memoization import MISSING, MemoizedFunction, result_key
+from runtime.operations import check_iterable, counted_range, index_array
+from runtime.tail_calls import trampoline
+
+_EXHAUSTED = object()
+
+# Calls the VM keeps on its own stack unless --max-call-depth says otherwise
+DEFAULT_MAX_CALL_DEPTH = 100000
+
+
+class VMFunction:
+    """A LanPro function or lambda compiled to bytecode.
+
+    Calls from bytecode are handled inside the dispatch loop without Python
+    recursion; calling the object directly (from a builtin or from code the
+    tree-walker runs) executes it on a fresh dispatch loop.
+    """
+    __slots__ = ('template', 'parent', 'vm')
+
+    def __init__(self, template, parent, vm):
+        self.template = template
+        self.parent = parent  # Frame the function was created in
+        self.vm = vm
+
+    def __call__(self, *args):
+        frame, dynamic = self.vm.enter(self, args)
+        return self.vm.execute(self.template.code, frame, dynamic)
+
+    def __repr__(self):
+        return f'<function {self.template.name}>'
+
+
+class VirtualMachine(Evaluator):
+    """Runs programs by compiling each top-level statement to bytecode.
+
+    A drop-in replacement for Evaluator (same run(program) API, MemoryManager,
+    builtins and debug output). Nodes the compiler leaves to the tree-walker
+    are evaluated by the inherited Evaluator methods with the current frame.
+
+    Calls between VM functions are kept on an explicit stack instead of the
+    Python one, so recursion is only limited by max_call_depth; tail calls
+    replace the running call and do not count towards it. Memoized VM
+    functions are called the same way, after a look in their cache.
+    """
+
+    def __init__(self, memory_manager):
+        super().__init__(memory_manager)
+        self.compiler = Compiler()
+        self.max_call_depth = DEFAULT_MAX_CALL_DEPTH
+
+    def execute_statement(self, statement):
+        return self.execute(self.compiler.compile_statement(statement), self.frame)
+
+    def enter(self, function, args):
+        """Set up a call: returns the callee's (frame, dynamic) pair."""
+        template = function.template
+        parameters = template.parameters
+        if template.frame_size is None:
+            # Unresolved body: bind parameters in a MemoryManager scope
+            self.memory_manager.push_scope()
+            for name, value in zip(parameters, args):
+                self.memory_manager.bind(name, value)
+            return None, True
+        frame = [function.parent] + [UNBOUND] * template.frame_size
+        bound = min(len(args), len(parameters))
+        frame[1:bound + 1] = args[:bound]
+        return frame, False
+
+    def look_up(self, memoized, args):
+        """Look a call of a memoized VM function up in its cache.
+
+        Returns the result, or MISSING, and the (cache, key) to store the
+        result under when the call returns, or None if it cannot be cached.
+        """
+        key = result_key(args)
+        if key is None:
+            memoized.uncached += 1
+            return MISSING, None
+        return memoized.cached.get(key), (memoized.cached, key)
+
+    def execute(self, unit, frame, dynamic=False):
+        """Run a code unit to its RETURN_VALUE and return the value.
+
+        `dynamic` says whether the unit's frame is a MemoryManager scope that
+        must be popped when it returns.
+        """
+        if not self.running:
+            return None
+        memory_manager = self.memory_manager
+        get_global = memory_manager.get
+        code, constants, names = unit.code, unit.constants, unit.names
+        stack = []
+        pc = 0
+        calls = []  # Saved (unit, pc, frame, stack, dynamic, memo) of the callers below the running function
+        memo = None  # The (cache, key) the running call's result goes into, if it is a memoized call
+        max_call_depth = self.max_call_depth
+        try:
+            while True:
+                opcode = code[pc]
+                argument = code[pc + 1]
+                pc += 2
+                if opcode == LOAD_LOCAL:
+                    value = frame[argument]
+                    if value is UNBOUND:
+                        raise KeyError(f"Undefined variable: '{unit.slot_names[argument]}'")
+                    stack.append(value)
+                elif opcode == LOAD_CONST:
+                    stack.append(constants[argument])
+                elif opcode == LOAD_GLOBAL:
+                    stack.append(get_global(names[argument]))
+                elif opcode == BINARY_TYPED:
+                    right = stack.pop()
+                    stack[-1] = constants[argument](stack[-1], right)
+                elif opcode == BINARY_ADD:
+                    right = stack.pop()
+                    left = stack[-1]
+                    if left.__class__ is int and right.__class__ is int:
+                        stack[-1] = left + right
+                    else:
+                        operation, line = constants[argument]
+                        stack[-1] = operation(left, right, line)
+                elif opcode == COMPARE_LESS:
+                    right = stack.pop()
+                    left = stack[-1]
+                    if left.__class__ is int and right.__class__ is int:
+                        stack[-1] = left < right
+                    else:
+                        operation, line = constants[argument]
+                        stack[-1] = operation(left, right, line)
+                elif opcode == BINARY_SUBTRACT:
+                    right = stack.pop()
+                    left = stack[-1]
+                    if left.__class__ is int and right.__class__ is int:
+                        stack[-1] = left - right
+                    else:
+                        operation, line = constants[argument]
+                        stack[-1] = operation(left, right, line)
+                elif opcode == BINARY_OP:
+                    operation, line = constants[argument]
+                    right = stack.pop()
+                    stack[-1] = operation(stack[-1], right, line)
+                elif opcode == STORE_LOCAL:
+                    frame[argument] = stack.pop()
+                elif opcode == POP_JUMP_IF_FALSE:
+                    if not stack.pop():
+                        pc = argument
+                elif opcode == JUMP:
+                    if argument < pc and not self.running:
+                        return None  # Tasks were stopped while looping
+                    pc = argument
+                elif opcode == ASSIGN_GLOBAL:
+                    self.assign_global(names[argument], stack.pop())
+                elif opcode == CALL:
+                    count, node = constants[argument]
+                    if count:
+                        args = stack[-count:]
+                        del stack[-count:]
+                    else:
+                        args = []
+                    callee = stack.pop()
+                    pending = None
+                    if callee.__class__ is MemoizedFunction and callee.function.__class__ is VMFunction:
+                        result, pending = self.look_up(callee, args)
+                        if result is not MISSING:
+                            stack.append(result)
+                            continue
+                        callee = callee.function
+                    if callee.__class__ is VMFunction and callee.vm is self:
+                        if len(calls) >= max_call_depth:
+                            raise RecursionError(f"Maximum call depth of {max_call_depth} exceeded calling '{node.name}' at line {node.line}")
+                        calls.append((unit, pc, frame, stack, dynamic, memo))
+                        memo = pending
+                        frame, dynamic = self.enter(callee, args)
+                        unit = callee.template.code
+                        code, constants, names = unit.code, unit.constants, unit.names
+                        stack = []
+                        pc = 0
+                    elif callable(callee):
+                        stack.append(callee(*args))
+                    else:
+                        stack.append(self.evaluate_function(node.name, node.arguments, node.line))
+                elif opcode == TAIL_CALL:
+                    count, node = constants[argument]
+                    if count:
+                        args = stack[-count:]
+                        del stack[-count:]
+                    else:
+                        args = []
+                    callee = stack.pop()
+                    if callee.__class__ is MemoizedFunction and callee.function.__class__ is VMFunction:
+                        # The callee's result is the running call's: it is cached under the running call's key
+                        result, _ = self.look_up(callee, args)
+                        if result is not MISSING:
+                            stack.append(result)
+                            continue
+                        callee = callee.function
+                    if callee.__class__ is VMFunction and callee.vm is self:
+                        if dynamic:
+                            memory_manager.pop_scope()
+                        frame, dynamic = self.enter(callee, args)
+                        unit = callee.template.code
+                        code, constants, names = unit.code, unit.constants, unit.names
+                        stack = []
+                        pc = 0
+                    elif callable(callee):
+                        stack.append(callee(*args))
+                    else:
+                        stack.append(self.evaluate_function(node.name, node.arguments, node.line))
+                elif opcode == RETURN_VALUE:
+                    value = stack.pop()
+                    if dynamic:
+                        dynamic = False
+                        memory_manager.pop_scope()
+                    if memo is not None:
+                        memo[0].put(memo[1], value)
+                    if not calls:
+                        return value
+                    unit, pc, frame, stack, dynamic, memo = calls.pop()
+                    code, constants, names = unit.code, unit.constants, unit.names
+                    stack.append(value)
+                elif opcode == POP:
+                    stack.pop()
+                elif opcode == LOAD_DEREF:
+                    depth, slot, name = unit.derefs[argument]
+                    value = frame_at(frame, depth)[slot]
+                    if value is UNBOUND:
+                        raise KeyError(f"Undefined variable: '{name}'")
+                    stack.append(value)
+                elif opcode == STORE_DEREF:
+                    depth, slot, name = unit.derefs[argument]
+                    frame_at(frame, depth)[slot] = stack.pop()
+                elif opcode == STORE_NAME:
+                    memory_manager.allocate(names[argument], stack.pop())
+                elif opcode == BUILD_LIST:
+                    if argument:
+                        values = stack[-argument:]
+                        del stack[-argument:]
+                    else:
+                        values = []
+                    stack.append(values)
+                elif opcode == INDEX:
+                    index = stack.pop()
+                    stack[-1] = index_array(stack[-1], index, constants[argument])
+                elif opcode == GET_ITER:
+                    stack[-1] = iter(check_iterable(stack[-1], constants[argument]))
+                elif opcode == FOR_ITER:
+                    value = next(stack[-1], _EXHAUSTED)
+                    if value is _EXHAUSTED:
+                        stack.pop()
+                        pc = argument
+                    else:
+                        stack.append(value)
+                elif opcode == LOAD_CACHED:
+                    slot, target = constants[argument]
+                    value = frame[slot]
+                    if value is not UNBOUND:
+                        stack.append(value)
+                        pc = target
+                elif opcode == STORE_CACHED:
+                    frame[argument] = stack[-1]
+                elif opcode == COUNTED_ITER:
+                    step, operator, line = constants[argument]
+                    limit = stack.pop()
+                    stack[-1] = iter(counted_range(stack[-1], limit, step, operator, line))
+                elif opcode == MAKE_FUNCTION:
+                    template = constants[argument]
+                    function = VMFunction(template, frame, self)
+                    if template.declaration is not None:
+                        function = self.memoize(template.declaration, function)
+                        self.functions[template.name] = {
+                            'parameters': template.parameters,
+                            'body': template.declaration.body,
+                            'function': function,
+                            'declaration': template.declaration
+                        }
+                    stack.append(function)
+                elif opcode == EVAL:
+                    tree_walker = self.for_thread()
+                    caller, tree_walker.frame = tree_walker.frame, frame
+                    try:
+                        stack.append(tree_walker.evaluate(constants[argument]))
+                    except ReturnValue as returned:
+                        # A return inside tree-walked code returns from the running function
+                        value = returned.value
+                        stack.append(trampoline(value) if value.__class__ is TailCall else value)
+                        pc = len(code) - 2  # The unit's final RETURN_VALUE
+                    finally:
+                        tree_walker.frame = caller
+                else:
+                    raise ValueError(f"Unknown opcode {opcode} at offset {pc - 2} in {unit.name}")
+        except BaseException:
+            # Unwind the MemoryManager scopes of every call still in progress
+            if dynamic:
+                memory_manager.pop_scope()
+            for _, _, _, _, caller_dynamic, _ in calls:
+                if caller_dynamic:
+                    memory_manager.pop_scope()
+            raise
@@ -0,0 +1,327 @@
+from parser.ast_nodes import (
+    ArrayAccess, AssignmentStatement, BinaryOperation, Block, ClassDeclaration, Constant, CountedLoop, ForStatement,
+    FunctionCall, FunctionDeclaration, Identifier, IfStatement, LambdaExpression, Literal, LoopInvariant, MethodCall,
+    NewExpression, Node, NullLiteral, ParallelForStatement, ParallelStatement, Program, ResetInvariants,
+    ScheduleStatement, WhileStatement
+)
+from runtime.operations import BINARY_OPERATIONS
+
+# Optimization levels selectable with --opt-level:
+#   0 - run the analyzed AST as is
+#   1 - turn literals into Constants (string quotes stripped once) and fold constant operations
+#   2 - also drop if branches and while loops whose condition is a constant, turn
+#       `while (i < n) { ...; i = i + 1; }` into CountedLoops and hoist loop invariants
+OPT_LEVELS = (0, 1, 2)
+DEFAULT_OPT_LEVEL = 1
+
+
+def count_nodes(node):
+    """Number of AST nodes in a subtree."""
+    if isinstance(node, list):
+        return sum(count_nodes(item) for item in node)
+    if not isinstance(node, Node):
+        return 0
+    return 1 + sum(count_nodes(getattr(node, name)) for name in node.fields)
+
+
+def scan(node, facts, enter_functions=False):
+    """Collect what running node can do into facts: {'assigned': set of names, 'calls': bool, 'tasks': bool}.
+
+    Names count as assigned by assignments, for loops, function declarations
+    and free(). Nested functions and lambdas are only entered with
+    enter_functions=True, since their bodies run when they are called.
+    """
+    if isinstance(node, list):
+        for item in node:
+            scan(item, facts, enter_functions)
+        return facts
+    if not isinstance(node, Node):
+        return facts
+    cls = node.__class__
+    if cls is AssignmentStatement or cls is ForStatement:
+        facts['assigned'].add(node.identifier)
+    elif cls is FunctionDeclaration:
+        facts['assigned'].add(node.name)
+        if not enter_functions:
+            return facts
+    elif cls is LambdaExpression or cls is ClassDeclaration:
+        if not enter_functions:
+            return facts
+    elif cls is FunctionCall:
+        facts['calls'] = True
+        if node.name == 'free' and node.arguments and isinstance(node.arguments[0], Identifier):
+            facts['assigned'].add(node.arguments[0].name)
+    elif cls is MethodCall or cls is NewExpression:
+        facts['calls'] = True
+    elif cls is ParallelStatement or cls is ScheduleStatement:
+        facts['tasks'] = facts['calls'] = True
+    elif cls is ParallelForStatement:
+        facts['tasks'] = facts['calls'] = True
+        facts['assigned'].update(reduction.identifier for reduction in node.reductions)
+    for name in node.fields:
+        scan(getattr(node, name), facts, enter_functions)
+    return facts
+
+
+def new_facts():
+    return {'assigned': set(), 'calls': False, 'tasks': False}
+
+
+class OptimizationReport:
+    """What an Optimizer changed."""
+
+    def __init__(self, level):
+        self.level = level
+        self.folded = 0             # Constant operations replaced by their value
+        self.dead_branches = 0      # if statements decided at compile time
+        self.dead_loops = 0         # while loops that can never run
+        self.stripped_literals = 0  # String literals whose quotes were stripped up front
+        self.counted_loops = 0      # while loops turned into CountedLoops
+        self.hoisted = 0            # Loop-invariant expressions
+        self.eliminated = 0         # AST nodes removed in total
+
+    def __str__(self):
+        return (f"Optimizer (level {self.level}): {self.eliminated} nodes eliminated "
+                f"({self.folded} constant folds, {self.dead_branches} dead branches, {self.dead_loops} dead loops), "
+                f"{self.stripped_literals} string literals pre-stripped, "
+                f"{self.counted_loops} counted loops, {self.hoisted} loop invariants hoisted")
+
+
+class Optimizer:
+    """Rewrites an analyzed AST into an equivalent, cheaper one.
+
+    Runs after semantic analysis (it keeps ScopeResolver's annotations) and
+    before evaluation. Only work whose outcome cannot depend on run-time state
+    is done: an operation that would fail (a type mismatch, a division by zero)
+    is left in place so that it still fails, with its message and line, when
+    the program runs.
+    """
+
+    def __init__(self, level=DEFAULT_OPT_LEVEL):
+        if level not in OPT_LEVELS:
+            raise ValueError(f"Unknown optimization level {level}, expected one of: {', '.join(map(str, OPT_LEVELS))}")
+        self.level = level
+        self.report = OptimizationReport(level)
+        self.functions = []  # Enclosing FunctionDeclarations, LambdaExpressions and parallel for bodies
+        self.nested_writes = {}  # id(function) -> names its nested functions assign
+        self.tasks = False  # Parallel or scheduled code may be changing globals
+
+    def optimize(self, program):
+        """Optimize a Program in place and return it."""
+        if self.level and isinstance(program.body, list):
+            self.tasks = scan(program.body, new_facts(), enter_functions=True)['tasks']
+            program.body = self.optimize_body(program.body, keep_last=False)
+        return program
+
+    def optimize_statement(self, statement):
+        """Optimize one top-level statement; returns None if it was eliminated."""
+        if not self.level:
+            return statement
+        self.tasks = self.tasks or scan(statement, new_facts(), enter_functions=True)['tasks']
+        return self.visit(statement)
+
+    def optimize_body(self, statements, keep_last=True):
+        body = []
+        for index, statement in enumerate(statements):
+            optimized = self.visit(statement)
+            if optimized is None and keep_last and index == len(statements) - 1:
+                # The last statement gives a function its value: keep a None in its place
+                optimized = NullLiteral(line=statement.line)
+                self.report.eliminated -= 1
+            if optimized is not None:
+                body.append(optimized)
+        return body
+
+    def visit(self, node):
+        """Return the optimized replacement for node (None for an eliminated statement)."""
+        # A resolved parallel for body runs in a frame of its own, so its loops hoist into that frame
+        function = (node.__class__ is FunctionDeclaration or node.__class__ is LambdaExpression
+                    or (node.__class__ is ParallelForStatement and node.frame_size is not None))
+        if function:
+            self.functions.append(node)
+        try:
+            for name in node.fields:
+                value = getattr(node, name)
+                if isinstance(value, Node):
+                    setattr(node, name, self.visit(value))
+                elif isinstance(value, list):
+                    if node.__class__ is Block or node.__class__ is Program:
+                        setattr(node, name, self.optimize_body(value))
+                    else:
+                        setattr(node, name, [self.visit(item) if isinstance(item, Node) else item for item in value])
+        finally:
+            if function:
+                self.functions.pop()
+        if node.__class__ is Literal:
+            return self.visit_literal(node)
+        if node.__class__ is BinaryOperation:
+            return self.fold(node)
+        if self.level >= 2:
+            if node.__class__ is IfStatement:
+                return self.visit_if(node)
+            if node.__class__ is WhileStatement:
+                return self.visit_while(node)
+            if node.__class__ is ForStatement:
+                return self.hoist_invariants(node)
+        return node
+
+    def visit_literal(self, node):
+        value = node.value
+        if isinstance(value, str) and value.startswith('"') and value.endswith('"'):
+            value = value[1:-1]
+            self.report.stripped_literals += 1
+        return Constant(value, node.line)
+
+    def fold(self, node):
+        left, right = node.left, node.right
+        if left.__class__ is not Constant or right.__class__ is not Constant:
+            return node
+        operation = BINARY_OPERATIONS.get(node.operator)
+        if operation is None:
+            return node
+        try:
+            value = operation(left.value, right.value, node.line)
+        except (ValueError, ArithmeticError):
+            return node  # Fails at run time instead
+        self.report.folded += 1
+        self.report.eliminated += 2
+        return Constant(value, node.line)
+
+    def constant_truth(self, node):
+        """True/False for a condition known before run time, None otherwise."""
+        if node.__class__ is Constant:
+            return bool(node.value)
+        if node.__class__ is NullLiteral:
+            return False
+        return None
+
+    def visit_if(self, node):
+        truth = self.constant_truth(node.condition)
+        if truth is None:
+            return node
+        branch = node.then_branch if truth else node.else_branch
+        self.report.dead_branches += 1
+        # An if statement's value is its branch's value, so the branch can stand in for it
+        self.report.eliminated += count_nodes(node) - count_nodes(branch)
+        return branch
+
+    def visit_while(self, node):
+        if self.constant_truth(node.condition) is False:
+            self.report.dead_loops += 1
+            self.report.eliminated += count_nodes(node)
+            return None
+        return self.hoist_invariants(self.counted_loop(node) or node)
+
+    # Loops
+
+    def function_writes(self):
+        """Names that functions nested in the current function may assign."""
+        function = self.functions[-1]
+        writes = self.nested_writes.get(id(function))
+        if writes is None:
+            writes = set()
+            body = function.body.body if isinstance(function.body, Block) else [function.body]
+            nested = []
+            scan_nested(body, nested)
+            for inner in nested:
+                writes |= scan(inner.body, new_facts(), enter_functions=True)['assigned']
+            self.nested_writes[id(function)] = writes
+        return writes
+
+    def unchanging(self, identifier, facts):
+        """Whether a variable read in a loop keeps its value while the loop body runs."""
+        if identifier.name in facts['assigned']:
+            return False
+        if identifier.slot is not None and identifier.depth == 0:
+            # Only the function's own nested functions can assign its locals
+            return not facts['tasks'] and identifier.name not in self.function_writes()
+        # Globals and outer locals can be assigned by any call, or by another task
+        return not facts['calls'] and not self.tasks
+
+    def counted_loop(self, node):
+        """Return a CountedLoop for `while (i < n) { ...; i = i + step; }`, or None."""
+        condition, body = node.condition, node.body
+        if condition.__class__ is not BinaryOperation or condition.operator not in ('<', '<='):
+            return None
+        variable, limit = condition.left, condition.right
+        if variable.__class__ is not Identifier or limit.__class__ not in (Identifier, Constant):
+            return None
+        if body.__class__ is not Block or not body.body:
+            return None
+        increment = body.body[-1]
+        if (increment.__class__ is not AssignmentStatement or increment.identifier != variable.name
+                or (increment.depth, increment.slot) != (variable.depth, variable.slot)):
+            return None
+        step = increment.value
+        if (step.__class__ is not BinaryOperation or step.operator != '+' or step.left.__class__ is not Identifier
+                or step.left.name != variable.name or step.right.__class__ is not Constant
+                or step.right.value.__class__ is not int or step.right.value <= 0):
+            return None
+        loop_body = Block(body.body[:-1], body.line)
+        facts = scan(loop_body, new_facts())
+        fixed = self.unchanging(variable, facts)
+        if limit.__class__ is Identifier:
+            fixed = fixed and self.unchanging(limit, facts)
+        self.report.counted_loops += 1
+        return CountedLoop(condition, loop_body, increment, node.line, fixed=fixed)
+
+    def hoist_invariants(self, node):
+        """Cache the loop-invariant expressions of a loop in hidden local slots."""
+        if not self.functions or self.functions[-1].frame_size is None:
+            return node  # Only locals can be shown not to change
+        facts = scan(node, new_facts())
+        if facts['tasks']:
+            return node
+        slots = []
+        if node.__class__ is WhileStatement:
+            node.condition = self.hoist(node.condition, facts, slots)
+        node.body = self.hoist(node.body, facts, slots)
+        if not slots:
+            return node
+        # The cached values belong to one run of the loop
+        return Block([ResetInvariants(slots, node.line), node], node.line)
+
+    def invariant(self, node, facts):
+        cls = node.__class__
+        if cls is Constant:
+            return True
+        if cls is Identifier:
+            return node.slot is not None and node.depth == 0 and self.unchanging(node, facts)
+        if cls is BinaryOperation:
+            return node.operator in BINARY_OPERATIONS and self.invariant(node.left, facts) and self.invariant(node.right, facts)
+        if cls is ArrayAccess:
+            return self.invariant(node.array, facts) and self.invariant(node.index, facts)
+        if cls is LoopInvariant:
+            return self.invariant(node.expression, facts)
+        return False
+
+    def hoist(self, node, facts, slots):
+        """Replace the largest invariant expressions under node by LoopInvariants."""
+        cls = node.__class__
+        if cls in (BinaryOperation, ArrayAccess, LoopInvariant) and self.invariant(node, facts):
+            function = self.functions[-1]
+            function.frame_size += 1
+            slots.append(function.frame_size)
+            self.report.hoisted += 1
+            return LoopInvariant(node, node.line, slot=function.frame_size)
+        if cls in (FunctionDeclaration, LambdaExpression, ClassDeclaration, ParallelForStatement):
+            return node  # Runs in its own frame
+        for name in node.fields:
+            value = getattr(node, name)
+            if isinstance(value, Node):
+                setattr(node, name, self.hoist(value, facts, slots))
+            elif isinstance(value, list):
+                setattr(node, name, [self.hoist(item, facts, slots) if isinstance(item, Node) else item for item in value])
+        return node
+
+
+def scan_nested(node, functions):
+    """Append every function and lambda declared under node to functions."""
+    if isinstance(node, list):
+        for item in node:
+            scan_nested(item, functions)
+    elif isinstance(node, Node):
+        if node.__class__ is FunctionDeclaration or node.__class__ is LambdaExpression:
+            functions.append(node)
+        for name in node.fields:
+            scan_nested(getattr(node, name), functions)
@@ -0,0 +1,128 @@
+from parser.ast_nodes import (
+    AssignmentStatement, ForStatement, FunctionCall, FunctionDeclaration, Identifier, LambdaExpression,
+    MemberAccess, MemberAssignment, MethodCall, NewExpression, Node, ParallelForStatement, ParallelStatement, ScheduleStatement
+)
+
+# Builtins whose calls have side effects, and those without
+IMPURE_BUILTINS = ('print', 'input', 'free', 'commit', 'cancel', 'stop_tasks', 'sleep', 'read_file', 'run_process')
+PURE_BUILTINS = ('range',)
+
+
+class PurityError(Exception):
+    """A function marked `memoized` might have side effects."""
+
+
+def collect_functions(node, functions):
+    """Add every FunctionDeclaration under `node` to `functions` (name -> list of declarations)."""
+    if isinstance(node, list):
+        for item in node:
+            collect_functions(item, functions)
+    elif isinstance(node, Node):
+        if node.__class__ is FunctionDeclaration:
+            functions.setdefault(node.name, []).append(node)
+        for name in node.fields:
+            collect_functions(getattr(node, name), functions)
+    return functions
+
+
+def assigned_names(node, names):
+    """Add the names assigned under `node` to `names`, without entering nested functions and lambdas."""
+    if isinstance(node, list):
+        for item in node:
+            assigned_names(item, names)
+    elif isinstance(node, Node) and node.__class__ not in (FunctionDeclaration, LambdaExpression):
+        if node.__class__ in (AssignmentStatement, ForStatement):
+            names.add(node.identifier)
+        for name in node.fields:
+            assigned_names(getattr(node, name), names)
+    return names
+
+
+class PurityChecker:
+    """Decide whether a function can be memoized without changing what a program does.
+
+    A pure function does not assign global variables or object fields, does not
+    call print, input or free, does not schedule tasks or start parallel blocks,
+    does not create objects (every caller would get the same one back from the
+    cache), does not read object fields (the cache keys an object by identity,
+    so a later change to a field would not be seen), and only calls range or functions declared in the program that are
+    pure as well. The only globals it may read are declared functions, and only
+    ones declared once: a cached result would outlive a change to any other
+    global. An assignment writes a global when the name is assigned at the top
+    level and is not a parameter, as in semantic.scope_resolver.
+    """
+
+    def __init__(self, global_names, functions):
+        self.global_names = global_names
+        self.functions = functions  # Name -> FunctionDeclarations with that name
+
+    def check(self, declaration):
+        reason = self.impurity(declaration, set())
+        if reason is not None:
+            raise PurityError(f"Function '{declaration.name}' cannot be memoized: it {reason}")
+
+    def impurity(self, declaration, visiting):
+        """Why a function is not pure, or None; `visiting` holds the functions being checked further up."""
+        if id(declaration) in visiting:
+            return None  # A recursive call is as pure as the function itself
+        visiting.add(id(declaration))
+        return self.find(declaration.body, self.local_names(declaration.parameters, declaration.body), visiting)
+
+    def local_names(self, parameters, body):
+        """The parameters and the locals a body assigns; assigned globals are reported by find()."""
+        return frozenset(parameters) | (assigned_names(body, set()) - self.global_names)
+
+    def find(self, node, parameters, visiting):
+        if isinstance(node, list):
+            for item in node:
+                reason = self.find(item, parameters, visiting)
+                if reason is not None:
+                    return reason
+            return None
+        if not isinstance(node, Node):
+            return None
+        node_class = node.__class__
+        line = getattr(node, 'line', None) or 'unknown'
+        if node_class is Identifier:
+            if node.name not in parameters and node.name not in self.functions:
+                return f"reads the global variable '{node.name}' at line {line}"
+        elif node_class in (AssignmentStatement, ForStatement):
+            if node.identifier in self.global_names and node.identifier not in parameters:
+                return f"assigns the global variable '{node.identifier}' at line {line}"
+        elif node_class is FunctionDeclaration:
+            if node.name in self.global_names and node.name not in parameters:
+                return f"assigns the global variable '{node.name}' at line {line}"
+            parameters = parameters | self.local_names(node.parameters, node.body)
+        elif node_class is LambdaExpression:
+            parameters = parameters | self.local_names(node.parameters, node.body)
+        elif node_class is NewExpression:
+            return f"creates an object of class '{node.class_name}' at line {line}"
+        elif node_class is MemberAccess:
+            return f"reads the field '{node.member}', which may change, at line {line}"
+        elif node_class is MemberAssignment:
+            return f"assigns the field '{node.member}' at line {line}"
+        elif node_class is MethodCall:
+            return f"calls the method '{node.member}', which may change its object, at line {line}"
+        elif node_class is ScheduleStatement:
+            return f"schedules a task at line {line}"
+        elif node_class is ParallelStatement:
+            return f"starts a parallel block at line {line}"
+        elif node_class is ParallelForStatement:
+            return f"starts a parallel for loop at line {line}"
+        elif node_class is FunctionCall:
+            if node.name in IMPURE_BUILTINS:
+                return f"calls '{node.name}' at line {line}"
+            declarations = self.functions.get(node.name)
+            if declarations is None and node.name not in PURE_BUILTINS:
+                return f"calls '{node.name}', which is not a declared function, at line {line}"
+            if declarations is not None and len(declarations) > 1:
+                return f"calls '{node.name}', which is declared more than once, at line {line}"
+            for declaration in declarations or ():
+                reason = self.impurity(declaration, visiting)
+                if reason is not None:
+                    return f"calls '{node.name}', which {reason}"
+        for name in node.fields:
+            reason = self.find(getattr(node, name), parameters, visiting)
+            if reason is not None:
+                return reason
+        return None
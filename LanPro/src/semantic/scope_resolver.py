@@ -0,0 +1,97 @@
+from parser.ast_nodes import Identifier
+from semantic.semantic_analyzer import SemanticAnalyzer, collect_assigned
+
+
+class ScopeResolver(SemanticAnalyzer):
+    """Semantic analysis plus lexical scope resolution.
+
+    Every function, lambda and method body gets a frame: its parameters come
+    first, followed by the names it assigns that are not already visible from
+    an enclosing function or the global scope (assigning to a visible name keeps
+    writing to that variable, as before). The body of a parallel for loop gets a
+    frame the same way, with the loop variable and the reduced variables as its
+    parameters. Identifiers, calls, assignments, for loops and nested function
+    declarations that refer to a local are annotated with its (depth, slot)
+    address, depth being the number of frames to walk up; globals keep slot
+    None and are looked up by name in the MemoryManager. Functions, lambdas and
+    parallel for loops are annotated with the frame_size their frames need.
+
+    Global names persist across visits, so a REPL session can resolve one entry
+    at a time.
+    """
+
+    def __init__(self, console=None):
+        super().__init__(console)
+        self.scopes = []  # Innermost last; each maps a local name to its slot
+        self.visitors[Identifier] = self.resolve_identifier
+
+    def lookup(self, name):
+        """Return the (depth, slot) of a visible local, or (None, None) for a global."""
+        depth = 0
+        for scope in reversed(self.scopes):
+            slot = scope.get(name)
+            if slot is not None:
+                return depth, slot
+            depth += 1
+        return None, None
+
+    def enter_scope(self, parameters, body):
+        scope = {}
+        for name in parameters:
+            scope.setdefault(name, len(scope) + 1)  # Slot 0 holds the parent frame
+        for name in collect_assigned(body, {}):
+            if name not in scope and name not in self.global_names and self.lookup(name)[1] is None:
+                scope[name] = len(scope) + 1
+        self.scopes.append(scope)
+
+    def leave_scope(self):
+        return len(self.scopes.pop())
+
+    def resolve_identifier(self, node):
+        node.depth, node.slot = self.lookup(node.name)
+
+    def visit_function_call(self, node):
+        super().visit_function_call(node)
+        node.depth, node.slot = self.lookup(node.name)
+
+    def analyze_assignment(self, node):
+        super().analyze_assignment(node)
+        node.depth, node.slot = self.lookup(node.identifier)
+
+    def visit_for_statement(self, node):
+        super().visit_for_statement(node)
+        node.depth, node.slot = self.lookup(node.identifier)
+
+    def visit_parallel_for_body(self, node):
+        # Chunks run the body in a frame of their own: [parent, loop variable, reduction copies..., body locals...]
+        for reduction in node.reductions:
+            reduction.depth, reduction.slot = self.lookup(reduction.identifier)
+        self.enter_scope([node.identifier, *[reduction.identifier for reduction in node.reductions]], node.body)
+        try:
+            super().visit_parallel_for_body(node)
+        finally:
+            node.frame_size = self.leave_scope()
+
+    def analyze_function_declaration(self, node):
+        node.depth, node.slot = self.lookup(node.name)
+        self.enter_scope(node.parameters, node.body)
+        try:
+            super().analyze_function_declaration(node)
+        finally:
+            node.frame_size = self.leave_scope()
+
+    def visit_lambda_expression(self, node):
+        self.enter_scope(node.parameters, node.body)
+        try:
+            super().visit_lambda_expression(node)
+        finally:
+            node.frame_size = self.leave_scope()
+
+    def visit_class_declaration(self, node):
+        # Methods run with the receiver bound to an implicit first parameter, 'self'
+        for method in node.methods:
+            self.enter_scope(['self', *method.parameters], method.body)
+            try:
+                super().analyze_function_declaration(method, is_method=True)
+            finally:
+                method.frame_size = self.leave_scope()
@@ -1,104 +1,248 @@
 from rich.console import Console
+from parser.ast_nodes import (
+    ArrayAccess, AssignmentStatement, Block, BinaryOperation, ClassDeclaration, Constant, ForStatement, FunctionCall,
+    FunctionDeclaration, Identifier, IfStatement, LambdaExpression, ListLiteral, Literal, MemberAccess,
+    MemberAssignment, MethodCall,
+    NewExpression, Node, NullLiteral, ParallelForStatement, ParallelStatement, Program, ReturnStatement,
+    ScheduleStatement, WhileStatement, from_dict
+)
+from runtime.data_parallel import REDUCTIONS
+from semantic.purity import PurityChecker, collect_functions
+from semantic.tail_calls import CallGraph, mark_tail_calls
+
+
+def collect_assigned(node, names):
+    """Add the names a statement (or list of statements) binds to `names`.
+
+    Nested functions and lambdas are not entered: they get their own scope.
+    Neither are parallel for bodies, whose new names are local to each chunk.
+    """
+    if isinstance(node, list):
+        for statement in node:
+            collect_assigned(statement, names)
+    elif isinstance(node, (AssignmentStatement, ForStatement)):
+        names[node.identifier] = None
+        if isinstance(node, ForStatement):
+            collect_assigned(node.body, names)
+    elif isinstance(node, FunctionDeclaration):
+        names[node.name] = None
+    elif isinstance(node, (Program, Block, WhileStatement, ParallelStatement, ScheduleStatement)):
+        collect_assigned(node.body, names)
+    elif isinstance(node, IfStatement):
+        collect_assigned(node.then_branch, names)
+        if node.else_branch is not None:
+            collect_assigned(node.else_branch, names)
+    return names
+
+
+def find_return(node):
+    """The first return statement under node that is not inside a nested function, lambda or class."""
+    if isinstance(node, list):
+        for item in node:
+            found = find_return(item)
+            if found is not None:
+                return found
+        return None
+    if not isinstance(node, Node) or isinstance(node, (FunctionDeclaration, LambdaExpression, ClassDeclaration)):
+        return None
+    if isinstance(node, ReturnStatement):
+        return node
+    return find_return([getattr(node, name) for name in node.fields])
+
 
 class SemanticAnalyzer:
-    def __init__(self):
-        self.console = Console()
+    def __init__(self, console=None):
+        self.console = console or Console()
         self.declared_variables = set()  # Track declared variables
         self.declared_functions = set()  # Track declared functions
+        # Names assigned at the top level, and every function declaration by name;
+        # memoized functions are checked for purity against them, and tail calls
+        # are only marked where the callee can call back into the function
+        self.global_names = set()
+        self.function_declarations = {}
+        self.memoized_declarations = []  # Checked again when a function they may call is redeclared
+        self.call_graph = CallGraph(self.function_declarations)
+        # Dispatch on the node class instead of comparing node['type'] strings
+        self.visitors = {
+            Program: self.visit_program,
+            AssignmentStatement: self.analyze_assignment,
+            IfStatement: self.visit_if_statement,
+            WhileStatement: self.visit_while_statement,
+            ForStatement: self.visit_for_statement,
+            ParallelStatement: self.visit_body,
+            ParallelForStatement: self.visit_parallel_for_statement,
+            ScheduleStatement: self.visit_schedule_statement,
+            NewExpression: self.visit_leaf,
+            MethodCall: self.visit_method_call,
+            MemberAccess: self.visit_member_access,
+            MemberAssignment: self.visit_member_assignment,
+            LambdaExpression: self.visit_lambda_expression,
+            Block: self.visit_block,
+            FunctionCall: self.visit_function_call,
+            BinaryOperation: self.visit_binary_operation,
+            Literal: self.visit_leaf,
+            Constant: self.visit_leaf,
+            Identifier: self.visit_leaf,
+            NullLiteral: self.visit_leaf,
+            ListLiteral: self.visit_list_literal,
+            ArrayAccess: self.visit_array_access,
+            FunctionDeclaration: self.analyze_function_declaration,
+            ClassDeclaration: self.visit_class_declaration,
+            ReturnStatement: self.analyze_return_statement,
+        }
 
     def analyze(self, ast):
         self.console.print("[cyan]Starting semantic analysis...[/cyan]")
         self.visit(ast)
 
     def visit(self, node):
-        if node['type'] == 'Program':
-            for statement in node['body']:
-                self.visit(statement)
-        elif node['type'] == 'AssignmentStatement':
-            self.analyze_assignment(node)
-        elif node['type'] == 'IfStatement':
-            self.visit(node['condition'])
-            self.visit(node['thenBranch'])
-            if node['elseBranch']:
-                self.visit(node['elseBranch'])
-        elif node['type'] == 'WhileStatement':
-            self.visit(node['condition'])
-            self.visit(node['body'])
-        elif node['type'] == 'ForStatement':
-            self.declared_variables.add(node['identifier'])
-            self.visit(node['iterable'])
-            self.visit(node['body'])
-        elif node['type'] == 'ParallelStatement':
-            self.visit(node['body'])
-        elif node['type'] == 'ScheduleStatement':
-            self.visit(node['body'])
-            self.visit(node['interval'])
-        elif node['type'] == 'NewExpression':
-            pass
-        elif node['type'] == 'MethodCall':
-            self.visit(node['object'])
-            for arg in node['arguments']:
-                self.visit(arg)
-        elif node['type'] == 'LambdaExpression':
-            # Visit the body of the lambda to check for semantic errors
-            self.visit(node['body'])
-        elif node['type'] == 'Block':
-            if not isinstance(node['body'], list):
-                raise Exception(f"Expected 'body' of Block node to be a list, but got {type(node['body'])} at line {node.get('line', 'unknown')}")
-            for statement in node['body']:
-                self.visit(statement)
-        elif node['type'] == 'FunctionCall':
-            for argument in node['arguments']:
-                self.visit(argument)
-        elif node['type'] == 'BinaryOperation':
-            self.visit(node['left'])
-            self.visit(node['right'])
-        elif node['type'] == 'Literal' or node['type'] == 'Identifier':
-            pass
-        elif node['type'] == 'NULL':
-            pass
-        elif node['type'] == 'ListLiteral':
-            for element in node['elements']:
-                self.visit(element)
-        elif node['type'] == 'ArrayAccess':
-            self.visit(node['array'])
-            self.visit(node['index'])
-        elif node['type'] == 'FunctionDeclaration':
-            self.analyze_function_declaration(node)
-        elif node['type'] == 'ClassDeclaration':
-            for method in node['methods']:
-                self.visit(method)
-        elif node['type'] == 'ReturnStatement':
-            self.analyze_return_statement(node)
-        else:
-            raise Exception(f"Unknown node type: {node['type']} at line {node.get('line', 'unknown')}")
+        visitor = self.visitors.get(node.__class__)
+        if visitor is not None:
+            return visitor(node)
+        if isinstance(node, dict):
+            return self.visit(from_dict(node))
+        raise Exception(f"Unknown node type: {node['type']} at line {node.get('line', 'unknown')}")
+
+    def visit_leaf(self, node):
+        pass
+
+    def visit_program(self, node):
+        self.declare_globals(node.body)
+        for statement in node.body:
+            self.visit(statement)
+
+    def visit_statement(self, node):
+        """Analyze one top-level statement of a program that is analyzed as it streams in."""
+        self.declare_globals(node)
+        self.visit(node)
+
+    def declare_globals(self, statements):
+        self.global_names.update(collect_assigned(statements, {}))
+        declared = collect_functions(statements, {})
+        for name, declarations in declared.items():
+            self.function_declarations.setdefault(name, []).extend(declarations)
+        # A program streamed or entered at the REPL can redeclare a function after a memoized one calls it
+        if any(len(self.function_declarations[name]) > 1 for name in declared):
+            for declaration in self.memoized_declarations:
+                PurityChecker(self.global_names, self.function_declarations).check(declaration)
+
+    def visit_body(self, node):
+        self.visit(node.body)
+
+    def visit_if_statement(self, node):
+        self.visit(node.condition)
+        self.visit(node.then_branch)
+        if node.else_branch:
+            self.visit(node.else_branch)
+
+    def visit_while_statement(self, node):
+        self.visit(node.condition)
+        self.visit(node.body)
+
+    def visit_for_statement(self, node):
+        self.declared_variables.add(node.identifier)
+        self.visit(node.iterable)
+        self.visit(node.body)
+
+    def visit_parallel_for_statement(self, node):
+        line = node.line or 'unknown'
+        seen = {node.identifier}
+        for reduction in node.reductions:
+            if reduction.operator not in REDUCTIONS:
+                raise Exception(f"Unknown reduction '{reduction.operator}' at line {reduction.line or 'unknown'}, expected one of: {', '.join(REDUCTIONS)}")
+            if reduction.identifier in seen:
+                raise Exception(f"Variable '{reduction.identifier}' cannot be reduced more than once or be the loop variable of a parallel for at line {line}")
+            seen.add(reduction.identifier)
+        returned = find_return(node.body)
+        if returned is not None:
+            raise Exception(f"Return statement inside a parallel for body at line {returned.line or line}")
+        self.visit(node.iterable)
+        self.visit_parallel_for_body(node)
+
+    def visit_parallel_for_body(self, node):
+        original_variables = self.declared_variables.copy()
+        self.declared_variables.add(node.identifier)
+        self.visit(node.body)
+        self.declared_variables = original_variables
+
+    def visit_schedule_statement(self, node):
+        self.visit(node.body)
+        self.visit(node.interval)
+
+    def visit_method_call(self, node):
+        self.visit(node.object)
+        for arg in node.arguments:
+            self.visit(arg)
+
+    def visit_member_access(self, node):
+        self.visit(node.object)
+
+    def visit_member_assignment(self, node):
+        self.visit(node.object)
+        self.visit(node.value)
+
+    def visit_lambda_expression(self, node):
+        # Visit the body of the lambda to check for semantic errors
+        self.visit(node.body)
+
+    def visit_block(self, node):
+        if not isinstance(node.body, list):
+            raise Exception(f"Expected 'body' of Block node to be a list, but got {type(node.body)} at line {node.line or 'unknown'}")
+        for statement in node.body:
+            self.visit(statement)
+
+    def visit_function_call(self, node):
+        for argument in node.arguments:
+            self.visit(argument)
+
+    def visit_binary_operation(self, node):
+        self.visit(node.left)
+        self.visit(node.right)
+
+    def visit_list_literal(self, node):
+        for element in node.elements:
+            self.visit(element)
+
+    def visit_array_access(self, node):
+        self.visit(node.array)
+        self.visit(node.index)
+
+    def visit_class_declaration(self, node):
+        for method in node.methods:
+            self.analyze_function_declaration(method, is_method=True)
 
     def analyze_assignment(self, node):
-        variable_name = node['identifier']
+        variable_name = node.identifier
         if variable_name in self.declared_variables:
-            self.console.print(f"[bold yellow]Notice:[/bold yellow] Redeclaration warning for variable '{variable_name}' at line {node.get('line', 'unknown')}")
+            self.console.print(f"[bold yellow]Notice:[/bold yellow] Redeclaration warning for variable '{variable_name}' at line {node.line or 'unknown'}")
         else:
             self.declared_variables.add(variable_name)
-        self.visit(node['value'])
+        self.visit(node.value)
 
-    def analyze_function_declaration(self, node):
-        function_name = node['name']
+    def analyze_function_declaration(self, node, is_method=False):
+        function_name = node.name
         if function_name in self.declared_functions:
-            self.console.print(f"[bold yellow]Notice:[/bold yellow] Redeclaration warning for function '{function_name}' at line {node.get('line', 'unknown')}")
+            self.console.print(f"[bold yellow]Notice:[/bold yellow] Redeclaration warning for function '{function_name}' at line {node.line or 'unknown'}")
         else:
             self.declared_functions.add(function_name)
+        if node.memoized:
+            PurityChecker(self.global_names, self.function_declarations).check(node)
+            self.memoized_declarations.append(node)
+        if not is_method:
+            # Methods are called without a trampoline, and a method's name says nothing about the calls back into it
+            node.tail_calls = mark_tail_calls(node.body, lambda name: self.call_graph.calls_back(name, function_name))
 
         original_variables = self.declared_variables.copy()
-        for param in node['parameters']:
+        for param in node.parameters:
             self.declared_variables.add(param)
 
-        if node['body']['type'] == 'Block':
-            self.visit(node['body'])
+        if isinstance(node.body, Block):
+            self.visit(node.body)
         else:
-            raise Exception(f"Expected a Block node for function body, but got {node['body']['type']} at line {node.get('line', 'unknown')}")
+            raise Exception(f"Expected a Block node for function body, but got {node.body['type']} at line {node.line or 'unknown'}")
 
         self.declared_variables = original_variables
 
     def analyze_return_statement(self, node):
         self.console.print("[cyan]Analyzing return statement...[/cyan]")
-        self.visit(node['value'])
\ No newline at end of file
+        self.visit(node.value)
@@ -0,0 +1,93 @@
+from parser.ast_nodes import (
+    AssignmentStatement, BinaryOperation, Block, ClassDeclaration, CountedLoop, ForStatement, FunctionCall,
+    FunctionDeclaration, IfStatement, LambdaExpression, Node, ParallelForStatement, ParallelStatement, ReturnStatement,
+    ScheduleStatement, WhileStatement
+)
+
+# Nodes the asyncio evaluator can suspend in the middle of; anything else runs to completion
+AWAITING_NODES = (
+    AssignmentStatement, BinaryOperation, Block, CountedLoop, ForStatement, FunctionCall, IfStatement,
+    ParallelForStatement, ReturnStatement, WhileStatement
+)
+
+# Their bodies run in calls or activities of their own, not as part of the node
+SEPARATE_BODIES = (ClassDeclaration, FunctionDeclaration, LambdaExpression, ParallelStatement, ScheduleStatement)
+
+
+class SuspensionAnalysis:
+    """Finds the nodes that may wait for an asynchronous builtin, for runtime.async_evaluator.
+
+    A declared function suspends if its body calls an asynchronous builtin or
+    a function that suspends. A node suspends if it is an AWAITING_NODES node
+    with such a call in it. Calls through variables, lambdas or methods are
+    not followed, so builtins reached that way simply block. Top-level
+    statements are added one at a time, as they are about to run, so streamed
+    programs work too.
+    """
+
+    def __init__(self, async_names):
+        self.async_names = async_names
+        self.declarations = {}        # Function name -> FunctionDeclaration
+        self.suspending_names = set()
+        self.nodes = set()            # ids of the nodes that suspend
+
+    def add(self, statement):
+        declared = []
+        self.collect_declarations(statement, declared)
+        if declared:
+            for declaration in declared:
+                self.declarations[declaration.name] = declaration
+            self.update()
+        self.mark(statement)
+
+    def collect_declarations(self, node, declared):
+        if isinstance(node, list):
+            for item in node:
+                self.collect_declarations(item, declared)
+        elif isinstance(node, Node) and not isinstance(node, (ClassDeclaration, LambdaExpression)):
+            if isinstance(node, FunctionDeclaration):
+                declared.append(node)
+            for name in node.fields:
+                self.collect_declarations(getattr(node, name), declared)
+
+    def suspending_call(self, name, names):
+        return name in names or (name in self.async_names and name not in self.declarations)
+
+    def calls_suspending(self, node, names):
+        if isinstance(node, list):
+            return any(self.calls_suspending(item, names) for item in node)
+        if not isinstance(node, Node) or isinstance(node, SEPARATE_BODIES):
+            return False
+        if isinstance(node, FunctionCall) and self.suspending_call(node.name, names):
+            return True
+        return any(self.calls_suspending(getattr(node, name), names) for name in node.fields)
+
+    def update(self):
+        """Work out which declared functions suspend, then mark their bodies again."""
+        names = set()
+        changed = True
+        while changed:
+            changed = False
+            for name, declaration in self.declarations.items():
+                if name not in names and self.calls_suspending(declaration.body, names):
+                    names.add(name)
+                    changed = True
+        self.suspending_names = names
+        for declaration in self.declarations.values():
+            self.mark(declaration.body)
+
+    def mark(self, node):
+        """Record the suspending nodes under node, returns whether node itself suspends."""
+        if isinstance(node, list):
+            return any([self.mark(item) for item in node])  # A list, so that every item gets marked
+        if not isinstance(node, Node):
+            return False
+        suspends = any([self.mark(getattr(node, name)) for name in node.fields])
+        if isinstance(node, SEPARATE_BODIES):
+            return False
+        if isinstance(node, FunctionCall) and self.suspending_call(node.name, self.suspending_names):
+            suspends = True
+        if suspends and isinstance(node, AWAITING_NODES):
+            self.nodes.add(id(node))
+            return True
+        return False
@@ -0,0 +1,70 @@
+from parser.ast_nodes import Block, ForStatement, FunctionCall, IfStatement, Node, ReturnStatement, WhileStatement
+
+
+def called_names(node, names):
+    """Add the names of the functions called anywhere under `node` to `names`."""
+    if isinstance(node, list):
+        for item in node:
+            called_names(item, names)
+    elif isinstance(node, Node):
+        if isinstance(node, FunctionCall):
+            names.add(node.name)
+        for name in node.fields:
+            called_names(getattr(node, name), names)
+    return names
+
+
+def mark_tail_calls(node, recursive):
+    """Mark the `return f(...)` statements of a function body as tail calls; True if any were marked.
+
+    Only calls for which recursive(f) holds are marked: turning a call that
+    cannot lead back into the function into a tail call saves no stack and
+    costs a trampoline. Only the function's own statements are searched:
+    nested functions are marked on their own, and parallel or scheduled
+    blocks run apart from the call they appear in.
+    """
+    found = False
+    if isinstance(node, list):
+        for statement in node:
+            found = mark_tail_calls(statement, recursive) or found
+    elif isinstance(node, ReturnStatement):
+        call = node.value
+        if isinstance(call, FunctionCall) and call.name != 'free' and recursive(call.name):
+            node.tail = found = True
+    elif isinstance(node, (Block, WhileStatement, ForStatement)):
+        found = mark_tail_calls(node.body, recursive)
+    elif isinstance(node, IfStatement):
+        found = mark_tail_calls(node.then_branch, recursive)
+        if node.else_branch is not None:
+            found = mark_tail_calls(node.else_branch, recursive) or found
+    return found
+
+
+class CallGraph:
+    """Which declared functions can reach which, by the names their bodies call.
+
+    Calls through variables, lambdas or methods are not followed, so a tail
+    call that only recurses through one of those is left unmarked and simply
+    nests like any other call.
+    """
+
+    def __init__(self, functions):
+        self.functions = functions  # Name -> FunctionDeclarations with that name
+        self.callees = {}  # id of a FunctionDeclaration -> names of the functions it calls
+
+    def calls_back(self, callee, caller):
+        """Whether calling the function named callee can lead to a call of caller."""
+        pending, seen = [callee], set()
+        while pending:
+            name = pending.pop()
+            if name == caller:
+                return True
+            if name in seen:
+                continue
+            seen.add(name)
+            for declaration in self.functions.get(name, ()):
+                names = self.callees.get(id(declaration))
+                if names is None:
+                    names = self.callees[id(declaration)] = called_names(declaration.body, set())
+                pending.extend(names)
+        return False
@@ -0,0 +1,224 @@
+from parser.ast_nodes import (
+    ArrayAccess, AssignmentStatement, BinaryOperation, ClassDeclaration, Constant, ForStatement, FunctionDeclaration,
+    Identifier, LambdaExpression, ListLiteral, Literal, Node, ParallelForStatement
+)
+from runtime.operations import BINARY_OPERATIONS, TYPED_OPERATIONS, check_iterable, index_array
+
+INT = 'int'
+STR = 'str'
+LIST = 'list'
+UNKNOWN = 'unknown'
+
+# One value of each known type. Running the real operations on them gives the
+# result type of an operation, or the exact error the program would raise.
+SAMPLES = {INT: 1, STR: 's', LIST: []}
+
+
+def join(known, new):
+    """Combine the types of two values a variable may hold."""
+    if known is None or known == new:
+        return new
+    return UNKNOWN
+
+
+def type_name(value):
+    name = value.__class__.__name__
+    return name if name in SAMPLES else UNKNOWN
+
+
+class TypeCheckError(ValueError):
+    """A program contains operations that must fail whenever they run."""
+
+    def __init__(self, errors):
+        super().__init__('\n'.join(errors))
+        self.errors = errors
+
+
+class TypeInference:
+    """Works out which variables and expressions are always int, str or list.
+
+    Runs on a program resolved by ScopeResolver. A variable's type is the
+    join of everything assigned to it anywhere, so it holds wherever the
+    variable is read. BinaryOperations whose operands are known get their
+    `operand_type` annotation set, letting the engines use the unchecked
+    operations of runtime.operations.TYPED_OPERATIONS. Operations, indexing
+    and for loops that can only fail are collected in `errors`, with the
+    message they would raise at run time.
+    """
+
+    def __init__(self):
+        self.types = {}  # Variable key -> type; globals are ('global', name), locals (id(scope), slot)
+        self.assignments = []  # (variable key, value expression)
+        self.keys = {}  # id(Identifier) -> variable key
+        self.scopes = []  # Enclosing functions and lambdas, innermost last
+        self.dynamic = False  # Some function binds names in the MemoryManager, so globals can hold anything
+        self.results = {}  # (operator, left type, right type) -> result type
+        self.errors = []
+
+    def infer(self, program):
+        """Annotate program and return the list of type errors found."""
+        self.collect(program.body)
+        self.solve()
+        self.annotate(program.body)
+        return self.errors
+
+    def check(self, program):
+        """Like infer(), but raise TypeCheckError if the program has type errors."""
+        errors = self.infer(program)
+        if errors:
+            raise TypeCheckError(errors)
+
+    # Variables
+
+    def key(self, name, depth, slot):
+        if slot is None:
+            return ('global', name)
+        return (id(self.scopes[-1 - depth]), slot)
+
+    def enter(self, scope, parameters):
+        self.scopes.append(scope)
+        slots = {}
+        for name in parameters:
+            slots.setdefault(name, len(slots) + 1)
+        for slot in slots.values():
+            self.types[(id(scope), slot)] = UNKNOWN  # Callers may pass anything
+
+    def collect(self, node):
+        """Record every variable assignment and what each identifier refers to."""
+        if isinstance(node, list):
+            for item in node:
+                self.collect(item)
+            return
+        if not isinstance(node, Node):
+            return
+        cls = node.__class__
+        if cls is Identifier:
+            self.keys[id(node)] = self.key(node.name, node.depth, node.slot)
+        elif cls is AssignmentStatement:
+            self.assignments.append((self.key(node.identifier, node.depth, node.slot), node.value))
+        elif cls is ForStatement:
+            self.types[self.key(node.identifier, node.depth, node.slot)] = UNKNOWN
+        elif cls is FunctionDeclaration or cls is LambdaExpression:
+            if cls is FunctionDeclaration:
+                self.types[self.key(node.name, node.depth, node.slot)] = UNKNOWN
+            if node.frame_size is None:
+                self.dynamic = True
+                self.collect(node.body)
+                return
+            self.enter(node, node.parameters)
+            try:
+                self.collect(node.body)
+            finally:
+                self.scopes.pop()
+            return
+        elif cls is ParallelForStatement:
+            self.collect(node.iterable)
+            for reduction in node.reductions:
+                # Combined from the chunks' results, which may be of any type
+                self.types[self.key(reduction.identifier, reduction.depth, reduction.slot)] = UNKNOWN
+            if node.frame_size is None:
+                self.dynamic = True
+                self.collect(node.body)
+                return
+            self.enter(node, [node.identifier, *[reduction.identifier for reduction in node.reductions]])
+            try:
+                self.collect(node.body)
+            finally:
+                self.scopes.pop()
+            return
+        elif cls is ClassDeclaration:
+            for method in node.methods:
+                if method.frame_size is None:
+                    self.dynamic = True
+                    self.collect(method.body)
+                    continue
+                self.enter(method, ['self', *method.parameters])
+                try:
+                    self.collect(method.body)
+                finally:
+                    self.scopes.pop()
+            return
+        for name in node.fields:
+            self.collect(getattr(node, name))
+
+    def solve(self):
+        """Join assigned types into the variables until nothing changes."""
+        changed = True
+        while changed:
+            changed = False
+            for key, value in self.assignments:
+                known = self.types.get(key)
+                new = join(known, self.type_of(value))
+                if new != known:
+                    self.types[key] = new
+                    changed = True
+
+    # Expressions
+
+    def type_of(self, node):
+        cls = node.__class__
+        if cls is Literal or cls is Constant:
+            value = node.value
+            if cls is Literal and isinstance(value, str) and value.startswith('"') and value.endswith('"'):
+                return STR
+            return type_name(value)
+        if cls is ListLiteral:
+            return LIST
+        if cls is Identifier:
+            key = self.keys.get(id(node))
+            if key is None or (self.dynamic and key[0] == 'global'):
+                return UNKNOWN
+            return self.types.get(key) or UNKNOWN
+        if cls is BinaryOperation:
+            return self.result_type(node.operator, self.type_of(node.left), self.type_of(node.right))
+        return UNKNOWN
+
+    def result_type(self, operator, left, right):
+        if left == UNKNOWN or right == UNKNOWN:
+            return UNKNOWN
+        key = (operator, left, right)
+        result = self.results.get(key)
+        if result is None:
+            operation = BINARY_OPERATIONS.get(operator)
+            try:
+                result = type_name(operation(SAMPLES[left], SAMPLES[right], None)) if operation else UNKNOWN
+            except ValueError:
+                result = UNKNOWN  # Reported by annotate()
+            self.results[key] = result
+        return result
+
+    def fails(self, check, *args):
+        """Record the error check(*args) raises, if any."""
+        try:
+            check(*args)
+        except ValueError as error:
+            self.errors.append(str(error))
+
+    def annotate(self, node):
+        if isinstance(node, list):
+            for item in node:
+                self.annotate(item)
+            return
+        if not isinstance(node, Node):
+            return
+        for name in node.fields:
+            self.annotate(getattr(node, name))
+        cls = node.__class__
+        if cls is BinaryOperation:
+            node.operand_type = None
+            left, right = self.type_of(node.left), self.type_of(node.right)
+            if left == UNKNOWN or right == UNKNOWN or node.operator not in BINARY_OPERATIONS:
+                return
+            self.fails(BINARY_OPERATIONS[node.operator], SAMPLES[left], SAMPLES[right], node.line)
+            if left == right and node.operator in TYPED_OPERATIONS.get(left, ()):
+                node.operand_type = left
+        elif cls is ArrayAccess:
+            array, index = self.type_of(node.array), self.type_of(node.index)
+            if array != UNKNOWN and array != LIST:
+                self.fails(index_array, SAMPLES[array], 0, node.line)
+            elif index != UNKNOWN and index != INT:
+                self.fails(index_array, [0], SAMPLES[index], node.line)
+        elif cls is ForStatement:
+            iterable = self.type_of(node.iterable)
+            if iterable != UNKNOWN:
+                self.fails(check_iterable, SAMPLES[iterable], node.line)
@@ -0,0 +1,127 @@
+import hashlib
+import marshal
+import os
+import sys
+
+from parser.ast_nodes import NODE_TYPES, Node
+
+# Bump when the analysis passes change what an analyzed program looks like.
+# Changes to the node classes themselves are picked up automatically because
+# their layout is part of the cache key.
+INTERPRETER_VERSION = '0.7.0'
+CACHE_MAGIC = b'LANC\x01'
+CACHE_SUFFIX = '.lanc'
+DEFAULT_CACHE_DIR = '__lancache__'
+DEFAULT_MAX_CACHE_SIZE = 64 * 1024 * 1024
+
+NODE_LAYOUT = repr(sorted((name, node_class.__slots__) for name, node_class in NODE_TYPES.items())).encode()
+
+
+def encode_node(value):
+    """Flatten nodes into marshal-friendly tuples of (type, *slot values)."""
+    if isinstance(value, Node):
+        # Specialized (quickened) nodes are stored as their node type
+        slots = NODE_TYPES[value.type].__slots__
+        return (value.type,) + tuple(encode_node(getattr(value, name)) for name in slots)
+    if isinstance(value, list):
+        return [encode_node(item) for item in value]
+    return value
+
+
+def decode_node(value):
+    if isinstance(value, tuple):
+        node_class = NODE_TYPES[value[0]]
+        node = node_class.__new__(node_class)
+        for name, item in zip(node_class.__slots__, value[1:]):
+            setattr(node, name, decode_node(item))
+        return node
+    if isinstance(value, list):
+        return [decode_node(item) for item in value]
+    return value
+
+
+class ProgramCache:
+    """__pycache__-style store of analyzed programs, keyed by source hash and interpreter version.
+
+    Entries live in `cache_dir` (by default a __lancache__ directory next to the
+    script) as <script>.<key>.lanc files. Once the directory grows past
+    `max_size` bytes the least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir=None, max_size=DEFAULT_MAX_CACHE_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def source_key(self, source_file):
+        """Hash a script (path or binary file object) together with the interpreter version."""
+        digest = hashlib.sha256()
+        digest.update(INTERPRETER_VERSION.encode())
+        digest.update(sys.implementation.cache_tag.encode())
+        digest.update(NODE_LAYOUT)
+        if isinstance(source_file, (bytes, str)):
+            digest.update(source_file.encode() if isinstance(source_file, str) else source_file)
+        else:
+            for block in iter(lambda: source_file.read(1 << 16), b''):
+                digest.update(block)
+        return digest.digest()
+
+    def path_for(self, script_path, key):
+        directory = self.cache_dir or os.path.join(os.path.dirname(os.path.abspath(script_path)), DEFAULT_CACHE_DIR)
+        name = os.path.splitext(os.path.basename(script_path))[0]
+        return os.path.join(directory, f'{name}.{key.hex()[:16]}{CACHE_SUFFIX}')
+
+    def load(self, script_path, key):
+        """Return the cached program for key, or None on a miss or an unreadable entry."""
+        path = self.path_for(script_path, key)
+        try:
+            with open(path, 'rb') as handle:
+                data = handle.read()
+        except OSError:
+            return None
+        header = CACHE_MAGIC + key
+        if not data.startswith(header):
+            return None
+        try:
+            program = decode_node(marshal.loads(data[len(header):]))
+        except (EOFError, ValueError, TypeError, KeyError):
+            return None
+        try:
+            os.utime(path)  # Mark as recently used for eviction
+        except OSError:
+            pass
+        return program
+
+    def store(self, script_path, key, program):
+        """Write program to the cache; failures (e.g. a read-only directory) are ignored."""
+        path = self.path_for(script_path, key)
+        payload = CACHE_MAGIC + key + marshal.dumps(encode_node(program))
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = f'{path}.{os.getpid()}.tmp'
+            with open(temporary, 'wb') as handle:
+                handle.write(payload)
+            os.replace(temporary, path)
+        except OSError:
+            return False
+        self.evict(os.path.dirname(path))
+        return True
+
+    def evict(self, directory):
+        """Remove least recently used entries until the directory fits in max_size."""
+        entries = []
+        try:
+            for entry in os.scandir(directory):
+                if entry.name.endswith(CACHE_SUFFIX) and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,83 @@
+import json
+import sys
+from collections import deque
+
+# Trace sinks receive structured events from the lexer and parser. Call sites
+# guard every emit() with `if trace.enabled:` and pass raw objects as fields, so
+# a disabled sink costs one attribute check and no string formatting at all.
+
+
+class NullTraceSink:
+    """Discards every event; the default sink."""
+    enabled = False
+
+    def emit(self, source, event, **fields):
+        pass
+
+    def close(self):
+        pass
+
+
+class RingBufferTraceSink:
+    """Keeps the most recent events in memory, e.g. to show what led up to an error."""
+    enabled = True
+
+    def __init__(self, capacity=1000):
+        self.events = deque(maxlen=capacity)
+
+    def emit(self, source, event, **fields):
+        self.events.append((source, event, fields))
+
+    def records(self, limit=None):
+        """Return the buffered events as dicts, oldest first (only the last `limit` if given)."""
+        events = list(self.events)[-limit:] if limit else self.events
+        return [dict({'source': source, 'event': event}, **fields) for source, event, fields in events]
+
+    def close(self):
+        pass
+
+
+class JsonLinesTraceSink:
+    """Writes one JSON object per event to a stream or file."""
+    enabled = True
+
+    def __init__(self, stream=None, path=None):
+        self.owns_stream = path is not None
+        self.stream = open(path, 'w') if path is not None else (stream or sys.stdout)
+
+    def emit(self, source, event, **fields):
+        record = {'source': source, 'event': event}
+        record.update(fields)
+        self.stream.write(json.dumps(record, default=encode_value) + '\n')
+
+    def close(self):
+        if self.owns_stream:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+
+def encode_value(value):
+    """JSON fallback: AST nodes become dicts, tokens and other objects their repr."""
+    to_dict = getattr(value, 'to_dict', None)
+    return to_dict() if to_dict is not None else repr(value)
+
+
+NULL_TRACE = NullTraceSink()
+
+TRACE_SINKS = {
+    'null': NullTraceSink,
+    'ring': RingBufferTraceSink,
+    'jsonl': JsonLinesTraceSink,
+}
+
+
+def create_trace_sink(kind, path=None, capacity=1000):
+    """Build a sink by name: 'null', 'ring' or 'jsonl' (written to path, or stdout)."""
+    if kind == 'null':
+        return NULL_TRACE
+    if kind == 'ring':
+        return RingBufferTraceSink(capacity)
+    if kind == 'jsonl':
+        return JsonLinesTraceSink(path=path)
+    raise ValueError(f"Unknown trace sink '{kind}', expected one of: {', '.join(TRACE_SINKS)}")
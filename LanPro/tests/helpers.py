@@ -0,0 +1,72 @@
+"""Helpers the test modules share: parse and analyze LanPro source, build engines and run programs on them."""
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from rich.console import Console
+
+from lexer.regex_tokenizer import RegexTokenizer
+from parser.syntax_analyzer import SyntaxAnalyzer
+from runtime.engines import create_engine
+from runtime.memory_manager import MemoryManager
+from semantic.optimizer import Optimizer
+from semantic.scope_resolver import ScopeResolver
+from semantic.type_inference import TypeInference
+
+
+def quiet_console():
+    return Console(file=io.StringIO())
+
+
+def parse(source):
+    """Parse source into a Program, without semantic analysis."""
+    return SyntaxAnalyzer().parse(RegexTokenizer(source).tokenize())
+
+
+def analyze(source, analyzer_class=ScopeResolver):
+    """Parse source and run analyzer_class over it, with its notices silenced."""
+    program = parse(source)
+    analyzer_class(console=quiet_console()).analyze(program)
+    return program
+
+
+def print_into(printed):
+    """A print builtin that appends each line it prints to the list printed."""
+    return lambda *args: printed.append(' '.join(map(str, args)))
+
+
+def create_evaluator(engine='tree', output=None):
+    """A fresh engine with a MemoryManager of its own and a silent console.
+
+    engine is a name from runtime.engines.ENGINES or an evaluator class.
+    output is installed as the print builtin; by default printing does nothing.
+    """
+    memory_manager = MemoryManager()
+    memory_manager.allocate('print', output or (lambda *args: None))
+    if isinstance(engine, str):
+        evaluator = create_engine(engine, memory_manager)
+    else:
+        evaluator = engine(memory_manager)
+    evaluator.console = quiet_console()
+    return evaluator
+
+
+def run_source(source, engine='tree', analyzer_class=ScopeResolver, opt_level=0, typed=False):
+    """Run a program and return what it printed, plus the error it stopped with (if any).
+
+    With typed=True, BinaryOperations are annotated by TypeInference first (its
+    errors are ignored, so the program still fails at run time).
+    """
+    printed = []
+    evaluator = create_evaluator(engine, print_into(printed))
+    program = analyze(source, analyzer_class)
+    if typed:
+        TypeInference().infer(program)
+    Optimizer(opt_level).optimize(program)
+    try:
+        evaluator.run(program)
+    except Exception as error:
+        printed.append(f'{type(error).__name__}: {error}')
+    return printed, evaluator.memory_manager
@@ -0,0 +1,74 @@
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from parser.ast_nodes import BinaryOperation, IfStatement, Literal, NewExpression, Program, from_dict
+from semantic.semantic_analyzer import SemanticAnalyzer
+from runtime.evaluator import Evaluator
+from runtime.memory_manager import MemoryManager
+from helpers import parse
+
+
+class TestAstNodes(unittest.TestCase):
+
+    def test_parser_emits_typed_nodes(self):
+        program = parse('x = 1 + 2; if (x > 2) { print(x); }')
+        self.assertIsInstance(program, Program)
+        self.assertIsInstance(program.body[0].value, BinaryOperation)
+        self.assertIsInstance(program.body[1], IfStatement)
+        self.assertFalse(hasattr(program.body[0].value, '__dict__'))
+
+    def test_dict_interface(self):
+        node = parse('x = 1 + 2;').body[0].value
+        self.assertEqual(node['type'], 'BinaryOperation')
+        self.assertEqual(node['operator'], '+')
+        self.assertEqual(node['left']['value'], 1)
+        self.assertEqual(node.get('line'), 1)
+        self.assertIsNone(node.get('missing'))
+        self.assertIn('right', node)
+        self.assertNotIn('missing', node)
+        with self.assertRaises(KeyError):
+            node['missing']
+
+    def test_renamed_keys(self):
+        node = parse('if (x > 1) { y = 1; } else { y = 2; }').body[0]
+        self.assertIs(node['thenBranch'], node.then_branch)
+        self.assertIs(node['elseBranch'], node.else_branch)
+        new = NewExpression(class_name='Point', line=3)
+        self.assertEqual(new['class'], 'Point')
+        self.assertEqual(new.to_dict(), {'type': 'NewExpression', 'class': 'Point', 'line': 3})
+
+    def test_dict_round_trip(self):
+        program = parse('function f(a) { return a * 2; } xs = [f(1), null]; print(xs[0]);')
+        as_dict = program.to_dict()
+        self.assertIsInstance(as_dict['body'][0]['body'], dict)
+        self.assertEqual(from_dict(as_dict), program)
+        self.assertEqual(program, as_dict)
+
+    def test_unknown_fields_are_rejected(self):
+        with self.assertRaises(TypeError):
+            Literal(value=1, colour='red')
+        with self.assertRaises(ValueError):
+            from_dict({'type': 'Mystery', 'line': 4})
+
+    def test_analyzer_and_evaluator_accept_dict_ast(self):
+        printed = []
+        memory_manager = MemoryManager()
+        memory_manager.allocate('print', lambda *args: printed.append(args))
+        program = parse('x = 2; y = x * 21; print(y);').to_dict()
+        with contextlib.redirect_stdout(io.StringIO()):
+            SemanticAnalyzer().analyze(program)
+            Evaluator(memory_manager).run(program)
+        self.assertEqual(printed, [(42,)])
+
+    def test_analyzer_reports_unhandled_nodes(self):
+        with self.assertRaises(Exception) as context:
+            SemanticAnalyzer().visit(parse('let x = 1;'))
+        self.assertIn('Unknown node type: LetStatement', str(context.exception))
+
+if __name__ == '__main__':
+    unittest.main()
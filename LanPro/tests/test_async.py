@@ -0,0 +1,96 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from runtime.async_evaluator import AsyncEvaluator
+from runtime.io_builtins import IO_BUILTINS
+from runtime.scheduler import ScheduledTask
+from semantic.scope_resolver import ScopeResolver
+from semantic.semantic_analyzer import SemanticAnalyzer
+from semantic.suspension import SuspensionAnalysis
+from helpers import analyze, create_evaluator, print_into
+
+
+class TestAsyncEvaluator(unittest.TestCase):
+
+    def setUp(self):
+        self.printed = []
+        self.evaluator = create_evaluator(AsyncEvaluator, print_into(self.printed))
+        self.memory_manager = self.evaluator.memory_manager
+
+    def tearDown(self):
+        self.evaluator.close()
+
+    def run_source(self, source, analyzer_class=ScopeResolver):
+        start = time.perf_counter()
+        self.evaluator.run(analyze(source, analyzer_class))
+        return time.perf_counter() - start
+
+    def test_thousands_of_sleeping_activities_share_one_thread(self):
+        source = ('done = 0; function nap(n) { sleep(1 / 5); return n; }'
+                  ' for (i in range(3000)) { parallel { x = nap(i); done = done + 1; commit(); } }')
+        for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+            with self.subTest(analyzer=analyzer_class.__name__):
+                threads = set(threading.enumerate())
+                elapsed = self.run_source(source, analyzer_class)
+                self.assertEqual(self.memory_manager.get('done'), 3000)
+                self.assertLess(elapsed, 3)  # One after another, the naps would take 600s
+                self.assertEqual(set(threading.enumerate()) - threads, set())
+
+    def test_activities_interleave_while_they_wait(self):
+        self.run_source('function step(s, t) { sleep(t); print(s); }'
+                        ' parallel { x = step("slow", 1 / 20); y = step("fast", 1 / 100); }')
+        self.assertEqual(self.printed, ['fast', 'slow'])
+
+    def test_read_file_and_run_process(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as file:
+            file.write('x' * 200000)
+        self.addCleanup(os.remove, file.name)
+        self.run_source(f'text = read_file("{file.name}"); out = run_process("echo hello");')
+        self.assertEqual(self.memory_manager.get('text'), 'x' * 200000)
+        self.assertEqual(self.memory_manager.get('out'), 'hello\n')
+        with self.assertRaises(ValueError):
+            self.run_source(f'out = run_process("{sys.executable} -c \'import sys; sys.exit(3)\'");')
+
+    def test_scheduled_tasks_run_on_the_loop(self):
+        threads = set(threading.enumerate())
+        self.run_source('ticks = 0; h = schedule { ticks = ticks + 1; } every 1 / 100;'
+                        ' schedule { print("later"); } after 1 / 50; sleep(1 / 5); cancel(h);')
+        self.assertGreaterEqual(self.memory_manager.get('ticks'), 10)
+        self.assertIsInstance(self.memory_manager.get('h'), ScheduledTask)
+        self.assertEqual(self.printed, ['later'])
+        self.assertEqual(self.evaluator.scheduler.pending(), 0)
+        self.assertEqual(set(threading.enumerate()) - threads, set())
+
+    def test_errors_in_activities_reach_run(self):
+        with self.assertRaises(ValueError):
+            self.run_source('parallel { x = sleep("soon"); }')
+
+
+class TestSuspensionAnalysis(unittest.TestCase):
+
+    def test_only_paths_to_asynchronous_builtins_suspend(self):
+        program = analyze('function a() { sleep(1); } function b() { a(); } function c() { return 1; }'
+                        ' x = b(); y = c();')
+        analysis = SuspensionAnalysis(IO_BUILTINS)
+        for statement in program.body:
+            analysis.add(statement)
+        self.assertEqual(analysis.suspending_names, {'a', 'b'})
+        self.assertIn(id(program.body[3]), analysis.nodes)
+        self.assertNotIn(id(program.body[4]), analysis.nodes)
+
+    def test_declared_functions_shadow_builtins(self):
+        program = analyze('function sleep(n) { return n; } x = sleep(1);')
+        analysis = SuspensionAnalysis(IO_BUILTINS)
+        for statement in program.body:
+            analysis.add(statement)
+        self.assertEqual(analysis.nodes, set())
+
+
+if __name__ == '__main__':
+    unittest.main()
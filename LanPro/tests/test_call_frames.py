@@ -0,0 +1,113 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from runtime.memory_manager import MemoryManager
+from semantic.scope_resolver import ScopeResolver
+from semantic.semantic_analyzer import SemanticAnalyzer
+from helpers import analyze, create_evaluator, parse
+
+
+class TestMemoryManagerFrames(unittest.TestCase):
+
+    def setUp(self):
+        self.memory_manager = MemoryManager()
+        self.memory_manager.allocate('x', 1)
+
+    def test_new_names_are_dropped_on_pop(self):
+        self.memory_manager.push_scope()
+        self.memory_manager.allocate('y', 2)
+        self.assertEqual(self.memory_manager.get('y'), 2)
+        self.memory_manager.pop_scope()
+        self.assertFalse(self.memory_manager.exists('y'))
+
+    def test_assigning_an_outer_name_updates_it(self):
+        self.memory_manager.push_scope()
+        self.memory_manager.allocate('x', 5)
+        self.memory_manager.pop_scope()
+        self.assertEqual(self.memory_manager.get('x'), 5)
+
+    def test_bound_parameter_shadows_outer_name(self):
+        self.memory_manager.push_scope()
+        self.memory_manager.bind('x', 10)
+        self.memory_manager.allocate('x', 11)
+        self.assertEqual(self.memory_manager.get('x'), 11)
+        self.memory_manager.pop_scope()
+        self.assertEqual(self.memory_manager.get('x'), 1)
+
+    def test_nested_scopes(self):
+        self.memory_manager.push_scope()
+        self.memory_manager.bind('a', 1)
+        self.memory_manager.push_scope()
+        self.memory_manager.bind('a', 2)
+        self.memory_manager.pop_scope()
+        self.assertEqual(self.memory_manager.get('a'), 1)
+        self.memory_manager.pop_scope()
+        self.assertFalse(self.memory_manager.exists('a'))
+
+    def test_pop_only_touches_bound_names(self):
+        for i in range(100):
+            self.memory_manager.allocate(f'g{i}', i)
+        self.memory_manager.push_scope()
+        self.memory_manager.bind('n', 3)
+        self.assertEqual(len(self.memory_manager.frames[-1]), 1)
+        self.memory_manager.pop_scope()
+
+
+class TestCallSemantics(unittest.TestCase):
+    """The same programs through the frame stack (SemanticAnalyzer) and slot frames (ScopeResolver)."""
+
+    def run_program(self, source, analyzer_class):
+        printed = []
+        evaluator = create_evaluator('tree', lambda *args: printed.append(args))
+        evaluator.run(analyze(source, analyzer_class))
+        return printed, evaluator.memory_manager
+
+    def assert_prints(self, source, expected):
+        for analyzer_class in (SemanticAnalyzer, ScopeResolver):
+            with self.subTest(analyzer=analyzer_class.__name__):
+                printed, _ = self.run_program(source, analyzer_class)
+                self.assertEqual(printed, expected)
+
+    def test_recursive_fib(self):
+        self.assert_prints(
+            'function fib(n) { if (n < 2) { return n; } return fib(n - 1) + fib(n - 2); } print(fib(15));',
+            [(610,)])
+
+    def test_return_stops_the_function(self):
+        self.assert_prints(
+            'function first(n) { i = 0; while (i < 10) { if (i == n) { return i; } i = i + 1; } return 99; }'
+            ' print(first(4));',
+            [(4,)])
+
+    def test_calls_in_a_loop(self):
+        self.assert_prints(
+            'function add(a, b) { return a + b; } i = 0; total = 0;'
+            ' while (i < 100) { total = add(total, i); i = i + 1; } print(total);',
+            [(4950,)])
+
+    def test_locals_are_discarded_after_the_call(self):
+        for analyzer_class in (SemanticAnalyzer, ScopeResolver):
+            with self.subTest(analyzer=analyzer_class.__name__):
+                _, memory_manager = self.run_program('function f(a) { b = a; } f(1);', analyzer_class)
+                self.assertFalse(memory_manager.exists('a'))
+                self.assertFalse(memory_manager.exists('b'))
+                self.assertEqual(memory_manager.frames, [])
+
+    def test_frames_are_popped_when_a_call_fails(self):
+        evaluator = create_evaluator('tree')
+        memory_manager = evaluator.memory_manager
+        with self.assertRaises(ValueError):
+            evaluator.run(parse('function f(a) { b = a + "x"; } f(1);'))
+        self.assertEqual(memory_manager.frames, [])
+        self.assertFalse(memory_manager.exists('a'))
+
+    def test_method_and_lambda_calls(self):
+        self.assert_prints(
+            'class P { twice(n) { return n * 2; } } p = new P(); f = (a) => a + 1; print(f(p.twice(3)));',
+            [(7,)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from runtime.engines import ENGINES
+from runtime.memory_manager import MemoryManager
+from semantic.scope_resolver import ScopeResolver
+from semantic.semantic_analyzer import SemanticAnalyzer
+from helpers import analyze, create_evaluator
+
+WORK = ('function fib(n) { if (n < 2) { return n; } return fib(n - 1) + fib(n - 2); }'
+        ' function work(n) { t = 0; for (i in range(n)) { t = t + fib(10); } return t; }')
+
+
+def start(source, engine='tree', analyzer_class=ScopeResolver):
+    """Run a program; returns the engine, whose tasks may still be running."""
+    evaluator = create_evaluator(engine)
+    evaluator.run(analyze(source, analyzer_class))
+    return evaluator
+
+
+def run_tasks(memory_manager, count, body):
+    """Run body(task) as `count` tasks on threads of their own, committing each one."""
+    def task_thread():
+        task = memory_manager.enter_task()
+        try:
+            body(task)
+            task.commit()
+        finally:
+            memory_manager.leave_task()
+
+    threads = [threading.Thread(target=task_thread) for _ in range(count)]
+    for thread in threads:
+        memory_manager.start_task()
+        thread.start()
+    return threads
+
+
+class TestConcurrency(unittest.TestCase):
+
+    def test_parallel_statements_call_functions(self):
+        statements = ' '.join(f'v{n} = work({n});' for n in range(12))
+        source = WORK + ' parallel { ' + statements + ' }'
+        for engine in ENGINES:
+            for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+                with self.subTest(engine=engine, analyzer=analyzer_class.__name__):
+                    memory_manager = start(source, engine, analyzer_class).memory_manager
+                    self.assertEqual([memory_manager.get(f'v{n}') for n in range(12)], [55 * n for n in range(12)])
+                    self.assertEqual(memory_manager.active_tasks, 0)
+                    self.assertFalse(memory_manager.exists('t'))  # Locals stayed in their tasks
+
+    def test_reference_counts_are_not_lost(self):
+        memory_manager = MemoryManager()
+        memory_manager.allocate('shared', 0)
+
+        def body(task):
+            for n in range(2000):
+                memory_manager.allocate('shared', n)
+                if n % 100 == 0:
+                    memory_manager.commit()
+
+        threads = run_tasks(memory_manager, 8, body)
+        for n in range(2000):
+            memory_manager.allocate('shared', n)  # The main thread keeps writing meanwhile
+        for thread in threads:
+            thread.join()
+        self.assertEqual(memory_manager.variables['shared']['ref_count'], 1 + 9 * 2000)
+        self.assertEqual(memory_manager.active_tasks, 0)
+
+    def test_task_scopes_are_private(self):
+        memory_manager = MemoryManager()
+        memory_manager.allocate('g', 1)
+        seen = {}
+        inside = threading.Event()
+        done = threading.Event()
+
+        def body(task):
+            memory_manager.push_scope()
+            memory_manager.bind('g', 'parameter')
+            memory_manager.allocate('total', 5)
+            seen['inside'] = (memory_manager.get('g'), memory_manager.get('total'))
+            inside.set()
+            done.wait(5)
+            memory_manager.pop_scope()
+            seen['after'] = memory_manager.get('g')
+
+        threads = run_tasks(memory_manager, 1, body)
+        inside.wait(5)
+        self.assertEqual(memory_manager.get('g'), 1)
+        self.assertFalse(memory_manager.exists('total'))
+        done.set()
+        threads[0].join()
+        self.assertEqual(seen, {'inside': ('parameter', 5), 'after': 1})
+        self.assertFalse(memory_manager.exists('total'))
+
+    def test_writes_are_published_on_commit(self):
+        memory_manager = MemoryManager()
+        memory_manager.allocate('x', 1)
+        memory_manager.allocate('y', 1)
+        memory_manager.allocate('gone', 1)
+        wrote = threading.Event()
+        checked = threading.Event()
+
+        def body(task):
+            memory_manager.allocate('x', 2)
+            memory_manager.allocate('fresh', 3)
+            memory_manager.deallocate('gone')
+            self.assertFalse(memory_manager.exists('gone'))
+            wrote.set()
+            checked.wait(5)
+
+        threads = run_tasks(memory_manager, 1, body)
+        wrote.wait(5)
+        self.assertEqual((memory_manager.get('x'), memory_manager.get('gone')), (1, 1))
+        self.assertFalse(memory_manager.exists('fresh'))
+        checked.set()
+        threads[0].join()
+        self.assertEqual((memory_manager.get('x'), memory_manager.get('fresh')), (2, 3))
+        with self.assertRaises(ValueError):
+            memory_manager.get('gone')
+        self.assertEqual(memory_manager.variables['x']['ref_count'], 2)
+
+    def test_commit_builtin(self):
+        source = ('function publish(v) { shared = v; commit(); missing(); } function keep(v) { kept = v; missing(); }'
+                  ' shared = 0; kept = 0; commit(); parallel { publish(5); keep(6); }')
+        evaluator = create_evaluator('tree')
+        with self.assertRaises(KeyError):
+            evaluator.run(analyze(source))
+        # Writes before commit() survive the error; the failed task's others are dropped
+        self.assertEqual(evaluator.memory_manager.get('shared'), 5)
+        self.assertEqual(evaluator.memory_manager.get('kept'), 0)
+
+    def test_scheduled_tasks_call_functions(self):
+        source = 'function bump(n) { return n + 1; } ticks = 0; schedule { ticks = bump(ticks); } every 1 / 1000;'
+        for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+            with self.subTest(analyzer=analyzer_class.__name__):
+                evaluator = start(source, 'tree', analyzer_class)
+                deadline = time.monotonic() + 5
+                while evaluator.memory_manager.get('ticks') < 20 and time.monotonic() < deadline:
+                    time.sleep(0.001)
+                evaluator.stop_tasks()
+                self.assertGreaterEqual(evaluator.memory_manager.get('ticks'), 20)
+
+    def test_main_thread_calls_are_hidden_from_tasks(self):
+        source = ('n = 0; seen = 0; h = schedule { if (n != 0) { seen = seen + 1; } } every 1 / 1000;'
+                  ' function f(n) { return n + 1; } i = 0; while (i < 20000) { f(5); i = i + 1; } cancel(h);')
+        for engine in ENGINES:
+            for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+                with self.subTest(engine=engine, analyzer=analyzer_class.__name__):
+                    evaluator = start(source, engine, analyzer_class)
+                    evaluator.stop_tasks()
+                    self.assertEqual(evaluator.memory_manager.get('seen'), 0)
+
+    def test_tasks_see_the_call_they_start_in(self):
+        source = 'function f(n) { parallel { x = n * 2; } } f(4);'
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                evaluator = start(source, engine, SemanticAnalyzer)
+                evaluator.thread_pool.shutdown(wait=True)
+                self.assertEqual(evaluator.memory_manager.get('x'), 8)
+                self.assertFalse(evaluator.memory_manager.exists('n'))
+
+
+    def test_tasks_work_on_a_copy_of_a_resolved_call(self):
+        # Writes to the call's locals reach it when the task commits, and are dropped if the task fails first
+        source = 'function f() { v = 0; parallel { if (v == 0) { v = 5; %s } } return () => v; } g = f();'
+        for engine in ENGINES:
+            for body, expected in [('', 5), ('commit(); missing();', 5), ('missing();', 0)]:
+                with self.subTest(engine=engine, body=body):
+                    evaluator = start(source % body, engine)
+                    evaluator.thread_pool.shutdown(wait=True)
+                    evaluator.run(analyze('r = g();'))
+                    self.assertEqual(evaluator.memory_manager.get('r'), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import glob
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from runtime.bytecode import Compiler
+from runtime.engines import ENGINES, create_engine
+from runtime.memory_manager import MemoryManager
+from runtime.transpiler import compile_module
+from semantic.scope_resolver import ScopeResolver
+from semantic.semantic_analyzer import SemanticAnalyzer
+from helpers import analyze, create_evaluator, parse, run_source
+
+SAMPLES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), '..', 'samples', '*.lan')))
+
+
+class TestEnginesMatchTreeWalker(unittest.TestCase):
+    """Differential test: every engine must print exactly what the tree-walker prints."""
+
+    def test_samples_exist(self):
+        self.assertTrue(SAMPLES)
+
+    def test_samples(self):
+        for path in SAMPLES:
+            with open(path) as handle:
+                source = handle.read()
+            for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+                expected, _ = run_source(source, 'tree', analyzer_class)
+                for engine in ENGINES:
+                    with self.subTest(sample=os.path.basename(path), engine=engine, analyzer=analyzer_class.__name__):
+                        self.assertEqual(run_source(source, engine, analyzer_class)[0], expected)
+                        self.assertEqual(run_source(source, engine, analyzer_class, opt_level=2)[0], expected)
+                        self.assertEqual(run_source(source, engine, analyzer_class, opt_level=2, typed=True)[0], expected)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            create_engine('jit', MemoryManager())
+
+
+class TestVirtualMachine(unittest.TestCase):
+
+    def test_deep_recursion_does_not_use_the_python_stack(self):
+        source = 'function down(n) { if (n == 0) { return 0; } return down(n - 1); } print(down(5000));'
+        printed, _ = run_source(source, 'vm')
+        self.assertEqual(printed, ['0'])
+
+    def test_scopes_are_unwound_after_an_error(self):
+        source = 'function inner(a) { return a + "x"; } function outer(b) { return inner(b); } outer(1);'
+        printed, memory_manager = run_source(source, 'vm', SemanticAnalyzer)
+        self.assertEqual(printed, ['ValueError: Type mismatch: Cannot add int and str at line 1'])
+        self.assertEqual(memory_manager.frames, [])
+        self.assertFalse(memory_manager.exists('a'))
+
+    def test_vm_functions_are_callable_from_the_tree_walker(self):
+        source = 'class Box { apply(f, v) { return f(v); } } b = new Box(); print(b.apply((x) => x * 3, 4));'
+        self.assertEqual(run_source(source, 'vm')[0], ['12'])
+
+    def test_disassemble(self):
+        program = parse('x = 1 + 2;')
+        listing = Compiler().compile_statement(program.body[0]).disassemble()
+        self.assertIn('BINARY_ADD', listing)
+        self.assertIn('ASSIGN_GLOBAL', listing)
+        self.assertIn('RETURN_VALUE', listing.splitlines()[-1])
+
+
+class TestClosureEvaluator(unittest.TestCase):
+
+    def test_int_fast_paths_keep_type_errors(self):
+        printed, _ = run_source('x = 1 + 2; print(x); y = x < "a";', 'closure')
+        self.assertEqual(printed, ['3', 'ValueError: Type mismatch: Cannot compare int and str at line 1'])
+
+    def test_booleans_take_the_checked_path(self):
+        source = 'b = 1 < 2; print(b + 1); print(b - b);'
+        self.assertEqual(run_source(source, 'closure')[0], run_source(source, 'tree')[0])
+
+    def test_function_calls_in_a_loop(self):
+        source = 'function f(n) { return n * 2; } i = 0; t = 0; while (i < 50) { t = t + f(i); i = i + 1; } print(t);'
+        self.assertEqual(run_source(source, 'closure')[0], ['2450'])
+
+
+def load_program(source, engine='python'):
+    return create_evaluator(engine), analyze(source)
+
+
+class TestTranspiledEvaluator(unittest.TestCase):
+
+    def test_locals_become_python_locals(self):
+        evaluator, program = load_program('function f(n) { t = n * 2; return t; } print(f(4));')
+        self.assertTrue(evaluator.load(program))
+        self.assertIn('v_t = ', evaluator.module.source)
+        self.assertIn("_get('f')", evaluator.module.source)
+
+    def test_unsupported_programs_are_tree_walked(self):
+        source = 'x = 2; parallel { a = 1; } print(x + 1);'
+        evaluator, program = load_program(source)
+        self.assertFalse(evaluator.load(program))
+        self.assertIn('Parallel', evaluator.fallback)
+        self.assertEqual(run_source(source, 'python')[0], ['3'])
+
+    def test_compiled_code_is_cached_by_source(self):
+        source = 'x = 40; y = x + 2;'
+        first, program = load_program(source)
+        first.run(program)
+        hits = compile_module.cache_info().hits
+        second, program = load_program(source)
+        second.run(program)
+        self.assertEqual(compile_module.cache_info().hits, hits + 1)
+        self.assertEqual(second.memory_manager.get('y'), 42)
+
+    def test_errors_report_the_lanpro_line(self):
+        evaluator, program = load_program('x = 1;\nfunction f(a) {\n  b = a + "q";\n  return b;\n}\nf(x);')
+        with self.assertRaises(ValueError) as raised:
+            evaluator.run(program)
+        self.assertEqual(raised.exception.lanpro_line, 3)
+        self.assertIn('LanPro line 3', raised.exception.__notes__)
+
+    def test_unbound_locals_raise_undefined_variable(self):
+        source = 'function f(a, b) { return b; } print(f(1));'
+        self.assertEqual(run_source(source, 'python')[0], ['KeyError: "Undefined variable: \'b\'"'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import sys
+import tracemalloc
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from runtime.engines import ENGINES
+from runtime.operations import check_iterable, lanpro_range
+from semantic.scope_resolver import ScopeResolver
+from semantic.semantic_analyzer import SemanticAnalyzer
+from helpers import run_source
+
+COUNTER = ('class Countdown { start(n) { self.n = n; return self; }'
+           ' has_next() { return self.n > 0; } next() { self.n = self.n - 1; return self.n + 1; } }')
+
+
+def run_everywhere(test, source, expected):
+    """Check that every engine, with and without scope resolution, prints `expected`."""
+    for engine in ENGINES:
+        for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+            with test.subTest(engine=engine, analyzer=analyzer_class.__name__):
+                test.assertEqual(run_source(source, engine, analyzer_class)[0], expected)
+
+
+class TestRange(unittest.TestCase):
+
+    def test_range_forms(self):
+        source = ('for (i in range(3)) { print(i); } for (i in range(5, 7)) { print(i); }'
+                  ' for (i in range(9, 0, 0 - 4)) { print(i); } print(range(2, 4));')
+        run_everywhere(self, source, ['0', '1', '2', '5', '6', '9', '5', '1', 'range(2, 4)'])
+
+    def test_range_in_a_function(self):
+        source = 'function total(n) { t = 0; for (i in range(n)) { t = t + i; } return t; } print(total(101));'
+        run_everywhere(self, source, ['5050'])
+
+    def test_bad_arguments(self):
+        for arguments, message in (((), 'range expects 1 to 3 arguments, got 0'),
+                                   ((1, 2, 3, 4), 'range expects 1 to 3 arguments, got 4'),
+                                   (('a',), 'range expects int arguments, got str'),
+                                   ((1 == 1,), 'range expects int arguments, got bool'),
+                                   ((0, 5, 0), 'range step cannot be zero')):
+            with self.subTest(arguments=arguments):
+                with self.assertRaises(ValueError) as raised:
+                    lanpro_range(*arguments)
+                self.assertEqual(str(raised.exception), message)
+
+    def test_loops_run_in_constant_memory(self):
+        source = 't = 0; for (i in range(50000)) { t = t + 1; } print(t);'
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                run_source(source.replace('50000', '5'), engine)  # Leave one-time setup out of the peak
+                tracemalloc.start()
+                try:
+                    printed = run_source(source, engine)[0]
+                    peak = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+                self.assertEqual(printed, ['50000'])
+                self.assertLess(peak, 256 * 1024)  # A list of 50000 ints alone takes about 2 MB
+
+
+class TestIteratorProtocol(unittest.TestCase):
+
+    def test_object_iterator(self):
+        run_everywhere(self, COUNTER + ' for (x in new Countdown().start(3)) { print(x); }', ['3', '2', '1'])
+
+    def test_iterator_method(self):
+        source = (COUNTER + ' class Launch { iterator() { return new Countdown().start(2); } }'
+                  ' class Digits { iterator() { return range(3); } }'
+                  ' for (x in new Launch()) { print(x); } for (d in new Digits()) { print(d); }')
+        run_everywhere(self, source, ['2', '1', '0', '1', '2'])
+
+    def test_values_are_produced_as_the_loop_runs(self):
+        source = (COUNTER + ' c = new Countdown().start(3);'
+                  ' for (x in c) { print(x, c.n); }')
+        run_everywhere(self, source, ['3 2', '2 1', '1 0'])
+
+    def test_python_iterators_from_builtins(self):
+        self.assertEqual(list(check_iterable(iter('ab'), 1)), ['a', 'b'])
+        self.assertEqual(list(check_iterable((x * 2 for x in (1, 2)), 1)), [2, 4])
+
+    def test_objects_without_the_protocol(self):
+        source = 'class Plain { f() { return 1; } } for (x in new Plain()) { print(x); }'
+        run_everywhere(self, source, ['ValueError: For loop expects an iterable, got Plain object without'
+                                      ' iterator() or has_next() and next() methods at line 1'])
+        source = 'class Bad { iterator() { return 5; } } for (x in new Bad()) { print(x); }'
+        run_everywhere(self, source, ['ValueError: For loop expects an iterable, got int at line 1'])
+        with self.assertRaises(ValueError):
+            check_iterable('abc', 3)  # Strings are not iterable in LanPro
+
+
+if __name__ == '__main__':
+    unittest.main()
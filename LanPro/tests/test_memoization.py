@@ -0,0 +1,146 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from runtime.engines import ENGINES
+from runtime.memoization import MemoizedFunction
+from semantic.purity import PurityError
+from semantic.scope_resolver import ScopeResolver
+from semantic.semantic_analyzer import SemanticAnalyzer
+from helpers import analyze, create_evaluator, parse, print_into, quiet_console
+
+
+def run(source, engine='tree', memo_size=None):
+    """Run a program; returns what it printed and the engine."""
+    printed = []
+    evaluator = create_evaluator(engine, print_into(printed))
+    if memo_size is not None:
+        evaluator.memo_size = memo_size
+    evaluator.run(analyze(source))
+    return printed, evaluator
+
+
+FIB = ('memoized function fib(n) { if (n < 2) { return n; } return fib(n - 1) + fib(n - 2); }'
+       ' print(fib(40));')
+
+
+class TestMemoization(unittest.TestCase):
+
+    def test_memoized_keyword(self):
+        memoized, plain = parse('memoized function f(n) { return n; } function g(n) { return n; }').body
+        self.assertTrue(memoized.memoized)
+        self.assertEqual(memoized.name, 'f')
+        self.assertIsNone(plain.memoized)
+        # 'memoized' is still an ordinary name elsewhere
+        self.assertEqual(parse('memoized = 3;').body[0].identifier, 'memoized')
+
+    def test_results_are_cached_on_every_engine(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                printed, evaluator = run(FIB, engine)
+                self.assertEqual(printed, ['102334155'])
+                info = evaluator.memoized['fib'].cached.cache_info()
+                self.assertEqual(info.misses, 41)  # One call per distinct argument
+                self.assertEqual(info.hits, 38)
+
+    def test_cache_is_bounded(self):
+        source = ('memoized function double(n) { return n * 2; } i = 0;'
+                  ' while (i < 10) { double(i); i = i + 1; } double(9); double(0);')
+        _, evaluator = run(source, memo_size=4)
+        info = evaluator.memoized['double'].cached.cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 11, 4))
+        self.assertIn('1 hits, 11 misses', str(evaluator.memoized['double']))
+        self.assertIn('4/4 entries, 7 evicted', str(evaluator.memoized['double']))
+
+    def test_arguments_keep_their_type(self):
+        source = 'memoized function same(x) { return x; } print(same(1 < 2), same(1), same(2 > 1));'
+        printed, evaluator = run(source)
+        self.assertEqual(printed, ['True 1 True'])
+        self.assertEqual(evaluator.memoized['same'].cached.cache_info().misses, 2)
+
+    def test_unhashable_arguments_are_not_cached(self):
+        source = 'memoized function first(xs) { return xs[0]; } print(first([7, 8]), first([7, 8]));'
+        printed, evaluator = run(source)
+        self.assertEqual(printed, ['7 7'])
+        self.assertEqual(evaluator.memoized['first'].uncached, 2)
+
+    def test_errors_are_not_cached(self):
+        source = 'memoized function at(i) { xs = [1]; return xs[i]; } at(0); at(3);'
+        with self.assertRaises(ValueError):
+            run(source)
+        memoized = MemoizedFunction('f', lambda x: len(x), 8)
+        self.assertEqual(memoized([1, 2]), 2)
+        self.assertEqual(memoized.uncached, 1)
+        with self.assertRaises(TypeError):
+            memoized(5)  # Raised inside the function, not by hashing
+        self.assertEqual(memoized.uncached, 1)
+        self.assertEqual(memoized.cached.cache_info().currsize, 0)
+
+    def test_pure_functions_are_accepted(self):
+        source = ('function ten() { return 10; } function helper(x) { y = x + ten(); return y; }'
+                  ' memoized function f(n) { t = helper(n); for (v in [1, 2]) { t = t + v; }'
+                  ' return t + f(n - 1); }')
+        for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+            analyze(source, analyzer_class)
+
+    def test_impure_functions_are_rejected(self):
+        cases = {
+            'total = 0; memoized function f(n) { total = total + n; return n; }':
+                "assigns the global variable 'total' at line 1",
+            'memoized function f(n) { print(n); }': "calls 'print' at line 1",
+            'memoized function f(n) { return input(n); }': "calls 'input' at line 1",
+            'memoized function f(n) { schedule { n = 1; } every 1; }': 'schedules a task at line',
+            'memoized function f(n) { parallel { n = 1; } }': 'starts a parallel block at line',
+            'memoized function f(p) { p.x = 1; }': "assigns the field 'x' at line 1",
+            'memoized function f(p) { return p.size(); }': "calls the method 'size'",
+            'memoized function f(p) { return p.x; }': "reads the field 'x', which may change, at line 1",
+            'memoized function f(g) { return g(1); }': "calls 'g', which is not a declared function",
+            'memoized function f(n) { return log(n); } function log(n) { print(n); return n; }':
+                "calls 'log', which calls 'print' at line 1",
+            'offset = 1; memoized function f(x) { return x + offset; }':
+                "reads the global variable 'offset' at line 1",
+            'offset = 1; function g(x) { return x + offset; } memoized function f(x) { return g(x); }':
+                "calls 'g', which reads the global variable 'offset' at line 1",
+            'function g(x) { return x + 1; } memoized function f(x) { return g(x); }'
+            ' function g(x) { return x + 100; }':
+                "calls 'g', which is declared more than once, at line 1",
+            'class P { get() { return 1; } } memoized function f(n) { return new P(); }':
+                "creates an object of class 'P' at line 1",
+        }
+        for source, reason in cases.items():
+            for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+                with self.subTest(source=source, analyzer=analyzer_class.__name__):
+                    with self.assertRaises(PurityError) as raised:
+                        analyze(source, analyzer_class)
+                    self.assertIn(f"Function 'f' cannot be memoized: it {reason}", str(raised.exception))
+
+    def test_redeclared_callees_are_rejected_one_statement_at_a_time(self):
+        analyzer = ScopeResolver(console=quiet_console())
+        program = parse('function g(x) { return x + 1; } memoized function f(x) { return g(x); }'
+                        ' function g(x) { return x + 100; }')
+        analyzer.visit_statement(program.body[0])
+        analyzer.visit_statement(program.body[1])
+        with self.assertRaises(PurityError) as raised:
+            analyzer.visit_statement(program.body[2])
+        self.assertIn("calls 'g', which is declared more than once", str(raised.exception))
+
+    def test_field_reads_are_rejected(self):
+        source = ('class P { set(v) { self.x = v; } } %sfunction getx(p) { return p.x; }'
+                  ' p = new P(); p.set(1); print(getx(p)); p.set(2); print(getx(p));')
+        for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+            with self.subTest(analyzer=analyzer_class.__name__):
+                with self.assertRaises(PurityError) as raised:
+                    analyze(source % 'memoized ', analyzer_class)
+                self.assertIn("Function 'getx' cannot be memoized: it reads the field 'x'", str(raised.exception))
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(run(source % '', engine)[0], ['1', '2'])
+
+    def test_parameters_shadow_globals(self):
+        analyze('n = 1; memoized function f(n) { n = n + 1; return n; }')
+
+
+if __name__ == '__main__':
+    unittest.main()
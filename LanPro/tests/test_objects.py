@@ -0,0 +1,90 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from parser.ast_nodes import Identifier, MemberAccess, MemberAssignment
+from runtime.objects import BoundMethod, LanProObject, field_layout
+from helpers import analyze, create_evaluator, parse, print_into
+
+
+def run(source):
+    printed = []
+    evaluator = create_evaluator('tree', print_into(printed))
+    program = analyze(source)
+    evaluator.run(program)
+    return printed, evaluator, program
+
+
+POINT = 'class Point { move(x, y) { self.x = x; self.y = y; self.x = self.x + 0; } sum() { return self.x + self.y; } } '
+
+
+class TestObjectModel(unittest.TestCase):
+
+    def test_member_assignment_is_parsed(self):
+        statement = parse('p.x = 1 + 2;').body[0]
+        self.assertIsInstance(statement, MemberAssignment)
+        self.assertEqual(statement.object, Identifier('p', 1))
+        self.assertEqual(statement.member, 'x')
+        self.assertIsInstance(parse('print(p.x);').body[0].arguments[0], MemberAccess)
+
+    def test_fields_come_from_self_assignments(self):
+        declaration = parse(POINT).body[0]
+        self.assertEqual(field_layout(declaration), {'x': 0, 'y': 1})
+
+    def test_objects_store_fields_by_index(self):
+        printed, evaluator, _ = run(POINT + 'p = new Point(); p.move(2, 5); p.y = 7; print(p.sum(), p.x);')
+        self.assertEqual(printed, ['9 2'])
+        point = evaluator.memory_manager.get('p')
+        self.assertIsInstance(point, LanProObject)
+        self.assertEqual(point.values, [2, 7])
+        self.assertIs(point.lanpro_class, evaluator.classes['Point'])
+
+    def test_methods_are_built_once(self):
+        _, evaluator, program = run(POINT + 'p = new Point(); p.move(1, 2); q = new Point(); q.move(3, 4);')
+        move = evaluator.classes['Point'].methods['move']
+        first, second = program.body[2], program.body[4]
+        self.assertIs(first.cache[1], move)
+        self.assertIs(second.cache[1], move)
+
+    def test_bound_methods(self):
+        printed, evaluator, _ = run(POINT + 'p = new Point(); m = p.move; m(4, 6); s = p.sum; print(s());')
+        self.assertEqual(printed, ['10'])
+        self.assertIsInstance(evaluator.memory_manager.get('s'), BoundMethod)
+
+    def test_call_sites_cache_the_method(self):
+        source = ('class A { f() { return 1; } } class B { f() { return 2; } }'
+                  ' function call(o) { return o.f(); } print(call(new A()), call(new A()), call(new B()));')
+        printed, evaluator, program = run(source)
+        self.assertEqual(printed, ['1 1 2'])
+        call_site = program.body[2].body.body[0].value
+        cached_class, method = call_site.cache
+        self.assertIs(cached_class, evaluator.classes['B'])
+        self.assertIs(method, evaluator.classes['B'].methods['f'])
+
+    def test_field_caches_follow_the_class(self):
+        source = ('class A { set() { self.a = 1; self.v = "a"; } } class B { set() { self.v = "b"; } }'
+                  ' function get(o) { return o.v; } x = new A(); x.set(); y = new B(); y.set();'
+                  ' print(get(x), get(y), get(x));')
+        self.assertEqual(run(source)[0], ['a b a'])
+
+    def test_errors(self):
+        cases = {
+            'p = new Point(); print(p.x);': "Field 'x' of Point object has not been set at line 1",
+            'p = new Point(); p.z = 1;': "Class 'Point' has no field 'z' at line 1",
+            'p = new Point(); print(p.z);': "Object of class 'Point' has no member 'z' at line 1",
+            'p = new Point(); p.fly();': "Method 'fly' not found on object of class 'Point' at line 1",
+            'n = 3; print(n.x);': "Cannot access member 'x' of non-object type int at line 1",
+            'n = 3; n.x = 1;': "Cannot access member 'x' of non-object type int at line 1",
+            'p = new Nothing();': "Class 'Nothing' is not defined at line 1",
+        }
+        for source, message in cases.items():
+            with self.subTest(source=source):
+                with self.assertRaises(ValueError) as raised:
+                    run(POINT + source)
+                self.assertEqual(str(raised.exception), message)
+
+
+if __name__ == '__main__':
+    unittest.main()
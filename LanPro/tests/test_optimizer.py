@@ -0,0 +1,138 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from parser.ast_nodes import (
+    BinaryOperation, Block, Constant, CountedLoop, LoopInvariant, NullLiteral, ResetInvariants, WhileStatement
+)
+from semantic.optimizer import Optimizer, count_nodes
+from helpers import analyze
+
+
+def optimize(source, level=2):
+    program = analyze(source)
+    optimizer = Optimizer(level)
+    return optimizer.optimize(program), optimizer.report
+
+
+class TestOptimizer(unittest.TestCase):
+
+    def test_constant_operations_are_folded(self):
+        program, report = optimize('x = 2 * 3 + 4;')
+        self.assertEqual(program.body[0].value, Constant(10, 1))
+        self.assertEqual(report.folded, 2)
+        self.assertEqual(report.eliminated, 4)
+
+    def test_string_literals_are_stripped_once(self):
+        program, report = optimize('s = "ab" + "cd"; t = "x";')
+        self.assertEqual(program.body[0].value.value, 'abcd')
+        self.assertEqual(program.body[1].value.value, 'x')
+        self.assertEqual(report.stripped_literals, 3)
+
+    def test_failing_operations_are_left_for_run_time(self):
+        program, report = optimize('a = 1 / 0; b = 1 + "s";')
+        self.assertIsInstance(program.body[0].value, BinaryOperation)
+        self.assertIsInstance(program.body[1].value, BinaryOperation)
+        self.assertEqual(report.folded, 0)
+
+    def test_operations_on_variables_are_kept(self):
+        program, _ = optimize('x = 1; y = x + 2;')
+        self.assertIsInstance(program.body[1].value, BinaryOperation)
+
+    def test_dead_branches_are_removed(self):
+        program, report = optimize('if (1 < 2) { a = 1; } else { a = 2; } if (null) { b = 1; }')
+        self.assertEqual(len(program.body), 1)
+        self.assertIsInstance(program.body[0], Block)
+        self.assertEqual(program.body[0].body[0].value, Constant(1, program.body[0].body[0].line))
+        self.assertEqual(report.dead_branches, 2)
+
+    def test_loops_that_never_run_are_removed(self):
+        program, report = optimize('while (3 > 4) { x = 1; } while (1) { stop_tasks(); }')
+        self.assertEqual(len(program.body), 1)
+        self.assertIsInstance(program.body[0], WhileStatement)
+        self.assertEqual(report.dead_loops, 1)
+
+    def test_function_keeps_a_none_result(self):
+        program, report = optimize('function f() { x = 1; while (0) { x = 2; } }')
+        body = program.body[0].body.body
+        self.assertIsInstance(body[-1], NullLiteral)
+        self.assertEqual(report.eliminated, 4)
+
+    def test_levels(self):
+        source = 'if (1) { x = 1 + 1; }'
+        program, report = optimize(source, level=0)
+        self.assertEqual(report.eliminated, 0)
+        self.assertIsInstance(program.body[0].then_branch.body[0].value, BinaryOperation)
+        program, _ = optimize(source, level=1)
+        self.assertEqual(program.body[0].then_branch.body[0].value, Constant(2, 1))
+        self.assertEqual(count_nodes(program.body[0].condition), 1)
+        with self.assertRaises(ValueError):
+            Optimizer(3)
+
+
+
+class TestLoopOptimizations(unittest.TestCase):
+
+    def function_body(self, source):
+        program, report = optimize(source)
+        return program.body[0], report
+
+    def test_counted_loop(self):
+        function, report = self.function_body('function f(n) { i = 0; while (i < n) { print(i); i = i + 1; } }')
+        loop = function.body.body[1]
+        self.assertIsInstance(loop, CountedLoop)
+        self.assertTrue(loop.fixed)
+        self.assertEqual(len(loop.body.body), 1)
+        self.assertEqual(report.counted_loops, 1)
+
+    def test_counted_loop_changed_in_its_body_is_not_fixed(self):
+        function, _ = self.function_body('function f(n) { i = 0; while (i < n) { n = n - 1; i = i + 1; } }')
+        self.assertFalse(function.body.body[1].fixed)
+        function, _ = self.function_body('function f(n) { i = 0; while (i < n) { free(i); i = i + 1; } }')
+        self.assertFalse(function.body.body[1].fixed)
+
+    def test_global_counted_loop_with_calls_is_not_fixed(self):
+        program, _ = optimize('i = 0; n = 3; while (i < n) { i = i + 1; } while (i < n) { g(); i = i + 1; }')
+        self.assertTrue(program.body[2].fixed)
+        self.assertFalse(program.body[3].fixed)
+
+    def test_other_loops_are_left_alone(self):
+        for source in ('function f(n) { i = 0; while (i < n) { i = i - 1; } }',
+                       'function f(n) { i = 0; while (i > n) { i = i + 1; } }',
+                       'function f(n) { i = 0; while (i < n) { i = i + n; } }',
+                       'function f(n) { i = 0; while (i < n) { i = i + 1; print(i); } }'):
+            function, _ = self.function_body(source)
+            self.assertIsInstance(function.body.body[1], WhileStatement, source)
+
+    def test_invariants_are_hoisted(self):
+        function, report = self.function_body(
+            'function f(n, k) { t = 0; for (x in n) { t = k * k + x + t; } return t; }')
+        hoisted = function.body.body[1]
+        self.assertIsInstance(hoisted, Block)
+        reset, loop = hoisted.body
+        self.assertIsInstance(reset, ResetInvariants)
+        invariant = loop.body.body[0].value.left.left
+        self.assertIsInstance(invariant, LoopInvariant)
+        self.assertEqual(reset.slots, [invariant.slot])
+        self.assertEqual(function.frame_size, invariant.slot)
+        self.assertEqual(report.hoisted, 1)
+
+    def test_assigned_names_are_not_invariant(self):
+        for source in ('function f(n, k) { t = 0; for (x in n) { t = k * 2 + t; k = x; } return t; }',
+                       'function f(n, k) { function g() { k = 1; } t = 0; for (x in n) { t = k * 2 + t; } return t; }',
+                       'k = 2; function f(n) { t = 0; for (x in n) { t = k * 2 + t; } return t; }'):
+            _, report = optimize(source)
+            self.assertEqual(report.hoisted, 0, source)
+
+    def test_outer_invariants_cover_inner_loops(self):
+        _, report = self.function_body(
+            'function f(n) { i = 0; t = 0; while (i < n) { j = 0; while (j < n) { t = n * 2 + i * n + t; j = j + 1; } i = i + 1; } return t; }')
+        self.assertEqual(report.counted_loops, 2)
+        # Operators group left to right: ((n * 2 + i) * n) is cached by the inner loop, n * 2 by the outer one
+        self.assertEqual(report.hoisted, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from parser.ast_nodes import FunctionCall
+from runtime.engines import ENGINES
+from runtime.parallel import ProcessBackend, collect_references, detached
+from runtime.quickening import DirectFunctionCall
+from semantic.optimizer import Optimizer
+from semantic.scope_resolver import ScopeResolver
+from semantic.semantic_analyzer import SemanticAnalyzer
+from helpers import analyze, create_evaluator, print_into
+
+WORK = 'function work(n) { t = 0; i = 0; while (i < n) { t = t + i; i = i + 1; } return t; }'
+
+
+class TestProcessBackend(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.backend = ProcessBackend(workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.backend.shutdown()
+
+    def run_source(self, source, engine='tree', analyzer_class=ScopeResolver, opt_level=1):
+        printed = []
+        evaluator = create_evaluator(engine, print_into(printed))
+        evaluator.process_backend = self.backend
+        program = analyze(source, analyzer_class)
+        Optimizer(opt_level).optimize(program)
+        evaluator.run(program)
+        return printed, evaluator.memory_manager
+
+    def test_writes_and_output_are_merged_in_statement_order(self):
+        source = (WORK + ' k = 10; parallel { a = work(100) + k; print("first"); b = work(200); print("second"); }'
+                  ' print(a, b);')
+        for engine in ENGINES:
+            for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+                with self.subTest(engine=engine, analyzer=analyzer_class.__name__):
+                    printed, _ = self.run_source(source, engine, analyzer_class)
+                    self.assertEqual(printed, ['first', 'second', '4960 19900'])
+
+    def test_locals_are_written_back(self):
+        source = ('base = 100; function g(m) { return m + base; }'
+                  ' function f(n) { x = 0; y = 0; parallel { x = n * 2; y = g(n); } return x + y; } print(f(5));')
+        for engine in ENGINES:
+            for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+                with self.subTest(engine=engine, analyzer=analyzer_class.__name__):
+                    self.assertEqual(self.run_source(source, engine, analyzer_class)[0], ['115'])
+
+    def test_later_statements_win(self):
+        _, memory_manager = self.run_source('parallel { x = 1; x = 2; }')
+        self.assertEqual(memory_manager.get('x'), 2)
+
+    def test_functions_that_cannot_be_sent(self):
+        with self.assertRaises(ValueError) as raised:
+            self.run_source('h = (x) => x; parallel { z = h(1); }')
+        self.assertIn("variable 'h' holds a function, which cannot be copied", str(raised.exception))
+
+    def test_errors_reach_the_parent(self):
+        with self.assertRaises(ValueError) as raised:
+            self.run_source('parallel { q = 1 / 0; }')
+        self.assertIn('Division by zero', str(raised.exception))
+
+
+class TestShipping(unittest.TestCase):
+
+    def test_detached_copies_drop_run_time_state(self):
+        program = analyze('function f(n) { return n; } f(1);')
+        call = program.body[1]
+        call.__class__, call.cache = DirectFunctionCall, lambda n: n
+        copy = detached(call)
+        self.assertIs(copy.__class__, FunctionCall)
+        self.assertIsNone(copy.cache)
+        self.assertEqual((copy.name, copy.slot), ('f', None))
+        self.assertIs(call.__class__, DirectFunctionCall)  # The original keeps running quickened
+
+    def test_references(self):
+        program = analyze('g = 1; function f(a) { b = 2; parallel { b = a + g; h = (x) => x + b; } return b; }')
+        statements = program.body[1].body.body[1].body.body
+        names, slots, writes = set(), set(), set()
+        collect_references(statements, 0, names, slots, writes)
+        self.assertEqual(names, {'g'})
+        self.assertEqual(slots, {(0, 1), (0, 2), (0, 3)})  # a, b (also read inside the lambda) and h
+        self.assertEqual(writes, {(0, 2), (0, 3)})
+        names, slots, writes = set(), set(), set()
+        collect_references(analyze('parallel { total = total + 1; }').body[0].body, 0, names, slots, writes)
+        self.assertEqual((names, slots, writes), ({'total'}, set(), {'total'}))
+
+
+if __name__ == '__main__':
+    unittest.main()
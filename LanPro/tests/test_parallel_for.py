@@ -0,0 +1,126 @@
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from parser.ast_nodes import ParallelForStatement
+from runtime.async_evaluator import AsyncEvaluator
+from runtime.data_parallel import guided_chunks
+from runtime.engines import ENGINES
+from runtime.parallel import ProcessBackend
+from semantic.scope_resolver import ScopeResolver
+from semantic.semantic_analyzer import SemanticAnalyzer
+from helpers import analyze, create_evaluator, print_into, run_source
+
+SQUARES = ('function square(n) { return n * n; } total = 0; best = 0; low = 1000000;'
+           ' parallel for (x in range(1000)) reduce (sum total, max best, min low) {'
+           ' y = square(x); total = total + y; if (y > best) { best = y; } if (y < low) { low = y; } }'
+           ' print(total, best, low);')
+EXPECTED = ['332833500 998001 0']
+
+
+class TestParallelFor(unittest.TestCase):
+
+    def test_parse(self):
+        loop = analyze('total = 0; parallel for (x in [1, 2]) reduce (sum total) { total = total + x; }').body[1]
+        self.assertIsInstance(loop, ParallelForStatement)
+        self.assertEqual(loop.identifier, 'x')
+        self.assertEqual([(r.operator, r.identifier) for r in loop.reductions], [('sum', 'total')])
+        self.assertEqual(analyze('parallel for (x in [1]) { y = x; }').body[0].reductions, [])
+
+    def test_analysis_errors(self):
+        for source, message in [
+            ('t = 0; parallel for (x in [1]) reduce (product t) { t = t; }', "Unknown reduction 'product'"),
+            ('t = 0; parallel for (x in [1]) reduce (sum t, max t) { t = t; }', "cannot be reduced more than once"),
+            ('parallel for (x in [1]) reduce (sum x) { y = x; }', "cannot be reduced more than once"),
+            ('function f() { parallel for (x in [1]) { return x; } }', "Return statement inside a parallel for"),
+        ]:
+            with self.subTest(source=source):
+                with self.assertRaises(Exception) as raised:
+                    analyze(source)
+                self.assertIn(message, str(raised.exception))
+
+    def test_reductions_on_every_engine(self):
+        for engine in ENGINES:
+            for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+                for opt_level in (0, 2):
+                    with self.subTest(engine=engine, analyzer=analyzer_class.__name__, opt_level=opt_level):
+                        self.assertEqual(run_source(SQUARES, engine, analyzer_class, opt_level)[0], EXPECTED)
+
+    def test_loops_in_functions_and_nested_loops(self):
+        source = ('function inner(n) { u = 0; parallel for (i in range(n)) reduce (sum u) { u = u + i; } return u; }'
+                  ' function outer(n) { k = 2; s = 0; parallel for (j in range(n)) reduce (sum s) {'
+                  ' t = inner(j) * k; s = s + t; } return s; } print(outer(60));')
+        for engine in ENGINES:
+            for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+                with self.subTest(engine=engine, analyzer=analyzer_class.__name__):
+                    self.assertEqual(run_source(source, engine, analyzer_class)[0], ['68440'])
+
+    def test_string_sums_keep_their_order(self):
+        source = ('s = ">"; parallel for (x in ["a", "b", "c"]) reduce (sum s) { s = s + x; } print(s);'
+                  ' t = ""; parallel for (x in range(40)) reduce (sum t) { t = t + "x"; } print(t);')
+        for engine in ENGINES:
+            for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+                with self.subTest(engine=engine, analyzer=analyzer_class.__name__):
+                    self.assertEqual(run_source(source, engine, analyzer_class)[0], ['>abc', 'x' * 40])
+
+    def test_body_names_are_private_and_global_writes_are_kept(self):
+        source = 'hits = 0; parallel for (x in range(500)) { y = x; if (x == 250) { hits = x; } }'
+        for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+            with self.subTest(analyzer=analyzer_class.__name__):
+                _, memory_manager = run_source(source, 'tree', analyzer_class)
+                self.assertEqual(memory_manager.get('hits'), 250)
+                self.assertFalse(memory_manager.exists('y'))
+                self.assertFalse(memory_manager.exists('x'))
+
+    def test_guided_chunks(self):
+        chunks = guided_chunks(range(1000), 4, 16)
+        self.assertEqual([len(chunk) for chunk in chunks][:3], [125, 109, 95])
+        self.assertEqual(len(chunks[-1]), 1000 - sum(len(chunk) for chunk in chunks[:-1]))
+        self.assertTrue(all(len(chunk) >= 16 for chunk in chunks[:-1]))
+        self.assertEqual([x for chunk in chunks for x in chunk], list(range(1000)))
+        self.assertEqual(guided_chunks([], 4, 16), [])
+
+
+class TestParallelForProcesses(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.backend = ProcessBackend(workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.backend.shutdown()
+
+    def test_chunks_run_in_workers(self):
+        source = SQUARES + ' hits = 0; parallel for (x in range(300)) { if (x == 200) { hits = x; print("hit"); } }'
+        for engine in ENGINES:
+            for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+                with self.subTest(engine=engine, analyzer=analyzer_class.__name__):
+                    printed = []
+                    evaluator = create_evaluator(engine, print_into(printed))
+                    evaluator.process_backend = self.backend
+                    evaluator.run(analyze(source, analyzer_class))
+                    self.assertEqual(printed, EXPECTED + ['hit'])
+                    self.assertEqual(evaluator.memory_manager.get('hits'), 200)
+
+
+class TestParallelForAsync(unittest.TestCase):
+
+    def test_waiting_iterations_overlap(self):
+        source = ('function fetch(n) { sleep(1 / 5); return n; } total = 0;'
+                  ' parallel for (x in range(100)) reduce (sum total) { y = fetch(x); total = total + y; }')
+        for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+            with self.subTest(analyzer=analyzer_class.__name__):
+                evaluator = create_evaluator(AsyncEvaluator)
+                self.addCleanup(evaluator.close)
+                start = time.perf_counter()
+                evaluator.run(analyze(source, analyzer_class))
+                self.assertLess(time.perf_counter() - start, 3)  # One after another, the sleeps would take 20s
+                self.assertEqual(evaluator.memory_manager.get('total'), 4950)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import io
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.program_cache import CACHE_SUFFIX, DEFAULT_CACHE_DIR, ProgramCache
+from helpers import parse
+
+SOURCE = 'function f(a) { return a * 2; }\nxs = [f(1), null, "s"];\nif (xs[0] > 1) { print(xs); } else { y = 0; }\n'
+
+
+class TestProgramCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.script = os.path.join(self.directory.name, 'script.lan')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip_next_to_script(self):
+        cache = ProgramCache()
+        key = cache.source_key(io.BytesIO(SOURCE.encode()))
+        self.assertIsNone(cache.load(self.script, key))
+        program = parse(SOURCE)
+        self.assertTrue(cache.store(self.script, key, program))
+        self.assertTrue(os.path.isdir(os.path.join(self.directory.name, DEFAULT_CACHE_DIR)))
+        self.assertEqual(cache.load(self.script, key), program)
+
+    def test_key_depends_on_source(self):
+        cache = ProgramCache()
+        self.assertNotEqual(cache.source_key(SOURCE), cache.source_key(SOURCE + ' '))
+        self.assertEqual(cache.source_key(SOURCE), cache.source_key(io.BytesIO(SOURCE.encode())))
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = ProgramCache(cache_dir=self.directory.name)
+        key = cache.source_key(SOURCE)
+        cache.store(self.script, key, parse(SOURCE))
+        with open(cache.path_for(self.script, key), 'r+b') as handle:
+            handle.truncate(40)
+        self.assertIsNone(cache.load(self.script, key))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ProgramCache(cache_dir=self.directory.name)
+        program = parse(SOURCE)
+        keys = [cache.source_key(SOURCE + '#' * n) for n in range(3)]
+        for n, key in enumerate(keys):
+            cache.store(self.script, key, program)
+            past = time.time() - 100 + n
+            os.utime(cache.path_for(self.script, key), (past, past))
+        entry_size = os.path.getsize(cache.path_for(self.script, keys[0]))
+        cache.load(self.script, keys[0])  # Refresh the oldest entry
+
+        cache.max_size = 2 * entry_size
+        cache.evict(self.directory.name)
+        remaining = sorted(name for name in os.listdir(self.directory.name) if name.endswith(CACHE_SUFFIX))
+        self.assertEqual(len(remaining), 2)
+        self.assertFalse(os.path.exists(cache.path_for(self.script, keys[1])))
+        self.assertIsNotNone(cache.load(self.script, keys[0]))
+
+if __name__ == '__main__':
+    unittest.main()
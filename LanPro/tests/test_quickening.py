@@ -0,0 +1,118 @@
+import glob
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from parser.ast_nodes import BinaryOperation, FunctionCall, Identifier, Node
+from runtime.quickening import QUICKEN_AFTER, DirectFunctionCall, IntBinaryOperation, LocalAssignment, LocalIdentifier
+from semantic.scope_resolver import ScopeResolver
+from semantic.semantic_analyzer import SemanticAnalyzer
+from utils.program_cache import decode_node, encode_node
+from helpers import analyze, create_evaluator, print_into
+
+SAMPLES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), '..', 'samples', '*.lan')))
+
+
+def run(source, quicken=True, analyzer_class=ScopeResolver):
+    """Run a program on the tree-walker; returns what it printed (plus any error), the evaluator and the program."""
+    printed = []
+    evaluator = create_evaluator('tree', print_into(printed))
+    evaluator.set_quickening(quicken, count_runs=True)
+    program = analyze(source, analyzer_class)
+    try:
+        evaluator.run(program)
+    except Exception as error:
+        printed.append(f'{type(error).__name__}: {error}')
+    return printed, evaluator, program
+
+
+def node_classes(node, found=None):
+    if found is None:
+        found = set()
+    if isinstance(node, list):
+        for item in node:
+            node_classes(item, found)
+    elif isinstance(node, Node):
+        found.add(node.__class__)
+        for name in node.fields:
+            node_classes(getattr(node, name), found)
+    return found
+
+
+LOOP = 'function f(n) { i = 0; t = 0; while (i < n) { t = t + g(i); i = i + 1; } return t; } function g(x) { return x * 2; } print(f(30));'
+
+
+class TestQuickening(unittest.TestCase):
+
+    def test_hot_nodes_are_specialized(self):
+        printed, evaluator, program = run(LOOP)
+        self.assertEqual(printed, ['870'])
+        classes = node_classes(program.body)
+        for specialized in (LocalIdentifier, LocalAssignment, IntBinaryOperation, DirectFunctionCall):
+            self.assertIn(specialized, classes)
+        stats = evaluator.quickening
+        self.assertGreater(stats.specialized['int operation'], 0)
+        self.assertGreater(stats.runs['function call'], 0)
+        self.assertEqual(stats.hit_rate('int operation'), 1.0)
+
+    def test_cold_nodes_stay_generic(self):
+        runs = QUICKEN_AFTER - 2  # The loop condition runs once more than the body
+        source = 'function f(n) { return n * 2; } i = 0; while (i < %d) { print(f(i)); i = i + 1; }' % runs
+        _, evaluator, program = run(source)
+        self.assertFalse(node_classes(program.body) & {LocalIdentifier, IntBinaryOperation, DirectFunctionCall})
+        self.assertEqual(sum(evaluator.quickening.specialized.values()), 0)
+
+    def test_quickening_can_be_turned_off(self):
+        printed, evaluator, program = run(LOOP, quicken=False)
+        self.assertEqual(printed, ['870'])
+        self.assertEqual(sum(evaluator.quickening.specialized.values()), 0)
+
+    def test_int_guard_falls_back(self):
+        source = ('function add(a, b) { return a + b; } i = 0; while (i < 20) { add(i, 1); i = i + 1; }'
+                  ' print(add("x", "y")); print(add(1 < 2, 1)); print(add(1, "z"));')
+        printed, evaluator, _ = run(source)
+        self.assertEqual(printed, ['xy', '2', 'ValueError: Type mismatch: Cannot add int and str at line 1'])
+        self.assertEqual(evaluator.quickening.misses['int operation'], 1)
+
+    def test_call_guard_follows_reassignment(self):
+        source = ('function one() { return 1; } function two() { return 2; } i = 0; t = 0;'
+                  ' while (i < 20) { if (i == 10) { one = two; } t = t + one(); i = i + 1; } print(t);')
+        printed, evaluator, _ = run(source)
+        self.assertEqual(printed, ['30'])
+        self.assertEqual(evaluator.quickening.misses['function call'], 1)
+
+    def test_deoptimized_nodes_are_generic_again(self):
+        source = 'function add(a, b) { return a + b; } i = 0; while (i < 20) { add(i, 1); i = i + 1; } add("x", "y");'
+        _, _, program = run(source)
+        add = program.body[0].body.body[0].value
+        self.assertIs(add.__class__, BinaryOperation)
+        self.assertLess(add.cache, 0)  # Backing off before specializing again
+
+    def test_specialized_nodes_keep_their_type(self):
+        _, _, program = run(LOOP)
+        call = program.body[0].body.body[2].body.body[0].value.right
+        self.assertIs(call.__class__, DirectFunctionCall)
+        self.assertEqual(call.type, 'FunctionCall')
+        self.assertEqual(call['name'], 'g')
+        self.assertEqual(call, FunctionCall('g', [Identifier('i', 1)], 1))
+        self.assertIs(decode_node(encode_node(call)).__class__, FunctionCall)
+
+    def test_samples_match_unquickened_runs(self):
+        for path in SAMPLES:
+            with open(path) as handle:
+                source = handle.read()
+            for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+                with self.subTest(sample=os.path.basename(path), analyzer=analyzer_class.__name__):
+                    self.assertEqual(run(source, True, analyzer_class)[0], run(source, False, analyzer_class)[0])
+
+    def test_report(self):
+        _, evaluator, _ = run(LOOP)
+        report = str(evaluator.quickening)
+        self.assertIn('int operation:', report)
+        self.assertIn('100.0% hit rate', report)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from lexer.tokenizer import Tokenizer
+from lexer.regex_tokenizer import RegexTokenizer
+
+
+def legacy_tokens(source):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Tokenizer(source).tokenize()
+
+
+def as_tuples(tokens):
+    return [(t.type, t.value, t.position, t.line) for t in tokens]
+
+
+class TestRegexTokenizer(unittest.TestCase):
+
+    def test_matches_legacy_engine(self):
+        sources = [
+            'x = 10; if (x >= 5) { print("hello"); } else { print("world"); }',
+            'let f = (a, b) => a + b;\n# comment line\nresult = f(1, 2);',
+            'class Point { show() { print("multi\nline"); } }\np = new Point();\np.show();',
+            'parallel { a = 1; b = 2; }\nschedule { tick = tick + 1; } every 5;',
+            'nullable = null; xs = [1, 2, 3]; y = xs[0] != 2;',
+        ]
+        for source in sources:
+            with self.subTest(source=source):
+                self.assertEqual(as_tuples(RegexTokenizer(source).tokenize()), as_tuples(legacy_tokens(source)))
+
+    def test_positions_and_lines(self):
+        tokens = RegexTokenizer('x = 1;\n  while (x < 3) {}').tokenize()
+        self.assertEqual((tokens[0].type, tokens[0].position, tokens[0].line), ('IDENTIFIER', 0, 1))
+        self.assertEqual((tokens[4].type, tokens[4].position, tokens[4].line), ('WHILE', 9, 2))
+        self.assertEqual(tokens[2].value, 1)
+
+    def test_invalid_character(self):
+        with self.assertRaises(Exception) as context:
+            RegexTokenizer('x = 1;\ny = @;').tokenize()
+        self.assertEqual(str(context.exception), 'Error: Invalid character: @ at position 11, line 2')
+
+    def test_unterminated_string(self):
+        source = 'x = "abc\ndef'
+        with self.assertRaises(Exception) as context:
+            RegexTokenizer(source).tokenize()
+        self.assertEqual(str(context.exception), 'Error: Unterminated string literal at position 12, line 2')
+
+    def test_non_ascii_source(self):
+        source = 'naïve = "héllo"; x² = 1;'
+        self.assertEqual(as_tuples(RegexTokenizer(source).tokenize()), as_tuples(legacy_tokens(source)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from cli.repl import LanProREPL
+from helpers import create_evaluator
+
+
+class TestLanProSession(unittest.TestCase):
+
+    def setUp(self):
+        self.printed = []
+        evaluator = create_evaluator('tree', lambda *args: self.printed.append(args))
+        self.console = evaluator.console
+        self.session = LanProREPL(evaluator, console=self.console)
+
+    def test_definitions_persist_between_entries(self):
+        self.session.evaluate('x = 10;')
+        self.session.evaluate('function show(a) { print(a + x); }')
+        self.session.evaluate('show(5);')
+        self.assertEqual(self.printed, [(15,)])
+        self.assertIn('x', self.session.semantic_analyzer.declared_variables)
+        self.assertIn('show', self.session.semantic_analyzer.declared_functions)
+
+    def test_multi_line_entry(self):
+        self.assertFalse(self.session.feed('function add(a, b) {'))
+        self.assertFalse(self.session.feed('  # a comment with a stray }'))
+        self.assertFalse(self.session.feed('  print(a + b);'))
+        self.assertTrue(self.session.feed('}'))
+        self.assertEqual(self.session.pending, [])
+        self.assertTrue(self.session.feed('add(1, 2);'))
+        self.assertEqual(self.printed, [(3,)])
+
+    def test_string_spanning_lines(self):
+        self.assertFalse(self.session.feed('print("first'))
+        self.assertTrue(self.session.feed('second");'))
+        self.assertEqual(self.printed, [('first\nsecond',)])
+
+    def test_failed_entry_does_not_leave_pending_input(self):
+        with self.assertRaises(Exception):
+            self.session.feed('y = "a" + 1;')
+        self.assertEqual(self.session.pending, [])
+        self.assertTrue(self.session.feed('print(1);'))
+        self.assertEqual(self.printed, [(1,)])
+
+    def test_only_new_fragment_is_analyzed(self):
+        self.session.evaluate('a = 1;')
+        self.session.evaluate('a = 2;')
+        output = self.console.file.getvalue()
+        self.assertEqual(output.count('Redeclaration warning'), 1)
+
+    def test_evaluate_returns_last_value(self):
+        self.assertEqual(self.session.evaluate('z = 4; z * 2;'), 8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from parser.ast_nodes import AssignmentStatement, ScheduleStatement
+from runtime.engines import ENGINES
+from runtime.scheduler import Scheduler, ScheduledTask
+from semantic.scope_resolver import ScopeResolver
+from semantic.semantic_analyzer import SemanticAnalyzer
+from helpers import analyze, create_evaluator
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return condition()
+
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = Scheduler(workers=2)
+
+    def tearDown(self):
+        self.scheduler.cancel_all()
+
+    def test_recurring_tasks_run_at_a_fixed_rate(self):
+        starts = []
+
+        def body():
+            starts.append(time.monotonic())
+            time.sleep(0.01)  # Would add up to 10 runs x 10ms of drift if the next run were timed from here
+
+        task = self.scheduler.schedule(body, 0.03, recurring=True)
+        self.assertTrue(wait_for(lambda: len(starts) >= 10))
+        task.cancel()
+        for index, start in enumerate(starts[:10]):
+            self.assertAlmostEqual(start - starts[0], index * 0.03, delta=0.02)
+
+    def test_runs_of_a_task_never_overlap(self):
+        running, overlaps = [], []
+
+        def body():
+            overlaps.append(bool(running))
+            running.append(1)
+            time.sleep(0.02)
+            running.pop()
+
+        task = self.scheduler.schedule(body, 0.005, recurring=True)
+        self.assertTrue(wait_for(lambda: task.runs >= 3))
+        task.cancel()
+        self.assertNotIn(True, overlaps)
+        self.assertGreater(task.skipped, 0)
+
+    def test_cancellation(self):
+        ran = []
+        later = self.scheduler.schedule(lambda: ran.append('later'), 0.05)
+        ticking = self.scheduler.schedule(lambda: ran.append('tick'), 0.005, recurring=True)
+        later.cancel()
+        self.assertTrue(wait_for(lambda: ticking.runs >= 2))
+        ticking.cancel()
+        runs = ticking.runs
+        time.sleep(0.08)
+        self.assertNotIn('later', ran)
+        self.assertLessEqual(ticking.runs, runs + 1)  # At most the run already handed to a worker
+        self.assertTrue(later.done and ticking.done)
+        self.assertEqual(self.scheduler.pending(), 0)
+        self.assertIn('cancelled', str(ticking))
+
+    def test_many_tasks_share_a_few_threads(self):
+        fired = []
+        threads = threading.active_count()
+        tasks = [self.scheduler.schedule(lambda: fired.append(1), 0.02 + (index % 10) * 0.001) for index in range(10000)]
+        self.assertTrue(wait_for(lambda: len(fired) == 10000))
+        self.assertLessEqual(threading.active_count() - threads, self.scheduler.workers + 1)
+        self.assertTrue(all(task.done for task in tasks))
+
+    def test_cancelled_tasks_are_dropped_from_the_heap(self):
+        tasks = [self.scheduler.schedule(lambda: None, 60) for _ in range(1000)]
+        for task in tasks[:900]:
+            task.cancel()
+        self.assertEqual(self.scheduler.pending(), 100)
+        self.assertLess(len(self.scheduler.heap), 600)
+
+    def test_errors_cancel_the_task(self):
+        def body():
+            raise ValueError('broken')
+
+        task = self.scheduler.schedule(body, 0.005, recurring=True)
+        self.assertTrue(wait_for(lambda: task.error is not None))
+        self.assertTrue(task.cancelled)
+        self.assertEqual(str(task.error), 'broken')
+        with self.assertRaises(ValueError):
+            self.scheduler.schedule(body, 0, recurring=True)
+
+
+class TestScheduleStatements(unittest.TestCase):
+
+    def start(self, source, engine='tree', analyzer_class=ScopeResolver):
+        evaluator = create_evaluator(engine)
+        evaluator.run(analyze(source, analyzer_class))
+        return evaluator
+
+    def test_handles_are_assigned(self):
+        statement = analyze('h = schedule { x = 1; } every 2;').body[0]
+        self.assertIsInstance(statement, AssignmentStatement)
+        self.assertIsInstance(statement.value, ScheduleStatement)
+        self.assertEqual(statement.value.schedule_type, 'recurring')
+
+    def test_cancel_builtin(self):
+        source = ('ticks = 0; function start() { h = schedule { ticks = ticks + 1; } every 1 / 200; return h; }'
+                  ' h = start(); late = schedule { ticks = 1000; } after 60;')
+        for engine in ENGINES:
+            for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+                with self.subTest(engine=engine, analyzer=analyzer_class.__name__):
+                    evaluator = self.start(source, engine, analyzer_class)
+                    memory_manager = evaluator.memory_manager
+                    self.assertTrue(wait_for(lambda: memory_manager.get('ticks') >= 3))
+                    evaluator.run(analyze('cancel(h); cancel(late);', analyzer_class))
+                    self.assertIsInstance(memory_manager.get('h'), ScheduledTask)
+                    self.assertEqual(evaluator.scheduler.pending(), 0)
+                    with self.assertRaises(ValueError):
+                        evaluator.run(analyze('cancel(ticks);', analyzer_class))
+
+    def test_stop_tasks_cancels_everything(self):
+        evaluator = self.start('ticks = 0; schedule { ticks = ticks + 1; } every 1 / 200;'
+                               ' schedule { ticks = 1000; } after 60;')
+        self.assertTrue(wait_for(lambda: evaluator.memory_manager.get('ticks') >= 1))
+        evaluator.stop_tasks()
+        self.assertEqual(evaluator.scheduler.pending(), 0)
+
+    def test_stop_tasks_builtin(self):
+        source = ('ticks = 0; schedule { ticks = ticks + 1; } every 1 / 200; schedule { ticks = 1000; } after 60;'
+                  ' while (ticks < 3) { sleep(1 / 200); } stop_tasks();')
+        for engine in ENGINES:
+            for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+                with self.subTest(engine=engine, analyzer=analyzer_class.__name__):
+                    evaluator = self.start(source, engine, analyzer_class)
+                    self.assertEqual(evaluator.scheduler.pending(), 0)
+                    ticks = evaluator.memory_manager.get('ticks')
+                    time.sleep(0.05)
+                    self.assertEqual(evaluator.memory_manager.get('ticks'), ticks)
+
+    def test_interval_must_be_positive(self):
+        with self.assertRaises(ValueError) as raised:
+            self.start('schedule { x = 1; } every 0;')
+        self.assertIn('Schedule interval must be positive, got 0', str(raised.exception))
+        self.start('schedule { x = 1; } after 0;')
+
+
+if __name__ == '__main__':
+    unittest.main()
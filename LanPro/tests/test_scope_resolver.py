@@ -0,0 +1,109 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from semantic.scope_resolver import ScopeResolver
+from helpers import analyze, create_evaluator, parse, quiet_console
+
+
+class TestScopeResolver(unittest.TestCase):
+
+    def test_top_level_names_are_global(self):
+        program = analyze('x = 1; y = x;')
+        self.assertIsNone(program.body[0].slot)
+        self.assertIsNone(program.body[1].value.slot)
+
+    def test_parameters_and_locals_get_slots(self):
+        program = analyze('function f(a, b) { c = a + b; print(c); }')
+        function = program.body[0]
+        self.assertEqual(function.frame_size, 3)
+        assignment = function.body.body[0]
+        self.assertEqual((assignment.depth, assignment.slot), (0, 3))
+        self.assertEqual((assignment.value.left.depth, assignment.value.left.slot), (0, 1))
+        self.assertEqual((assignment.value.right.depth, assignment.value.right.slot), (0, 2))
+        call = function.body.body[1]
+        self.assertIsNone(call.slot)  # print is a global
+        self.assertEqual((call.arguments[0].depth, call.arguments[0].slot), (0, 3))
+
+    def test_assigning_a_global_in_a_function_stays_global(self):
+        program = analyze('function inc() { count = count + 1; } count = 0;')
+        function = program.body[0]
+        self.assertEqual(function.frame_size, 0)
+        self.assertIsNone(function.body.body[0].slot)
+
+    def test_lambda_closes_over_enclosing_frame(self):
+        program = analyze('function make(n) { return (x) => x + n; }')
+        lambda_node = program.body[0].body.body[0].value
+        self.assertEqual(lambda_node.frame_size, 1)
+        self.assertEqual((lambda_node.body.left.depth, lambda_node.body.left.slot), (0, 1))
+        self.assertEqual((lambda_node.body.right.depth, lambda_node.body.right.slot), (1, 1))
+
+    def test_methods_bind_self_first(self):
+        program = analyze('class P { show(n) { print(self, n); } }')
+        method = program.body[0].methods[0]
+        self.assertEqual(method.frame_size, 2)
+        arguments = method.body.body[0].arguments
+        self.assertEqual([argument.slot for argument in arguments], [1, 2])
+
+    def test_globals_persist_between_visits(self):
+        resolver = ScopeResolver(console=quiet_console())
+        resolver.visit(parse('total = 0;'))
+        program = parse('function add(n) { total = total + n; }')
+        resolver.visit(program)
+        self.assertIsNone(program.body[0].body.body[0].slot)
+
+
+class TestResolvedEvaluation(unittest.TestCase):
+
+    def run_program(self, source):
+        printed = []
+        evaluator = create_evaluator('tree', lambda *args: printed.append(args))
+        memory_manager = evaluator.memory_manager
+        memory_manager.allocate('free', lambda node: memory_manager.deallocate(node.name))
+        evaluator.run(analyze(source))
+        return printed, memory_manager
+
+    def test_locals_do_not_leak_into_globals(self):
+        printed, memory_manager = self.run_program('function f(a) { b = a * 2; print(b); } f(4);')
+        self.assertEqual(printed, [(8,)])
+        self.assertFalse(memory_manager.exists('a'))
+        self.assertFalse(memory_manager.exists('b'))
+
+    def test_parameter_shadows_global(self):
+        printed, _ = self.run_program('x = 5; function g(x) { print(x); } g(10); print(x);')
+        self.assertEqual(printed, [(10,), (5,)])
+
+    def test_function_updates_existing_global(self):
+        printed, _ = self.run_program('c = 0; function inc() { c = c + 1; } inc(); inc(); print(c);')
+        self.assertEqual(printed, [(2,)])
+
+    def test_closure_reads_enclosing_parameter(self):
+        printed, _ = self.run_program('function make(n) { return (x) => x + n; } add2 = make(2); print(add2(5));')
+        self.assertEqual(printed, [(7,)])
+
+    def test_nested_function_writes_enclosing_local(self):
+        printed, _ = self.run_program(
+            'function outer() { k = 1; function inner() { k = k + 1; } inner(); print(k); } outer();')
+        self.assertEqual(printed, [(2,)])
+
+    def test_for_loop_variable_is_local(self):
+        printed, memory_manager = self.run_program('function f() { for (v in [1, 2]) { print(v); } } f();')
+        self.assertEqual(printed, [(1,), (2,)])
+        self.assertFalse(memory_manager.exists('v'))
+
+    def test_unassigned_local_is_undefined(self):
+        with self.assertRaises(KeyError):
+            self.run_program('function f() { print(t); t = 1; } f();')
+
+    def test_free_unbinds_local(self):
+        with self.assertRaises(KeyError):
+            self.run_program('function f(a) { free(a); print(a); } f(1);')
+
+    def test_method_call(self):
+        printed, _ = self.run_program('class P { hi(n) { print(n); } } p = new P(); p.hi(3);')
+        self.assertEqual(printed, [(3,)])
+
+if __name__ == '__main__':
+    unittest.main()
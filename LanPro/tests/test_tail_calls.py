@@ -0,0 +1,91 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from runtime.engines import ENGINES
+from semantic.scope_resolver import ScopeResolver
+from semantic.semantic_analyzer import SemanticAnalyzer
+from helpers import analyze, create_evaluator, run_source
+
+# Deeper than Python's own recursion limit
+DEPTH = 20000
+
+COUNT = ('function count(n, acc) { if (n == 0) { return acc; } return count(n - 1, acc + n); }'
+         ' print(count(%d, 0));')
+EVEN_ODD = ('function even(n) { if (n == 0) { return 1 == 1; } return odd(n - 1); }'
+            ' function odd(n) { if (n == 0) { return 1 == 2; } return even(n - 1); } print(even(%d));')
+SUM = 'function sum(n) { if (n == 0) { return 0; } return n + sum(n - 1); } print(sum(%d));'
+
+
+class TestTailCalls(unittest.TestCase):
+
+    def test_only_calls_that_may_recurse_are_marked(self):
+        source = ('function double(n) { return n * 2; }'
+                  ' function f(n) { if (n == 0) { return double(n); } return g(n - 1); }'
+                  ' function g(n) { return f(n); }'
+                  ' function h(n) { return f(n) + 1; }'
+                  ' function k(n) { return double(n); }')
+        double, f, g, h, k = analyze(source).body
+        then_return, tail_return = f.body.body[0].then_branch.body[0], f.body.body[1]
+        self.assertFalse(then_return.tail)  # double never calls f
+        self.assertTrue(tail_return.tail)  # g calls f back
+        self.assertTrue(f.tail_calls)
+        self.assertTrue(g.tail_calls)
+        self.assertFalse(h.tail_calls)  # Not a tail call
+        self.assertFalse(k.tail_calls)
+        self.assertFalse(double.tail_calls)
+
+    def test_deep_tail_recursion_on_every_engine(self):
+        for engine in ENGINES:
+            for opt_level in (0, 2):
+                with self.subTest(engine=engine, opt_level=opt_level):
+                    self.assertEqual(run_source(COUNT % DEPTH, engine, opt_level=opt_level)[0],
+                                     [str(DEPTH * (DEPTH + 1) // 2)])
+
+    def test_deep_mutual_recursion_on_every_engine(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(run_source(EVEN_ODD % (DEPTH + 1), engine)[0], ['False'])
+
+    def test_tail_call_to_a_builtin_or_lambda(self):
+        source = ('function f(n, k) { if (n == 0) { return k(n); } return f(n - 1, k); }'
+                  ' print(f(5, (x) => x + 1));')
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(run_source(source, engine)[0], ['1'])
+
+    def test_method_returning_a_call_to_a_recursive_function(self):
+        source = ('function f(n) { if (n == 0) { return 0; } return g(n - 1); } function g(n) { return f(n); }'
+                  ' class C { f(n) { return g(n); } } c = new C(); print(c.f(3)); print(c.f(3) + 1);')
+        for engine in ENGINES:
+            for analyzer_class in (ScopeResolver, SemanticAnalyzer):
+                with self.subTest(engine=engine, analyzer=analyzer_class.__name__):
+                    self.assertEqual(run_source(source, engine, analyzer_class)[0], ['0', '1'])
+
+    def test_deep_non_tail_recursion_on_the_vm(self):
+        self.assertEqual(run_source(SUM % DEPTH, 'vm')[0], [str(DEPTH * (DEPTH + 1) // 2)])
+        self.assertEqual(run_source(SUM % DEPTH, 'tree')[0][0].split(':')[0], 'RecursionError')
+
+    def test_memoized_functions(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                printed = run_source('memoized ' + (COUNT % DEPTH) + ' print(count(%d, 0));' % DEPTH, engine)[0]
+                self.assertEqual(printed, [str(DEPTH * (DEPTH + 1) // 2)] * 2)
+                printed = run_source('memoized ' + EVEN_ODD % (DEPTH + 1), engine)[0]
+                self.assertEqual(printed, ['False'])
+        self.assertEqual(run_source('memoized ' + SUM % DEPTH, 'vm')[0], [str(DEPTH * (DEPTH + 1) // 2)])
+
+    def test_vm_call_depth_is_bounded(self):
+        evaluator = create_evaluator('vm')
+        evaluator.max_call_depth = 100
+        evaluator.run(analyze(SUM % 99))
+        with self.assertRaises(RecursionError) as raised:
+            evaluator.run(analyze(SUM % 100))
+        self.assertIn("Maximum call depth of 100 exceeded calling 'sum'", str(raised.exception))
+        evaluator.run(analyze(COUNT % 1000))  # Tail calls do not add to the depth
+
+
+if __name__ == '__main__':
+    unittest.main()
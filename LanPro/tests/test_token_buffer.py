@@ -0,0 +1,56 @@
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from lexer.tokenizer import Token
+from lexer.regex_tokenizer import RegexTokenizer
+from lexer.token_buffer import TokenBuffer
+from parser.syntax_analyzer import SyntaxAnalyzer
+
+SOURCE = 'x = 1; y = "1"; while (x < 10) { x = x + 1; }\nz = null;'
+
+
+def as_tuples(tokens):
+    return [(t.type, t.value, t.position, t.line) for t in tokens]
+
+
+class TestTokenBuffer(unittest.TestCase):
+
+    def test_token_has_no_instance_dict(self):
+        token = Token('NUMBER', 1, 0, 1)
+        self.assertFalse(hasattr(token, '__dict__'))
+        with self.assertRaises(AttributeError):
+            token.extra = True
+
+    def test_round_trip(self):
+        tokens = RegexTokenizer(SOURCE).tokenize()
+        buffer = TokenBuffer.from_tokens(tokens)
+        self.assertEqual(len(buffer), len(tokens))
+        self.assertEqual(as_tuples(buffer), as_tuples(tokens))
+        self.assertEqual(as_tuples([buffer[-1]]), as_tuples(tokens[-1:]))
+
+    def test_values_are_interned_by_type(self):
+        buffer = TokenBuffer.from_tokens(RegexTokenizer(SOURCE).iter_tokens())
+        self.assertEqual(buffer.value_table.count('x'), 1)
+        self.assertIn(1, buffer.value_table)
+        self.assertIn('"1"', buffer.value_table)
+        self.assertEqual(buffer.types.typecode, 'i')
+
+    def test_missing_position_and_line(self):
+        buffer = TokenBuffer()
+        buffer.append(Token('OPERATOR', ';'))
+        self.assertEqual(as_tuples(buffer), [('OPERATOR', ';', None, None)])
+
+    def test_parser_consumes_buffer(self):
+        tokens = RegexTokenizer(SOURCE).tokenize()
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = SyntaxAnalyzer().parse(tokens)
+            actual = SyntaxAnalyzer().parse(TokenBuffer.from_tokens(tokens))
+        self.assertEqual(actual, expected)
+
+if __name__ == '__main__':
+    unittest.main()
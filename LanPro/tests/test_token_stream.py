@@ -0,0 +1,70 @@
+import contextlib
+import io
+import mmap
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from lexer.regex_tokenizer import RegexTokenizer
+from parser.syntax_analyzer import SyntaxAnalyzer
+
+SOURCE = 'x = 10;\nlabel = "spans\nseveral chunks";  # comment\nif (x >= 5) { print("héllo"); } else { y = null; }\n'
+
+
+def as_tuples(tokens):
+    return [(t.type, t.value, t.position, t.line) for t in tokens]
+
+
+def parse(tokens):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return SyntaxAnalyzer().parse(tokens)
+
+
+class TestTokenStream(unittest.TestCase):
+
+    def test_text_file_chunks_match_string_source(self):
+        expected = as_tuples(RegexTokenizer(SOURCE).tokenize())
+        for chunk_size in (1, 2, 5, 64):
+            with self.subTest(chunk_size=chunk_size):
+                tokenizer = RegexTokenizer(io.StringIO(SOURCE), chunk_size=chunk_size)
+                self.assertEqual(as_tuples(tokenizer.iter_tokens()), expected)
+
+    def test_binary_and_mmap_sources(self):
+        expected = as_tuples(RegexTokenizer(SOURCE).tokenize())
+        data = SOURCE.encode('utf-8')
+        self.assertEqual(as_tuples(RegexTokenizer(io.BytesIO(data), chunk_size=3).iter_tokens()), expected)
+        with tempfile.TemporaryFile() as handle:
+            handle.write(data)
+            handle.flush()
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                self.assertEqual(as_tuples(RegexTokenizer(mapped, chunk_size=4).iter_tokens()), expected)
+
+    def test_errors_from_stream(self):
+        with self.assertRaises(Exception) as context:
+            list(RegexTokenizer(io.StringIO('x = "abc\ndef'), chunk_size=2).iter_tokens())
+        self.assertEqual(str(context.exception), 'Error: Unterminated string literal at position 12, line 2')
+
+    def test_parser_accepts_token_generator(self):
+        streamed = parse(RegexTokenizer(io.StringIO(SOURCE), chunk_size=8).iter_tokens())
+        self.assertEqual(streamed, parse(RegexTokenizer(SOURCE).tokenize()))
+
+    def test_statements_are_yielded_before_input_is_exhausted(self):
+        consumed = []
+
+        def tracking(tokens):
+            for token in tokens:
+                consumed.append(token)
+                yield token
+
+        tokens = RegexTokenizer('a = 1; b = 2; c = 3;').tokenize()
+        with contextlib.redirect_stdout(io.StringIO()):
+            statements = SyntaxAnalyzer().iter_statements(tracking(tokens))
+            first = next(statements)
+        self.assertEqual(first['identifier'], 'a')
+        self.assertLess(len(consumed), len(tokens))
+
+if __name__ == '__main__':
+    unittest.main()
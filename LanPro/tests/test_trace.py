@@ -0,0 +1,80 @@
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from lexer.tokenizer import Tokenizer
+from lexer.regex_tokenizer import RegexTokenizer
+from parser.syntax_analyzer import SyntaxAnalyzer
+from utils.trace import NULL_TRACE, JsonLinesTraceSink, RingBufferTraceSink, create_trace_sink
+
+SOURCE = 'x = 10; if (x >= 5) { print("big"); }'
+
+
+class ExplodingValue:
+    """Fails the test if anything tries to format it."""
+
+    def __repr__(self):
+        raise AssertionError("trace field was formatted")
+
+    __str__ = __repr__
+
+
+class TestTraceSinks(unittest.TestCase):
+
+    def test_default_pipeline_is_silent(self):
+        stdout = io.StringIO()
+        sys.stdout, original = stdout, sys.stdout
+        try:
+            SyntaxAnalyzer().parse(Tokenizer(SOURCE).tokenize())
+        finally:
+            sys.stdout = original
+        self.assertEqual(stdout.getvalue(), '')
+
+    def test_null_sink_never_formats(self):
+        self.assertFalse(NULL_TRACE.enabled)
+        NULL_TRACE.emit('parser', 'enter', value=ExplodingValue())
+
+    def test_ring_buffer_keeps_latest_events(self):
+        sink = RingBufferTraceSink(capacity=3)
+        SyntaxAnalyzer(trace=sink).parse(RegexTokenizer(SOURCE, trace=sink).tokenize())
+        records = sink.records()
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[-1]['event'], 'ast')
+        self.assertEqual(records[-1]['ast']['type'], 'Program')
+
+    def test_lexer_engines_emit_same_token_events(self):
+        legacy, regex = RingBufferTraceSink(), RingBufferTraceSink()
+        Tokenizer('a = b + 12;', trace=legacy).tokenize()
+        RegexTokenizer('a = b + 12;', trace=regex).tokenize()
+        self.assertEqual(legacy.records(), regex.records())
+        self.assertEqual(regex.records()[-2], {'source': 'lexer', 'event': 'token', 'type': 'NUMBER',
+                                               'value': 12, 'position': 8, 'line': 1})
+
+    def test_json_lines_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.jsonl')
+            sink = create_trace_sink('jsonl', path)
+            SyntaxAnalyzer(trace=sink).parse(RegexTokenizer(SOURCE).tokenize())
+            sink.close()
+            with open(path) as handle:
+                records = [json.loads(line) for line in handle]
+        productions = [r['production'] for r in records if r['event'] == 'enter']
+        self.assertIn('if_statement', productions)
+        self.assertIn('block', productions)
+
+    def test_json_lines_stream_formats_objects_with_repr(self):
+        stream = io.StringIO()
+        JsonLinesTraceSink(stream).emit('parser', 'exit', token=RegexTokenizer('x').tokenize()[0])
+        self.assertEqual(json.loads(stream.getvalue())['token'], 'Token(IDENTIFIER, x, position=0, line=1)')
+
+    def test_unknown_sink(self):
+        with self.assertRaises(ValueError):
+            create_trace_sink('syslog')
+
+if __name__ == '__main__':
+    unittest.main()
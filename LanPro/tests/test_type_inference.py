@@ -0,0 +1,87 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from parser.ast_nodes import BinaryOperation, Node
+from semantic.scope_resolver import ScopeResolver
+from semantic.semantic_analyzer import SemanticAnalyzer
+from semantic.type_inference import TypeCheckError, TypeInference
+from helpers import analyze
+
+
+def operand_types(node, found=None):
+    """operand_type of every BinaryOperation under node, in evaluation order."""
+    if found is None:
+        found = []
+    if isinstance(node, list):
+        for item in node:
+            operand_types(item, found)
+    elif isinstance(node, Node):
+        for name in node.fields:
+            operand_types(getattr(node, name), found)
+        if node.__class__ is BinaryOperation:
+            found.append(node.operand_type)
+    return found
+
+
+def infer(source, analyzer_class=ScopeResolver):
+    program = analyze(source, analyzer_class)
+    errors = TypeInference().infer(program)
+    return operand_types(program.body), errors
+
+
+class TestTypeInference(unittest.TestCase):
+
+    def test_int_variables(self):
+        types, errors = infer('x = 1; x = x + 2; y = x * x; z = y < x;')
+        self.assertEqual(types, ['int', 'int', 'int'])
+        self.assertEqual(errors, [])
+
+    def test_string_concatenation(self):
+        types, _ = infer('a = "p"; b = a + "q"; c = b - "q";')
+        self.assertEqual(types, ['str', None])
+
+    def test_mixed_assignments_are_unknown(self):
+        types, errors = infer('x = 1; function f() { x = "s"; } y = x + 1;')
+        self.assertEqual(types, [None])
+        self.assertEqual(errors, [])
+
+    def test_division_and_booleans_stay_checked(self):
+        types, _ = infer('x = 4 / 2; b = 1 < 2; c = b + 1; d = x + 1;')
+        self.assertEqual(types, [None, 'int', None, None])
+
+    def test_parameters_are_unknown(self):
+        types, _ = infer('function f(n) { t = 0; t = t + n; k = 2; return k * 3; }')
+        self.assertEqual(types, [None, 'int'])
+
+    def test_locals_written_by_nested_functions(self):
+        source = 'function f() { v = 1; function g() { v = "z"; } g(); return v + 1; }'
+        self.assertEqual(infer(source)[0], [None])
+
+    def test_dynamic_scoping_makes_globals_unknown(self):
+        source = 'function h(y) { return z + 1; } function k(z) { return h(1); } z = 5; w = z + 1;'
+        self.assertEqual(infer(source, SemanticAnalyzer)[0], [None, None])
+        self.assertEqual(infer(source, ScopeResolver)[0], ['int', 'int'])
+
+    def test_errors_use_the_runtime_messages(self):
+        source = 'x = 1;\ny = x + "a";\nl = [1];\nz = l["k"];\nfor (c in x) { print(c); }\nw = x[0];'
+        _, errors = infer(source)
+        self.assertEqual(errors, [
+            'Type mismatch: Cannot add int and str at line 2',
+            'Array index must be an integer, got str at line 4',
+            'For loop expects an iterable, got int at line 5',
+            'Cannot index into non-array type int at line 6',
+        ])
+
+    def test_check_raises(self):
+        program = analyze('s = "a"; t = s * 2;')
+        with self.assertRaises(TypeCheckError) as raised:
+            TypeInference().check(program)
+        self.assertEqual(len(raised.exception.errors), 1)
+        TypeInference().check(analyze('s = "a"; t = s + "b";'))
+
+
+if __name__ == '__main__':
+    unittest.main()